@@ -1,18 +1,27 @@
 from fastapi import APIRouter
-from .endpoints import auth, risk, settings, student, report, faculty, about, question, calendar, gemini, rag, practice_questions, notes
+from fastapi import Depends
+from .endpoints import auth, risk, settings, student, report, faculty, about, question, calendar, gemini, rag, practice_questions, notes, metrics
+from app.core.config import settings as app_settings
+from app.core.database import statement_timeout
 
 api_router = APIRouter()
+
+def route_timeout(name: str):
+    # Routers listed in DB_ROUTE_STATEMENT_TIMEOUTS_MS get a tighter statement_timeout than the connection default
+    timeout_ms = app_settings.DB_ROUTE_STATEMENT_TIMEOUTS_MS.get(name)
+    return [Depends(statement_timeout(timeout_ms))] if timeout_ms else []
+
 api_router.include_router(auth.router, prefix="/auth", tags=["auth"])
 
 # Jake's Mock Risk BS
 from .endpoints import mock_risk
 api_router.include_router(mock_risk.router, prefix="/info", tags=["info"])
 
-api_router.include_router(risk.router, prefix="/inf", tags=["info"])
+api_router.include_router(risk.router, prefix="/inf", tags=["info"], dependencies=route_timeout("risk"))
 
 api_router.include_router(student.router, prefix="/student", tags=["student"])
 api_router.include_router(faculty.router, prefix="/faculty", tags=["faculty"])
-api_router.include_router(report.router, prefix="", tags=["report"])
+api_router.include_router(report.router, prefix="", tags=["report"], dependencies=route_timeout("report"))
 api_router.include_router(settings.router, prefix="/settings", tags=["settings"])
 api_router.include_router(about.router, prefix="/about", tags=["about"])
 api_router.include_router(question.router, prefix="/question", tags=["question"])
@@ -21,4 +30,5 @@ api_router.include_router(about.router, prefix="/about", tags=["about"])
 api_router.include_router(rag.router, prefix="/rag", tags=["rag"])
 api_router.include_router(gemini.router)
 api_router.include_router(practice_questions.router)
-api_router.include_router(notes.router, prefix="/notes")
\ No newline at end of file
+api_router.include_router(notes.router, prefix="/notes")
+api_router.include_router(metrics.router, prefix="/metrics", tags=["metrics"])
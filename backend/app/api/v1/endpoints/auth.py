@@ -8,6 +8,7 @@ from app.core.security import (
     create_access_token,
     get_password_hash,
     get_current_active_user,
+    load_auth_context,
     ACCESS_TOKEN_EXPIRE_MINUTES
 )
 from app.schemas.user import UserLogin, Token, UserCreate, UserResponse
@@ -45,7 +46,9 @@ async def login(
             )
         
         access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-        access_token = create_access_token(data={"sub": user.username}, expires_delta=access_token_expires)
+        # The login id, role and student/faculty id go in as claims, resolving them also warms the auth cache
+        context = load_auth_context(db, user.username)
+        access_token = create_access_token(data=context.claims(), expires_delta=access_token_expires)
         
         return {
             "access_token": access_token, 
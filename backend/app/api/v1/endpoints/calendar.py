@@ -8,7 +8,7 @@ from sqlalchemy.orm import Session
 from pydantic import Field
 
 from app.core.database import get_db
-from app.core.security import get_current_active_user
+from app.core.security import get_current_active_user, current_student_id
 from app.models import Student, LoginInfo as User
 from app.models.calendar_models import CalendarEvent, StudyPlan, StudyPlanEvent
 from app.schemas.calendar import (
@@ -24,18 +24,17 @@ from app.schemas.calendar import (
     generate_uuid,
 )
 from app.scripts.machine_learning.study_plan_generator import generate_study_plan
-from app.scripts.machine_learning.pdf_generator import generate_study_plan_pdf
 
 router = APIRouter()
 
 # Helper function to get student_id from current user
 async def get_student_id(current_user: User, db: Session) -> int:
-    student = db.query(Student).filter(Student.logininfoid == current_user.logininfoid).first()
-    if not student:
+    student_id = current_student_id(db, current_user)
+    if not student_id:
         # For testing, return a default student ID
         print("WARNING: No student found for user, using default ID")
         return 1
-    return student.studentid
+    return student_id
 
 # Get all calendar events for the current user
 @router.get("/events", response_model=List[Event])
@@ -345,28 +344,24 @@ async def generate_study_plan_endpoint(
         if existing_plans:
             # Get all event IDs associated with existing plans
             plan_ids = [plan.plan_id for plan in existing_plans]
-            study_plan_events = db.query(StudyPlanEvent).filter(
-                StudyPlanEvent.plan_id.in_(plan_ids)
-            ).all()
-            
-            # Get the event IDs that need to be deleted
-            event_ids = [event.event_id for event in study_plan_events]
-            
-            # Delete the study plan events first (due to foreign key constraints)
-            for event in study_plan_events:
-                db.delete(event)
+            event_ids = [
+                event_id for (event_id,) in db.query(StudyPlanEvent.event_id).filter(
+                    StudyPlanEvent.plan_id.in_(plan_ids)
+                )
+            ]
             
-            # Then delete the calendar events
-            for event_id in event_ids:
-                calendar_event = db.query(CalendarEvent).filter(
-                    CalendarEvent.event_id == event_id
-                ).first()
-                if calendar_event:
-                    db.delete(calendar_event)
-            
-            # Finally delete the study plans
-            for plan in existing_plans:
-                db.delete(plan)
+            # Delete the study plan events first (due to foreign key constraints),
+            # then the calendar events and plans, one statement each
+            db.query(StudyPlanEvent).filter(
+                StudyPlanEvent.plan_id.in_(plan_ids)
+            ).delete(synchronize_session=False)
+            if event_ids:
+                db.query(CalendarEvent).filter(
+                    CalendarEvent.event_id.in_(event_ids)
+                ).delete(synchronize_session=False)
+            db.query(StudyPlan).filter(
+                StudyPlan.plan_id.in_(plan_ids)
+            ).delete(synchronize_session=False)
             
             # Commit the deletions
             db.commit()
@@ -537,9 +532,10 @@ async def export_study_plan(
         events = db.query(CalendarEvent).filter(CalendarEvent.event_id.in_(event_ids)).all()
         
         # Convert events to the format expected by the PDF generator
+        plan_events_by_event = {pe.event_id: pe for pe in plan_events}
         formatted_events = []
         for event in events:
-            plan_event = next((pe for pe in plan_events if pe.event_id == event.event_id), None)
+            plan_event = plan_events_by_event.get(event.event_id)
             
             formatted_events.append({
                 "id": event.event_id,
@@ -568,6 +564,9 @@ async def export_study_plan(
             "summary": calculate_study_plan_summary(formatted_events)
         }
         
+        # matplotlib, seaborn and reportlab are only imported when a plan is exported
+        from app.scripts.machine_learning.pdf_generator import generate_study_plan_pdf
+        
         # Generate the PDF
         return generate_study_plan_pdf(
             student_id=student_id,
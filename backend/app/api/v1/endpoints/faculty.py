@@ -14,7 +14,6 @@ from app.models import (
 )
 from app.schemas.reportschema import StudentCompleteReport, DomainReport, DomainGrouping
 
-import pandas as pd
 from typing import Optional, List
 from datetime import datetime
 
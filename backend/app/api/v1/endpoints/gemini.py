@@ -1,24 +1,26 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
 from typing import Any, Dict
 from app.core.database import get_db
-from app.core.security import get_current_active_user
+from app.core.security import get_current_active_user, current_student_id
 from app.services.gemini_service import generate_domain_questions as generate_questions
-from app.models import LoginInfo as User, Student
+from app.models import LoginInfo as User, Student, ChatMessage
+from sqlalchemy import func
 from typing import List, Optional
 from app.services.gemini_service import (
     get_entire_chat,
     get_chat_history,
+    conversation_exists,
     create_message,
     create_conversation,
-    generate_model_response
-)
-from app.core.security import (
-    get_current_active_user
+    generate_model_response,
+    summarize_conversation
 )
 from app.core.security import (
     get_current_active_user
 )
+from app.services import answer_cache_service, prompt_service
+from app.core.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_datetime_cursor
 from app.schemas.chat_schemas import (
     FirstMessageRequest,   
     FirstMessageRequest,   
@@ -37,6 +39,56 @@ router = APIRouter(prefix="/gemini", tags=["gemini"])
 
 # Above is an old endpoint for the flash chat, leaving as I don't know our process for that. 
 
+@router.get("/cache/stats", status_code=status.HTTP_200_OK)
+async def answer_cache_stats(
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    
+    if not current_user.issuperuser:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to view cache statistics"
+        )
+    
+    return answer_cache_service.cache_stats(db)
+
+@router.get("/prompt/stats", status_code=status.HTTP_200_OK)
+async def prompt_size_stats(
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    
+    if not current_user.issuperuser:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to view prompt statistics"
+        )
+    
+    stats = prompt_service.prompt_stats()
+    
+    # Persisted distribution across every recorded model response, not just this process
+    p50, p90, p99, maximum, responses = db.query(
+        func.percentile_cont(0.5).within_group(ChatMessage.tokensinput),
+        func.percentile_cont(0.9).within_group(ChatMessage.tokensinput),
+        func.percentile_cont(0.99).within_group(ChatMessage.tokensinput),
+        func.max(ChatMessage.tokensinput),
+        func.count(ChatMessage.messageid)
+    ).filter(
+        ChatMessage.sendertype != "user",
+        ChatMessage.tokensinput > 0
+    ).one()
+    
+    stats["recorded_prompt_tokens"] = {
+        "responses": responses,
+        "p50": float(p50 or 0),
+        "p90": float(p90 or 0),
+        "p99": float(p99 or 0),
+        "max": maximum or 0,
+    }
+    
+    return stats
+
 @router.get("/chat/history", response_model=List[ChatConversationSummary], status_code=status.HTTP_200_OK)
 async def get_all_chat_history(
     current_user: User = Depends(get_current_active_user),
@@ -53,10 +105,20 @@ async def get_all_chat_history(
 async def single_chat_history(
     conversation_id: int,
     since_timestamp: Optional[datetime] = Query(None, description="Filter messages since this timestamp"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page, loads older messages"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     db: Session = Depends(get_db)
 ):
     
-    conversation = get_entire_chat(db, conversation_id, since_timestamp)
+    try:
+        before = decode_datetime_cursor(cursor)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+    
+    conversation = get_entire_chat(db, conversation_id, since_timestamp, before=before, limit=limit)
     
     if not conversation:
         raise HTTPException(
@@ -111,12 +173,11 @@ async def start_chat(
 async def add_message(
     conversation_id: int,
     request: SendMessageRequest,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db)
 ):
     
-    conversation = get_entire_chat(db, conversation_id)
-    
-    if not conversation:
+    if not conversation_exists(db, conversation_id):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Conversation not found"
@@ -126,6 +187,9 @@ async def add_message(
     
     model_response = generate_model_response(db=db, user_message_id=message.messageid)
     
+    # Older turns are folded into the rolling summary after the response is sent
+    background_tasks.add_task(summarize_conversation, conversation_id)
+    
     add_message_response = AddMessageResponse(
         message_id=model_response.messageid,
         conversation_id=model_response.conversationid,
@@ -154,11 +218,7 @@ async def generate_domain_questions(
             detail="Domain and subdomain are required"
         )
 
-    student_id = (
-        db.query(Student.studentid)
-        .filter(Student.logininfoid == current_user.logininfoid)
-        .scalar()
-    )
+    student_id = current_student_id(db, current_user)
     if not student_id:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
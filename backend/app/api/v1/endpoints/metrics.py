@@ -0,0 +1,21 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+
+from app.core.security import get_current_active_user
+from app.core.database import engine
+from app.core.db_pool import pool_metrics
+from app.models import LoginInfo as User
+
+router = APIRouter()
+
+
+@router.get("/db", status_code=status.HTTP_200_OK)
+async def database_pool_metrics(
+    current_user: User = Depends(get_current_active_user)
+):
+    if not current_user.issuperuser:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to view metrics"
+        )
+    
+    return pool_metrics(engine)
@@ -1,38 +1,146 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, status
+import os
+import shutil
+import hashlib
+import tempfile
+from typing import Optional
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, BackgroundTasks, Query, status
+from starlette.concurrency import run_in_threadpool
 from app.core.security import get_current_user
 from app.core.database import get_db
 from app.models import LoginInfo as User
-from app.services.s3_service import s3, BUCKET
+from app.models import Document, Student
+from app.services import s3_service
+from sqlalchemy import select, tuple_
 from sqlalchemy.orm import Session
-from app.services.rag_service import ingest_document_from_s3
+from app.core.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, encode_cursor, decode_datetime_cursor
+from app.schemas.rag_schema import NoteListItem, NoteListResponse
+from app.services.rag_service import register_document, ingest_uploaded_note
 
 router = APIRouter(tags=["notes"])
 
+# Size of each read when copying the upload to disk, the whole file is never held in memory
+COPY_BUFFER_SIZE = 1024 * 1024
+
+
+def _spool_to_disk(source, suffix: str):
+    """Copies the upload to a temp file for the ingest job and hashes it on the way through."""
+    digest = hashlib.sha256()
+    size = 0
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix, prefix="medpass_note_") as target:
+        for block in iter(lambda: source.read(COPY_BUFFER_SIZE), b""):
+            digest.update(block)
+            size += len(block)
+            target.write(block)
+    return target.name, digest.hexdigest(), size
+
+
 @router.post("/upload/", status_code=status.HTTP_201_CREATED)
 async def upload_file(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     key = f"notes/{current_user.username}/{file.filename}"
+    temp_path = None
     try:
-        content = await file.read()
-        s3.put_object(Bucket=BUCKET, Key=key, Body=content)
-        ingest_document_from_s3(db, BUCKET, key, current_user.logininfoid)
+        _, ext = os.path.splitext(file.filename)
+        temp_path, filehash, size = await run_in_threadpool(_spool_to_disk, file.file, ext)
+
+        # Multipart upload straight from the temp file, parts are read from disk as they are sent
+        with open(temp_path, "rb") as upload:
+            await run_in_threadpool(s3_service.upload_stream, upload, key, file.content_type)
+
+        doc = register_document(db, key, current_user.logininfoid, filesize=size, content_type=file.content_type)
+        if not doc:
+            raise HTTPException(404, "Student not found")
+    except HTTPException:
+        if temp_path and os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
     except Exception:
+        if temp_path and os.path.exists(temp_path):
+            os.remove(temp_path)
         raise HTTPException(500, "Failed to upload file")
-    return {"key": key}
-
-@router.get("/list/", response_model=list[dict])
-async def list_user_files(current_user: User = Depends(get_current_user)):
-    prefix = f"notes/{current_user.username}/"
-    resp = s3.list_objects_v2(Bucket=BUCKET, Prefix=prefix)
-    items = resp.get("Contents", [])
-    return [
-        {
-            "key": obj["Key"],
-            "size_kb": round(obj["Size"] / 1024, 2),
-            "last_modified": obj["LastModified"].isoformat()
-        }
-        for obj in items
-    ]
+
+    # Extraction and embedding happen after the response; the job owns and removes the temp file
+    background_tasks.add_task(ingest_uploaded_note, doc.documentid, temp_path, filehash)
+    return {"key": key, "documentid": doc.documentid, "status": doc.status}
+
+@router.get("/status/{document_id}")
+async def upload_status(
+    document_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    doc = db.query(Document).join(
+        Student, Document.studentid == Student.studentid
+    ).filter(
+        Document.documentid == document_id,
+        Student.logininfoid == current_user.logininfoid
+    ).first()
+
+    if not doc:
+        raise HTTPException(404, "Document not found")
+
+    return {
+        "documentid": doc.documentid,
+        "key": doc.s3_key,
+        "status": doc.status,
+        "message": doc.statusmessage,
+        "version": doc.version,
+        "size_kb": round(doc.filesize / 1024, 2) if doc.filesize else None,
+        "ingest": doc.ingeststats,
+        "updated_at": doc.updated_at.isoformat() if doc.updated_at else None
+    }
+
+@router.get("/list/", response_model=NoteListResponse)
+async def list_user_files(
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    try:
+        after = decode_datetime_cursor(cursor)
+    except ValueError:
+        raise HTTPException(400, "Invalid cursor")
+
+    student_id = select(Student.studentid).where(
+        Student.logininfoid == current_user.logininfoid
+    ).scalar_subquery()
+
+    # Newest first; the (studentid, lastmodified, documentid) index serves both the filter and the order
+    query = db.query(Document).filter(
+        Document.studentid == student_id,
+        Document.s3_key.isnot(None)
+    )
+    if after:
+        query = query.filter(
+            tuple_(Document.lastmodified, Document.documentid) < after
+        )
+    rows = query.order_by(
+        Document.lastmodified.desc(), Document.documentid.desc()
+    ).limit(limit + 1).all()
+
+    page = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit:
+        next_cursor = encode_cursor(page[-1].lastmodified, page[-1].documentid)
+
+    return NoteListResponse(
+        items=[
+            NoteListItem(
+                documentid=doc.documentid,
+                key=doc.s3_key,
+                title=doc.title,
+                size_kb=round(doc.filesize / 1024, 2) if doc.filesize else None,
+                last_modified=doc.lastmodified,
+                status=doc.status,
+                chunks=doc.chunkcount or 0,
+                version=doc.version
+            )
+            for doc in page
+        ],
+        next_cursor=next_cursor
+    )
@@ -1,13 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, select
 from typing import List, Optional
 
 from app.core.database import get_db
-from app.core.security import get_current_active_user
+from app.core.security import get_current_active_user, current_student_id
 from app.models import LoginInfo as User, Student
 from app.services.gemini_service import generate_domain_questions
-from app.models.class_models import GeneratedQuestion
+from app.services import question_parser
+from app.models.class_models import GeneratedQuestion, QuestionGenerationJob
+from app.schemas.practice_question import QuestionJobRequest
+from app.services.question_job_service import (
+    build_rag_context,
+    create_job,
+    format_question,
+    job_response,
+    run_job,
+    save_generated_questions
+)
 import json
 
 router = APIRouter(prefix="/practice-questions", tags=["practice-questions"])
@@ -21,9 +31,7 @@ async def get_domain_questions(
 ):
     try:
         # Get student ID
-        student_id = db.query(Student.studentid).filter(
-            Student.logininfoid == current_user.logininfoid
-        ).scalar()
+        student_id = current_student_id(db, current_user)
         
         if not student_id:
             raise HTTPException(
@@ -82,9 +90,7 @@ async def generate_and_save_questions(
 ):
     try:
         # Get student ID
-        student_id = db.query(Student.studentid).filter(
-            Student.logininfoid == current_user.logininfoid
-        ).scalar()
+        student_id = current_student_id(db, current_user)
         
         if not student_id:
             raise HTTPException(
@@ -93,18 +99,7 @@ async def generate_and_save_questions(
             )
         
         if rag:
-            from app.services.rag_service import search_documents
-            
-            search_query = f"{domain} {subdomain}"
-            relevant_docs = search_documents(search_query, limit=3)
-            
-            doc_context = ""
-            if relevant_docs:
-                doc_context = "Use the following document excerpts as reference:\n\n"
-                for i, doc in enumerate(relevant_docs, 1):
-                    doc_context += f"Document {i}: {doc['title']}\n{doc['content']}\n\n"
-                
-                additional_context = doc_context + additional_context
+            additional_context = build_rag_context(domain, subdomain) + additional_context
         
         # Generate questions using the existing Gemini service
         generated_data = await generate_domain_questions(
@@ -121,61 +116,9 @@ async def generate_and_save_questions(
                 detail=generated_data["error"]
             )
         
-        # Save the generated questions
-        questions = generated_data.get("questions", [])
-        saved_questions = []
-        
-        for q in questions:
-            # Check if question already exists
-            existing = db.query(GeneratedQuestion).filter(
-                GeneratedQuestion.student_id == student_id,
-                GeneratedQuestion.domain == domain,
-                GeneratedQuestion.subdomain == subdomain,
-                GeneratedQuestion.question_text == q.get("text")
-            ).first()
-            
-            if existing:
-                saved_questions.append({
-                    "id": existing.id,
-                    "text": existing.question_text,
-                    "difficulty": existing.difficulty,
-                    "category": subdomain,
-                    "correctPct": (existing.times_correct / existing.times_practiced * 100) if existing.times_practiced > 0 else 0,
-                    "timesPracticed": existing.times_practiced
-                })
-                continue
-            
-            # Create new question
-            options_data = []
-            correct_option = ""
-            
-            for opt in q.get("options", []):
-                if opt.get("isCorrect"):
-                    correct_option = opt.get("id", "")
-                options_data.append(opt)
-            
-            new_question = GeneratedQuestion(
-                student_id=student_id,
-                domain=domain,
-                subdomain=subdomain,
-                question_text=q.get("text", ""),
-                options=options_data,
-                correct_option=correct_option,
-                explanation=q.get("explanation", ""),
-                difficulty=q.get("difficulty", "medium")
-            )
-            
-            db.add(new_question)
-            db.flush()
-            
-            saved_questions.append({
-                "id": new_question.id,
-                "text": new_question.question_text,
-                "difficulty": new_question.difficulty,
-                "category": subdomain,
-                "correctPct": 0,
-                "timesPracticed": 0
-            })
+        # Save the generated questions, skipping ones the student already has
+        saved = save_generated_questions(db, student_id, domain, subdomain, generated_data.get("questions", []))
+        saved_questions = [format_question(question) for question in saved]
         
         db.commit()
         
@@ -191,6 +134,70 @@ async def generate_and_save_questions(
             detail=f"Error generating and saving questions: {str(e)}"
         )
 
+@router.post("/jobs", status_code=status.HTTP_202_ACCEPTED)
+async def submit_generation_job(
+    request: QuestionJobRequest,
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    student_id = current_student_id(db, current_user)
+    
+    if not student_id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Student not found"
+        )
+    
+    subdomains = list(dict.fromkeys(sub.strip() for sub in request.subdomains if sub.strip()))
+    if not request.domain.strip() or not subdomains:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Domain and at least one subdomain are required"
+        )
+    
+    job = create_job(db, student_id, request.domain.strip(), subdomains, request.count)
+    
+    # Subdomains are generated concurrently after the response, poll GET /jobs/{id} for progress
+    background_tasks.add_task(run_job, job.id, request.additional_context, request.rag)
+    
+    return job_response(db, job, include_questions=False)
+
+@router.get("/jobs/{job_id}", status_code=status.HTTP_200_OK)
+async def get_generation_job(
+    job_id: int,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    student_id = select(Student.studentid).where(
+        Student.logininfoid == current_user.logininfoid
+    ).scalar_subquery()
+    
+    job = db.query(QuestionGenerationJob).filter(
+        QuestionGenerationJob.id == job_id,
+        QuestionGenerationJob.student_id == student_id
+    ).first()
+    
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    
+    return job_response(db, job)
+
+@router.get("/generation-stats", status_code=status.HTTP_200_OK)
+async def get_generation_stats(
+    current_user: User = Depends(get_current_active_user)
+):
+    if not current_user.issuperuser:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to view generation statistics"
+        )
+    
+    return question_parser.parser_stats()
+
 @router.get("/stats", status_code=status.HTTP_200_OK)
 async def get_domain_stats(
     domain: str,
@@ -200,9 +207,7 @@ async def get_domain_stats(
 ):
     try:
         # Get student ID
-        student_id = db.query(Student.studentid).filter(
-            Student.logininfoid == current_user.logininfoid
-        ).scalar()
+        student_id = current_student_id(db, current_user)
         
         if not student_id:
             raise HTTPException(
@@ -298,9 +303,7 @@ async def update_question_stats(
 ):
     try:
         # Get student ID
-        student_id = db.query(Student.studentid).filter(
-            Student.logininfoid == current_user.logininfoid
-        ).scalar()
+        student_id = current_student_id(db, current_user)
         
         if not student_id:
             raise HTTPException(
@@ -5,7 +5,7 @@ from sqlalchemy.exc import IntegrityError
 from typing import List, Optional
 from datetime import datetime
 
-from app.core.security import get_current_active_user
+from app.core.security import get_current_active_user, current_student_id
 from app.models import (
     LoginInfo as User
 )
@@ -80,22 +80,19 @@ async def create_content_areas(db, content_area_names):
 
 async def create_question_options(db: Session, question_id: int, options_data):
     """Create options and question-option relationships"""
+    # Look up the current maximum IDs once and count up from them instead of once per option
+    max_option_id = db.query(func.max(Option.optionid)).scalar()
+    next_option_id = 1 if max_option_id is None else max_option_id + 1
+    max_qo_id = db.query(func.max(QuestionOption.questionoptionid)).scalar()
+    next_qo_id = 1 if max_qo_id is None else max_qo_id + 1
+    
     for option_data in options_data:
-        # Get the maximum option ID currently in the table
-        max_option_id = db.query(func.max(Option.optionid)).scalar()
-        next_option_id = 1 if max_option_id is None else max_option_id + 1
-        
         # Create option with a unique ID
         option = Option(
             optionid=next_option_id,
             optiondescription=option_data.OptionDescription
         )
         db.add(option)
-        db.flush()  # Get the option ID
-        
-        # Get the maximum question-option ID currently in the table
-        max_qo_id = db.query(func.max(QuestionOption.questionoptionid)).scalar()
-        next_qo_id = 1 if max_qo_id is None else max_qo_id + 1
         
         # Create question-option relationship with explanation included
         question_option = QuestionOption(
@@ -106,6 +103,12 @@ async def create_question_options(db: Session, question_id: int, options_data):
             explanation=option_data.Explanation if option_data.CorrectAnswer else None
         )
         db.add(question_option)
+        
+        next_option_id += 1
+        next_qo_id += 1
+    
+    # Options before their question-option rows, in one round of inserts
+    db.flush()
 
 async def create_question_classifications(db: Session, question_id: int, content_area_ids: List[int]):
     """Create question-content area classifications"""
@@ -898,7 +901,7 @@ async def get_review_performance(
                 detail="Admins accounts can not access student review performance route"
             )
 
-        studentid = db.query(Student.studentid).filter(Student.logininfoid == current_user.logininfoid).scalar()
+        studentid = current_student_id(db, current_user)
         if not studentid:
             raise HTTPException(
                 status_code=404,
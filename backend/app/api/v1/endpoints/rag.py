@@ -10,9 +10,11 @@ from app.core.database import (get_db,
 )
 
 from app.services.gemini_service import embed_text
-from app.services.rag_service import search_documents
+from app.services.rag_service import search_documents, SCOPE_GLOBAL, SCOPE_STUDENT
 from app.core.security import (
-    get_current_active_user
+    get_current_active_user,
+    current_student_id,
+    current_faculty_id
 )
 from app.models import LoginInfo as User
 from app.models import (
@@ -21,29 +23,66 @@ from app.models import (
 )
 from app.schemas.rag_schema import DocumentSearchResponse
 
-import pandas as pd
 from typing import Optional, List
 from datetime import datetime
 
 router = APIRouter()
 
+# "all" is everything the caller can see: global curriculum and their own notes.
+# "faculty" is global curriculum narrowed to the documents of the caller's own faculty
+SEARCH_SCOPES = {
+    "global": [SCOPE_GLOBAL],
+    "faculty": [SCOPE_GLOBAL],
+    "student": [SCOPE_STUDENT],
+    "all": [SCOPE_GLOBAL, SCOPE_STUDENT],
+}
+
 @router.get("/search", response_model=DocumentSearchResponse)
 async def search_documents_endpoint(
     query: str = Query(..., description="Search query text"),
     limit: int = Query(5, description="Maximum number of results to return", ge=1, le=100),
-    faculty_id: Optional[int] = Query(None, description="Filter by faculty ID"),
+    faculty_id: Optional[int] = Query(None, description="Filter by faculty ID, must be the caller's own faculty"),
     similarity_threshold: float = Query(0.5, description="Minimum similarity score (0-1)", ge=0, le=1),
+    scope: str = Query("global", description="global, faculty, student (own notes) or all"),
+    current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     
+    if scope not in SEARCH_SCOPES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown scope {scope}, expected one of {', '.join(SEARCH_SCOPES)}"
+        )
+    
     try:
-        results = search_documents(query, limit, faculty_id, similarity_threshold)
+        # Student notes are only ever searched for their owner
+        student_id = current_student_id(db, current_user)
+        
+        if scope == "student" and not student_id:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Student not found")
+        
+        # The faculty filter is only ever the caller's own faculty, never one taken from the query on trust
+        if scope == "faculty" or faculty_id is not None:
+            own_faculty_id = current_faculty_id(db, current_user)
+            if not own_faculty_id:
+                raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only faculty can filter by faculty")
+            if faculty_id is not None and faculty_id != own_faculty_id:
+                raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to search this faculty's documents")
+            faculty_id = own_faculty_id
+        
+        results = search_documents(
+            query, limit, faculty_id, similarity_threshold,
+            scopes=SEARCH_SCOPES[scope],
+            student_id=student_id
+        )
         
         return DocumentSearchResponse(
             results=results,
             total_results=len(results)
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -13,7 +13,7 @@ from app.core.database import (
     generateDomainReport,
     get_student_statistics
 )
-from app.core.security import get_current_active_user
+from app.core.security import get_current_active_user, current_student_id
 from app.models import (
     LoginInfo as User,
     Student,
@@ -68,7 +68,7 @@ async def generate_report(
                 detail="Admins accounts can not access student reports route"
             )
 
-        studentid = db.query(Student.studentid).filter(Student.logininfoid == current_user.logininfoid).scalar()
+        studentid = current_student_id(db, current_user)
         if not studentid:
             raise HTTPException(
                 status_code=404,
@@ -118,7 +118,7 @@ async def generate_domain_report(
                 status_code=403,
                 detail="Admins accounts can not access student reports route"
             )
-        studentid = db.query(Student.studentid).filter(Student.logininfoid == current_user.logininfoid).scalar()
+        studentid = current_student_id(db, current_user)
         if not studentid:
             raise HTTPException(
                 status_code=404,
@@ -447,7 +447,7 @@ async def get_stats_average(
                 detail="Admins accounts can not access student review performance route"
             )
 
-        studentid = db.query(Student.studentid).filter(Student.logininfoid == current_user.logininfoid).scalar()
+        studentid = current_student_id(db, current_user)
         if not studentid:
             raise HTTPException(
                 status_code=404,
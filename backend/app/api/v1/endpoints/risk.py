@@ -3,8 +3,7 @@ from sqlalchemy.orm import Session
 import os
 import json
 import pickle
-import pandas as pd
-import numpy as np
+import threading
 from typing import Dict, List, Tuple, Optional, Any
 from pathlib import Path
 from app.core.security import get_current_active_user
@@ -26,44 +25,101 @@ ML_DIR = BASE_DIR / "scripts" / "machine_learning"
 DATA_DIR = ML_DIR / "data"
 MODEL_DIR = DATA_DIR / "model"
 
-# Load student data for reference
-try:
-    with open(DATA_DIR / "all_students_data.json", "r") as f:
-        ALL_STUDENTS_DATA = json.load(f)
-except Exception as e:
-    print(f"Error loading student data: {str(e)}")
-    ALL_STUDENTS_DATA = []
-
-# Load prediction data for non-graduated students
-try:
-    PREDICTIONS_PATH = MODEL_DIR / "final_predictions.csv"
-    if PREDICTIONS_PATH.exists():
-        PREDICTIONS_DF = pd.read_csv(PREDICTIONS_PATH)
-    else:
-        PREDICTIONS_DF = pd.DataFrame()
-except Exception as e:
-    print(f"Error loading predictions: {str(e)}")
-    PREDICTIONS_DF = pd.DataFrame()
-
-# Load the ML model and preprocessor
-try:
-    with open(MODEL_DIR / "best_model.pkl", "rb") as f:
-        MODEL = pickle.load(f)
-    
-    with open(MODEL_DIR / "preprocessor.pkl", "rb") as f:
-        PREPROCESSOR = pickle.load(f)
-    
-    # Load model evaluation for reference
-    with open(MODEL_DIR / "model_evaluation.json", "r") as f:
-        MODEL_EVAL = json.load(f)
+# The student dataset, predictions CSV and pickled model (which pulls in pandas and sklearn) are
+# loaded on the first risk request rather than at import, so workers start without them.
+_assets: Dict[str, Any] = {}
+_assets_lock = threading.Lock()
+
+
+def _load_student_data() -> Dict[int, Dict]:
+    try:
+        with open(DATA_DIR / "all_students_data.json", "r") as f:
+            students = json.load(f)
+    except Exception as e:
+        print(f"Error loading student data: {str(e)}")
+        return {}
+    return {student.get("StudentInfo", {}).get("StudentID"): student for student in students}
+
+
+def _load_predictions():
+    import pandas as pd
     
-    ML_LOADED = True
-except Exception as e:
-    print(f"Error loading ML model: {str(e)}")
-    MODEL = None
-    PREPROCESSOR = None
-    MODEL_EVAL = {"best_model": "", "accuracy": 0}
-    ML_LOADED = False
+    try:
+        predictions_path = MODEL_DIR / "final_predictions.csv"
+        if predictions_path.exists():
+            return pd.read_csv(predictions_path)
+        return pd.DataFrame()
+    except Exception as e:
+        print(f"Error loading predictions: {str(e)}")
+        return pd.DataFrame()
+
+
+def _load_model() -> Dict[str, Any]:
+    try:
+        with open(MODEL_DIR / "best_model.pkl", "rb") as f:
+            model = pickle.load(f)
+        
+        with open(MODEL_DIR / "preprocessor.pkl", "rb") as f:
+            preprocessor = pickle.load(f)
+        
+        # Load model evaluation for reference
+        with open(MODEL_DIR / "model_evaluation.json", "r") as f:
+            model_eval = json.load(f)
+        
+        return {"model": model, "preprocessor": preprocessor, "model_eval": model_eval, "loaded": True}
+    except Exception as e:
+        print(f"Error loading ML model: {str(e)}")
+        return {"model": None, "preprocessor": None, "model_eval": {"best_model": "", "accuracy": 0}, "loaded": False}
+
+
+_LOADERS = {"students": _load_student_data, "predictions": _load_predictions, "ml": _load_model}
+
+
+def _asset(name: str):
+    if name not in _assets:
+        with _assets_lock:
+            if name not in _assets:
+                _assets[name] = _LOADERS[name]()
+    return _assets[name]
+
+
+def get_student_data() -> Dict[int, Dict]:
+    """all_students_data.json indexed by StudentID, read on first use."""
+    return _asset("students")
+
+
+def get_predictions():
+    """Precomputed predictions for non-graduated students as a DataFrame, read on first use."""
+    return _asset("predictions")
+
+
+def get_ml_model() -> Dict[str, Any]:
+    """The best model, its preprocessor and evaluation, unpickled on first use."""
+    return _asset("ml")
+
+
+def preload_assets() -> bool:
+    """Loads everything up front, gunicorn runs this in the master so forked workers share it. Returns whether the model loaded."""
+    get_student_data()
+    get_predictions()
+    return get_ml_model()["loaded"]
+
+
+# The old module constants, still readable as risk.MODEL etc.
+_LEGACY_NAMES = {
+    "ALL_STUDENTS_DATA": lambda: list(get_student_data().values()),
+    "PREDICTIONS_DF": get_predictions,
+    "MODEL": lambda: get_ml_model()["model"],
+    "PREPROCESSOR": lambda: get_ml_model()["preprocessor"],
+    "MODEL_EVAL": lambda: get_ml_model()["model_eval"],
+    "ML_LOADED": lambda: get_ml_model()["loaded"],
+}
+
+
+def __getattr__(name: str):
+    if name in _LEGACY_NAMES:
+        return _LEGACY_NAMES[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 router = APIRouter()
 
@@ -72,9 +128,7 @@ def get_student_from_json(student_id: int) -> Optional[Dict]:
     Retrieve student data from the pre-loaded JSON file.
     """
     try:
-        for student_data in ALL_STUDENTS_DATA:
-            if student_data.get("StudentInfo", {}).get("StudentID") == student_id:
-                return student_data
+        return get_student_data().get(student_id)
     except Exception as e:
         print(f"Error retrieving student from JSON: {str(e)}")
     return None
@@ -84,15 +138,16 @@ def get_cached_prediction(student_id: int) -> Optional[Dict]:
     Get prediction from pre-computed predictions CSV.
     """
     try:
-        if PREDICTIONS_DF.empty:
+        predictions = get_predictions()
+        if predictions.empty:
             return None
         
-        student_prediction = PREDICTIONS_DF[PREDICTIONS_DF["StudentID"] == student_id]
+        student_prediction = predictions[predictions["StudentID"] == student_id]
         if student_prediction.empty:
             return None
         
         # Get the prediction from the best model
-        best_model = MODEL_EVAL.get("best_model", "").replace(" ", "_")
+        best_model = get_ml_model()["model_eval"].get("best_model", "").replace(" ", "_")
         
         prediction_col = f"{best_model}_Prediction"
         probability_col = f"{best_model}_Probability"
@@ -220,7 +275,11 @@ def predict_graduation_risk(student_data: Dict) -> MLPrediction:
                      probability, descriptive text, and confidence score
     """
     try:
-        if not ML_LOADED:
+        import numpy as np
+        import pandas as pd
+        
+        ml = get_ml_model()
+        if not ml["loaded"]:
             return MLPrediction(
                 prediction=-1,
                 probability=0.0,
@@ -274,9 +333,9 @@ def predict_graduation_risk(student_data: Dict) -> MLPrediction:
         X = student_df.drop(columns=[col for col in features_to_drop if col in student_df.columns], errors='ignore')
         
         try:
-            X_processed = PREPROCESSOR.transform(X)
-            prediction = int(MODEL.predict(X_processed)[0])
-            probability = float(MODEL.predict_proba(X_processed)[0][1])
+            X_processed = ml["preprocessor"].transform(X)
+            prediction = int(ml["model"].predict(X_processed)[0])
+            probability = float(ml["model"].predict_proba(X_processed)[0][1])
             
             return MLPrediction(
                 prediction=prediction,
@@ -461,12 +520,14 @@ async def get_risk_assessment(
         risk_level = "High" if risk_score < 50 else "Medium" if risk_score < 75 else "Low"
         
         # Prepare details for the response
+        ml = get_ml_model()
+        model_eval = ml["model_eval"]
         details = {
             "student_name": f"{student_info.get('FirstName', '')} {student_info.get('LastName', '')}".strip(),
             "total_exams": len(exams),
             "passed_exams": sum(1 for exam in exams if exam.get("PassOrFail", False)),
             "total_grades": len(grades),
-            "ml_model_accuracy": MODEL_EVAL.get(MODEL_EVAL.get("best_model", ""), {}).get("accuracy", 0) if ML_LOADED else 0
+            "ml_model_accuracy": model_eval.get(model_eval.get("best_model", ""), {}).get("accuracy", 0) if ml["loaded"] else 0
         }
         
         return RiskAssessmentResponse(
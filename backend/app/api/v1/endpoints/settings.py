@@ -2,6 +2,7 @@ from typing import Dict, Optional
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from ....core.security import get_current_active_user, get_password_hash
+from ....core import auth_cache
 from ....core.database import get_db
 from app.models import LoginInfo as User
 from app.models import Student, Faculty
@@ -110,10 +111,13 @@ async def update_user_settings(
                 detail="Position can only be updated for faculty members"
             )
         
+        # current_user is the cached auth context, the update needs the row itself
+        user = db.get(User, current_user.logininfoid)
+        
         # updates user profile based on user type
         updated_user = update_user_profile(
             db=db,
-            current_user=current_user,
+            current_user=user,
             student=student if user_type == "student" else None,
             faculty=faculty if user_type == "faculty" else None,
             username=user_data.username,
@@ -124,6 +128,8 @@ async def update_user_settings(
             position=user_data.position if user_type == "faculty" else None,
             bio=user_data.bio
         )
+        # Both names, the old one may still be cached and a rename frees it
+        auth_cache.invalidate(username=current_user.username, logininfoid=current_user.logininfoid)
         
         return updated_user
     
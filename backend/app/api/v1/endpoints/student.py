@@ -1,13 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 import json
-import numpy as np
+import math
 from typing import Dict, List, Tuple
 from ....schemas.reportschema import StudentReport
 from ....core.database import get_db, link_logininfo, generateStudentInformationReport
 from app.models import Student, LoginInfo as User
 from app.core.security import (
-    get_current_active_user
+    get_current_active_user,
+    current_student_id
 )
 
 router = APIRouter()
@@ -24,7 +25,7 @@ def get_student(student_id: int, db: Session = Depends(get_db)):
     student_dict = {column.name: getattr(student, column.name) for column in Student.__table__.columns}
     
     for key, value in student_dict.items():
-        if isinstance(value, float) and np.isnan(value):
+        if isinstance(value, float) and math.isnan(value):
             student_dict[key] = None
              
     return student_dict
@@ -67,7 +68,7 @@ async def generate_report(
                 detail="Admins accounts can not access student reports route"
             )
 
-        studentid = db.query(Student.studentid).filter(Student.logininfoid == current_user.logininfoid).scalar()
+        studentid = current_student_id(db, current_user)
         if not studentid:
             raise HTTPException(
                 status_code=404,
@@ -0,0 +1,82 @@
+import time
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from .config import settings
+from .metrics import auth_cache_lookups_total
+
+
+@dataclass(frozen=True)
+class AuthContext:
+    """
+    What a request needs to know about its user, without an ORM row. Has the LoginInfo columns the
+    endpoints read, plus the linked student or faculty id so they don't query Student again.
+    """
+    logininfoid: int
+    username: str
+    email: Optional[str]
+    bio: Optional[str]
+    isactive: Optional[bool]
+    issuperuser: Optional[bool]
+    studentid: Optional[int] = None
+    facultyid: Optional[int] = None
+
+    @property
+    def role(self) -> Optional[str]:
+        return "student" if self.studentid is not None else "faculty" if self.facultyid is not None else None
+
+    def claims(self) -> Dict:
+        """Token claims for this user, sub stays the username; uid, sid and fid rebuild the context on a cache miss."""
+        claims = {"sub": self.username, "uid": self.logininfoid, "role": self.role}
+        if self.studentid is not None:
+            claims["sid"] = self.studentid
+        if self.facultyid is not None:
+            claims["fid"] = self.facultyid
+        return claims
+
+
+# username -> (expires at, context), oldest first so the least recently used is evicted
+_contexts: "OrderedDict[str, Tuple[float, AuthContext]]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def get_cached(username: str) -> Optional[AuthContext]:
+    if settings.AUTH_CACHE_TTL_SECONDS <= 0:
+        return None
+    with _lock:
+        entry = _contexts.get(username)
+        if entry is not None and entry[0] > time.monotonic():
+            _contexts.move_to_end(username)
+            auth_cache_lookups_total.inc(result="hit")
+            return entry[1]
+        if entry is not None:
+            del _contexts[username]
+    auth_cache_lookups_total.inc(result="miss")
+    return None
+
+
+def put(context: AuthContext):
+    if settings.AUTH_CACHE_TTL_SECONDS <= 0:
+        return
+    with _lock:
+        _contexts[context.username] = (time.monotonic() + settings.AUTH_CACHE_TTL_SECONDS, context)
+        _contexts.move_to_end(context.username)
+        while len(_contexts) > settings.AUTH_CACHE_MAX_ENTRIES:
+            _contexts.popitem(last=False)
+
+
+def invalidate(username: Optional[str] = None, logininfoid: Optional[int] = None):
+    """Drops the cached context for a username and/or login id, after a profile, password or role change."""
+    with _lock:
+        if username is not None:
+            _contexts.pop(username, None)
+        if logininfoid is not None:
+            for key in [key for key, (_, context) in _contexts.items() if context.logininfoid == logininfoid]:
+                del _contexts[key]
+
+
+def clear():
+    with _lock:
+        _contexts.clear()
@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Dict, Optional
 import os
 from pathlib import Path
 
@@ -17,6 +17,10 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    # Resolved user, role and student/faculty id per token subject, cached per worker process.
+    # Profile changes invalidate locally, other workers see them once the TTL runs out. 0 disables it
+    AUTH_CACHE_TTL_SECONDS: int = 30
+    AUTH_CACHE_MAX_ENTRIES: int = 10000
     ENVIRONMENT: str = "production"
 
     NEXTAUTH_URL: str
@@ -24,8 +28,85 @@ class Settings(BaseSettings):
     NEXT_PUBLIC_API_BASE_URL: str
     
     GEMINI_API_KEYS: Optional[str] = None
-    AWS_S3_ACCESS: str
-    AWS_S3_DEV: str
+    AWS_S3_ACCESS: Optional[str] = None
+    AWS_S3_DEV: Optional[str] = None
+
+    # Connection pool, sized per worker process
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    # Seconds a request waits for a free connection before failing
+    DB_POOL_TIMEOUT: int = 30
+    # Connections older than this many seconds are replaced, and checked with a ping before use
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # Default statement_timeout for every connection in milliseconds, 0 disables it
+    DB_STATEMENT_TIMEOUT_MS: int = 60000
+    # Tighter statement timeouts for individual routers, keyed by router name
+    DB_ROUTE_STATEMENT_TIMEOUTS_MS: Dict[str, int] = {"report": 15000, "risk": 15000}
+
+    # Extracted document text is cached here by content hash, defaults to the system temp dir
+    EXTRACT_CACHE_DIR: Optional[str] = None
+
+    # Semantic answer cache for the chat assistant
+    ANSWER_CACHE_ENABLED: bool = True
+    ANSWER_CACHE_TTL_SECONDS: int = 60 * 60 * 24
+    ANSWER_CACHE_MIN_SIMILARITY: float = 0.95
+
+    # Most tokens of chat context and RAG chunks packed into a chat prompt's system instruction
+    PROMPT_CONTEXT_TOKEN_BUDGET: int = 3000
+
+    # Prometheus scrape endpoint at /metrics; when METRICS_TOKEN is set scrapers send it as a bearer token
+    METRICS_ENABLED: bool = True
+    METRICS_TOKEN: Optional[str] = None
+
+    # Most Gemini generate calls in flight at once from this process
+    LLM_MAX_CONCURRENCY: int = 8
+
+    # Development only: per-request query profile headers, requests repeating one statement this often are logged
+    QUERY_PROFILER_ENABLED: bool = False
+    QUERY_PROFILER_REPEAT_THRESHOLD: int = 5
+
+    # OpenTelemetry tracing, needs opentelemetry-sdk. "otlp" posts to a collector, "file" appends JSON lines
+    TRACING_ENABLED: bool = False
+    TRACING_EXPORTER: str = "otlp"
+    TRACING_OTLP_ENDPOINT: str = "http://localhost:4318/v1/traces"
+    TRACING_FILE_PATH: str = "traces.jsonl"
+    TRACING_SERVICE_NAME: str = "medpass-backend"
+    TRACING_SAMPLE_RATIO: float = 1.0
+
+    # Backends: "gemini"/"s3" in production, "local" runs offline with deterministic embeddings and
+    # answers and stores objects under LOCAL_STORAGE_DIR
+    LLM_PROVIDER: str = "gemini"
+    STORAGE_PROVIDER: str = "s3"
+    LOCAL_STORAGE_DIR: Optional[str] = None
+    # Latency and failures the local providers simulate on every call
+    LOCAL_PROVIDER_LATENCY_MS: float = 0.0
+    LOCAL_PROVIDER_JITTER_MS: float = 0.0
+    LOCAL_PROVIDER_ERROR_RATE: float = 0.0
+    LOCAL_PROVIDER_SEED: Optional[int] = None
+
+    # gunicorn (gunicorn.conf.py), WEB_WORKERS defaults to one per CPU
+    WEB_BIND: str = "0.0.0.0:8000"
+    WEB_WORKERS: Optional[int] = None
+    # Load the app and the risk model in the master so workers share them copy-on-write
+    WEB_PRELOAD: bool = True
+    WEB_BACKLOG: int = 2048
+    WEB_KEEPALIVE_SECONDS: int = 5
+    WEB_TIMEOUT_SECONDS: int = 120
+    # Seconds a worker gets to finish in-flight requests on reload or shutdown
+    WEB_GRACEFUL_TIMEOUT_SECONDS: int = 30
+    # Recycle a worker after this many requests (plus jitter), 0 never does
+    WEB_MAX_REQUESTS: int = 0
+    WEB_MAX_REQUESTS_JITTER: int = 0
+    # /health/ready fails while the risk model is missing, not just when the database is down
+    READINESS_REQUIRES_MODEL: bool = True
+    # Online schema changes (app.core.migrations): DDL stops waiting for its table lock after this many
+    # milliseconds and retries, so requests never queue behind a migration for long
+    MIGRATION_LOCK_TIMEOUT_MS: int = 3000
+    MIGRATION_LOCK_ATTEMPTS: int = 5
+    # Batched backfills: keys per transaction and the pause between batches
+    BACKFILL_BATCH_SIZE: int = 1000
+    BACKFILL_PAUSE_SECONDS: float = 0.05
 
     class Config:
         env_file = str(Path(__file__).resolve().parent.parent.parent.parent / ".env")
@@ -1,8 +1,14 @@
 from sqlalchemy import create_engine, inspect, MetaData, text, func, case, select
 from sqlalchemy.orm import sessionmaker
+from fastapi import Depends
 from typing import Optional, List
 from .config import settings
 from .base import Base
+from . import auth_cache
+from .db_pool import engine_options, instrument_engine, instrument_sessions, register_pool_metrics, set_statement_timeout
+from .metrics import instrument_queries
+from .query_profiler import instrument_profiler
+from .tracing import instrument_tracing
 from decimal import Decimal
 
 from app.models import (
@@ -30,8 +36,14 @@ from app.schemas.reportschema import StudentReport, ExamReport, GradeReport, Dom
 from app.schemas.question import ExamResultsCreate, StudentQuestionPerformanceResponseReview
 from app.schemas.pydantic_base_models import user_schemas
 
-engine = create_engine(settings.sync_database_url)
+engine = create_engine(settings.sync_database_url, **engine_options())
+instrument_engine(engine)
+instrument_queries(engine)
+instrument_profiler(engine)
+instrument_tracing(engine)
+register_pool_metrics(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+instrument_sessions(SessionLocal)
 
 def get_db():
     """Dependency to get a DB session."""
@@ -41,6 +53,16 @@ def get_db():
     finally:
         db.close()
         
+def statement_timeout(timeout_ms: Optional[int]):
+    """
+    Router or route dependency that caps every statement in the request's session at timeout_ms.
+    FastAPI caches get_db per request, so this is the same session the endpoint receives.
+    """
+    def dependency(db = Depends(get_db)):
+        set_statement_timeout(db, timeout_ms)
+        return db
+    return dependency
+        
 def ensure_pgvector_extension():
     db = next(get_db())
     
@@ -142,6 +164,9 @@ def link_logininfo(id, logininfoid, usertype):
         db.commit()
         
     db.close()
+    
+    # The cached auth context still has the old student/faculty id
+    auth_cache.invalidate(logininfoid=logininfoid)
 
 #Pulls All the Information Relevant to Student 
 def generateStudentInformationReport(student_id, db):
@@ -265,7 +290,6 @@ def generateDomainReport(student_id, db, domain_id: Optional[int] = None):
     
     if domain_id:
         query = query.filter(Domain.domainid == domain_id)
-    print(str(query.statement))
     data = query.all()
     domain_grades = []
     #Converting to dictionary as there can be multiple records of grades
@@ -280,7 +304,6 @@ def generateDomainReport(student_id, db, domain_id: Optional[int] = None):
         }
         pydanticData = DomainReport(**grade_dict)
         domain_grades.append(pydanticData)
-    print(data)
     return domain_grades
 
 #Updates Faculty Access
@@ -485,8 +508,19 @@ def get_historical_performance(db, student_id=None, exam_id=None, skip=0, limit=
     Get exam results with their associated student question performances.
     
     """
-    # Start with a base query for exam results
-    query = db.query(ExamResults)
+    # Start with a base query for exam results, student and exam names come from the same row
+    query = db.query(
+        ExamResults,
+        Student.studentid,
+        Student.firstname,
+        Student.lastname,
+        Exam.examid,
+        Exam.examname
+    ).outerjoin(
+        Student, Student.studentid == ExamResults.studentid
+    ).outerjoin(
+        Exam, Exam.examid == ExamResults.examid
+    )
     
     # Apply filters if provided
     if student_id:
@@ -509,44 +543,37 @@ def get_historical_performance(db, student_id=None, exam_id=None, skip=0, limit=
     if not exam_results:
         return []
     
+    # Load every performance on the page with its question in one query
+    performances_by_result = {}
+    performance_rows = db.query(
+        StudentQuestionPerformance,
+        Question.prompt,
+        Question.questionDifficulty
+    ).outerjoin(
+        Question, StudentQuestionPerformance.questionid == Question.questionid
+    ).filter(
+        StudentQuestionPerformance.examresultid.in_([row[0].examresultsid for row in exam_results])
+    ).order_by(
+        StudentQuestionPerformance.studentquestionperformanceid
+    ).all()
+    
+    for perf, prompt, difficulty in performance_rows:
+        performances_by_result.setdefault(perf.examresultid, []).append({
+            "StudentQuestionPerformanceID": perf.studentquestionperformanceid,
+            "ExamResultsID": perf.examresultid,
+            "QuestionID": perf.questionid,
+            "Result": perf.result,
+            "Confidence": perf.confidence,
+            "QuestionPrompt": prompt,
+            "QuestionDifficulty": difficulty
+        })
+    
     # Build the response
     result = []
     
-    for er in exam_results:
-        # Get student name
-        student = db.query(Student).filter(Student.studentid == er.studentid).first()
-        student_name = f"{student.firstname} {student.lastname}" if student else "Unknown"
-        
-        # Get exam name
-        exam = db.query(Exam).filter(Exam.examid == er.examid).first()
-        exam_name = exam.examname if exam else "Unknown"
-        
-        # Get performances for this exam result
-        performances = db.query(
-            StudentQuestionPerformance
-        ).outerjoin(
-            Question, StudentQuestionPerformance.questionid == Question.questionid
-        ).filter(
-            StudentQuestionPerformance.examresultid == er.examresultsid
-        ).all()
-        
-        # Format performances
-        performance_list = []
-        for perf in performances:
-            # Get question details
-            question = db.query(Question).filter(
-                Question.questionid == perf.questionid
-            ).first()
-            
-            performance_list.append({
-                "StudentQuestionPerformanceID": perf.studentquestionperformanceid,
-                "ExamResultsID": perf.examresultid,
-                "QuestionID": perf.questionid,
-                "Result": perf.result,
-                "Confidence": perf.confidence,
-                "QuestionPrompt": question.prompt if question else None,
-                "QuestionDifficulty": question.questionDifficulty if question else None
-            })
+    for er, found_student_id, firstname, lastname, found_exam_id, examname in exam_results:
+        student_name = f"{firstname} {lastname}" if found_student_id is not None else "Unknown"
+        exam_name = examname if found_exam_id is not None else "Unknown"
         
         # Add to result
         result.append({
@@ -561,7 +588,7 @@ def get_historical_performance(db, student_id=None, exam_id=None, skip=0, limit=
                 "Timestamp": er.timestamp,
                 "ClerkshipID": er.clerkshipid
             },
-            "Performances": performance_list
+            "Performances": performances_by_result.get(er.examresultsid, [])
         })
     
     return result
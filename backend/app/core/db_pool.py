@@ -0,0 +1,154 @@
+import threading
+import time
+from typing import Dict, Optional
+
+from sqlalchemy import event, exc
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import QueuePool
+
+from .config import settings
+
+# Postgres SQLSTATE for a statement cancelled by statement_timeout
+QUERY_CANCELED = "57014"
+# Upper bounds (seconds) of the checkout wait histogram, the last bucket catches everything slower
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+_metrics = {
+    "checkouts": 0,
+    "checkout_wait_seconds_total": 0.0,
+    "checkout_wait_seconds_max": 0.0,
+    "checkout_timeouts": 0,
+    "statement_timeouts": 0,
+    "connections_opened": 0,
+    "connections_invalidated": 0,
+}
+_wait_histogram = [0] * (len(WAIT_BUCKETS) + 1)
+_metrics_lock = threading.Lock()
+
+
+def _record_wait(seconds: float):
+    with _metrics_lock:
+        _metrics["checkouts"] += 1
+        _metrics["checkout_wait_seconds_total"] += seconds
+        _metrics["checkout_wait_seconds_max"] = max(_metrics["checkout_wait_seconds_max"], seconds)
+        for index, bound in enumerate(WAIT_BUCKETS):
+            if seconds <= bound:
+                _wait_histogram[index] += 1
+                break
+        else:
+            _wait_histogram[-1] += 1
+
+
+def _record(event_name: str):
+    with _metrics_lock:
+        _metrics[event_name] += 1
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that times how long each checkout waited for a free connection."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            _record("checkout_timeouts")
+            raise
+        finally:
+            _record_wait(time.perf_counter() - started)
+
+
+def engine_options() -> Dict:
+    """create_engine keyword arguments built from the DB_* settings."""
+    options = {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+    if settings.DB_STATEMENT_TIMEOUT_MS:
+        # Server side default for every connection, routes can tighten it with statement_timeout()
+        options["connect_args"] = {"options": f"-c statement_timeout={int(settings.DB_STATEMENT_TIMEOUT_MS)}"}
+    return options
+
+
+def instrument_engine(engine):
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        _record("connections_opened")
+
+    @event.listens_for(engine, "invalidate")
+    def _on_invalidate(dbapi_connection, connection_record, exception):
+        _record("connections_invalidated")
+
+    @event.listens_for(engine, "handle_error")
+    def _on_error(context):
+        if getattr(context.original_exception, "pgcode", None) == QUERY_CANCELED:
+            _record("statement_timeouts")
+
+
+def instrument_sessions(session_factory):
+    @event.listens_for(session_factory, "after_begin")
+    def _apply_statement_timeout(session, transaction, connection):
+        timeout_ms = session.info.get("statement_timeout_ms")
+        if timeout_ms:
+            # SET LOCAL only lasts for this transaction, so it is reapplied after every commit
+            connection.exec_driver_sql(f"SET LOCAL statement_timeout = {int(timeout_ms)}")
+
+
+def set_statement_timeout(db: Session, timeout_ms: Optional[int]):
+    """Applies timeout_ms to every transaction the session runs from now on."""
+    db.info["statement_timeout_ms"] = timeout_ms
+
+
+def pool_metrics(engine) -> Dict:
+    pool = engine.pool
+    with _metrics_lock:
+        metrics = dict(_metrics)
+        histogram = list(_wait_histogram)
+
+    metrics["checkout_wait_seconds_total"] = round(metrics["checkout_wait_seconds_total"], 6)
+    metrics["checkout_wait_seconds_max"] = round(metrics["checkout_wait_seconds_max"], 6)
+    metrics["checkout_wait_seconds_avg"] = round(metrics["checkout_wait_seconds_total"] / metrics["checkouts"], 6) if metrics["checkouts"] else 0.0
+    # Cumulative like a Prometheus histogram, le_X counts every checkout that waited at most X seconds
+    cumulative = 0
+    metrics["checkout_wait_histogram"] = {}
+    for bound, count in zip(WAIT_BUCKETS + ("inf",), histogram):
+        cumulative += count
+        metrics["checkout_wait_histogram"][f"le_{bound}"] = cumulative
+    metrics.update({
+        "pool_size": pool.size(),
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": pool.overflow(),
+    })
+    return metrics
+
+
+def register_pool_metrics(engine):
+    """Exposes the pool on /metrics, values are read from pool_metrics at scrape time."""
+    from .metrics import Gauge
+
+    Gauge(
+        "db_pool_connections", "Pooled connections by state", ("state",),
+        callback=lambda: {
+            (state,): value for state, value in pool_metrics(engine).items()
+            if state in ("checked_out", "checked_in", "overflow", "pool_size")
+        }
+    )
+    Gauge(
+        "db_pool_events_total", "Pool checkouts, timeouts and connection churn", ("event",),
+        callback=lambda: {
+            (name,): value for name, value in pool_metrics(engine).items()
+            if name in ("checkouts", "checkout_timeouts", "statement_timeouts", "connections_opened", "connections_invalidated")
+        },
+        kind="counter"
+    )
+    Gauge(
+        "db_pool_checkout_wait_seconds_total", "Total time requests waited for a pooled connection",
+        callback=lambda: {(): pool_metrics(engine)["checkout_wait_seconds_total"]},
+        kind="counter"
+    )
@@ -0,0 +1,34 @@
+import time
+from typing import Any, Dict, Tuple
+
+from sqlalchemy import text
+
+from .config import settings
+from .database import engine
+
+# Liveness only says the worker's event loop answers. Readiness also needs the database and the risk
+# model, so a load balancer holds traffic back from a worker that cannot serve it yet.
+
+
+def check_database() -> Dict[str, Any]:
+    started = time.perf_counter()
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+    except Exception as e:
+        return {"ok": False, "error": str(e).splitlines()[0]}
+    return {"ok": True, "latency_ms": round(1000 * (time.perf_counter() - started), 1)}
+
+
+def check_model() -> Dict[str, Any]:
+    # Loads the model on the first probe when the master did not preload it
+    from app.api.v1.endpoints.risk import get_ml_model
+
+    ml = get_ml_model()
+    return {"ok": ml["loaded"], "best_model": ml["model_eval"].get("best_model") or None}
+
+
+def readiness() -> Tuple[bool, Dict[str, Any]]:
+    checks = {"database": check_database(), "model": check_model()}
+    required = ["database"] + (["model"] if settings.READINESS_REQUIRES_MODEL else [])
+    return all(checks[name]["ok"] for name in required), checks
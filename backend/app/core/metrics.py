@@ -0,0 +1,264 @@
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import event
+
+from .tracing import span
+
+# Prometheus text format without the client library: counters and histograms with labels,
+# kept in process memory and rendered on /metrics. Each worker process reports its own values.
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+LLM_BUCKETS = (0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0, 30.0, 60.0, 120.0)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 250, 500)
+
+_registry: List["_Metric"] = []
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"] + self._samples()
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            values = dict(self._values)
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in sorted(values.items())]
+
+
+class Gauge(_Metric):
+    """
+    Value read at render time from a callback returning {label values tuple: value}.
+    kind="counter" exposes totals that are already counted elsewhere, such as the pool's.
+    """
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (), callback=None, kind: str = "gauge"):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+        self.kind = kind
+
+    def _samples(self) -> List[str]:
+        try:
+            values = self.callback() if self.callback else {}
+        except Exception:
+            return []
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in sorted(values.items())]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._series: Dict[Tuple[str, ...], Dict] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["counts"][index] += 1
+                    break
+            series["sum"] += value
+            series["count"] += 1
+
+    def snapshot(self, **labels) -> Optional[Dict]:
+        with self._lock:
+            series = self._series.get(self._key(labels))
+            return {"counts": list(series["counts"]), "sum": series["sum"], "count": series["count"]} if series else None
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            series = {key: {"counts": list(value["counts"]), "sum": value["sum"], "count": value["count"]} for key, value in self._series.items()}
+
+        lines = []
+        for key, value in sorted(series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, value["counts"]):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, ('le', _format_value(bound)))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(value['sum'])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {value['count']}")
+        return lines
+
+
+def render_prometheus() -> str:
+    return "\n".join(line for metric in _registry for line in metric.render()) + "\n"
+
+
+# ——————— HTTP ———————
+
+http_requests_total = Counter("http_requests_total", "Requests handled, by route template and status code", ("method", "route", "status"))
+http_request_duration_seconds = Histogram("http_request_duration_seconds", "Request latency by route template", ("method", "route"))
+http_db_queries = Histogram("http_request_db_queries", "SQL statements executed per request", ("route",), buckets=QUERY_COUNT_BUCKETS)
+http_db_seconds = Histogram("http_request_db_seconds", "Time spent in SQL per request", ("route",))
+
+# ——————— Database ———————
+
+db_queries_total = Counter("db_queries_total", "SQL statements executed, inside and outside requests")
+db_query_duration_seconds = Histogram("db_query_duration_seconds", "Latency of single SQL statements")
+
+# ——————— LLM ———————
+
+llm_requests_total = Counter("llm_requests_total", "Gemini calls by operation and outcome", ("operation", "model", "outcome"))
+llm_request_duration_seconds = Histogram("llm_request_duration_seconds", "Gemini call latency", ("operation", "model"), buckets=LLM_BUCKETS)
+llm_tokens_total = Counter("llm_tokens_total", "Tokens sent to and received from Gemini", ("operation", "model", "direction"))
+
+# ——————— Auth ———————
+
+auth_cache_lookups_total = Counter("auth_cache_lookups_total", "Token subjects resolved from the auth context cache or the database", ("result",))
+
+# Per request SQL totals, set by the middleware and filled in by the engine hooks
+_request_stats: ContextVar[Optional[Dict]] = ContextVar("request_stats", default=None)
+
+
+def current_request_stats() -> Optional[Dict]:
+    return _request_stats.get()
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware timing every HTTP request. Routes are labelled by their template
+    (/api/v1/notes/status/{document_id}) so path parameters don't explode the series count.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = {"queries": 0, "query_seconds": 0.0}
+        token = _request_stats.set(stats)
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            method = scope.get("method", "")
+
+            http_requests_total.inc(method=method, route=route_path, status=status_code)
+            http_request_duration_seconds.observe(elapsed, method=method, route=route_path)
+            http_db_queries.observe(stats["queries"], route=route_path)
+            http_db_seconds.observe(stats["query_seconds"], route=route_path)
+            _request_stats.reset(token)
+
+
+def instrument_queries(engine):
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_started"].pop()
+        elapsed = time.perf_counter() - started
+        db_queries_total.inc()
+        db_query_duration_seconds.observe(elapsed)
+
+        stats = _request_stats.get()
+        if stats is not None:
+            stats["queries"] += 1
+            stats["query_seconds"] += elapsed
+
+    @event.listens_for(engine, "handle_error")
+    def _on_error(context):
+        # A failed statement never reaches after_cursor_execute, drop its start time
+        started = context.connection.info.get("query_started") if context.connection is not None else None
+        if started:
+            started.pop()
+
+
+@contextmanager
+def llm_timer(operation: str, model: str) -> Iterator[Dict]:
+    """
+    Times one Gemini call. The caller fills in "input_tokens"/"output_tokens" on the yielded dict
+    once the response is back; an exception is counted as an error and re-raised. The call is
+    also a gemini.<operation> span when tracing is on.
+    """
+    call = {"input_tokens": 0, "output_tokens": 0}
+    started = time.perf_counter()
+    outcome = "success"
+    with span(f"gemini.{operation}", **{"gen_ai.system": "gemini", "gen_ai.request.model": model}) as current:
+        try:
+            yield call
+        except Exception:
+            outcome = "error"
+            raise
+        finally:
+            llm_request_duration_seconds.observe(time.perf_counter() - started, operation=operation, model=model)
+            llm_requests_total.inc(operation=operation, model=model, outcome=outcome)
+            if call["input_tokens"]:
+                llm_tokens_total.inc(call["input_tokens"], operation=operation, model=model, direction="input")
+            if call["output_tokens"]:
+                llm_tokens_total.inc(call["output_tokens"], operation=operation, model=model, direction="output")
+            if current is not None:
+                current.set_attribute("gen_ai.usage.input_tokens", call["input_tokens"])
+                current.set_attribute("gen_ai.usage.output_tokens", call["output_tokens"])
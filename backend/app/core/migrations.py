@@ -0,0 +1,404 @@
+import os
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence
+
+from sqlalchemy import bindparam, func, inspect, select, text, update
+from sqlalchemy.exc import OperationalError
+
+from app.core.config import settings
+from app.core.database import engine
+
+# Schema changes go through the Alembic revisions in backend/migrations. Databases built by
+# create_all_tables before migrations existed have no alembic_version table, they are stamped at
+# the baseline so only the later revisions run against them.
+#
+# Revisions touching large tables use the online helpers below instead of the plain op calls:
+# create_index_concurrently builds without blocking writes, run_with_lock_timeout keeps an ALTER
+# from queueing traffic behind it, and backfill/backfill_rows fill new columns in small throttled
+# transactions instead of one UPDATE that locks every row. A unique constraint is added with dedupe
+# (removes existing duplicates in batches) followed by add_unique_constraint.
+#
+# Every revision must also be a no-op against a schema that already has its change: a database
+# create_all_tables built from newer models is stamped at the baseline all the same.
+
+BASELINE_REVISION = "0001"
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "alembic.ini")
+# Postgres SQLSTATE for a statement that gave up waiting on lock_timeout
+LOCK_NOT_AVAILABLE = "55P03"
+
+
+def alembic_config(connection=None):
+    from alembic.config import Config
+
+    config = Config(ALEMBIC_INI)
+    config.set_main_option("script_location", os.path.join(os.path.dirname(ALEMBIC_INI), "migrations"))
+    # Keeps env.py from replacing the application's logging setup when called in process
+    config.attributes["configure_logger"] = False
+    if connection is not None:
+        config.attributes["connection"] = connection
+    return config
+
+
+def head_revision() -> str:
+    from alembic.script import ScriptDirectory
+
+    return ScriptDirectory.from_config(alembic_config()).get_current_head()
+
+
+def upgrade_database(revision: str = "head"):
+    """Brings the database to `revision`, stamping a pre-migrations database at the baseline first."""
+    from alembic import command
+
+    with engine.connect() as connection:
+        tables = set(inspect(connection).get_table_names())
+
+    # env.py opens its own connection, without the app's statement timeout that a long index build would hit
+    config = alembic_config()
+    if tables and "alembic_version" not in tables:
+        print(f"Existing schema without migration history, stamping revision {BASELINE_REVISION}")
+        command.stamp(config, BASELINE_REVISION)
+    command.upgrade(config, revision)
+    print(f"Database upgraded to {revision}")
+
+
+def is_lock_timeout(error: Exception) -> bool:
+    return getattr(getattr(error, "orig", None), "pgcode", None) == LOCK_NOT_AVAILABLE
+
+
+# ——————— DDL helpers, called from inside a revision's upgrade()/downgrade() ———————
+
+def run_with_lock_timeout(operation: Callable[[], None], lock_timeout_ms: Optional[int] = None,
+                          attempts: Optional[int] = None, backoff_seconds: float = 1.0):
+    """
+    Runs operation (op.add_column, op.alter_column, ...) committed on its own under a short lock_timeout.
+    An ALTER waiting for its table lock makes every later query on the table wait too, so the wait is
+    capped and the operation retried with a growing pause instead.
+    """
+    from alembic import op
+
+    timeout_ms = int(lock_timeout_ms or settings.MIGRATION_LOCK_TIMEOUT_MS)
+    attempts = attempts or settings.MIGRATION_LOCK_ATTEMPTS
+    context = op.get_context()
+
+    if context.as_sql:
+        op.execute(f"SET lock_timeout = {timeout_ms}")
+        operation()
+        op.execute("RESET lock_timeout")
+        return
+
+    with context.autocommit_block():
+        for attempt in range(1, attempts + 1):
+            op.execute(f"SET lock_timeout = {timeout_ms}")
+            try:
+                operation()
+                return
+            except OperationalError as e:
+                if not is_lock_timeout(e) or attempt == attempts:
+                    raise
+                print(f"Lock not acquired within {timeout_ms}ms (attempt {attempt}/{attempts}), retrying")
+                time.sleep(backoff_seconds * attempt)
+            finally:
+                op.execute("RESET lock_timeout")
+
+
+def add_column(table_name: str, column, **kw):
+    """
+    op.add_column under run_with_lock_timeout. Add new columns nullable or with a constant default,
+    those are a catalog change only; fill them with backfill() and add NOT NULL afterwards.
+    """
+    from alembic import op
+
+    run_with_lock_timeout(lambda: op.add_column(table_name, column, **kw))
+
+
+def _drop_invalid_index(name: str, table_name: str):
+    # A failed or cancelled CONCURRENTLY build leaves an INVALID index behind that IF NOT EXISTS would keep
+    from alembic import op
+
+    invalid = op.get_bind().execute(text(
+        "SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid WHERE c.relname = :name AND NOT i.indisvalid"
+    ), {"name": name}).first()
+    if invalid:
+        print(f"Dropping invalid index {name} left by an interrupted build")
+        op.drop_index(name, table_name=table_name, postgresql_concurrently=True, if_exists=True)
+
+
+def create_index_concurrently(name: str, table_name: str, columns: Sequence, **kw):
+    """
+    CREATE INDEX CONCURRENTLY IF NOT EXISTS, outside the migration transaction as Postgres requires.
+    Reads and writes carry on during the build, which scans the table twice instead of locking it.
+    """
+    from alembic import op
+
+    context = op.get_context()
+    with context.autocommit_block():
+        if not context.as_sql:
+            _drop_invalid_index(name, table_name)
+        op.create_index(name, table_name, list(columns), postgresql_concurrently=True, if_not_exists=True, **kw)
+
+
+def drop_index_concurrently(name: str, table_name: str):
+    from alembic import op
+
+    with op.get_context().autocommit_block():
+        op.drop_index(name, table_name=table_name, postgresql_concurrently=True, if_exists=True)
+
+
+def add_unique_constraint(name: str, table_name: str, columns: Sequence[str]):
+    """
+    Builds the unique index concurrently, then attaches it as constraint `name` (ADD CONSTRAINT ... USING
+    INDEX only takes a short lock, the table is not scanned again). Skipped when the constraint exists,
+    e.g. a database created by create_all_tables from models that already declared it.
+    Existing duplicates make the build fail, remove them first with dedupe().
+    """
+    from alembic import op
+
+    create_index_concurrently(name, table_name, columns, unique=True)
+    run_with_lock_timeout(lambda: op.execute(
+        "DO $$ BEGIN "
+        f"IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = '{name}' AND conrelid = '{table_name}'::regclass) THEN "
+        f"ALTER TABLE {table_name} ADD CONSTRAINT {name} UNIQUE USING INDEX {name}; "
+        "END IF; END $$"
+    ))
+
+
+def drop_unique_constraint(name: str, table_name: str):
+    from alembic import op
+
+    run_with_lock_timeout(lambda: op.drop_constraint(name, table_name, type_="unique", if_exists=True))
+
+
+# ——————— Batched backfills ———————
+
+class BackfillProgress:
+    """Prints rows done, rate and time left at most every report_seconds, and once at the end."""
+
+    def __init__(self, label: str, total: int, report_seconds: float = 5.0, clock: Callable[[], float] = time.monotonic):
+        self.label = label
+        self.total = total
+        self.report_seconds = report_seconds
+        self.clock = clock
+        self.started = self.last_report = clock()
+        self.done = 0
+        self.updated = 0
+        self.batches = 0
+
+    def advance(self, done: int, updated: int):
+        self.done += done
+        self.updated += updated
+        self.batches += 1
+        if self.clock() - self.last_report >= self.report_seconds:
+            self.report()
+
+    def summary(self) -> Dict:
+        elapsed = self.clock() - self.started
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        remaining = max(self.total - self.done, 0)
+        return {
+            "label": self.label,
+            "done": self.done,
+            "total": self.total,
+            "updated": self.updated,
+            "batches": self.batches,
+            "seconds": round(elapsed, 2),
+            "rate_per_second": round(rate, 1),
+            "eta_seconds": round(remaining / rate, 1) if rate else None,
+        }
+
+    def report(self):
+        self.last_report = self.clock()
+        summary = self.summary()
+        percent = summary["done"] / summary["total"] if summary["total"] else 1.0
+        eta = f"{summary['eta_seconds']:.0f}s" if summary["eta_seconds"] is not None else "-"
+        print(
+            f"{self.label}: {summary['done']}/{summary['total']} ({percent:.0%}) updated {summary['updated']} "
+            f"in {summary['batches']} batches, {summary['rate_per_second']}/s, eta {eta}"
+        )
+
+
+def _throttle(rows: int, took: float, pause_seconds: float, max_rows_per_second: Optional[float], sleep: Callable[[float], None]):
+    # The fixed pause lets autovacuum and replication keep up, the rate cap stretches it for big batches
+    wait = pause_seconds
+    if max_rows_per_second:
+        wait = max(wait, rows / max_rows_per_second - took)
+    if wait > 0:
+        sleep(wait)
+
+
+@contextmanager
+def _batch(bind, lock_timeout_ms: Optional[int]) -> Iterator:
+    with bind.begin() as connection:
+        if connection.dialect.name == "postgresql":
+            # A batch waiting on a row lock held by a request gives up and is retried, it never blocks it for long
+            connection.exec_driver_sql(f"SET LOCAL lock_timeout = {int(lock_timeout_ms or settings.MIGRATION_LOCK_TIMEOUT_MS)}")
+        yield connection
+
+
+def _run_batch(bind, work: Callable, lock_timeout_ms: Optional[int], attempts: Optional[int], sleep: Callable[[float], None]):
+    attempts = attempts or settings.MIGRATION_LOCK_ATTEMPTS
+    for attempt in range(1, attempts + 1):
+        try:
+            with _batch(bind, lock_timeout_ms) as connection:
+                return work(connection)
+        except OperationalError as e:
+            if not is_lock_timeout(e) or attempt == attempts:
+                raise
+            sleep(attempt)
+
+
+def backfill(table_name: str, key: str, update_sql: str, bind=None, batch_size: Optional[int] = None,
+             pause_seconds: Optional[float] = None, max_rows_per_second: Optional[float] = None,
+             lock_timeout_ms: Optional[int] = None, attempts: Optional[int] = None, label: Optional[str] = None,
+             report_seconds: float = 5.0, sleep: Callable[[float], None] = time.sleep) -> Dict:
+    """
+    Runs update_sql once per key range of table_name, each range committed in its own transaction.
+    update_sql must restrict the rows it touches with `<key> > :low AND <key> <= :high`, for example
+
+        UPDATE documentchunk SET searchvector = to_tsvector('english', content)
+        WHERE documentchunkid > :low AND documentchunkid <= :high AND searchvector IS NULL
+
+    Keep the statement idempotent (skip rows already done) so an interrupted run can simply be restarted.
+    Revisions call it through revision_backfill(), scripts use the app engine.
+    """
+    if ":low" not in update_sql or ":high" not in update_sql:
+        raise ValueError("update_sql must filter on the key range with :low and :high")
+    bind = bind or engine
+    batch_size = batch_size or settings.BACKFILL_BATCH_SIZE
+    pause_seconds = settings.BACKFILL_PAUSE_SECONDS if pause_seconds is None else pause_seconds
+
+    with bind.connect() as connection:
+        low, high = connection.execute(text(f"SELECT min({key}), max({key}) FROM {table_name}")).one()
+    if low is None:
+        return BackfillProgress(label or table_name, 0).summary()
+
+    progress = BackfillProgress(label or table_name, high - low + 1, report_seconds)
+    statement = text(update_sql)
+    start = low - 1
+    while start < high:
+        end = min(start + batch_size, high)
+        started = time.monotonic()
+        updated = _run_batch(bind, lambda connection: connection.execute(statement, {"low": start, "high": end}).rowcount,
+                             lock_timeout_ms, attempts, sleep)
+        progress.advance(end - start, max(updated, 0))
+        _throttle(end - start, time.monotonic() - started, pause_seconds, max_rows_per_second, sleep)
+        start = end
+
+    progress.report()
+    return progress.summary()
+
+
+def backfill_rows(table, columns: Sequence[str], compute: Callable[[List], List[Dict]], where=None, bind=None,
+                  batch_size: Optional[int] = None, pause_seconds: Optional[float] = None,
+                  max_rows_per_second: Optional[float] = None, lock_timeout_ms: Optional[int] = None,
+                  attempts: Optional[int] = None, label: Optional[str] = None, report_seconds: float = 5.0,
+                  sleep: Callable[[float], None] = time.sleep) -> Dict:
+    """
+    Backfill for values computed in Python, e.g. re-embedding chunks. Walks table (a SQLAlchemy Table)
+    in primary key order, hands each batch of rows (the key plus `columns`) to compute, and writes back
+    the dicts it returns, keyed by the primary key column name. where filters the rows to visit.
+
+    Only the UPDATE runs inside a transaction, compute runs between them so a slow model call never
+    holds row locks.
+    """
+    bind = bind or engine
+    batch_size = batch_size or settings.BACKFILL_BATCH_SIZE
+    pause_seconds = settings.BACKFILL_PAUSE_SECONDS if pause_seconds is None else pause_seconds
+    (key,) = table.primary_key.columns
+
+    with bind.connect() as connection:
+        count = select(func.count()).select_from(table)
+        total = connection.execute(count.where(where) if where is not None else count).scalar()
+
+    query = select(key, *[table.c[name] for name in columns]).order_by(key).limit(batch_size)
+    if where is not None:
+        query = query.where(where)
+
+    progress = BackfillProgress(label or table.name, total, report_seconds)
+    after = None
+    while True:
+        with bind.connect() as connection:
+            rows = connection.execute(query.where(key > after) if after is not None else query).all()
+        if not rows:
+            break
+        after = rows[-1][0]
+
+        started = time.monotonic()
+        changes = compute(rows)
+        updated = 0
+        if changes:
+            # The SET clause comes from each dict's keys, the primary key is matched through _key
+            params = [{**{name: value for name, value in change.items() if name != key.name}, "_key": change[key.name]} for change in changes]
+            statement = update(table).where(key == bindparam("_key"))
+            _run_batch(bind, lambda connection: connection.execute(statement, params), lock_timeout_ms, attempts, sleep)
+            updated = len(params)
+        progress.advance(len(rows), updated)
+        _throttle(len(rows), time.monotonic() - started, pause_seconds, max_rows_per_second, sleep)
+
+    progress.report()
+    return progress.summary()
+
+
+def revision_backfill(table_name: str, key: str, update_sql: str, **kw) -> Optional[Dict]:
+    """
+    backfill() for use inside a revision. Online it runs in batches on the migration's own engine once
+    the revision's earlier DDL is committed; with --sql the statement is rendered once for the whole key range.
+    """
+    from alembic import op
+
+    context = op.get_context()
+    if context.as_sql:
+        op.execute(text(update_sql).bindparams(low=-2 ** 31, high=2 ** 31 - 1))
+        return None
+    with context.autocommit_block():
+        return backfill(table_name, key, update_sql, bind=op.get_bind().engine, **kw)
+
+
+def dedupe(table_name: str, key: str, columns: Sequence[str], repoint: Sequence = (), cascade: Sequence = (),
+           keep: str = "first", **kw):
+    """
+    Removes the rows that would break a unique constraint on `columns` before it is added, from inside a
+    revision. Of each group of equal values the first (lowest key) or last row is kept; rows with a null
+    in `columns` never collide and are left alone. Foreign keys listed in repoint, as (table, column), are
+    moved to the kept row, rows in cascade tables pointing at a removed row are deleted with it.
+
+    The (dupid, keepid) pairs are computed once, with a single sort of the table, into a scratch table
+    indexed on dupid; the batched backfills then walk that table, so each batch is an index range scan
+    instead of another window over the whole table. Safe to restart, the pairs are recomputed.
+    """
+    from alembic import op
+
+    pairs = f"dedupe_{table_name}"
+    order = "DESC" if keep == "last" else "ASC"
+    partition = ", ".join(columns)
+    not_null = " AND ".join(f"{column} IS NOT NULL" for column in columns)
+    # Scratch data only, an unlogged table skips the WAL and is visible to the backfill's own connections
+    unlogged = "UNLOGGED " if op.get_context().dialect.name == "postgresql" else ""
+
+    op.execute(f"DROP TABLE IF EXISTS {pairs}")
+    op.execute(
+        f"CREATE {unlogged}TABLE {pairs} AS SELECT dupid, keepid FROM (SELECT {key} AS dupid, "
+        f"first_value({key}) OVER (PARTITION BY {partition} ORDER BY {key} {order}) AS keepid "
+        f"FROM {table_name} WHERE {not_null}) groups WHERE dupid <> keepid"
+    )
+    op.execute(f"CREATE INDEX ix_{pairs}_dupid ON {pairs} (dupid)")
+
+    batch = f"{pairs}.dupid > :low AND {pairs}.dupid <= :high"
+    for ref_table, ref_column in repoint:
+        revision_backfill(
+            pairs, "dupid",
+            f"UPDATE {ref_table} SET {ref_column} = {pairs}.keepid FROM {pairs} WHERE {ref_table}.{ref_column} = {pairs}.dupid AND {batch}",
+            label=f"{ref_table}.{ref_column} -> kept {table_name}", **kw
+        )
+    for ref_table, ref_column in cascade:
+        revision_backfill(
+            pairs, "dupid",
+            f"DELETE FROM {ref_table} WHERE {ref_column} IN (SELECT dupid FROM {pairs} WHERE {batch})",
+            label=f"{ref_table} rows of duplicate {table_name}", **kw
+        )
+    revision_backfill(
+        pairs, "dupid",
+        f"DELETE FROM {table_name} WHERE {key} IN (SELECT dupid FROM {pairs} WHERE {batch})",
+        label=f"duplicate {table_name}", **kw
+    )
+    op.execute(f"DROP TABLE {pairs}")
@@ -0,0 +1,40 @@
+import base64
+import json
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+# Keyset (seek) pagination: the cursor carries the sort key of the last row on the page,
+# so every page is an index range scan instead of an OFFSET that rescans earlier rows
+DEFAULT_PAGE_SIZE = 25
+MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(*values) -> str:
+    payload = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[List]:
+    """Returns the cursor values, or None for the first page. Raises ValueError on a malformed cursor."""
+    if not cursor:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8"))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, list):
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def decode_datetime_cursor(cursor: Optional[str]) -> Optional[Tuple[datetime, int]]:
+    """Decodes a (timestamp, id) cursor, or None for the first page. Raises ValueError on a malformed cursor."""
+    values = decode_cursor(cursor)
+    if values is None:
+        return None
+    if len(values) != 2 or not isinstance(values[0], str) or not isinstance(values[1], int) or isinstance(values[1], bool):
+        raise ValueError("Invalid cursor")
+    try:
+        return datetime.fromisoformat(values[0]), values[1]
+    except ValueError:
+        raise ValueError("Invalid cursor")
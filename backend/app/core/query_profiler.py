@@ -0,0 +1,141 @@
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional
+
+from sqlalchemy import event
+
+# Development aid: groups every statement a request runs by its normalized SQL so loops that
+# issue the same query per row (N+1) stand out. Off unless QUERY_PROFILER_ENABLED is set.
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PARAMETER = re.compile(r"%\(\w+\)s|%s|:\w+|\$\d+|\?")
+_IN_LIST = re.compile(r"\bIN\s*\((?:\s*\?\s*,?)+\)", re.IGNORECASE)
+_POSTCOMPILE = re.compile(r"\(__\[POSTCOMPILE_\w+\]\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_sql(statement: str) -> str:
+    """Statement with literals and bind parameters replaced by ?, so per-row variants group together."""
+    sql = _POSTCOMPILE.sub("(?)", statement)
+    sql = _STRING_LITERAL.sub("?", sql)
+    sql = _PARAMETER.sub("?", sql)
+    sql = _NUMBER_LITERAL.sub("?", sql)
+    sql = _IN_LIST.sub("IN (?)", sql)
+    return _WHITESPACE.sub(" ", sql).strip()
+
+
+class QueryProfile:
+    """Statements seen while a profile was active, grouped by normalized SQL."""
+
+    def __init__(self):
+        self.patterns: Dict[str, Dict] = {}
+
+    def record(self, statement: str, seconds: float):
+        pattern = normalize_sql(statement)
+        entry = self.patterns.get(pattern)
+        if entry is None:
+            entry = self.patterns[pattern] = {"count": 0, "seconds": 0.0}
+        entry["count"] += 1
+        entry["seconds"] += seconds
+
+    @property
+    def count(self) -> int:
+        return sum(entry["count"] for entry in self.patterns.values())
+
+    @property
+    def total_seconds(self) -> float:
+        return sum(entry["seconds"] for entry in self.patterns.values())
+
+    def repeated(self, threshold: int = 2) -> List[Dict]:
+        """Patterns run at least threshold times, most frequent first."""
+        return [
+            {"sql": pattern, "count": entry["count"], "seconds": round(entry["seconds"], 6)}
+            for pattern, entry in sorted(self.patterns.items(), key=lambda item: (-item[1]["count"], -item[1]["seconds"]))
+            if entry["count"] >= threshold
+        ]
+
+    def summary(self, top: int = 3, threshold: int = 2) -> Dict:
+        return {
+            "queries": self.count,
+            "distinct": len(self.patterns),
+            "db_ms": round(self.total_seconds * 1000, 2),
+            "repeated": self.repeated(threshold)[:top],
+        }
+
+
+_active_profile: ContextVar[Optional[QueryProfile]] = ContextVar("query_profile", default=None)
+
+
+@contextmanager
+def profile_queries() -> Iterator[QueryProfile]:
+    """Collects the statements run on instrumented engines inside the block."""
+    profile = QueryProfile()
+    token = _active_profile.set(profile)
+    try:
+        yield profile
+    finally:
+        _active_profile.reset(token)
+
+
+def instrument_profiler(engine):
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if _active_profile.get() is not None:
+            conn.info.setdefault("profiler_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        profile = _active_profile.get()
+        started = conn.info.get("profiler_started")
+        if profile is None or not started:
+            return
+        profile.record(statement, time.perf_counter() - started.pop())
+
+    @event.listens_for(engine, "handle_error")
+    def _on_error(context):
+        started = context.connection.info.get("profiler_started") if context.connection is not None else None
+        if started:
+            started.pop()
+
+
+class QueryProfilerMiddleware:
+    """
+    Profiles each HTTP request and reports it in X-Query-Count, X-Query-Time-Ms and X-Query-Repeated
+    response headers. Requests with a pattern repeated repeat_threshold times or more are also printed.
+    """
+
+    def __init__(self, app, repeat_threshold: int = 5, top: int = 3):
+        self.app = app
+        self.repeat_threshold = repeat_threshold
+        self.top = top
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with profile_queries() as profile:
+            async def send_with_profile(message):
+                if message["type"] == "http.response.start":
+                    headers = list(message.get("headers", []))
+                    repeated = profile.repeated(self.repeat_threshold)
+                    headers.append((b"x-query-count", str(profile.count).encode()))
+                    headers.append((b"x-query-time-ms", f"{profile.total_seconds * 1000:.2f}".encode()))
+                    headers.append((b"x-query-repeated", str(len(repeated)).encode()))
+                    message = {**message, "headers": headers}
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_profile)
+            finally:
+                repeated = profile.repeated(self.repeat_threshold)
+                if repeated:
+                    print(
+                        f"Query profile {scope.get('method', '')} {scope.get('path', '')}: "
+                        f"{profile.count} queries in {profile.total_seconds * 1000:.1f}ms, repeated patterns:"
+                    )
+                    for entry in repeated[:self.top]:
+                        print(f"  {entry['count']}x {entry['seconds'] * 1000:.1f}ms {entry['sql'][:200]}")
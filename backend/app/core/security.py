@@ -6,9 +6,11 @@ from fastapi import HTTPException, Security, Depends
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 from ..schemas.user import TokenData, UserInDB
-from app.models import LoginInfo as User
+from app.models import LoginInfo as User, Student, Faculty
 from ..core.database import get_db
 from .config import settings
+from . import auth_cache
+from .auth_cache import AuthContext
 
 # Security configuration
 SECRET_KEY = settings.SECRET_KEY
@@ -30,10 +32,76 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
+def load_auth_context(db: Session, username: str) -> Optional[AuthContext]:
+    """The login and its linked student/faculty id in one query, and caches it."""
+    row = db.query(User, Student.studentid, Faculty.facultyid).outerjoin(
+        Student, Student.logininfoid == User.logininfoid
+    ).outerjoin(
+        Faculty, Faculty.logininfoid == User.logininfoid
+    ).filter(User.username == username).first()
+    if row is None:
+        return None
+
+    user, studentid, facultyid = row
+    context = AuthContext(
+        logininfoid=user.logininfoid,
+        username=user.username,
+        email=user.email,
+        bio=user.bio,
+        isactive=user.isactive,
+        issuperuser=user.issuperuser,
+        studentid=studentid,
+        facultyid=facultyid
+    )
+    auth_cache.put(context)
+    return context
+
+def load_auth_context_from_claims(db: Session, payload: dict) -> Optional[AuthContext]:
+    """
+    Cache miss for a token that names its role: the student/faculty ids come from the sid/fid claims, so
+    only the LoginInfo row is read, by primary key, for the fields that can change under a live token
+    (isactive, issuperuser, profile). Tokens minted before the claims existed, or before the login was
+    linked to a student or faculty, return None and go through load_auth_context.
+    """
+    if payload.get("uid") is None or payload.get("role") is None:
+        return None
+    user = db.get(User, payload["uid"])
+    # A login renamed since the token was minted is left to the uid check in get_current_user
+    if user is None or user.username != payload.get("sub"):
+        return None
+
+    context = AuthContext(
+        logininfoid=user.logininfoid,
+        username=user.username,
+        email=user.email,
+        bio=user.bio,
+        isactive=user.isactive,
+        issuperuser=user.issuperuser,
+        studentid=payload.get("sid"),
+        facultyid=payload.get("fid")
+    )
+    auth_cache.put(context)
+    return context
+
+def current_student_id(db: Session, current_user) -> Optional[int]:
+    """
+    Student id of the authenticated user. Contexts from get_current_user already carry it, a plain
+    LoginInfo row (scripts, dependency overrides in tests) falls back to the query.
+    """
+    if isinstance(current_user, AuthContext):
+        return current_user.studentid
+    return db.query(Student.studentid).filter(Student.logininfoid == current_user.logininfoid).scalar()
+
+def current_faculty_id(db: Session, current_user) -> Optional[int]:
+    """Faculty id of the authenticated user, resolved the same way as current_student_id."""
+    if isinstance(current_user, AuthContext):
+        return current_user.facultyid
+    return db.query(Faculty.facultyid).filter(Faculty.logininfoid == current_user.logininfoid).scalar()
+
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
     db: Session = Depends(get_db)
-) -> User:
+) -> AuthContext:
     credentials_exception = HTTPException(
         status_code=401,
         detail="Could not validate credentials",
@@ -48,9 +116,18 @@ async def get_current_user(
     except JWTError:
         raise credentials_exception
 
-    user = db.query(User).filter(User.username == token_data.username).first()
+    # Most requests are answered from the cache. A miss reads the login by primary key and takes its
+    # role ids from the token; only tokens without them pay for the Student/Faculty joins
+    user = (
+        auth_cache.get_cached(token_data.username)
+        or load_auth_context_from_claims(db, payload)
+        or load_auth_context(db, token_data.username)
+    )
     if user is None:
         raise credentials_exception
+    # A token minted for an account that has since been renamed away must not match its successor
+    if payload.get("uid") is not None and payload["uid"] != user.logininfoid:
+        raise credentials_exception
     return user
 
 async def get_current_active_user(
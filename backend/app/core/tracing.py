@@ -0,0 +1,220 @@
+import functools
+import inspect
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Optional
+
+from sqlalchemy import event
+
+from .config import settings
+
+# OpenTelemetry is optional: without the packages, or with TRACING_ENABLED off, every helper here
+# is a no-op and spans cost one global lookup.
+try:
+    from opentelemetry import propagate, trace
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor, SpanExporter, SpanExportResult
+    from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+    from opentelemetry.trace import SpanKind, Status, StatusCode
+except ImportError:
+    trace = None
+    SpanExporter = object
+
+# Longest SQL statement attached to a db span
+MAX_STATEMENT_LENGTH = 2000
+
+_tracer = None
+
+
+class JsonLinesSpanExporter(SpanExporter):
+    """Appends each finished span to a file as one JSON line, for offline analysis without a collector."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, spans):
+        lines = "".join(span.to_json(indent=None) + "\n" for span in spans)
+        with self._lock, open(self.path, "a", encoding="utf-8") as trace_file:
+            trace_file.write(lines)
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self):
+        pass
+
+
+def _exporter():
+    if settings.TRACING_EXPORTER == "file":
+        return JsonLinesSpanExporter(settings.TRACING_FILE_PATH)
+    if settings.TRACING_EXPORTER == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        return OTLPSpanExporter(endpoint=settings.TRACING_OTLP_ENDPOINT)
+    raise ValueError(f"Unknown TRACING_EXPORTER {settings.TRACING_EXPORTER!r}, expected 'otlp' or 'file'")
+
+
+def configure_tracing() -> bool:
+    """Installs the tracer provider from the TRACING_* settings. Returns whether tracing is on."""
+    global _tracer
+
+    if not settings.TRACING_ENABLED:
+        return False
+    if trace is None:
+        print("TRACING_ENABLED is set but opentelemetry-sdk is not installed, tracing is off")
+        return False
+
+    provider = TracerProvider(
+        resource=Resource.create({"service.name": settings.TRACING_SERVICE_NAME}),
+        sampler=ParentBased(TraceIdRatioBased(settings.TRACING_SAMPLE_RATIO)),
+    )
+    provider.add_span_processor(BatchSpanProcessor(_exporter()))
+    trace.set_tracer_provider(provider)
+    _tracer = trace.get_tracer("medpass")
+    return True
+
+
+def tracing_enabled() -> bool:
+    return _tracer is not None
+
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[Optional[Any]]:
+    """
+    Child span of the current one for the duration of the block. Yields the span, or None when
+    tracing is off, so callers can add attributes with `if current: current.set_attribute(...)`.
+    """
+    if _tracer is None:
+        yield None
+        return
+
+    with _tracer.start_as_current_span(name, attributes={key: value for key, value in attributes.items() if value is not None}) as current:
+        yield current
+
+
+def traced(name: Optional[str] = None) -> Callable:
+    """Decorator wrapping every call of a sync or async function in a span named service.function."""
+    def decorator(func):
+        span_name = name or f"{func.__module__.rsplit('.', 1)[-1]}.{func.__name__}"
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if _tracer is None:
+                    return await func(*args, **kwargs)
+                with span(span_name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _tracer is None:
+                return func(*args, **kwargs)
+            with span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+
+    return decorator
+
+
+def _end_with_error(current, error: BaseException):
+    current.record_exception(error)
+    current.set_status(Status(StatusCode.ERROR, str(error)))
+    current.end()
+
+
+def instrument_tracing(engine):
+    """One client span per SQL statement, parented to whatever span is current when it runs."""
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if _tracer is None:
+            return
+        current = _tracer.start_span("db.query", kind=SpanKind.CLIENT, attributes={
+            "db.system": conn.dialect.name,
+            "db.statement": statement[:MAX_STATEMENT_LENGTH],
+        })
+        conn.info.setdefault("trace_spans", []).append(current)
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        spans = conn.info.get("trace_spans")
+        if spans:
+            current = spans.pop()
+            if cursor.rowcount is not None and cursor.rowcount >= 0:
+                current.set_attribute("db.rowcount", cursor.rowcount)
+            current.end()
+
+    @event.listens_for(engine, "handle_error")
+    def _on_error(context):
+        spans = context.connection.info.get("trace_spans") if context.connection is not None else None
+        if spans:
+            _end_with_error(spans.pop(), context.original_exception)
+
+
+def instrument_boto_client(client):
+    """One client span per AWS API call made through client, including each part of a multipart upload."""
+    service = client.meta.service_model.service_id.hyphenize()
+
+    # before-parameter-build still sees the caller's parameters (Bucket, Key), before-call only the serialized request
+    def _before_call(model, params, context, **kwargs):
+        if _tracer is None:
+            return
+        attributes = {"rpc.system": "aws-api", "rpc.service": service, "rpc.method": model.name}
+        if params.get("Bucket"):
+            attributes["aws.s3.bucket"] = params["Bucket"]
+        if params.get("Key"):
+            attributes["aws.s3.key"] = params["Key"]
+        context["trace_span"] = _tracer.start_span(f"{service}.{model.name}", kind=SpanKind.CLIENT, attributes=attributes)
+
+    def _after_call(http_response, context, **kwargs):
+        current = context.pop("trace_span", None)
+        if current is not None:
+            current.set_attribute("http.status_code", http_response.status_code)
+            current.end()
+
+    def _after_call_error(exception, context, **kwargs):
+        current = context.pop("trace_span", None)
+        if current is not None:
+            _end_with_error(current, exception)
+
+    client.meta.events.register(f"before-parameter-build.{service}", _before_call)
+    client.meta.events.register(f"after-call.{service}", _after_call)
+    client.meta.events.register(f"after-call-error.{service}", _after_call_error)
+
+
+class TracingMiddleware:
+    """
+    Server span for every HTTP request, continuing the caller's trace when it sends a traceparent header.
+    The span is renamed to the route template once routing has matched.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or _tracer is None:
+            await self.app(scope, receive, send)
+            return
+
+        carrier = {key.decode("latin-1"): value.decode("latin-1") for key, value in scope.get("headers", [])}
+        method = scope.get("method", "")
+
+        with _tracer.start_as_current_span(
+            f"{method} {scope.get('path', '')}",
+            context=propagate.extract(carrier),
+            kind=SpanKind.SERVER,
+            attributes={"http.method": method, "http.target": scope.get("path", "")},
+        ) as current:
+            async def send_with_status(message):
+                if message["type"] == "http.response.start":
+                    current.set_attribute("http.status_code", message["status"])
+                    if message["status"] >= 500:
+                        current.set_status(Status(StatusCode.ERROR))
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_status)
+            finally:
+                route = getattr(scope.get("route"), "path", None)
+                if route:
+                    current.update_name(f"{method} {route}")
+                    current.set_attribute("http.route", route)
@@ -1,6 +1,12 @@
-from fastapi import FastAPI
+from typing import Optional
+from fastapi import FastAPI, Header, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 from .core.config import settings
+from .core.health import readiness
+from .core.metrics import MetricsMiddleware, render_prometheus
+from .core.query_profiler import QueryProfilerMiddleware
+from .core.tracing import TracingMiddleware, configure_tracing
 from .api.v1.api import api_router
 
 from app.models import *
@@ -28,4 +34,31 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-app.include_router(api_router, prefix=settings.API_V1_STR)
\ No newline at end of file
+app.include_router(api_router, prefix=settings.API_V1_STR)
+
+if settings.QUERY_PROFILER_ENABLED:
+    app.add_middleware(QueryProfilerMiddleware, repeat_threshold=settings.QUERY_PROFILER_REPEAT_THRESHOLD)
+
+if configure_tracing():
+    app.add_middleware(TracingMiddleware)
+
+# Outermost, so the latency includes CORS and every other middleware
+app.add_middleware(MetricsMiddleware)
+
+@app.get("/metrics", include_in_schema=False, response_class=PlainTextResponse)
+async def metrics(authorization: Optional[str] = Header(None)):
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+    if settings.METRICS_TOKEN and authorization != f"Bearer {settings.METRICS_TOKEN}":
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+    
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
+@app.get("/health/live", include_in_schema=False)
+async def live():
+    return {"status": "ok"}
+
+@app.get("/health/ready", include_in_schema=False)
+def ready():
+    ok, checks = readiness()
+    return JSONResponse({"status": "ok" if ok else "unavailable", "checks": checks}, status_code=200 if ok else 503)
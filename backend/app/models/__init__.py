@@ -26,7 +26,8 @@ from .misc_models import (
     ClassRoster,
     Extracurricular,
     Document,
-    DocumentChunk
+    DocumentChunk,
+    IngestCheckpoint
 )
 
 from .result_models import (
@@ -42,7 +43,8 @@ from .chat_models import (
     ChatConversation,
     ChatContext,
     ChatMessage,
-    ChatMessageContext
+    ChatMessageContext,
+    ChatAnswerCache
 )
 
 from .calendar_models import (
@@ -56,8 +58,8 @@ __all__ = [
     'LoginInfo', 'Student', 'Faculty', 'GraduationStatus', 'EnrollmentRecord',
     'Exam', 'ContentArea', 'Option', 'Question', 'QuestionClassification', 'QuestionOption',
     'Class', 'ClassOffering', 'GradeClassification', 'StudentGrade',
-    'ClassRoster', 'Extracurricular',
+    'ClassRoster', 'Extracurricular', 'Document', 'DocumentChunk', 'IngestCheckpoint',
     'Clerkship', 'ExamResults', 'StudentQuestionPerformance',
-    'ChatConversation', 'ChatContext', 'ChatMessage', 'ChatMessageContext',
+    'ChatConversation', 'ChatContext', 'ChatMessage', 'ChatMessageContext', 'ChatAnswerCache',
     'CalendarEvent', 'StudyPlan', 'StudyPlanEvent'
 ]
\ No newline at end of file
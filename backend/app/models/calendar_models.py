@@ -1,10 +1,11 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Identity, DateTime, JSON, Text, Float
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Identity, DateTime, JSON, Text, Float, Index
 from sqlalchemy.orm import relationship
 from app.core.base import Base
 from datetime import datetime
 
 class CalendarEvent(Base):
     __tablename__ = 'calendar_events'
+    __table_args__ = (Index('ix_calendar_events_student_start', 'student_id', 'start_time'),)
 
     event_id = Column('event_id', String(36), primary_key=True)
     student_id = Column('student_id', Integer, ForeignKey('student.studentid'), nullable=False)
@@ -1,6 +1,6 @@
-from sqlalchemy import Column, Integer, String, Boolean, Float, ForeignKey, Identity, DateTime, Numeric, Text, func
+from sqlalchemy import Column, Integer, String, Boolean, Float, ForeignKey, Identity, DateTime, Numeric, Text, Index, func
 from sqlalchemy.orm import relationship
-from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.dialects.postgresql import JSONB, ARRAY
 from pgvector.sqlalchemy import Vector
 from app.core.base import Base
 import datetime
@@ -17,6 +17,8 @@ class ChatConversation(Base):
     totaltokensinput = Column('totaltokensinput', Integer, default=0)
     totaltokensoutput = Column('totaltokensoutput', Integer, default=0)
     totalcost = Column('totalcost', Numeric(10, 6), default=0.0)
+    # Maintained by create_message so the history list doesn't count every conversation's messages
+    messagecount = Column('messagecount', Integer, default=0, nullable=False)
     
     messages = relationship('ChatMessage', back_populates='conversation')
     contexts = relationship('ChatContext', back_populates='source_conversation')
@@ -45,6 +47,10 @@ class ChatContext(Base):
     
 class ChatMessage(Base):
     __tablename__ = 'chatmessage'
+    __table_args__ = (
+        # Serves both the per-conversation filter and the keyset order of a history page
+        Index('ix_chatmessage_conversation_timestamp', 'conversationid', 'timestamp', 'messageid'),
+    )
     
     messageid = Column('messageid', Integer, Identity(start=1, increment=1), primary_key=True)
     conversationid = Column('conversationid', Integer, ForeignKey('chatconversation.conversationid', ondelete='CASCADE'))
@@ -71,4 +77,30 @@ class ChatMessageContext(Base):
     wasused = Column('wasused', Boolean, default=False)
     
     message = relationship('ChatMessage', back_populates='context_links')
-    context = relationship('ChatContext', back_populates='message_links')
\ No newline at end of file
+    context = relationship('ChatContext', back_populates='message_links')
+class ChatAnswerCache(Base):
+    __tablename__ = 'chatanswercache'
+    __table_args__ = (
+        Index(
+            'ix_chatanswercache_embedding', 'embedding',
+            postgresql_using='hnsw',
+            postgresql_with={'m': 16, 'ef_construction': 64},
+            postgresql_ops={'embedding': 'vector_cosine_ops'}
+        ),
+        Index('ix_chatanswercache_fingerprint', 'fingerprint', 'expiresat'),
+    )
+    
+    cacheid = Column('cacheid', Integer, Identity(start=1, increment=1), primary_key=True)
+    question = Column('question', Text, nullable=False)
+    answer = Column('answer', Text, nullable=False)
+    embedding = Column('embedding', Vector(768), nullable=False)
+    # sha256 of the model and the document chunks retrieved for the question, an answer is only
+    # reused when the new question retrieved exactly the same material
+    fingerprint = Column('fingerprint', String(64), nullable=False)
+    # Source documents, so re-ingesting one of them drops the answers built from it
+    documentids = Column('documentids', ARRAY(Integer), nullable=False, default=list)
+    model = Column('model', String(100))
+    hitcount = Column('hitcount', Integer, default=0)
+    createdat = Column('createdat', DateTime, default=func.now())
+    lasthitat = Column('lasthitat', DateTime, nullable=True)
+    expiresat = Column('expiresat', DateTime, nullable=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Identity, DateTime, Text
+from sqlalchemy import Column, Integer, String, ForeignKey, Identity, DateTime, Text, UniqueConstraint, Index
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 from app.core.base import Base
@@ -17,6 +17,7 @@ class Class(Base):
 
 class ClassOffering(Base):
     __tablename__ = 'classoffering'
+    __table_args__ = (UniqueConstraint('classid', 'datetaught', name='uq_classoffering_class_year'),)
 
     classofferingid = Column('classofferingid', Integer, Identity(start=1, increment=1), primary_key=True)
     facultyid = Column('facultyid', Integer, ForeignKey('faculty.facultyid'))
@@ -33,13 +34,18 @@ class Domain(Base):
     __tablename__ = 'domain'
     
     domainid = Column('domainid', Integer, Identity(start=1, increment=1), primary_key=True)
-    domainname = Column('domainname', String(255), nullable=False)
+    domainname = Column('domainname', String(255), nullable=False, unique=True)
     weight = Column('weight', Integer)
     
     domainIntersection = relationship('ClassDomain', back_populates='domainInfo')
     
 class ClassDomain(Base):
     __tablename__ = 'classdomain'
+    # The unique constraint's index serves lookups by classid, domain lookups need their own
+    __table_args__ = (
+        UniqueConstraint('classid', 'domaindid', name='uq_classdomain_class_domain'),
+        Index('ix_classdomain_domainid', 'domaindid'),
+    )
     
     classdomainid = Column('classdomainid', Integer, Identity(start=1, increment=1), primary_key=True)
     classid = Column('classid', Integer, ForeignKey('class.ClassID'))
@@ -50,6 +56,7 @@ class ClassDomain(Base):
 
 class GeneratedQuestion(Base):
     __tablename__ = 'generated_questions'
+    __table_args__ = (Index('ix_generated_questions_student_domain', 'student_id', 'domain', 'subdomain'),)
 
     id = Column('id', Integer, Identity(start=1, increment=1), primary_key=True)
     student_id = Column('student_id', Integer, ForeignKey('student.studentid'), nullable=False)
@@ -66,4 +73,19 @@ class GeneratedQuestion(Base):
     times_practiced = Column('times_practiced', Integer, default=0)
     times_correct = Column('times_correct', Integer, default=0)
     
-    student = relationship('Student', back_populates='generated_questions')
\ No newline at end of file
+    student = relationship('Student', back_populates='generated_questions')
+class QuestionGenerationJob(Base):
+    __tablename__ = 'question_generation_jobs'
+
+    id = Column('id', Integer, Identity(start=1, increment=1), primary_key=True)
+    student_id = Column('student_id', Integer, ForeignKey('student.studentid'), nullable=False, index=True)
+    domain = Column('domain', String(255), nullable=False)
+    subdomains = Column('subdomains', JSONB, nullable=False)
+    count = Column('count', Integer, nullable=False)
+    # pending, running, completed, partial (some subdomains failed) or failed
+    status = Column('status', String(20), nullable=False, default='pending')
+    # Per subdomain {"status", "question_ids", "error"}, written as each subdomain finishes
+    progress = Column('progress', JSONB, nullable=False, default=dict)
+    created_at = Column('created_at', DateTime, default=datetime.utcnow)
+    updated_at = Column('updated_at', DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    finished_at = Column('finished_at', DateTime, nullable=True)
@@ -8,7 +8,7 @@ class Exam(Base):
     __tablename__ = 'exam'
 
     examid = Column('examid', Integer, Identity(start=1, increment=1), primary_key=True, index=True)
-    examname = Column('examname', String(255), nullable=False)
+    examname = Column('examname', String(255), nullable=False, unique=True)
     examdescription = Column('examdescription', String(255))
     passscore = Column('passscore', Integer)
     examtype = Column('examtype', String(50))
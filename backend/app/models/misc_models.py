@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Identity, Text, DateTime, func
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Identity, Text, DateTime, UniqueConstraint, Index, func, text
 from sqlalchemy.orm import relationship
+from sqlalchemy.dialects.postgresql import JSONB
 from pgvector.sqlalchemy import Vector
 from app.core.base import Base
 
@@ -27,12 +28,27 @@ class Extracurricular(Base):
     
 class Document(Base):
     __tablename__ = 'document'
+    # Serves the newest-first keyset pagination of a student's notes
+    __table_args__ = (Index('ix_document_student_lastmodified', 'studentid', 'lastmodified', 'documentid'),)
     
     documentid = Column('documentid', Integer, Identity(start=1, increment=1), primary_key=True)
     title = Column('title', String(255))
     author = Column('author', String(255))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    s3_key = Column('s3_key', String(512))
+    # Re-uploads of the same key update this row in place and bump the version
+    s3_key = Column('s3_key', String(512), unique=True)
+    version = Column('version', Integer, nullable=False, default=1, server_default='1')
+    contenthash = Column('contenthash', String(64))
+    # Uploads are ingested in the background: pending -> processing -> ready, or failed
+    status = Column('status', String(20), nullable=False, default='ready', server_default='ready')
+    statusmessage = Column('statusmessage', Text)
+    ingeststats = Column('ingeststats', JSONB)
+    filesize = Column('filesize', Integer)
+    contenttype = Column('contenttype', String(255))
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    # Cached at upload time so listing notes never has to go to S3
+    lastmodified = Column('lastmodified', DateTime(timezone=True), server_default=func.now())
+    chunkcount = Column('chunkcount', Integer, nullable=False, default=0, server_default='0')
     facultyid = Column('facultyid', Integer, ForeignKey('faculty.facultyid'))
     studentid = Column('studentid', Integer, ForeignKey('student.studentid'))
     
@@ -42,12 +58,52 @@ class Document(Base):
     
 class DocumentChunk(Base):
     __tablename__ = 'documentchunk'
+    __table_args__ = (
+        # Global curriculum is the large shared corpus, it gets its own ANN index so scoped rows never
+        # compete for the top-k. Student scopes are small per owner and are searched exactly
+        # off the btree, which keeps their results complete however big the global corpus gets
+        Index(
+            'ix_documentchunk_embedding_global', 'embedding',
+            postgresql_using='hnsw',
+            postgresql_with={'m': 16, 'ef_construction': 64},
+            postgresql_ops={'embedding': 'vector_cosine_ops'},
+            postgresql_where=text("ownerscope = 'global'")
+        ),
+        Index('ix_documentchunk_owner', 'ownerscope', 'ownerid'),
+    )
     
     documentchunkid = Column('documentchunkid', Integer, Identity(start=1, increment=1), primary_key=True)
     documentid = Column('documentid', Integer, ForeignKey('document.documentid'))
     chunkindex = Column('chunkindex', Integer)
     content = Column('content', Text)
+    # sha256 of the chunk text, lets a re-ingest reuse embeddings for chunks that did not change
+    contenthash = Column('contenthash', String(64), index=True)
+    # Heading trail the chunk sits under, e.g. "Chapter 14: Heart > Layers of heart"
+    sectionpath = Column('sectionpath', String(1024))
+    tokencount = Column('tokencount', Integer)
+    # Copied from the parent document so scoped searches filter without joining: global or student
+    ownerscope = Column('ownerscope', String(10), nullable=False, default='global', server_default='global')
+    # studentid for the student scope, null for global
+    ownerid = Column('ownerid', Integer)
+    # Copied from the parent document too, a faculty filtered search selects its chunks off this index
+    facultyid = Column('facultyid', Integer, index=True)
     embedding = Column('embedding', Vector(768), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
-    documents = relationship('Document', back_populates='chunks')
\ No newline at end of file
+    documents = relationship('Document', back_populates='chunks')
+    
+class IngestCheckpoint(Base):
+    __tablename__ = 'ingestcheckpoint'
+    # One row per ingest source (file + sheet) so reruns can skip or resume finished work
+    __table_args__ = (UniqueConstraint('source', 'sheet', name='uq_ingestcheckpoint_source_sheet'),)
+    
+    checkpointid = Column('checkpointid', Integer, Identity(start=1, increment=1), primary_key=True)
+    source = Column('source', String(512), nullable=False)
+    sheet = Column('sheet', String(255), nullable=False, default='')
+    filehash = Column('filehash', String(64), nullable=False)
+    lastrow = Column('lastrow', Integer, default=0)
+    chunkindex = Column('chunkindex', Integer, default=0)
+    documentid = Column('documentid', Integer, ForeignKey('document.documentid', ondelete='SET NULL'), nullable=True)
+    # pending -> running -> complete, or failed
+    status = Column('status', String(20), nullable=False, default='pending')
+    updatedat = Column('updatedat', DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
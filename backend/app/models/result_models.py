@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, Date, DateTime, ForeignKey, Identity, Float
+from sqlalchemy import Column, Integer, String, Boolean, Date, DateTime, ForeignKey, Identity, Float, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from app.core.base import Base
 
@@ -19,6 +19,10 @@ class Clerkship(Base):
     
 class ExamResults(Base):
     __tablename__ = 'examresults'
+    __table_args__ = (
+        Index('ix_examresults_student_exam', 'studentid', 'examid'),
+        Index('ix_examresults_examid', 'examid'),
+    )
 
     examresultsid = Column('examresultsid', Integer, Identity(start=1, increment=1), primary_key=True)
     studentid = Column('studentid', Integer, ForeignKey('student.studentid'))
@@ -35,6 +39,7 @@ class ExamResults(Base):
     
 class StudentQuestionPerformance(Base):
     __tablename__ = 'studentquestionperformance'
+    __table_args__ = (Index('ix_studentquestionperformance_examresultsid', 'examresultsid'),)
 
     studentquestionperformanceid = Column('studentquestionperformanceid', Integer, Identity(start=1, increment=1), primary_key=True)
     examresultid = Column('examresultsid', Integer, ForeignKey('examresults.examresultsid'))
@@ -49,7 +54,7 @@ class GraduationStatus(Base):
     __tablename__ = 'graduationstatus'
 
     graduationstatusid = Column('graduationstatusid', Integer, Identity(start=1, increment=1), primary_key=True)
-    studentid = Column('studentid', Integer, ForeignKey('student.studentid'))
+    studentid = Column('studentid', Integer, ForeignKey('student.studentid'), unique=True)
     rosteryear = Column('rosteryear', Integer, ForeignKey('classroster.rosteryear'))
     graduationyear = Column('graduationyear', Integer)
     graduated = Column('graduated', Boolean)
@@ -61,6 +66,7 @@ class GraduationStatus(Base):
     
 class StudentGrade(Base):
     __tablename__ = 'studentgrade'
+    __table_args__ = (UniqueConstraint('studentid', 'gradeclassificationid', name='uq_studentgrade_student_classification'),)
 
     studentgradeid = Column('studentgradeid', Integer, Identity(start=1, increment=1), primary_key=True)
     studentid = Column('studentid', Integer, ForeignKey('student.studentid'))
@@ -74,6 +80,7 @@ class StudentGrade(Base):
 
 class GradeClassification(Base):
     __tablename__ = 'gradeclassification'
+    __table_args__ = (Index('ix_gradeclassification_classofferingid', 'classofferingid'),)
 
     gradeclassificationid = Column('gradeclassificationid', Integer, Identity(start=1, increment=1), primary_key=True)
     classofferingid = Column('classofferingid', Integer, ForeignKey('classoffering.classofferingid'))
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, Date, ForeignKey, Identity, Float
+from sqlalchemy import Column, Integer, String, Boolean, Date, ForeignKey, Identity, Float, Index
 from sqlalchemy.orm import relationship
 from app.core.base import Base
 
@@ -6,7 +6,7 @@ class LoginInfo(Base):
     __tablename__ = 'logininfo'
 
     logininfoid = Column('logininfoid', Integer, Identity(start=1, increment=10), primary_key=True)
-    username = Column('username', String(255), nullable=False)
+    username = Column('username', String(255), nullable=False, unique=True)
     password = Column('password', String(255), nullable=False)
     isactive = Column('isactive', Boolean)
     issuperuser = Column('issuperuser', Boolean)
@@ -20,6 +20,8 @@ class LoginInfo(Base):
 
 class Student(Base):
     __tablename__ = 'student'
+    # Every authenticated student request resolves its student id by login
+    __table_args__ = (Index('ix_student_logininfoid', 'logininfoid'),)
 
     studentid = Column('studentid', Integer, primary_key=True)
     logininfoid = Column('logininfoid', Integer, ForeignKey('logininfo.logininfoid'))
@@ -48,6 +50,7 @@ class Student(Base):
 
 class Faculty(Base):
     __tablename__ = 'faculty'
+    __table_args__ = (Index('ix_faculty_logininfoid', 'logininfoid'),)
 
     facultyid = Column('facultyid', Integer, primary_key=True)
     logininfoid = Column('logininfoid', Integer, ForeignKey('logininfo.logininfoid'))
@@ -62,6 +65,7 @@ class Faculty(Base):
     
 class FacultyAccess(Base):
     __tablename__ = 'facultyaccess'
+    __table_args__ = (Index('ix_facultyaccess_faculty_rosteryear', 'facultyid', 'rosteryear'),)
     
     facultyaccessid = Column('facultyaccessid', Integer, Identity(start=1, increment=1), primary_key=True)
     facultyid = Column('facultyid', Integer, ForeignKey('faculty.facultyid'))
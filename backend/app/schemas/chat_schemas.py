@@ -56,7 +56,10 @@ class ChatConversationDetail(BaseModel):
     totaltokensinput: int
     totaltokensoutput: int
     totalcost: float
+    message_count: int = 0
     messages: List[ChatMessageWithContextModel] = []
+    # Pass back as cursor to load the page of older messages, None once the start is reached
+    next_cursor: Optional[str] = None
 
 # Request schemas
 class SearchConversationsRequest(BaseModel):
@@ -0,0 +1,9 @@
+from pydantic import BaseModel, Field
+from typing import List
+
+class QuestionJobRequest(BaseModel):
+    domain: str
+    subdomains: List[str] = Field(..., min_length=1, max_length=50)
+    count: int = Field(5, ge=1, le=20, description="Questions per subdomain")
+    additional_context: str = ""
+    rag: bool = True
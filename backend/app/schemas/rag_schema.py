@@ -7,9 +7,23 @@ class DocumentSearchResult(BaseModel):
     content: str
     title: str
     author: str
+    sectionpath: Optional[str] = None
     similarity: float 
     
 class DocumentSearchResponse(BaseModel):
     results: List[DocumentSearchResult]
     total_results: int
-    
\ No newline at end of file
+    
+class NoteListItem(BaseModel):
+    documentid: int
+    key: str
+    title: Optional[str] = None
+    size_kb: Optional[float] = None
+    last_modified: Optional[datetime] = None
+    status: str
+    chunks: int
+    version: int
+
+class NoteListResponse(BaseModel):
+    items: List[NoteListItem]
+    next_cursor: Optional[str] = None
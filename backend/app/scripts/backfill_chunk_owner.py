@@ -0,0 +1,27 @@
+from app.core.migrations import backfill
+
+# Chunks stored before ownerscope/ownerid existed default to the global scope.
+# Copies the owner from the parent document so student notes drop out of the shared search space.
+# Runs in batches of chunk ids, each its own short transaction, so searches keep going meanwhile.
+
+
+def backfill_chunk_owner(batch_size=None, pause_seconds=None):
+    try:
+        summary = backfill("documentchunk", "documentchunkid", """
+            UPDATE documentchunk AS dc
+            SET ownerscope = 'student', ownerid = d.studentid
+            FROM document AS d
+            WHERE dc.documentid = d.documentid
+              AND dc.documentchunkid > :low AND dc.documentchunkid <= :high
+              AND d.studentid IS NOT NULL
+              AND (dc.ownerscope <> 'student' OR dc.ownerid IS DISTINCT FROM d.studentid)
+        """, batch_size=batch_size, pause_seconds=pause_seconds, label="chunk owners")
+        print(f"Moved {summary['updated']} chunks to the student scope")
+        return summary["updated"]
+    except Exception as e:
+        print(f"Error backfilling chunk owners: {e}")
+        return None
+
+
+if __name__ == "__main__":
+    backfill_chunk_owner()
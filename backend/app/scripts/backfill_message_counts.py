@@ -0,0 +1,31 @@
+from app.core.migrations import backfill
+
+# Conversations created before messagecount was maintained by create_message.
+# Batched by conversation id and safe to rerun; it also repairs counts that have drifted,
+# only rows whose count is wrong are written.
+
+
+def backfill_message_counts(batch_size=None, pause_seconds=None):
+    try:
+        summary = backfill("chatconversation", "conversationid", """
+            UPDATE chatconversation AS c
+            SET messagecount = counts.total
+            FROM (
+                SELECT c2.conversationid, count(m.messageid) AS total
+                FROM chatconversation AS c2
+                LEFT JOIN chatmessage AS m ON m.conversationid = c2.conversationid
+                WHERE c2.conversationid > :low AND c2.conversationid <= :high
+                GROUP BY c2.conversationid
+            ) AS counts
+            WHERE c.conversationid = counts.conversationid
+              AND c.messagecount IS DISTINCT FROM counts.total
+        """, batch_size=batch_size, pause_seconds=pause_seconds, label="message counts")
+        print(f"Backfilled message counts for {summary['updated']} conversations")
+        return summary["updated"]
+    except Exception as e:
+        print(f"Error backfilling message counts: {e}")
+        return None
+
+
+if __name__ == "__main__":
+    backfill_message_counts()
@@ -0,0 +1,44 @@
+from sqlalchemy import func
+
+from app.models import Document, DocumentChunk
+from app.core.database import get_db
+from app.services.s3_service import get_storage
+
+# Notes uploaded before sizes and chunk counts were cached on the document row.
+# Walks the bucket once (with continuation, not just the first 1000 keys) and fills them in.
+
+
+def backfill_note_metadata(prefix: str = "notes/"):
+    db = next(get_db())
+    updated = 0
+    try:
+        chunk_counts = dict(
+            db.query(DocumentChunk.documentid, func.count(DocumentChunk.documentchunkid))
+            .group_by(DocumentChunk.documentid)
+            .all()
+        )
+
+        for index, obj in enumerate(get_storage().list_objects(prefix), 1):
+            doc = db.query(Document).filter(Document.s3_key == obj["Key"]).first()
+            if doc:
+                doc.filesize = obj["Size"]
+                doc.lastmodified = obj["LastModified"]
+                doc.chunkcount = chunk_counts.get(doc.documentid, 0)
+                updated += 1
+            # One commit per listing page's worth of keys
+            if index % 1000 == 0:
+                db.commit()
+        db.commit()
+
+        print(f"Backfilled metadata for {updated} notes")
+        return updated
+    except Exception as e:
+        db.rollback()
+        print(f"Error backfilling note metadata: {e}")
+        return None
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    backfill_note_metadata()
@@ -0,0 +1,112 @@
+import os
+import re
+import sys
+import argparse
+from typing import Dict, List
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from app.services.extract_service import extract_texts
+from app.services.chunk_service import chunk_text, embedding_text, parse_blocks, CHUNK_MAX_TOKENS, CHUNK_MIN_TOKENS
+from app.services.rag_service import split_text
+from app.services.token_service import estimate_tokens
+
+RAG_DATA_DIR = os.path.join("app", "scripts", "data", "ragdata")
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.split()).lower()
+
+
+def build_queries(texts: Dict[str, str], every: int = 3, min_words: int = 8) -> List[str]:
+    """
+    Retrieval proxy without calling Gemini: every third sentence becomes a query, trimmed to its middle
+    words so it is not an exact copy. A chunk counts as relevant if it contains the trimmed span.
+    """
+    queries = []
+    for text in texts.values():
+        sentences = []
+        for kind, _, block in parse_blocks(text):
+            if kind == "paragraph":
+                sentences.extend(re.split(r"(?<=[.!?])\s+", " ".join(block.split())))
+        for indx, sentence in enumerate(sentences):
+            words = sentence.split()
+            if indx % every or len(words) < min_words:
+                continue
+            trim = len(words) // 5
+            queries.append(" ".join(words[trim:len(words) - trim]))
+    return queries
+
+
+def evaluate(name: str, chunks: List[str], embed_inputs: List[str], queries: List[str], corpus_tokens: int) -> dict:
+    vectorizer = TfidfVectorizer(stop_words="english", sublinear_tf=True)
+    matrix = vectorizer.fit_transform(embed_inputs)
+    query_matrix = vectorizer.transform(queries)
+    scores = (query_matrix @ matrix.T).toarray()
+
+    normalized_chunks = [_normalize(chunk) for chunk in chunks]
+    hits_at_1 = hits_at_3 = 0
+    reciprocal_ranks = []
+    answerable = 0
+    for indx, query in enumerate(queries):
+        target = _normalize(query)
+        relevant = {chunk_indx for chunk_indx, chunk in enumerate(normalized_chunks) if target in chunk}
+        if not relevant:
+            # The span was cut across two chunks, so no chunk can answer it on its own
+            reciprocal_ranks.append(0.0)
+            continue
+        answerable += 1
+        ranking = list(np.argsort(-scores[indx]))
+        rank = min(ranking.index(chunk_indx) for chunk_indx in relevant) + 1
+        hits_at_1 += rank == 1
+        hits_at_3 += rank <= 3
+        reciprocal_ranks.append(1.0 / rank)
+
+    embed_tokens = sum(estimate_tokens(text) for text in embed_inputs)
+    chunk_tokens = [estimate_tokens(chunk) for chunk in chunks]
+    return {
+        "splitter": name,
+        "chunks": len(chunks),
+        "embed_tokens": embed_tokens,
+        "overhead_pct": 100.0 * (embed_tokens - corpus_tokens) / corpus_tokens,
+        "max_chunk_tokens": max(chunk_tokens),
+        "mean_chunk_tokens": sum(chunk_tokens) / len(chunk_tokens),
+        "intact_spans_pct": 100.0 * answerable / len(queries),
+        "hit@1": 100.0 * hits_at_1 / len(queries),
+        "hit@3": 100.0 * hits_at_3 / len(queries),
+        "mrr": sum(reciprocal_ranks) / len(queries),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the fixed-size splitter with the structure aware chunker")
+    parser.add_argument("--max-tokens", type=int, default=CHUNK_MAX_TOKENS)
+    parser.add_argument("--min-tokens", type=int, default=CHUNK_MIN_TOKENS)
+    args = parser.parse_args()
+
+    file_paths = sorted(os.path.join(RAG_DATA_DIR, name) for name in os.listdir(RAG_DATA_DIR))
+    texts = extract_texts(file_paths)
+    corpus_tokens = sum(estimate_tokens(text) for text in texts.values())
+    queries = build_queries(texts)
+
+    legacy_chunks = [chunk for text in texts.values() for chunk in split_text(text)]
+    structured = [chunk for text in texts.values() for chunk in chunk_text(text, args.max_tokens, args.min_tokens)]
+
+    results = [
+        evaluate("recursive 1000/200 chars", legacy_chunks, legacy_chunks, queries, corpus_tokens),
+        evaluate(f"structured {args.max_tokens} tokens", [chunk["content"] for chunk in structured],
+                 [embedding_text(chunk) for chunk in structured], queries, corpus_tokens),
+    ]
+
+    print(f"{len(texts)} documents, {corpus_tokens} tokens of text, {len(queries)} queries (TF-IDF retrieval proxy)")
+    columns = list(results[0].keys())
+    print(" | ".join(f"{column:>14}" for column in columns))
+    for result in results:
+        print(" | ".join(
+            f"{value:>14.2f}" if isinstance(value, float) else f"{value:>14}" for value in result.values()
+        ))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,162 @@
+import sys
+import json
+import argparse
+import threading
+from typing import Dict, Iterator, List, Optional
+
+from app.scripts.benchmarks.api import SCENARIOS, load_users
+
+# Missing index audit: replays the endpoint mix of the api benchmark, captures every SELECT it runs
+# and explains each distinct one with EXPLAIN (ANALYZE, BUFFERS) inside a rolled back transaction.
+#
+#   DATABASE_URL=... python -m app.scripts.benchmarks.api seed --reset
+#   DATABASE_URL=... python -m app.scripts.benchmarks.explain --min-rows 1000 --fail-on-seq-scan
+#
+# Sequential scans reading at least --min-rows rows are reported with the table, the rows read and how
+# many of those the filter threw away, a high discard ratio usually means a missing index.
+
+DEFAULT_MIN_ROWS = 1000
+
+
+def walk(plan: Dict) -> Iterator[Dict]:
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from walk(child)
+
+
+def seq_scans(plan: Dict, min_rows: int = 0) -> List[Dict]:
+    """Seq Scan nodes of an EXPLAIN (ANALYZE, FORMAT JSON) plan that read at least min_rows rows."""
+    scans = []
+    for node in walk(plan["Plan"] if "Plan" in plan else plan):
+        if node.get("Node Type") != "Seq Scan":
+            continue
+        loops = node.get("Actual Loops", 1)
+        returned = node.get("Actual Rows", 0) * loops
+        removed = node.get("Rows Removed by Filter", 0) * loops
+        if returned + removed < min_rows:
+            continue
+        scans.append({
+            "relation": node.get("Relation Name"),
+            "rows_read": returned + removed,
+            "rows_removed": removed,
+            "loops": loops,
+            "filter": node.get("Filter"),
+            "shared_blocks": node.get("Shared Hit Blocks", 0) + node.get("Shared Read Blocks", 0),
+        })
+    return scans
+
+
+def capture(app, users: List[dict], scenarios: List[str], requests: int) -> Dict[str, Dict]:
+    """Distinct SELECT statements the scenarios run, keyed by normalized SQL with the first parameters seen."""
+    from fastapi.testclient import TestClient
+    from sqlalchemy import event
+
+    from app.core.database import engine
+    from app.core.query_profiler import normalize_sql
+
+    statements: Dict[str, Dict] = {}
+    lock = threading.Lock()
+    # Queries from the app's own startup are attributed to None
+    scenario = None
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if executemany or not statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            return
+        pattern = normalize_sql(statement)
+        with lock:
+            entry = statements.get(pattern)
+            if entry is None:
+                entry = statements[pattern] = {"statement": statement, "parameters": parameters, "scenarios": [], "count": 0}
+            entry["count"] += 1
+            if scenario and scenario not in entry["scenarios"]:
+                entry["scenarios"].append(scenario)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        with TestClient(app) as client:
+            for scenario in scenarios:
+                build_path = SCENARIOS[scenario]
+                for index in range(requests):
+                    user = users[index % len(users)]
+                    client.get(build_path(user, index), headers=user["headers"])
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    return statements
+
+
+def explain(statement: str, parameters) -> Dict:
+    """EXPLAIN (ANALYZE, BUFFERS) output of one statement, the transaction is rolled back afterwards."""
+    from app.core.database import engine
+
+    with engine.connect() as connection:
+        transaction = connection.begin()
+        try:
+            row = connection.exec_driver_sql(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {statement}", parameters).scalar()
+        finally:
+            transaction.rollback()
+    plan = json.loads(row) if isinstance(row, str) else row
+    return plan[0]
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Explain the queries behind the hot endpoints and report sequential scans")
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=3, help="requests per scenario, each with a different student")
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--min-rows", type=int, default=DEFAULT_MIN_ROWS, help="ignore sequential scans reading fewer rows")
+    parser.add_argument("--output", help="write every plan and the scans found as JSON")
+    parser.add_argument("--fail-on-seq-scan", action="store_true", help="exit 1 when a sequential scan is reported")
+    args = parser.parse_args(argv)
+
+    from app.main import app
+    from app.services.llm_providers import FaultInjector, LocalProvider, set_llm_provider
+    from app.services.s3_service import LocalStorage, set_storage
+
+    users = load_users(args.users)
+    if not users:
+        print("No benchmark students found, run `python -m app.scripts.benchmarks.api seed` first")
+        return 1
+
+    set_llm_provider(LocalProvider(FaultInjector()))
+    set_storage(LocalStorage(faults=FaultInjector()))
+    try:
+        statements = capture(app, users, args.scenarios or list(SCENARIOS), args.requests)
+    finally:
+        set_llm_provider(None)
+        set_storage(None)
+
+    findings = []
+    for pattern, entry in statements.items():
+        plan = explain(entry["statement"], entry["parameters"])
+        entry["plan"] = plan
+        entry["seq_scans"] = seq_scans(plan, args.min_rows)
+        entry["execution_ms"] = plan.get("Execution Time")
+        for scan in entry["seq_scans"]:
+            findings.append({**scan, "scenarios": entry["scenarios"], "sql": pattern})
+
+    print(f"Explained {len(statements)} distinct statements")
+    for finding in sorted(findings, key=lambda finding: finding["rows_read"], reverse=True):
+        removed = finding["rows_removed"] / finding["rows_read"] if finding["rows_read"] else 0.0
+        print(
+            f"  Seq Scan on {finding['relation']:<28} {finding['rows_read']:>10} rows read  {removed:>5.0%} removed  "
+            f"({', '.join(finding['scenarios'])})"
+        )
+        if finding["filter"]:
+            print(f"    filter: {finding['filter']}")
+    if not findings:
+        print(f"No sequential scans over {args.min_rows} rows")
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump({"min_rows": args.min_rows, "findings": findings, "statements": [
+                {"sql": pattern, "scenarios": entry["scenarios"], "count": entry["count"],
+                 "execution_ms": entry["execution_ms"], "plan": entry["plan"]}
+                for pattern, entry in statements.items()
+            ]}, file, indent=2, default=str)
+        print(f"Wrote {args.output}")
+
+    return 1 if findings and args.fail_on_seq_scan else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
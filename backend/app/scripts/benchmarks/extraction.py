@@ -0,0 +1,100 @@
+import os
+import sys
+import time
+import shutil
+import tempfile
+import argparse
+
+import pypdf
+
+from app.services.extract_service import extract_texts, PAGES_PER_TASK
+
+RAG_DATA_DIR = os.path.join("app", "scripts", "data", "ragdata")
+
+
+def legacy_extract(file_path: str) -> str:
+    # The original serial extractors, kept here as the baseline
+    _, ext = os.path.splitext(file_path)
+    text = ""
+    if ext.lower() == ".pdf":
+        with open(file_path, "rb") as file:
+            for page in pypdf.PdfReader(file).pages:
+                text += page.extract_text() + "\n"
+    else:
+        import docx
+        for paragraph in docx.Document(file_path).paragraphs:
+            text += paragraph.text + "\n"
+    return text
+
+
+def build_corpus(work_dir: str, scale: int):
+    """Copies every ragdata chapter `scale` times and merges the PDFs into one long document."""
+    sources = sorted(os.path.join(RAG_DATA_DIR, name) for name in os.listdir(RAG_DATA_DIR))
+    file_paths = []
+    for copy in range(scale):
+        for source in sources:
+            target = os.path.join(work_dir, f"{copy:03d}_{os.path.basename(source)}")
+            shutil.copyfile(source, target)
+            file_paths.append(target)
+
+    writer = pypdf.PdfWriter()
+    for source in sources:
+        if source.lower().endswith(".pdf"):
+            for _ in range(max(1, scale // 10)):
+                writer.append(source)
+    merged_path = os.path.join(work_dir, "merged_chapters.pdf")
+    with open(merged_path, "wb") as file:
+        writer.write(file)
+
+    return file_paths, merged_path
+
+
+def timed(label: str, func):
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<40} {elapsed:8.2f}s")
+    return result, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark serial vs process pool text extraction")
+    parser.add_argument("--scale", type=int, default=100, help="copies of each ragdata chapter")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--skip-serial", action="store_true", help="skip the slow legacy baseline")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="medpass_extract_bench_")
+    cache_dir = tempfile.mkdtemp(prefix="medpass_extract_cache_")
+    os.environ["EXTRACT_CACHE_DIR"] = cache_dir
+    from app.core.config import settings
+    settings.EXTRACT_CACHE_DIR = cache_dir
+
+    try:
+        file_paths, merged_path = build_corpus(work_dir, args.scale)
+        merged_pages = len(pypdf.PdfReader(merged_path).pages)
+        print(f"{len(file_paths)} files + merged PDF of {merged_pages} pages, {args.workers} workers")
+
+        if not args.skip_serial:
+            legacy, _ = timed("serial legacy (+= per page)", lambda: {path: legacy_extract(path) for path in file_paths})
+            timed("serial legacy merged PDF", lambda: legacy_extract(merged_path))
+
+        pooled, _ = timed("process pool, cold cache", lambda: extract_texts(file_paths, max_workers=args.workers, use_cache=False))
+        timed(f"process pool merged PDF ({PAGES_PER_TASK} pages/task)", lambda: extract_texts([merged_path], max_workers=args.workers, use_cache=False))
+
+        # Copies share a content hash, so after the first write every file is served from the cache
+        timed("process pool, populate cache", lambda: extract_texts(file_paths, max_workers=args.workers))
+        timed("process pool, warm cache", lambda: extract_texts(file_paths, max_workers=args.workers))
+
+        if not args.skip_serial:
+            # DOCX output now carries heading/table markers, so only PDFs are expected to match byte for byte
+            pdf_paths = [path for path in file_paths if path.lower().endswith(".pdf")]
+            mismatched = [path for path in pdf_paths if legacy[path] != pooled.get(path)]
+            print(f"PDF output matches legacy extractor: {not mismatched} ({len(mismatched)} mismatched)")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
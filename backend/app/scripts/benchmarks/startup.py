@@ -0,0 +1,104 @@
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+from statistics import median
+from typing import Dict, List, Optional
+
+# Cold start of a worker: a fresh interpreter importing app.main, profiled with -X importtime.
+#
+#   python -m app.scripts.benchmarks.startup --runs 5 --max-seconds 1.0
+#
+# Exits 1 when the median import is over the target or one of HEAVY_MODULES was imported eagerly,
+# those are meant to load on first use (risk model, PDF export, ingestion, Gemini, S3).
+
+HEAVY_MODULES = (
+    "pandas", "sklearn", "scipy", "matplotlib", "seaborn", "reportlab",
+    "langchain", "pypdf", "docx", "google.generativeai", "boto3",
+)
+DEFAULT_TARGET_SECONDS = 1.0
+
+
+def parse_importtime(stderr: str) -> List[Dict]:
+    """Rows of `import time: self [us] | cumulative | name` as dicts, nesting depth from the indent."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        rows.append({
+            "module": name.strip(),
+            "depth": (len(name) - len(name.lstrip()) - 1) // 2,
+            "self_ms": int(self_us) / 1000,
+            "cumulative_ms": int(cumulative_us) / 1000,
+        })
+    return rows
+
+
+def cold_import(module: str = "app.main", importtime: bool = True) -> Dict:
+    """Imports module in a new interpreter. Returns the wall time, the heavy modules it loaded and the importtime rows."""
+    script = (
+        f"import sys, json; import {module}; "
+        f"print(json.dumps([name for name in {list(HEAVY_MODULES)!r} if name in sys.modules]))"
+    )
+    command = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", script]
+
+    started = time.perf_counter()
+    result = subprocess.run(command, capture_output=True, text=True, env=os.environ.copy())
+    wall = time.perf_counter() - started
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+
+    return {
+        "seconds": wall,
+        "heavy_modules": json.loads(result.stdout.strip().splitlines()[-1]),
+        "rows": parse_importtime(result.stderr) if importtime else [],
+    }
+
+
+def report(rows: List[Dict], top: int):
+    print("\nSlowest by cumulative time (top level packages)")
+    for row in sorted((row for row in rows if row["depth"] <= 1), key=lambda row: row["cumulative_ms"], reverse=True)[:top]:
+        print(f"  {row['cumulative_ms']:>9.1f}ms  {row['module']}")
+    print("\nSlowest by self time")
+    for row in sorted(rows, key=lambda row: row["self_ms"], reverse=True)[:top]:
+        print(f"  {row['self_ms']:>9.1f}ms  {row['module']}")
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Profile and time a cold import of the API")
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters to time, the median is compared")
+    parser.add_argument("--max-seconds", type=float, default=DEFAULT_TARGET_SECONDS, help="cold start target")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--output", help="write the timings and importtime rows as JSON")
+    args = parser.parse_args(argv)
+
+    # The profiled run is reported, the timed runs go without -X importtime since it adds overhead
+    profiled = cold_import(args.module)
+    timings = [cold_import(args.module, importtime=False)["seconds"] for _ in range(args.runs)]
+    cold_start = median(timings)
+
+    report(profiled["rows"], args.top)
+    print(f"\nCold import of {args.module}: median {cold_start:.3f}s over {args.runs} runs (min {min(timings):.3f}s, max {max(timings):.3f}s), target {args.max_seconds:.3f}s")
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump({"module": args.module, "timings": timings, "median_seconds": cold_start,
+                       "heavy_modules": profiled["heavy_modules"], "rows": profiled["rows"]}, file, indent=2)
+        print(f"Wrote {args.output}")
+
+    failed = False
+    if profiled["heavy_modules"]:
+        print(f"Imported eagerly: {', '.join(profiled['heavy_modules'])}")
+        failed = True
+    if cold_start > args.max_seconds:
+        print(f"Over the cold start target by {cold_start - args.max_seconds:.3f}s")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,217 @@
+import hashlib
+import random
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Dict, List
+
+from sqlalchemy import Integer, text
+
+from app.core.base import Base
+from app.models import (
+    ChatContext,
+    ChatConversation,
+    ChatMessage,
+    Class,
+    ClassDomain,
+    ClassOffering,
+    ClassRoster,
+    Document,
+    DocumentChunk,
+    Domain,
+    Exam,
+    ExamResults,
+    Faculty,
+    GradeClassification,
+    GraduationStatus,
+    LoginInfo,
+    Question,
+    Student,
+    StudentGrade,
+    StudentQuestionPerformance,
+    CalendarEvent,
+)
+from app.models.class_models import GeneratedQuestion
+from app.services.llm_providers import EMBEDDING_DIM, deterministic_embedding
+
+# Every synthetic login shares this prefix, the benchmark runner finds its users by it
+USERNAME_PREFIX = "bench_student_"
+INSERT_BATCH = 1000
+
+DOMAINS = ["Cardiovascular", "Respiratory", "Renal", "Gastrointestinal", "Neurology", "Endocrine", "Reproductive", "Musculoskeletal"]
+SUBDOMAINS = ["Physiology", "Pathology", "Pharmacology", "Anatomy", "Microbiology"]
+EXAMS = ["CBSE", "Step 1", "Block 1 NBME", "Block 2 NBME", "Block 3 NBME", "Block 4 NBME", "Block 5 NBME", "Block 6 NBME"]
+WORDS = (
+    "cardiac output preload afterload renal clearance glomerular filtration insulin glucagon receptor "
+    "agonist antagonist inflammation necrosis apoptosis ischemia infarction murmur stenosis regurgitation "
+    "ventilation perfusion compliance surfactant hepatic portal biliary neuron synapse dopamine serotonin"
+).split()
+
+
+@dataclass
+class CohortSize:
+    students: int = 200
+    exams_per_student: int = 6
+    grades_per_student: int = 40
+    questions: int = 500
+    answers_per_exam: int = 20
+    conversations_per_student: int = 2
+    messages_per_conversation: int = 20
+    documents: int = 20
+    chunks_per_document: int = 50
+    generated_questions_per_student: int = 20
+    events_per_student: int = 15
+
+
+def fake_embedding(text_value: str) -> List[float]:
+    """Same vectors the local LLM provider returns, so seeded rows match the runner's queries."""
+    return deterministic_embedding(text_value, EMBEDDING_DIM)
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def _insert(db, model, rows: List[dict]):
+    for start in range(0, len(rows), INSERT_BATCH):
+        db.execute(model.__table__.insert(), rows[start:start + INSERT_BATCH])
+
+
+def reset(db):
+    """Empties every table. Only point this at a throwaway benchmark database."""
+    tables = ", ".join(f'"{table.name}"' for table in Base.metadata.sorted_tables)
+    db.execute(text(f"TRUNCATE {tables} RESTART IDENTITY CASCADE"))
+    db.commit()
+
+
+def seed_cohort(db, size: CohortSize, seed: int = 42) -> Dict[str, int]:
+    """
+    Inserts a synthetic cohort with explicit ids from 1 and returns the row count per table.
+    Embeddings come from fake_embedding, so RAG search works against the same fake backend the runner uses.
+    """
+    rng = random.Random(seed)
+    now = datetime(2025, 1, 1)
+    counts: Dict[str, int] = {}
+
+    def add(model, rows):
+        _insert(db, model, rows)
+        counts[model.__tablename__] = len(rows)
+
+    # ——————— Curriculum ———————
+    add(ClassRoster, [{"rosteryear": year, "initialrosteramount": size.students, "currentenrollment": size.students} for year in (2025, 2026, 2027, 2028)])
+    add(Faculty, [{"facultyid": 1, "firstname": "Bench", "lastname": "Faculty", "position": "Professor"}])
+    add(Domain, [{"domainid": index, "domainname": name, "weight": 10} for index, name in enumerate(DOMAINS, 1)])
+    add(Class, [{"ClassID": index, "ClassName": f"Block {index}", "Block": index} for index in range(1, len(DOMAINS) + 1)])
+    add(ClassDomain, [{"classdomainid": index, "classid": index, "domaindid": index} for index in range(1, len(DOMAINS) + 1)])
+    add(ClassOffering, [{"classofferingid": index, "facultyid": 1, "classid": index, "datetaught": 2024, "semester": "Fall"} for index in range(1, len(DOMAINS) + 1)])
+    classifications = [
+        {"gradeclassificationid": index, "classofferingid": (index - 1) % len(DOMAINS) + 1, "classificationname": f"{DOMAINS[(index - 1) % len(DOMAINS)]} {subdomain}", "unittype": "points"}
+        for index, subdomain in enumerate((subdomain for subdomain in SUBDOMAINS for _ in DOMAINS), 1)
+    ]
+    add(GradeClassification, classifications)
+    add(Exam, [{"examid": index, "examname": name, "passscore": 194, "examtype": "NBME"} for index, name in enumerate(EXAMS, 1)])
+    add(Question, [
+        {
+            "questionid": index,
+            "examid": rng.randint(1, len(EXAMS)),
+            "prompt": _sentence(rng, 12)[:255],
+            "questiondifficulty": rng.choice(["easy", "medium", "hard"]),
+            "gradeclassificationid": rng.randint(1, len(classifications)),
+        }
+        for index in range(1, size.questions + 1)
+    ])
+
+    # ——————— Students ———————
+    # Every login shares one precomputed hash, hashing per user would dominate the seed time
+    password_hash = "$2b$12$benchmarkbenchmarkbenchmarkbenchmarkbenchmarkbenchmark"
+    add(LoginInfo, [
+        {"logininfoid": index, "username": f"{USERNAME_PREFIX}{index}", "password": password_hash, "isactive": True, "issuperuser": False, "email": f"{USERNAME_PREFIX}{index}@example.com"}
+        for index in range(1, size.students + 1)
+    ])
+    add(Student, [
+        {"studentid": index, "logininfoid": index, "firstname": f"Student{index}", "lastname": "Bench", "cumgpa": round(rng.uniform(2.8, 4.0), 2), "bcpmgpa": round(rng.uniform(2.8, 4.0), 2), "mmicalc": round(rng.uniform(20, 40), 1)}
+        for index in range(1, size.students + 1)
+    ])
+    add(GraduationStatus, [
+        {"graduationstatusid": index, "studentid": index, "rosteryear": rng.choice((2025, 2026, 2027, 2028)), "graduationyear": 2028, "graduated": False, "graduationlength": 4, "status": "Active"}
+        for index in range(1, size.students + 1)
+    ])
+    add(StudentGrade, [
+        {"studentgradeid": (student - 1) * size.grades_per_student + grade, "studentid": student, "gradeclassificationid": rng.randint(1, len(classifications)),
+         "pointsearned": round(rng.uniform(50, 100), 1), "pointsavailable": 100.0, "daterecorded": date(2024, 9, 1) + timedelta(days=grade)}
+        for student in range(1, size.students + 1) for grade in range(1, size.grades_per_student + 1)
+    ])
+
+    results, performances = [], []
+    for student in range(1, size.students + 1):
+        for attempt in range(size.exams_per_student):
+            result_id = len(results) + 1
+            score = rng.randint(150, 260)
+            results.append({"examresultsid": result_id, "studentid": student, "examid": attempt % len(EXAMS) + 1, "score": score, "passorfail": score >= 194, "timestamp": now - timedelta(days=30 * attempt)})
+            for question_id in rng.sample(range(1, size.questions + 1), min(size.answers_per_exam, size.questions)):
+                performances.append({"studentquestionperformanceid": len(performances) + 1, "examresultsid": result_id, "questionid": question_id, "result": rng.random() < 0.7, "confidence": rng.randint(1, 5)})
+    add(ExamResults, results)
+    add(StudentQuestionPerformance, performances)
+
+    generated = []
+    for student in range(1, size.students + 1):
+        for index in range(1, size.generated_questions_per_student + 1):
+            practiced = rng.randint(0, 10)
+            generated.append({
+                "id": len(generated) + 1, "student_id": student,
+                "domain": DOMAINS[index % len(DOMAINS)], "subdomain": SUBDOMAINS[index % len(SUBDOMAINS)],
+                "question_text": _sentence(rng, 15), "correct_option": "A", "explanation": _sentence(rng, 10), "difficulty": "medium",
+                "options": [{"id": letter, "text": _sentence(rng, 4), "isCorrect": letter == "A"} for letter in "ABCD"],
+                "times_practiced": practiced, "times_correct": rng.randint(0, practiced), "created_at": now,
+            })
+    add(GeneratedQuestion, generated)
+    add(CalendarEvent, [
+        {
+            "event_id": f"bench-{student}-{index}", "student_id": student, "title": f"Study {DOMAINS[index % len(DOMAINS)]}",
+            "start_time": now + timedelta(days=index, hours=9), "end_time": now + timedelta(days=index, hours=11),
+            "all_day": False, "event_type": "study", "priority": 3, "created_at": now, "updated_at": now,
+        }
+        for student in range(1, size.students + 1) for index in range(1, size.events_per_student + 1)
+    ])
+
+    # ——————— Chat ———————
+    conversations, messages, contexts = [], [], []
+    for student in range(1, size.students + 1):
+        for _ in range(size.conversations_per_student):
+            conversation_id = len(conversations) + 1
+            conversations.append({"conversationid": conversation_id, "userid": student, "title": _sentence(rng, 4), "createdat": now, "updatedat": now,
+                                  "isactive": True, "totaltokensinput": 0, "totaltokensoutput": 0, "totalcost": 0, "messagecount": size.messages_per_conversation})
+            for index in range(size.messages_per_conversation):
+                content = _sentence(rng, 30)
+                messages.append({"messageid": len(messages) + 1, "conversationid": conversation_id, "sendertype": "user" if index % 2 == 0 else "assistant",
+                                 "content": content, "embedding": fake_embedding(content), "timestamp": now + timedelta(minutes=index), "tokensinput": 50, "tokensoutput": 200, "messagecost": 0})
+            summary = _sentence(rng, 60)
+            contexts.append({"contextid": len(contexts) + 1, "conversationid": conversation_id, "title": "Conversation summary", "content": summary,
+                             "embedding": fake_embedding(summary), "createdat": now, "updatedat": now, "isactive": True, "importancescore": 1.0, "createdby": student,
+                             "metadata": {"kind": "summary", "throughmessageid": len(messages), "summarizedmessages": size.messages_per_conversation}})
+    add(ChatConversation, conversations)
+    add(ChatMessage, messages)
+    add(ChatContext, contexts)
+
+    # ——————— Documents ———————
+    add(Document, [
+        {"documentid": index, "title": f"Chapter {index}", "author": "Bench", "created_at": now, "version": 1, "status": "ready", "chunkcount": size.chunks_per_document}
+        for index in range(1, size.documents + 1)
+    ])
+    chunks = []
+    for document in range(1, size.documents + 1):
+        for index in range(size.chunks_per_document):
+            content = " ".join(_sentence(rng, 20) for _ in range(5))
+            chunks.append({"documentchunkid": len(chunks) + 1, "documentid": document, "chunkindex": index, "content": content,
+                           "contenthash": hashlib.sha256(content.encode()).hexdigest(), "sectionpath": f"Chapter {document} > Section {index}",
+                           "tokencount": len(content) // 4, "ownerscope": "global", "embedding": fake_embedding(content), "created_at": now})
+    add(DocumentChunk, chunks)
+
+    # Explicit ids leave the identity sequences at 1, move them past the seeded rows
+    for table in Base.metadata.sorted_tables:
+        for column in table.primary_key.columns:
+            if isinstance(column.type, Integer) and table.name in counts:
+                db.execute(text(f"SELECT setval(pg_get_serial_sequence('\"{table.name}\"', '{column.name}'), GREATEST((SELECT MAX(\"{column.name}\") FROM \"{table.name}\"), 1))"))
+
+    db.commit()
+    return counts
+
@@ -0,0 +1,126 @@
+import os
+import sys
+import time
+import socket
+import argparse
+import subprocess
+import http.client
+from multiprocessing import Pool
+from typing import Dict, List, Optional
+
+from app.scripts.benchmarks.api import percentile
+
+# Throughput of the gunicorn server as the worker count grows:
+#
+#   python -m app.scripts.benchmarks.workers --workers 1 2 4 --clients 16 --duration 10
+#   DATABASE_URL=... python -m app.scripts.benchmarks.workers --path /api/v1/report --token <jwt>
+#
+# Each worker count gets its own server from gunicorn.conf.py on a free port, the local LLM and storage
+# providers, and load from --clients processes holding keep-alive connections. The default path only
+# exercises the framework, point --path at a real endpoint (with --token) against a seeded database.
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_live(port: int, timeout: float) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/health/live")
+            if conn.getresponse().status == 200:
+                return True
+        except OSError:
+            time.sleep(0.2)
+    return False
+
+
+def start_server(workers: int, port: int) -> subprocess.Popen:
+    env = dict(os.environ, WEB_WORKERS=str(workers), WEB_BIND=f"127.0.0.1:{port}", LLM_PROVIDER="local", STORAGE_PROVIDER="local")
+    return subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "--access-logfile", "/dev/null", "app.main:app"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+
+
+def client(job: Dict) -> Dict:
+    """One load generating process: GETs over a single keep-alive connection until the deadline."""
+    headers = {"Authorization": f"Bearer {job['token']}"} if job["token"] else {}
+    conn = http.client.HTTPConnection("127.0.0.1", job["port"], timeout=30)
+    latencies: List[float] = []
+    errors = 0
+    while time.monotonic() < job["deadline"]:
+        started = time.perf_counter()
+        try:
+            conn.request("GET", job["path"], headers=headers)
+            response = conn.getresponse()
+            response.read()
+            if response.status >= 400:
+                errors += 1
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            conn.close()
+            conn = http.client.HTTPConnection("127.0.0.1", job["port"], timeout=30)
+        latencies.append(time.perf_counter() - started)
+    conn.close()
+    return {"latencies": latencies, "errors": errors}
+
+
+def measure(workers: int, path: str, token: Optional[str], clients: int, duration: float, startup_timeout: float) -> Dict:
+    port = free_port()
+    server = start_server(workers, port)
+    try:
+        if not wait_until_live(port, startup_timeout):
+            raise RuntimeError(f"Server with {workers} workers did not come up within {startup_timeout}s")
+        # A short warm up so every worker has imported its lazy dependencies before timing
+        deadline = time.monotonic() + min(2.0, duration)
+        with Pool(clients) as pool:
+            pool.map(client, [{"port": port, "path": path, "token": token, "deadline": deadline}] * clients)
+
+            deadline = time.monotonic() + duration
+            results = pool.map(client, [{"port": port, "path": path, "token": token, "deadline": deadline}] * clients)
+    finally:
+        server.terminate()
+        server.wait(timeout=60)
+
+    latencies = [latency for result in results for latency in result["latencies"]]
+    return {
+        "workers": workers,
+        "requests": len(latencies),
+        "errors": sum(result["errors"] for result in results),
+        "throughput_rps": round(len(latencies) / duration, 1),
+        "p50_ms": round(1000 * percentile(latencies, 50), 2) if latencies else None,
+        "p95_ms": round(1000 * percentile(latencies, 95), 2) if latencies else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark gunicorn throughput from 1 to N workers")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--path", default="/health/live")
+    parser.add_argument("--token", help="bearer token for authenticated paths")
+    parser.add_argument("--clients", type=int, default=16, help="load generating processes")
+    parser.add_argument("--duration", type=float, default=10.0, help="timed seconds per worker count")
+    parser.add_argument("--startup-timeout", type=float, default=60.0)
+    args = parser.parse_args()
+
+    results = []
+    for workers in args.workers:
+        result = measure(workers, args.path, args.token, args.clients, args.duration, args.startup_timeout)
+        results.append(result)
+        # Scaling efficiency: throughput per worker relative to the first run
+        base = results[0]
+        efficiency = (result["throughput_rps"] / workers) / (base["throughput_rps"] / base["workers"]) if base["throughput_rps"] else 0.0
+        print(
+            f"{workers:>3} workers  {result['throughput_rps']:>9} req/s  p50 {result['p50_ms']}ms  p95 {result['p95_ms']}ms  "
+            f"errors {result['errors']}  efficiency {efficiency:.0%}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,10 @@
 import pandas as pd
 import re
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects.postgresql import insert
 from ..schemas.pydantic_base_models import result_schemas, class_schemas
 from app.models import Class, ClassOffering, GradeClassification, StudentGrade, Domain, ClassDomain
 from ..core.database import get_db
+from .ingest_utils import IngestReport, bulk_insert, iter_sheet_frames, read_sheet, frame_to_rows, validate_rows
 import os
 
 def extract_subject(text):
@@ -27,46 +28,49 @@ def ingest_class():
         "app", "scripts", "data", "Class Information.xlsx"
     )
     
-    df_class = pd.read_excel(class_filePath, sheet_name=0)
+    df_class = read_sheet(class_filePath, 0)
+    df_class['Block'] = pd.to_numeric(df_class['Block'], errors='coerce').astype('Int64')
     
     #Import Base Class Information
+    report = IngestReport("class")
     db = next(get_db())
     try:
-        for _, row in df_class.iterrows():
-            try:
-                class_data = class_schemas.ClassModel(
-                    ClassID = row['Class ID'],
-                    ClassName = row['Class Name'],
-                    ClassDescription = row['Description'],
-                    Block = row['Block']
-                ) 
-                db_class_data = Class(
-                    classid = class_data.ClassID,
-                    classname = class_data.ClassName,
-                    classdescription = class_data.ClassDescription,
-                    block = class_data.Block
-                )
-                db.add(db_class_data)
-                db.commit()
-            except IntegrityError:
-                print(f"Class {row['Class Name']} already exists in the database!")
-                db.rollback()
-            except Exception as e:
-                print(f"Error when adding data {e}")
-                db.rollback()
-                raise
+        rows = frame_to_rows(df_class, {
+            'Class ID': 'classid',
+            'Class Name': 'classname',
+            'Description': 'classdescription',
+            'Block': 'block'
+        })
+        # A malformed sheet fails here, before any class is written
+        rows = validate_rows(rows, class_schemas.ClassModel, {
+            'classid': 'ClassID',
+            'classname': 'ClassName',
+            'classdescription': 'ClassDescription',
+            'block': 'Block'
+        }, 'class')
+        bulk_insert(db, Class, rows, report)
         print('Base Class Data Loaded in Database')    
     except Exception as e:
         print(f"Unexpected Error {e}")
+        return None
     finally:
         db.close()
+        report.finish().print_summary()
+    
+    return report
         
+def _percent_to_float(column):
+    '''Convert to string first to strip % convert back to float after'''
+    return pd.to_numeric(column.astype(str).str.rstrip('%'), errors='coerce') * 100
+
 def process_sheet_data(data):
     number_subjects = len(data.columns[1:]) // 3
     groupavg_indx = data[data.iloc[:, 0] == 'Group Average'].index[0]
     
     topics_data = []
-    student_scores = []
+    student_frames = []
+    
+    student_rows = data[data.index > groupavg_indx]
     
     for sub_indx in range(number_subjects):
         '''Splits Block Into three sections for subjects'''
@@ -74,7 +78,6 @@ def process_sheet_data(data):
         subject_column = data.columns[start:start + 3] 
         
         topic_name = extract_subject(subject_column[0])
-        '''Convert to string first to strip % convert back to float after'''
         group_avg = float(str(data.iloc[groupavg_indx, start]).rstrip('%')) * 100
         
         topic_header = {
@@ -85,21 +88,29 @@ def process_sheet_data(data):
         }
         topics_data.append(topic_header)
         
-        student_rows = data[data.index > groupavg_indx].copy()
+        # Whole-column transforms instead of per-row parsing, blank cells stay NaN like before
+        raw = student_rows.iloc[:, start:start + 3]
+        scores = pd.DataFrame({
+            'student id': student_rows.iloc[:, 0],
+            'subject name': topic_name,
+            'percentage': _percent_to_float(raw.iloc[:, 0]),
+            'points achieved': pd.to_numeric(raw.iloc[:, 1], errors='coerce').astype(float),
+            'points available': pd.to_numeric(raw.iloc[:, 2], errors='coerce').astype(float)
+        })
         
-        for _, row in student_rows.iterrows():
-            try:
-                score = {
-                    'student id': row.iloc[0],
-                    'subject name': topic_name,
-                    'percentage': float(str(row.iloc[start]).rstrip('%')) * 100,
-                    'points achieved': float(row.iloc[start + 1]),
-                    'points available': float(row.iloc[start + 2])
-                }
-                student_scores.append(score)
-            except (ValueError, TypeError) as e:
-                print(f"Can not process score for studentID: {row.iloc[0]} in subject {topic_name}: {e}")
-                continue
+        # Values that were present but could not be parsed are dropped, matching the old per-row ValueError handling
+        invalid = (scores['percentage'].isna() & raw.iloc[:, 0].notna()) | \
+                  (scores['points achieved'].isna() & raw.iloc[:, 1].notna()) | \
+                  (scores['points available'].isna() & raw.iloc[:, 2].notna())
+        for student_id in scores.loc[invalid, 'student id']:
+            print(f"Can not process score for studentID: {student_id} in subject {topic_name}")
+        
+        student_frames.append(scores[~invalid])
+    
+    if student_frames:
+        student_scores = pd.concat(student_frames, ignore_index=True).to_dict('records')
+    else:
+        student_scores = []
             
     return topics_data, student_scores
 
@@ -111,82 +122,81 @@ def insert_class_offering(db, block_num, year):
             ClassID = int(class_id[0]),
             DateTaught = year
         ) 
-        db_offering_data = ClassOffering(
+        # Upsert on (classid, datetaught) so a rerun reuses the existing offering instead of failing
+        statement = insert(ClassOffering).values(
             classid = offering_data.ClassID,
             datetaught = offering_data.DateTaught
-        )
-        db.add(db_offering_data)
+        ).on_conflict_do_update(
+            index_elements = ['classid', 'datetaught'],
+            set_ = {'datetaught': offering_data.DateTaught}
+        ).returning(ClassOffering.classofferingid)
+        class_offering_id = db.execute(statement).scalar()
         db.commit()
         print(f'Class Offering Data for ClassID: {int(class_id[0])} for Year: {year} Loaded in Database')
-    except IntegrityError:
-        print(f"Class Offering with ClassID: {class_id} already exists in the database!")
-        db.rollback ()
     except Exception as e:
         print(f"Error when adding data {e}")
         db.rollback()
         raise 
        
-    return db_offering_data.classofferingid
+    return class_offering_id
         
-def insert_grade_classifications(db, topics_data, class_offering_id):
-    classification_ids = {}
+def insert_grade_classifications(db, topics_data, class_offering_id, report=None):
+    report = report or IngestReport("gradeclassification")
+    
+    # Classifications already created for this offering (previous or partial run) are reused
+    classification_ids = dict(
+        db.query(GradeClassification.classificationname, GradeClassification.gradeclassificationid).filter(
+            GradeClassification.classofferingid == class_offering_id
+        ).all()
+    )
+    
+    rows = []
     for subject in topics_data:
-        try:
-            classification_data = result_schemas.GradeClassification(
-                ClassOfferingID = class_offering_id,
-                ClassificationName = subject['name'],
-                UnitType = 'Assessment'
-            ) 
-            db_classification_data = GradeClassification(
-                classofferingid = classification_data.ClassOfferingID,
-                classificationname = classification_data.ClassificationName,
-                unittype = classification_data.UnitType
-            )
-            db.add(db_classification_data)
-            db.commit()
-            classification_ids[subject['name']] = db_classification_data.gradeclassificationid
-                
-        except IntegrityError:
-            print(f"Grade Classfication with name: {subject['name']} already exists in the database!")
-            db.rollback() 
-            
-        except Exception as e:
-            print(f"Error when adding data {e}")
-            db.rollback()
-            raise
+        if subject['name'] in classification_ids:
+            continue
+        classification_data = result_schemas.GradeClassification(
+            ClassOfferingID = class_offering_id,
+            ClassificationName = subject['name'],
+            UnitType = 'Assessment'
+        ) 
+        rows.append({
+            'classofferingid': classification_data.ClassOfferingID,
+            'classificationname': classification_data.ClassificationName,
+            'unittype': classification_data.UnitType
+        })
+    
+    inserted = bulk_insert(db, GradeClassification, rows, report, returning=['classificationname'])
+    classification_ids.update({row['classificationname']: row['gradeclassificationid'] for row in inserted})
     print(f'Grade Classification Data for Class Offering: {class_offering_id} Loaded in Database')
         
     return classification_ids
 
-def insert_student_grades(db, student_scores, classification_ids, block):
-    for row in student_scores:
-        try:
-            classification_id = classification_ids.get(row['subject name'])
-                    
-            student_data = result_schemas.StudentGrade(
-                StudentID = row['student id'],
-                GradeClassificationID = classification_id,
-                PointsEarned = row['points achieved'],
-                PointsAvailable = row['points available']
-            ) 
-            db_student_data = StudentGrade(
-                studentid = student_data.StudentID,
-                gradeclassificationid = student_data.GradeClassificationID, 
-                pointsearned = student_data.PointsEarned,
-                pointsavailable = student_data.PointsAvailable
-            )
-            db.add(db_student_data)
-            db.commit()      
-        except IntegrityError:
-            print(f"Student Grade with already exists for student: {row['student id']} already exists in the database!")
-            db.rollback() 
-        
-        except Exception as e:
-            print(f"Error when adding data {e}")
-            db.rollback()
-            raise
+def insert_student_grades(db, student_scores, classification_ids, block, report=None):
+    report = report or IngestReport(f"studentgrade block {block}")
+    
+    df_scores = pd.DataFrame(student_scores)
+    if df_scores.empty:
+        return report
+    
+    # Vectorized mapping from subject name to the newly created classification ids
+    df_scores['gradeclassificationid'] = df_scores['subject name'].map(classification_ids)
+    rows = frame_to_rows(df_scores, {
+        'student id': 'studentid',
+        'gradeclassificationid': 'gradeclassificationid',
+        'points achieved': 'pointsearned',
+        'points available': 'pointsavailable'
+    })
+    rows = validate_rows(rows, result_schemas.StudentGrade, {
+        'studentid': 'StudentID',
+        'gradeclassificationid': 'GradeClassificationID',
+        'pointsearned': 'PointsEarned',
+        'pointsavailable': 'PointsAvailable'
+    }, f'studentgrade block {block}')
+    bulk_insert(db, StudentGrade, rows, report)
     print(f'Student Grade Data for Block: {block} Loaded in Database')
     
+    return report
+    
 def ingest_domain():
     
     db = next(get_db())
@@ -201,27 +211,18 @@ def ingest_domain():
     
     df_domain_data = pd.DataFrame(base_domain_data)
     
+    report = IngestReport("domain")
     try:
-        for _, row in df_domain_data.iterrows():
-            try:
-                db_domain_data = Domain(
-                domainname = row['domainname'],
-                weight = row['weight']
-                )
-                db.add(db_domain_data)
-                db.commit()
-            except IntegrityError:
-                print(f"Domain {row['domainname']} already exists in the database!")
-                db.rollback()
-            except Exception as e:
-                print(f"Error when adding data {e}")
-                db.rollback()
-                raise
+        bulk_insert(db, Domain, frame_to_rows(df_domain_data, {'domainname': 'domainname', 'weight': 'weight'}), report)
         print('Base Domain Data Loaded in Database')    
     except Exception as e:
         print(f"Unexpected Error {e}")
+        return None
     finally:
         db.close()
+        report.finish().print_summary()
+    
+    return report
 
 def ingest_classdomain():
     class_filePath = os.path.join(
@@ -230,25 +231,57 @@ def ingest_classdomain():
     
     df_classdomainmapping = pd.read_csv(class_filePath)
 
+    report = IngestReport("classdomain")
     db = next(get_db())
     try:
-        for _, row in df_classdomainmapping.iterrows():
-            try:
-                db_classdomain_data = ClassDomain(
-                    classid = row['classid'],
-                    domainid = row['domainid']
-                )
-                db.add(db_classdomain_data)
-                db.commit()
-            except Exception as e:
-                print(f"Error when adding data {e}")
-                db.rollback()
-                raise
+        bulk_insert(db, ClassDomain, frame_to_rows(df_classdomainmapping, {'classid': 'classid', 'domainid': 'domainid'}), report)
         print('Base Class Domain Mapping Data Loaded in Database')    
     except Exception as e:
         print(f"Unexpected Error {e}")
+        return None
     finally:
         db.close()    
+        report.finish().print_summary()
+    
+    return report
+
+DROPPED_SHEETS = [
+    'Full ID List', '2024 Block 1 Block Filters', '2024 Block 2 Block Filters', '2024 Block 3', '2024 Block 4', 
+    '2024 Block 5', '2024 Block 6 Block Filters', '2024 Block 6 Category Filters', '2024 Block 7 Block Filters', '2024 Block 7 Category Filters', '2024 Block 8 Block Filters', '2024 Block 8 Category Filters', '2024 Block 9', '2024 Block 10'
+]
+
+def ingest_block_sheet(sheet_name, df_current, report):
+    sheet_name, year, block = process_sheet_name({sheet_name: df_current}, 0)
+    
+    db = next(get_db())
+    try:
+        topics_data, student_scores = process_sheet_data(df_current)
+        
+        class_offering_id = insert_class_offering(db, int(block), int(year))
+        
+        classification_ids = insert_grade_classifications(db, topics_data, class_offering_id)
+        
+        insert_student_grades(db, student_scores, classification_ids, block, report)
+        
+        print(f"Succesfully process sheet {sheet_name}")
+        return len(student_scores)
+        
+    except Exception as e:
+        print(f"Error processing sheet {sheet_name}: {e}")
+        db.rollback()
+        return None
+    finally:
+        db.close()
+
+def ingest_blocks(file_path):
+    report = IngestReport("studentgrade")
+    
+    # Sheets are streamed one at a time rather than loading the whole workbook up front
+    for sheet_name, df_current in iter_sheet_frames(file_path, skip_sheets=DROPPED_SHEETS):
+        ingest_block_sheet(sheet_name, df_current, report)
+    
+    report.finish().print_summary()
+    return report
 
 if __name__ == "__main__":
     
@@ -256,14 +289,6 @@ if __name__ == "__main__":
         "app", "scripts", "data", "Deidentified Reports (1).xlsx"
     )
     
-    df_unrdata = pd.read_excel(filePath, sheet_name=None)
-    dropped_sheets = [
-        'Full ID List', '2024 Block 1 Block Filters', '2024 Block 2 Block Filters', '2024 Block 3', '2024 Block 4', 
-        '2024 Block 5', '2024 Block 6 Block Filters', '2024 Block 6 Category Filters', '2024 Block 7 Block Filters', '2024 Block 7 Category Filters', '2024 Block 8 Block Filters', '2024 Block 8 Category Filters', '2024 Block 9', '2024 Block 10'
-    ]
-    df_unrdata = {name: df for name, df in df_unrdata.items() if name not in dropped_sheets}
-    sheet_names = df_unrdata.keys()
-    
     #Ingesting Base Domain Information
     ingest_domain()
       
@@ -273,27 +298,5 @@ if __name__ == "__main__":
     #Ingesting Base Class Domain Mappings
     ingest_classdomain()
     
-    
     #Ingestion Process Begins
-    for i in range(len(sheet_names)):
-        sheet_name, year, block = process_sheet_name(df_unrdata, i)
-        
-        df_current = df_unrdata[sheet_name]
-        try:
-            db = next(get_db())
-            topics_data, student_scores = process_sheet_data(df_current)
-            
-            class_offering_id = insert_class_offering(db, int(block), int(year))
-            
-            classification_ids = insert_grade_classifications(db, topics_data, class_offering_id)
-            
-            insert_student_grades(db, student_scores, classification_ids, block)
-            
-            print(f"Succesfully process sheet {sheet_name}")
-            
-        except Exception as e:
-            print(f"Error processing sheet {sheet_name}: {e}")
-            db.rollback()
-        finally:
-            db.close()   
-        
+    ingest_blocks(filePath)
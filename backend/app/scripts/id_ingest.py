@@ -4,29 +4,43 @@ from app.schemas.pydantic_base_models import user_schemas, exam_schemas, misc_sc
 from app.models import Student, ClassRoster, GraduationStatus, ExamResults, LoginInfo, Exam, Faculty
 from app.core.database import get_db, link_logininfo
 from app.core.security import get_password_hash
+from app.scripts.ingest_utils import IngestReport, bulk_insert, read_sheet, frame_to_rows, validate_rows
 import os
 
+#Adding Base Exam Name Data
+BASE_EXAM_DATA = {
+    'Exam Name': ['MCAT', 'CBSE', 'Step 1', 'Step 2', 'Text Exam'],
+    'Exam Description': ['Medical School Admission Exam', 'Step 1 Readiness Exam', 
+                         'Major Medical Exam for Pre-Pratical', 'Major Medical Exam Post-Pratical', 'Test Exam for Development'],
+    'Pass Score': [510, 70, 196, 214, 100]
+}
 
-if __name__ == "__main__":
-    
-    filePath = os.path.join(
-        "app", "scripts", "data", "Deidentified Reports (1).xlsx"
-    )
-    
-    df_unrdata = pd.read_excel(filePath, sheet_name=0)
+#Processing Exam Data
+EXAM_ID_DICT = {
+    'MCATcalc': 1,
+    'CBSE1 score': 2,
+    'CBSE2 score': 2,
+    'USMLE_Step1score': 3,
+    'USMLE_STEP2score': 4
+}
+
+EXAM_NAME_MAPPING = {
+    'MCATcalc': 'MCAT',
+    'CBSE1 score': 'CBSE',
+    'CBSE2 score': 'CBSE',
+    'USMLE_Step1score': 'Step 1',
+    'USMLE_STEP2score': 'Step 2'
+}
+
+def load_unr_frame(file_path):
+    df_unrdata = read_sheet(file_path, 0)
     
-    df_unrdata = df_unrdata.drop([
+    return df_unrdata.drop([
         'Bl1_5av_calc', 'Bl6-10av_calc', 'Bl1-10av_calc',
         'Graduated.4yr', 'Graduated.5yr', 'Graduated.6yr','Graduated.>6yr'
         ], axis='columns')
-    
-    #Creating Student List
-    df_student = df_unrdata[[
-        'Random Number ID', 'Cum.T.Gpa', 'Cum.Bcpm.Gpa', 
-        'MMIcalc'
-    ]]
-    
-    #Creating Class Roster List
+
+def build_class_roster(df_unrdata):
     df_classroster = df_unrdata[[
         'Matric.year', 'Grad.Year'
     ]]
@@ -47,242 +61,56 @@ if __name__ == "__main__":
     df_classroster['currentEnrollment'] = df_classroster['currentEnrollment'].astype(int)
     df_classroster['Matric.year'] = df_classroster['Matric.year'].astype(int)
     
-    #Creating Graduation Status Frame
+    return df_classroster
+
+def convertGradYear(string):
+    if pd.isna(string) or string == 'Active':
+        return None
     
+    try:
+        return int(string.split('.')[1].split('-')[0])
+    except:
+        return None
+
+def build_graduation_status(df_unrdata):
     #Status 2024Jan isn't ideal but basing it on avaialable data
     df_graduationstatus = df_unrdata[[
         'Random Number ID', 'Matric.year', 'Grad.Year', 'Graduated', 'Grad.yrs', 'Status2024Jan'
-    ]]
-    
-    def convertGradYear(string):
-        if pd.isna(string) or string == 'Active':
-            return None
-        
-        try:
-            return int(string.split('.')[1].split('-')[0])
-        except:
-            return None
+    ]].copy()
         
     df_graduationstatus['Grad.yrs'] = df_graduationstatus['Grad.yrs'].apply(convertGradYear).replace({float('nan'): None})
     df_graduationstatus['Grad.Year'] = df_graduationstatus['Grad.Year'].replace(['Active', 'Dropped'], None)
     df_graduationstatus['Graduated'] = df_graduationstatus['Graduated'].fillna(0).astype(bool)
-
-    #Adding Base Exam Name Data
-    base_exam_data = {
-        'Exam Name': ['MCAT', 'CBSE', 'Step 1', 'Step 2', 'Text Exam'],
-        'Exam Description': ['Medical School Admission Exam', 'Step 1 Readiness Exam', 
-                             'Major Medical Exam for Pre-Pratical', 'Major Medical Exam Post-Pratical', 'Test Exam for Development'],
-        'Pass Score': [510, 70, 196, 214, 100]
-    }
     
-    df_exam_data = pd.DataFrame(base_exam_data)
-    
-    #Adding Student Exam Data
+    return df_graduationstatus
+
+def build_student_exams(df_unrdata):
+    #Adding Student Exam Data, reshaped to one row per (student, exam column) with a vectorized pass calculation
     df_student_exam = df_unrdata[[
        'Random Number ID',  'MCATcalc', 'CBSE1 score', 'CBSE2 score', 'USMLE_Step1score', 'USMLE_STEP2score'
-    ]] 
+    ]].melt(id_vars='Random Number ID', var_name='exam column', value_name='score')
     
-    #Adding Student Data
-    try:
-        db = next(get_db())
-        for _, row in df_student.iterrows():
-            student_data = user_schemas.StudentSchema(
-                StudentID = row['Random Number ID'],
-                CumGPA = row['Cum.T.Gpa'],
-                BcpmGPA = row['Cum.Bcpm.Gpa'],
-                MMICalc = row['MMIcalc']
-            ) 
-            db_student = Student(
-                studentid = student_data.StudentID,
-                cumgpa = student_data.CumGPA,
-                bcpmgpa = student_data.BcpmGPA,
-                mmicalc = student_data.MMICalc
-            )
-            db.add(db_student)
-        db.commit()
-        print('Student Data Loaded in Database')
-        
-    except Exception as e:
-        print(f"Error when adding data {e}")
-        db.rollback()
-        raise
-    
-    finally:
-        db.close()    
-    
-    
-    
-    #Ingesting ClassRoster List
-    try:
-        db = next(get_db())
-        for _, row in df_classroster.iterrows():
-            roster_data = misc_schemas.ClassRoster(
-                RosterYear = row['Matric.year'],
-                InitialRosterAmount = row['initialRosterAmount'],
-                CurrentEnrollment = row['currentEnrollment']
-            ) 
-            db_roster = ClassRoster(
-                rosteryear = roster_data.RosterYear,
-                initialrosteramount = roster_data.InitialRosterAmount,
-                currentenrollment = roster_data.CurrentEnrollment
-            )
-            db.add(db_roster)
-        db.commit()
-        print('Class Roster Data Loaded in Database')
-        
-    except Exception as e:
-        print(f"Error when adding data {e}")
-        db.rollback()
-        raise
-    
-    finally:
-        db.close()   
+    df_student_exam['score'] = pd.to_numeric(df_student_exam['score'], errors='coerce')
+    df_student_exam = df_student_exam[df_student_exam['score'].notna()].copy()
     
+    exam_dict = dict(zip(BASE_EXAM_DATA['Exam Name'], BASE_EXAM_DATA['Pass Score']))
+    pass_scores = df_student_exam['exam column'].map(EXAM_NAME_MAPPING).map(exam_dict)
     
-    # ingesting graduation status
-    try:
-        db = next(get_db())
-        for _, row in df_graduationstatus.iterrows():
-            graduation_data = result_schemas.GraduationStatus(
-                StudentID = row['Random Number ID'],
-                RosterYear = row['Matric.year'],
-                GraduationYear = row['Grad.Year'],
-                Graduated = row['Graduated'],
-                GraduationLength = row['Grad.yrs'],
-                Status = row['Status2024Jan']
-            ) 
-            db_graduation = GraduationStatus(
-                studentid = graduation_data.StudentID,
-                rosteryear = graduation_data.RosterYear,
-                graduationyear = graduation_data.GraduationYear,
-                graduated = graduation_data.Graduated,
-                graduationlength = graduation_data.GraduationLength,
-                status = graduation_data.Status
-            )
-            db.add(db_graduation)
-        db.commit()
-        print('Graduation Status Data Loaded in Database')
-        
-    except Exception as e:
-        print(f"Error when adding data {e}")
-        db.rollback()
-        raise
+    df_student_exam['studentid'] = df_student_exam['Random Number ID'].astype(int)
+    df_student_exam['examid'] = df_student_exam['exam column'].map(EXAM_ID_DICT)
+    df_student_exam['score'] = df_student_exam['score'].astype(int)
+    df_student_exam['passorfail'] = (df_student_exam['score'] >= pass_scores).where(pass_scores.notna(), None)
     
-    finally:
-        db.close()  
-    
-    #Ingesting Exam Data
-    try:
-        db = next(get_db())
-        for _, row in df_exam_data.iterrows():
-            exam_data = exam_schemas.Exam(
-                ExamName = row['Exam Name'],
-                ExamDescription = row['Exam Description'],
-                PassScore = row['Pass Score']
-            ) 
-            db_exam_data = Exam(
-                examname = exam_data.ExamName,
-                examdescription = exam_data.ExamDescription,
-                passscore = exam_data.PassScore
-            )
-            db.add(db_exam_data)
-        db.commit()
-        print('Exam Data Loaded in Database')
-        
-    except Exception as e:
-        print(f"Error when adding data {e}")
-        db.rollback()
-        raise
-    
-    finally:
-        db.close()  
-    
-    
-    #Processing Exam Data
-    exam_id_dict = {
-        'MCATcalc': 1,
-        'CBSE1 score': 2,
-        'CBSE2 score': 2,
-        'USMLE_Step1score': 3,
-        'USMLE_STEP2score': 4
-    }
-    
-    exam_name_mapping = {
-        'MCATcalc': 'MCAT',
-        'CBSE1 score': 'CBSE',
-        'CBSE2 score': 'CBSE',
-        'USMLE_Step1score': 'Step 1',
-        'USMLE_STEP2score': 'Step 2'
-    }
-    
-    exam_columns = ['MCATcalc', ('CBSE1 score', 'CBSE2 score'), 'USMLE_Step1score', 'USMLE_STEP2score']
-    processed_student_exam = []
-    exam_dict = dict(zip(base_exam_data['Exam Name'], base_exam_data['Pass Score']))
-    
-    def pass_calculate(score, passScore):
-                if score >= passScore:
-                    return True
-                elif score < passScore:
-                    return False
-                else:
-                    return None
-                
-    
-    for _, row in df_student_exam.iterrows():
-        for exam_col in ['MCATcalc', 'USMLE_Step1score', 'USMLE_STEP2score']:
-            passScore = exam_dict.get(exam_name_mapping.get(exam_col), None)
-            
-            if pd.notna(row[exam_col]):
-                data = {
-                    'studentID': int(row['Random Number ID']),
-                    'examID': exam_id_dict[exam_col],
-                    'clerkshipID': None,
-                    'score': int(row[exam_col]),
-                    'passOrFail': pass_calculate(int(row[exam_col]), passScore)
-                }
-                processed_student_exam.append(data)
-        
-        if pd.notna(row['CBSE1 score']):
-            passScore = exam_dict.get(exam_name_mapping.get('CBSE1 score'), None)
-            data = {
-                'studentID': int(row['Random Number ID']),
-                'examID': exam_id_dict['CBSE1 score'],
-                'clerkshipID': None,
-                'score': int(row['CBSE1 score']),
-                'passOrFail': pass_calculate(int(row['CBSE1 score']), passScore)
-            }
-            processed_student_exam.append(data)
-        
-        if pd.notna(row['CBSE2 score']):
-            passScore = exam_dict.get(exam_name_mapping.get('CBSE2 score'), None)
-            data = {
-                'studentID': int(row['Random Number ID']),
-                'examID': exam_id_dict['CBSE2 score'],
-                'clerkshipID': None,
-                'score': int(row['CBSE2 score']),
-                'passOrFail': pass_calculate(int(row['CBSE2 score']), passScore)
-            }
-            processed_student_exam.append(data)
-        
-    #Ingesting Processed Student Data
+    return df_student_exam[['studentid', 'examid', 'score', 'passorfail']]
+
+def ingest_frame(model, df, column_map, name, schema, schema_fields):
+    report = IngestReport(name)
+    db = next(get_db())
     try:
-        db = next(get_db())
-        for row in processed_student_exam:
-            student_exam_data = result_schemas.ExamResults(
-                StudentID = row['studentID'],
-                ExamID = row['examID'],
-                Score = row['score'],
-                PassOrFail = row['passOrFail']
-            ) 
-            db_student_exam_data = ExamResults(
-                studentid = student_exam_data.StudentID,
-                examid = student_exam_data.ExamID,
-                score = student_exam_data.Score,
-                passorfail = student_exam_data.PassOrFail     
-            )
-            db.add(db_student_exam_data)
-        db.commit()
-        print('Student Exam Data Loaded in Database')
+        # Every row goes through its pydantic schema first, so a malformed sheet fails before anything is inserted
+        rows = validate_rows(frame_to_rows(df, column_map), schema, schema_fields, name)
+        bulk_insert(db, model, rows, report)
+        print(f'{name} Data Loaded in Database')
         
     except Exception as e:
         print(f"Error when adding data {e}")
@@ -290,11 +118,82 @@ if __name__ == "__main__":
         raise
     
     finally:
-        db.close()  
+        db.close()
+        report.finish().print_summary()
     
+    return report
+
+def ingest_students(df_unrdata):
+    df_student = df_unrdata[[
+        'Random Number ID', 'Cum.T.Gpa', 'Cum.Bcpm.Gpa', 
+        'MMIcalc'
+    ]]
+    return ingest_frame(Student, df_student, {
+        'Random Number ID': 'studentid',
+        'Cum.T.Gpa': 'cumgpa',
+        'Cum.Bcpm.Gpa': 'bcpmgpa',
+        'MMIcalc': 'mmicalc'
+    }, 'Student', user_schemas.StudentSchema, {
+        'studentid': 'StudentID',
+        'cumgpa': 'CumGPA',
+        'bcpmgpa': 'BcpmGPA',
+        'mmicalc': 'MMICalc'
+    })
+
+def ingest_class_roster(df_unrdata):
+    return ingest_frame(ClassRoster, build_class_roster(df_unrdata), {
+        'Matric.year': 'rosteryear',
+        'initialRosterAmount': 'initialrosteramount',
+        'currentEnrollment': 'currentenrollment'
+    }, 'Class Roster', misc_schemas.ClassRoster, {
+        'rosteryear': 'RosterYear',
+        'initialrosteramount': 'InitialRosterAmount',
+        'currentenrollment': 'CurrentEnrollment'
+    })
+
+def ingest_graduation_status(df_unrdata):
+    return ingest_frame(GraduationStatus, build_graduation_status(df_unrdata), {
+        'Random Number ID': 'studentid',
+        'Matric.year': 'rosteryear',
+        'Grad.Year': 'graduationyear',
+        'Graduated': 'graduated',
+        'Grad.yrs': 'graduationlength',
+        'Status2024Jan': 'status'
+    }, 'Graduation Status', result_schemas.GraduationStatus, {
+        'studentid': 'StudentID',
+        'rosteryear': 'RosterYear',
+        'graduationyear': 'GraduationYear',
+        'graduated': 'Graduated',
+        'graduationlength': 'GraduationLength',
+        'status': 'Status'
+    })
+
+def ingest_exams():
+    return ingest_frame(Exam, pd.DataFrame(BASE_EXAM_DATA), {
+        'Exam Name': 'examname',
+        'Exam Description': 'examdescription',
+        'Pass Score': 'passscore'
+    }, 'Exam', exam_schemas.Exam, {
+        'examname': 'ExamName',
+        'examdescription': 'ExamDescription',
+        'passscore': 'PassScore'
+    })
+
+def ingest_student_exams(df_unrdata):
+    df_student_exam = build_student_exams(df_unrdata)
+    return ingest_frame(ExamResults, df_student_exam, {
+        column: column for column in df_student_exam.columns
+    }, 'Student Exam', result_schemas.ExamResults, {
+        'studentid': 'StudentID',
+        'examid': 'ExamID',
+        'score': 'Score',
+        'passorfail': 'PassOrFail'
+    })
+
+def ingest_mock_users():
     #Admin & User Testing Ingest
     hashed_password = get_password_hash('Medpass#1')
-    
+
     login_data = {
     'username': ['mpadmin', 'mpuser'],
     'password': [
@@ -306,10 +205,11 @@ if __name__ == "__main__":
     'email': ['amongus@gmail.com', 'amongus@gmail.com'],
     'bio': ['Admin user biography', 'This is Bron Jameson\'s biography.']
     }   
-    
+
     df_login_data = pd.DataFrame(login_data)
     try:
         db = next(get_db())
+        rows = []
         for _, row in df_login_data.iterrows():
             logininfo_data = user_schemas.LoginInfo(
                 Username = row['username'],
@@ -319,44 +219,41 @@ if __name__ == "__main__":
                 Email = row['email'],
                 Bio = row['bio']
             ) 
-            db_logininfo_data = LoginInfo(
-                 username = logininfo_data.Username,
-                 password = logininfo_data.Password,
-                 isactive = logininfo_data.IsActive,
-                 issuperuser = logininfo_data.IsSuperUser,
-                 email = logininfo_data.Email,
-                 bio = logininfo_data.Bio
-            )
-            db.add(db_logininfo_data)
-        db.commit()
+            rows.append({
+                'username': logininfo_data.Username,
+                'password': logininfo_data.Password,
+                'isactive': logininfo_data.IsActive,
+                'issuperuser': logininfo_data.IsSuperUser,
+                'email': logininfo_data.Email,
+                'bio': logininfo_data.Bio
+            })
+        # Usernames are unique so rerunning the ingest leaves existing accounts untouched
+        bulk_insert(db, LoginInfo, rows, IngestReport("Mock Login Info"), conflict_key=['username'])
         link_logininfo(298, 11, 'student')
         user = db.query(Student).filter(Student.studentid == 298).first()
-        
+
         if user:
             user.firstname = 'Bron'
             user.lastname = 'Jameson'
             db.commit()
         print('Mock Login Info Data Loaded in Database')
-        
+
     except Exception as e:
         print(f"Error when adding data {e}")
         db.rollback()
         raise
-    
+
     finally:
         db.close()  
-        
+
     try:
         db = next(get_db())
-        faculty_member = Faculty(
-            facultyid = 1,
-            firstname = 'Bronson',
-            lastname = 'Admin',
-            position = 'Medpass Admin'
-        )
-        db.add(faculty_member)
-        
-        db.commit()
+        bulk_insert(db, Faculty, [{
+            'facultyid': 1,
+            'firstname': 'Bronson',
+            'lastname': 'Admin',
+            'position': 'Medpass Admin'
+        }], IngestReport("Mock Faculty"))
         link_logininfo(1, 1, 'faculty')
         print('Mock Faculty Data Loaded in Database')
     except Exception as e:
@@ -365,7 +262,25 @@ if __name__ == "__main__":
         raise
     finally:
         db.close()
+
+def ingest_all(file_path):
+    df_unrdata = load_unr_frame(file_path)
+    
+    reports = [
+        ingest_students(df_unrdata),
+        ingest_class_roster(df_unrdata),
+        ingest_graduation_status(df_unrdata),
+        ingest_exams(),
+        ingest_student_exams(df_unrdata)
+    ]
+    ingest_mock_users()
+    
+    return reports
+
+if __name__ == "__main__":
     
+    filePath = os.path.join(
+        "app", "scripts", "data", "Deidentified Reports (1).xlsx"
+    )
     
-    
-    
\ No newline at end of file
+    ingest_all(filePath)
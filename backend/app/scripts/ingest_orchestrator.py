@@ -0,0 +1,264 @@
+import os
+import sys
+import hashlib
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional
+
+from sqlalchemy.dialects.postgresql import insert
+
+from app.models import IngestCheckpoint
+from app.core.database import get_db
+from app.scripts import id_ingest, block_ingest
+from app.scripts.ingest_utils import IngestReport, iter_sheet_frames
+
+DATA_DIR = os.path.join("app", "scripts", "data")
+UNR_REPORT_PATH = os.path.join(DATA_DIR, "Deidentified Reports (1).xlsx")
+RAG_DATA_DIR = os.path.join(DATA_DIR, "ragdata")
+SCRIPTS_DIR = os.path.join("app", "scripts")
+
+# Independent sources (block sheets, chat samples, each RAG document) run on this many threads
+DEFAULT_MAX_WORKERS = 4
+
+
+def file_hash(file_path: str) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        for block in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def get_checkpoint(source: str, sheet: str = "") -> Optional[dict]:
+    db = next(get_db())
+    try:
+        checkpoint = db.query(IngestCheckpoint).filter(
+            IngestCheckpoint.source == source,
+            IngestCheckpoint.sheet == sheet
+        ).first()
+        if not checkpoint:
+            return None
+        return {
+            "filehash": checkpoint.filehash,
+            "lastrow": checkpoint.lastrow,
+            "chunkindex": checkpoint.chunkindex,
+            "documentid": checkpoint.documentid,
+            "status": checkpoint.status
+        }
+    finally:
+        db.close()
+
+
+def save_checkpoint(source: str, sheet: str, filehash: str, status: str, **fields):
+    values = {"source": source, "sheet": sheet, "filehash": filehash, "status": status, **fields}
+    statement = insert(IngestCheckpoint).values(**values).on_conflict_do_update(
+        constraint="uq_ingestcheckpoint_source_sheet",
+        set_={key: value for key, value in values.items() if key not in ("source", "sheet")}
+    )
+
+    db = next(get_db())
+    try:
+        db.execute(statement)
+        db.commit()
+    finally:
+        db.close()
+
+
+def is_complete(checkpoint: Optional[dict], filehash: str) -> bool:
+    return bool(checkpoint) and checkpoint["status"] == "complete" and checkpoint["filehash"] == filehash
+
+
+def run_step(source: str, sheet: str, filehash: str, step: Callable[[], Optional[int]]) -> str:
+    """
+    Runs one unit of ingest work unless a complete checkpoint with the same file hash exists.
+    The step returns the number of rows it processed, or None when it failed.
+    """
+    if is_complete(get_checkpoint(source, sheet), filehash):
+        print(f"Skipping {source} [{sheet}], unchanged since last ingest")
+        return "skipped"
+
+    save_checkpoint(source, sheet, filehash, "running")
+    try:
+        rows = step()
+    except Exception as e:
+        print(f"Ingest step {source} [{sheet}] failed: {e}")
+        rows = None
+
+    if rows is None:
+        save_checkpoint(source, sheet, filehash, "failed")
+        return "failed"
+
+    save_checkpoint(source, sheet, filehash, "complete", lastrow=rows)
+    return "complete"
+
+
+def _report_rows(reports) -> Optional[int]:
+    # The ingest functions return None when they failed, pass that on as run_step's failure signal
+    if reports is None:
+        return None
+    if not isinstance(reports, list):
+        reports = [reports]
+    if any(report is None for report in reports):
+        return None
+    return sum(report.attempted for report in reports)
+
+
+def ingest_id_sheet() -> List[str]:
+    filehash = file_hash(UNR_REPORT_PATH)
+    df_unrdata = id_ingest.load_unr_frame(UNR_REPORT_PATH)
+
+    # Each table is its own checkpoint; order matters because of the foreign keys between them
+    steps = [
+        ("Full ID List/student", lambda: _report_rows(id_ingest.ingest_students(df_unrdata))),
+        ("Full ID List/classroster", lambda: _report_rows(id_ingest.ingest_class_roster(df_unrdata))),
+        ("Full ID List/graduationstatus", lambda: _report_rows(id_ingest.ingest_graduation_status(df_unrdata))),
+        ("Full ID List/exam", lambda: _report_rows(id_ingest.ingest_exams())),
+        ("Full ID List/examresults", lambda: _report_rows(id_ingest.ingest_student_exams(df_unrdata))),
+        ("Full ID List/mockusers", lambda: id_ingest.ingest_mock_users() or 0),
+    ]
+
+    statuses = []
+    for sheet, step in steps:
+        status = run_step(UNR_REPORT_PATH, sheet, filehash, step)
+        statuses.append(status)
+        if status == "failed":
+            break
+    return statuses
+
+
+def ingest_block_sheets(max_workers: int = DEFAULT_MAX_WORKERS) -> List[str]:
+    filehash = file_hash(UNR_REPORT_PATH)
+
+    base_steps = [
+        ("base/domain", lambda: _report_rows(block_ingest.ingest_domain())),
+        ("base/class", lambda: _report_rows(block_ingest.ingest_class())),
+        ("base/classdomain", lambda: _report_rows(block_ingest.ingest_classdomain())),
+    ]
+    statuses = [run_step(UNR_REPORT_PATH, sheet, filehash, step) for sheet, step in base_steps]
+    if "failed" in statuses:
+        return statuses
+
+    report = IngestReport("studentgrade")
+    pending = []
+    for sheet_name, df_current in iter_sheet_frames(UNR_REPORT_PATH, skip_sheets=block_ingest.DROPPED_SHEETS):
+        if is_complete(get_checkpoint(UNR_REPORT_PATH, sheet_name), filehash):
+            print(f"Skipping sheet {sheet_name}, unchanged since last ingest")
+            statuses.append("skipped")
+            continue
+        pending.append((sheet_name, df_current))
+
+    # Block sheets only share the class rows created above, so they can load side by side
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(
+                run_step, UNR_REPORT_PATH, sheet_name, filehash,
+                lambda name=sheet_name, frame=df_current: block_ingest.ingest_block_sheet(name, frame, report)
+            )
+            for sheet_name, df_current in pending
+        ]
+        statuses.extend(future.result() for future in futures)
+
+    report.finish().print_summary()
+    return statuses
+
+
+def ingest_script(module: str) -> str:
+    # Sample-data scripts insert fixed ids, so they only rerun when the script itself changes
+    script_path = os.path.join(SCRIPTS_DIR, module.split(".")[-1] + ".py")
+
+    def step():
+        result = subprocess.run([sys.executable, "-m", module])
+        return 1 if result.returncode == 0 else None
+
+    return run_step(script_path, "", file_hash(script_path), step)
+
+
+def ingest_document_file(file_path: str, text: Optional[str] = None) -> str:
+    from app.services.rag_service import ingest_document, reingest_document
+
+    filehash = file_hash(file_path)
+    checkpoint = get_checkpoint(file_path)
+    if is_complete(checkpoint, filehash):
+        print(f"Skipping document {file_path}, unchanged since last ingest")
+        return "skipped"
+
+    # An edited file is diffed into the document it was ingested as rather than added as a second copy.
+    # The old hash stays recorded until that succeeds, so an interrupted run diffs again
+    if checkpoint and checkpoint["filehash"] != filehash and checkpoint["documentid"]:
+        save_checkpoint(file_path, "", checkpoint["filehash"], "running")
+        try:
+            doc_id = reingest_document(file_path, checkpoint["documentid"], text=text)
+        except Exception as e:
+            print(f"Re-ingesting {file_path} failed: {e}")
+            save_checkpoint(file_path, "", checkpoint["filehash"], "failed")
+            return "failed"
+        if doc_id:
+            save_checkpoint(file_path, "", filehash, "complete", documentid=doc_id)
+            return "complete"
+        print(f"Document {checkpoint['documentid']} for {file_path} no longer exists, ingesting it as a new document")
+        checkpoint = None
+
+    # Resume a partially embedded document only if the file is the same one that was started
+    start_chunk, document_id = 0, None
+    if checkpoint and checkpoint["filehash"] == filehash and checkpoint["documentid"]:
+        start_chunk, document_id = checkpoint["chunkindex"] or 0, checkpoint["documentid"]
+        print(f"Resuming {file_path} from chunk {start_chunk}")
+
+    save_checkpoint(file_path, "", filehash, "running", chunkindex=start_chunk, documentid=document_id)
+
+    def on_progress(doc_id, next_chunk):
+        save_checkpoint(file_path, "", filehash, "running", chunkindex=next_chunk, documentid=doc_id)
+
+    doc_id = ingest_document(None, file_path, start_chunk=start_chunk, document_id=document_id, on_progress=on_progress, text=text)
+    if not doc_id:
+        save_checkpoint(file_path, "", filehash, "failed")
+        return "failed"
+
+    save_checkpoint(file_path, "", filehash, "complete", documentid=doc_id)
+    return "complete"
+
+
+def ingest_documents(directory_path: str = RAG_DATA_DIR, max_workers: int = DEFAULT_MAX_WORKERS) -> List[str]:
+    from app.services.extract_service import extract_texts
+
+    file_paths = [
+        os.path.join(directory_path, filename)
+        for filename in sorted(os.listdir(directory_path))
+        if os.path.isfile(os.path.join(directory_path, filename))
+    ]
+
+    # Text extraction is CPU bound and runs on a process pool; the embedding threads below are network bound
+    texts = extract_texts(file_paths, max_workers=max_workers)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(lambda path: ingest_document_file(path, texts.get(path)), file_paths))
+
+
+def run_all(max_workers: int = DEFAULT_MAX_WORKERS) -> dict:
+    """
+    Runs the full seed pipeline. Students, exams and login info are loaded first because everything else
+    references them; block grades (+ question samples), chat samples and RAG documents then run concurrently.
+    """
+    results = {"id": ingest_id_sheet()}
+    if "failed" in results["id"]:
+        print("Student data failed to load, stopping before dependent sources")
+        return results
+
+    def blocks_then_questions():
+        statuses = ingest_block_sheets(max_workers)
+        statuses.append(ingest_script("app.scripts.question_ingest"))
+        return statuses
+
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        blocks = executor.submit(blocks_then_questions)
+        chat = executor.submit(ingest_script, "app.scripts.chat_ingest")
+        documents = executor.submit(ingest_documents, RAG_DATA_DIR, max_workers)
+
+        results["blocks"] = blocks.result()
+        results["chat"] = [chat.result()]
+        results["documents"] = documents.result()
+
+    for name, statuses in results.items():
+        counts = {status: statuses.count(status) for status in set(statuses)}
+        print(f"{name}: {counts}")
+
+    return results
@@ -0,0 +1,215 @@
+import time
+import math
+import threading
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import pandas as pd
+from openpyxl import load_workbook
+from pydantic import ValidationError
+from sqlalchemy.dialects.postgresql import insert
+
+# Rows per INSERT ... VALUES statement, each batch is committed on its own
+DEFAULT_BATCH_SIZE = 1000
+# Only keep a sample of the conflicting rows so the report stays small on large cohorts
+MAX_CONFLICT_SAMPLES = 50
+
+
+class IngestReport:
+    """Tracks inserted rows, conflicts and throughput for a single ingest step."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.attempted = 0
+        self.inserted = 0
+        self.conflicts = 0
+        self.batches = 0
+        self.conflict_samples: List[dict] = []
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+        # Reports can be shared by sheets loading on different threads
+        self._lock = threading.Lock()
+
+    def record_batch(self, attempted: int, inserted: int, conflicted_rows: Sequence[dict] = ()):
+        with self._lock:
+            self.attempted += attempted
+            self.inserted += inserted
+            self.conflicts += attempted - inserted
+            self.batches += 1
+
+            for row in conflicted_rows:
+                if len(self.conflict_samples) >= MAX_CONFLICT_SAMPLES:
+                    break
+                self.conflict_samples.append(row)
+
+    def finish(self):
+        self.finished = time.perf_counter()
+        return self
+
+    @property
+    def elapsed(self) -> float:
+        end = self.finished if self.finished is not None else time.perf_counter()
+        return end - self.started
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.attempted / self.elapsed if self.elapsed > 0 else 0.0
+
+    def summary(self) -> Dict:
+        return {
+            "name": self.name,
+            "attempted": self.attempted,
+            "inserted": self.inserted,
+            "conflicts": self.conflicts,
+            "batches": self.batches,
+            "elapsed_seconds": round(self.elapsed, 3),
+            "rows_per_second": round(self.rows_per_second, 1),
+            "conflict_samples": self.conflict_samples,
+        }
+
+    def print_summary(self):
+        print(
+            f"[{self.name}] {self.inserted}/{self.attempted} rows inserted, "
+            f"{self.conflicts} conflicts, {self.batches} batches in {self.elapsed:.2f}s "
+            f"({self.rows_per_second:.0f} rows/s)"
+        )
+        for row in self.conflict_samples[:5]:
+            print(f"  conflict: {row}")
+
+
+def _dedupe_columns(header: Sequence) -> List[str]:
+    # Mirrors pandas.read_excel header handling so downstream code sees the same column names
+    columns = []
+    seen: Dict[str, int] = {}
+    for indx, name in enumerate(header):
+        name = f"Unnamed: {indx}" if name is None else str(name)
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        columns.append(name)
+    return columns
+
+
+def iter_sheet_frames(file_path: str, sheet_names: Optional[Sequence[str]] = None, skip_sheets: Sequence[str] = ()) -> Iterator[Tuple[str, pd.DataFrame]]:
+    """
+    Streams worksheets one at a time with openpyxl's read-only mode.
+    Only the sheet currently being processed is held in memory.
+    """
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        for worksheet in workbook.worksheets:
+            if sheet_names is not None and worksheet.title not in sheet_names:
+                continue
+            if worksheet.title in skip_sheets:
+                continue
+
+            rows = worksheet.iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                continue
+
+            records = [row for row in rows if any(value is not None for value in row)]
+            yield worksheet.title, pd.DataFrame.from_records(records, columns=_dedupe_columns(header))
+    finally:
+        workbook.close()
+
+
+def read_sheet(file_path: str, sheet_index: int = 0) -> pd.DataFrame:
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        sheet_name = workbook.sheetnames[sheet_index]
+    finally:
+        workbook.close()
+
+    for _, frame in iter_sheet_frames(file_path, sheet_names=[sheet_name]):
+        return frame
+    return pd.DataFrame()
+
+
+def frame_to_rows(df: pd.DataFrame, column_map: Dict[str, str]) -> List[dict]:
+    """Renames frame columns to model attributes and converts NaN/numpy values to plain python."""
+    renamed = df[list(column_map.keys())].rename(columns=column_map)
+    renamed = renamed.astype(object).where(renamed.notna(), None)
+    return renamed.to_dict("records")
+
+
+def validate_rows(rows: List[dict], schema, field_map: Dict[str, str], name: str = "rows") -> List[dict]:
+    """
+    Validates every row against a pydantic schema before it is inserted, field_map maps row keys to
+    schema fields. Returns the rows with the schema's coerced values, raises ValueError on bad rows.
+    """
+    validated = []
+    errors = []
+    for index, row in enumerate(rows):
+        try:
+            values = schema(**{field_map[key]: _clean_value(value) for key, value in row.items() if key in field_map}).model_dump()
+        except ValidationError as e:
+            error = e.errors()[0]
+            errors.append(f"row {index} {'.'.join(str(part) for part in error['loc'])}: {error['msg']}")
+            continue
+        validated.append({key: values[field_map[key]] if key in field_map else value for key, value in row.items()})
+
+    if errors:
+        raise ValueError(f"{name}: {len(errors)} of {len(rows)} rows failed validation, " + "; ".join(errors[:5]))
+    return validated
+
+
+def _clean_value(value):
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    if hasattr(value, "item"):
+        return value.item()
+    return value
+
+
+def bulk_insert(
+    db,
+    model,
+    rows: List[dict],
+    report: IngestReport,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    conflict_key: Optional[Sequence[str]] = None,
+    returning: Optional[Sequence[str]] = None,
+) -> List[dict]:
+    """
+    Inserts rows with multi-row INSERT statements, committing once per batch.
+    Conflicting rows are skipped (ON CONFLICT DO NOTHING) and recorded on the report.
+    Returns the `returning` columns of every inserted row.
+    """
+    table = model.__table__
+    key_columns = list(conflict_key) if conflict_key else [col.key for col in model.__mapper__.primary_key]
+    returned_columns = list(dict.fromkeys(list(returning or []) + key_columns))
+
+    inserted_rows = []
+    for start in range(0, len(rows), batch_size):
+        batch = [
+            {column: _clean_value(value) for column, value in row.items()}
+            for row in rows[start:start + batch_size]
+        ]
+        if not batch:
+            continue
+
+        statement = insert(table).values(
+            [{model.__mapper__.attrs[key].columns[0].name: value for key, value in row.items()} for row in batch]
+        ).on_conflict_do_nothing().returning(
+            *[model.__mapper__.attrs[key].columns[0] for key in returned_columns]
+        )
+
+        try:
+            result = [dict(zip(returned_columns, row)) for row in db.execute(statement).fetchall()]
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
+        inserted_keys = {tuple(row[key] for key in key_columns) for row in result}
+        conflicted = [
+            {key: row.get(key) for key in key_columns}
+            for row in batch
+            if all(key in row for key in key_columns) and tuple(row[key] for key in key_columns) not in inserted_keys
+        ]
+        report.record_batch(len(batch), len(result), conflicted)
+        inserted_rows.extend(result)
+
+    return inserted_rows
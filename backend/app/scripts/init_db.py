@@ -1,20 +1,19 @@
 # backend/app/scripts/init_db.py
 import os
-from ..services.rag_service import ingest_document_directory
+import sys
+from app.core.database import ensure_pgvector_extension
+from app.core.migrations import upgrade_database
+from app.scripts.ingest_orchestrator import run_all
 
 if __name__ == "__main__":
     
-    filepath = class_filePath = os.path.join(
-        "app", "scripts", "data", "ragdata"
-    )
+    # Reseeding is incremental by default, pass --reset to wipe the database first
+    if "--reset" in sys.argv:
+        os.system('python -m app.scripts.tables.nuke_reset')
     
-    os.system('python -m app.scripts.tables.nuke_reset')
-    os.system('python -m app.scripts.tables.create_db')
-    #ensure_pgvector_extension()
-    os.system('python -m app.scripts.id_ingest')
-    os.system('python -m app.scripts.block_ingest')
-    os.system('python -m app.scripts.question_ingest')
-    os.system('python -m app.scripts.chat_ingest')
-    docnumbers = ingest_document_directory(filepath)
+    ensure_pgvector_extension()
+    upgrade_database()
+    
+    run_all()
     print("Document ingestion complete!")
-    print("Database has been reset & reseeded!")
\ No newline at end of file
+    print("Database has been seeded, unchanged sources were skipped!")
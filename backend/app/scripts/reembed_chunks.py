@@ -0,0 +1,60 @@
+import sys
+import argparse
+
+from app.core.migrations import backfill_rows
+from app.models import DocumentChunk
+from app.services.chunk_service import embedding_text
+from app.services.gemini_service import embed_text
+
+# Recomputes document chunk embeddings with the current embedding model, for example after changing
+# EMBED_MODEL or to fill chunks stored while Gemini was unavailable:
+#
+#   python -m app.scripts.reembed_chunks --missing-only
+#   python -m app.scripts.reembed_chunks --batch-size 100 --max-rows-per-second 20
+#
+# Chunks are read and written in small batches, the embedding calls run between transactions and the
+# rate cap keeps the embedding quota and the database write load flat, so search stays up throughout.
+
+
+def reembed_chunks(missing_only: bool = False, batch_size: int = 100, max_rows_per_second: float = None, pause_seconds: float = None):
+    table = DocumentChunk.__table__
+    failed = []
+
+    def compute(rows):
+        changes = []
+        for row in rows:
+            try:
+                # Same text ingest embeds, so the section path keeps giving continuation chunks their context
+                text = embedding_text({"content": row.content or "", "sectionpath": row.sectionpath})
+                changes.append({"documentchunkid": row.documentchunkid, "embedding": embed_text(text)})
+            except Exception as e:
+                # Left as it was, a later --missing-only run or a rerun picks it up
+                failed.append(row.documentchunkid)
+                print(f"Embedding chunk {row.documentchunkid} failed: {e}")
+        return changes
+
+    summary = backfill_rows(
+        table, ["content", "sectionpath"], compute,
+        where=table.c.embedding.is_(None) if missing_only else None,
+        batch_size=batch_size, pause_seconds=pause_seconds, max_rows_per_second=max_rows_per_second,
+        label="chunk embeddings",
+    )
+    summary["failed"] = len(failed)
+    print(f"Re-embedded {summary['updated']} chunks, {len(failed)} failed")
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Recompute document chunk embeddings in throttled batches")
+    parser.add_argument("--missing-only", action="store_true", help="only chunks without an embedding")
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--max-rows-per-second", type=float, help="cap on chunks embedded per second")
+    parser.add_argument("--pause-seconds", type=float, help="pause between batches, defaults to BACKFILL_PAUSE_SECONDS")
+    args = parser.parse_args(argv)
+
+    summary = reembed_chunks(args.missing_only, args.batch_size, args.max_rows_per_second, args.pause_seconds)
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
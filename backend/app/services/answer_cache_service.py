@@ -0,0 +1,117 @@
+import hashlib
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import select, func
+
+from app.core.config import settings
+from app.models.chat_models import ChatAnswerCache
+
+# Process-local hit/miss counters, reset on restart. Per entry hit counts live on the cache rows
+_stats = {"hits": 0, "misses": 0, "bypassed": 0, "stores": 0, "invalidated": 0}
+_stats_lock = threading.Lock()
+
+
+def _record(event: str, amount: int = 1):
+    with _stats_lock:
+        _stats[event] += amount
+
+
+def retrieval_fingerprint(model: str, rag_content: List[dict]) -> str:
+    """Identifies the material an answer was built from: the model plus the retrieved chunk ids."""
+    chunk_ids = sorted(str(doc["documentchunkid"]) for doc in rag_content)
+    return hashlib.sha256(f"{model}|{','.join(chunk_ids)}".encode("utf-8")).hexdigest()
+
+
+def lookup_answer(db, query_embedding: List[float], fingerprint: str) -> Optional[dict]:
+    """
+    Returns the closest unexpired cached answer for the same retrieval fingerprint,
+    if its question is at least ANSWER_CACHE_MIN_SIMILARITY similar to this one.
+    """
+    if not settings.ANSWER_CACHE_ENABLED:
+        return None
+
+    distance = ChatAnswerCache.embedding.cosine_distance(query_embedding)
+    row = db.execute(
+        select(ChatAnswerCache, (1 - distance).label("similarity"))
+        .where(
+            ChatAnswerCache.fingerprint == fingerprint,
+            ChatAnswerCache.expiresat > datetime.utcnow()
+        )
+        .order_by(distance)
+        .limit(1)
+    ).first()
+
+    if not row or row.similarity < settings.ANSWER_CACHE_MIN_SIMILARITY:
+        _record("misses")
+        return None
+
+    entry = row.ChatAnswerCache
+    entry.hitcount = (entry.hitcount or 0) + 1
+    entry.lasthitat = datetime.utcnow()
+    db.commit()
+
+    _record("hits")
+    return {"cacheid": entry.cacheid, "answer": entry.answer, "similarity": float(row.similarity)}
+
+
+def store_answer(db, question: str, answer: str, query_embedding: List[float], fingerprint: str, rag_content: List[dict], model: str):
+    if not settings.ANSWER_CACHE_ENABLED:
+        return None
+
+    entry = ChatAnswerCache(
+        question=question,
+        answer=answer,
+        embedding=query_embedding,
+        fingerprint=fingerprint,
+        documentids=sorted({doc["documentid"] for doc in rag_content if doc.get("documentid")}),
+        model=model,
+        hitcount=0,
+        expiresat=datetime.utcnow() + timedelta(seconds=settings.ANSWER_CACHE_TTL_SECONDS)
+    )
+    db.add(entry)
+    db.commit()
+
+    _record("stores")
+    return entry.cacheid
+
+
+def record_bypass():
+    # Only first turns are cached; later turns carry history and are counted so the hit rate is honest
+    _record("bypassed")
+
+
+def invalidate_documents(db, document_ids: List[int]) -> int:
+    """Drops cached answers built from any of the given documents. Does not commit."""
+    if not document_ids:
+        return 0
+    removed = db.query(ChatAnswerCache).filter(
+        ChatAnswerCache.documentids.overlap(list(document_ids))
+    ).delete(synchronize_session=False)
+    _record("invalidated", removed)
+    return removed
+
+
+def purge_expired(db) -> int:
+    removed = db.query(ChatAnswerCache).filter(
+        ChatAnswerCache.expiresat <= datetime.utcnow()
+    ).delete(synchronize_session=False)
+    db.commit()
+    return removed
+
+
+def cache_stats(db) -> Dict:
+    with _stats_lock:
+        stats = dict(_stats)
+
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+
+    entries, total_hits = db.query(
+        func.count(ChatAnswerCache.cacheid),
+        func.coalesce(func.sum(ChatAnswerCache.hitcount), 0)
+    ).filter(ChatAnswerCache.expiresat > datetime.utcnow()).one()
+    stats["entries"] = entries
+    stats["lifetime_hits"] = int(total_hits)
+    return stats
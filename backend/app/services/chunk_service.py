@@ -0,0 +1,197 @@
+import re
+from typing import List, Optional, Tuple
+
+from app.services.token_service import estimate_tokens, EMBED_MODEL_MAX_TOKENS
+
+# Token counts are the len/4 estimate from token_service, not the embedding model's tokenizer.
+# Chunks are packed up to this many tokens; well under the embedding model limit so retrieval stays focused
+CHUNK_MAX_TOKENS = 320
+# Sections smaller than this are merged with the following section instead of becoming their own chunk
+CHUNK_MIN_TOKENS = 80
+
+SECTION_SEPARATOR = " > "
+
+_MARKDOWN_HEADING = re.compile(r"^(#{1,6})\s+(.*\S)\s*$")
+_CHAPTER_HEADING = re.compile(r"^(chapter|section|part|unit)\s+\d+\b", re.IGNORECASE)
+_LIST_ITEM = re.compile(r"^(\d+[\).]|[a-z][\).]|[-•*])\s*", re.IGNORECASE)
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def _pdf_heading_level(line: str) -> Optional[int]:
+    """PDF text has no styles, so headings are guessed from short title-like lines."""
+    words = line.split()
+    if not words or len(words) > 10 or len(line) > 80:
+        return None
+    if _CHAPTER_HEADING.match(line):
+        return 1
+    if _LIST_ITEM.match(line):
+        return None
+    if line.endswith(":"):
+        return 2
+    letters = [char for char in line if char.isalpha()]
+    if len(letters) >= 4 and line.isupper():
+        return 2
+    return None
+
+
+def parse_blocks(text: str) -> List[Tuple[str, Optional[int], str]]:
+    """
+    Splits extracted text into (kind, heading level, text) blocks where kind is heading, paragraph or table.
+    Headings come from `#` markers written by the DOCX extractor or from the PDF line heuristics.
+    """
+    blocks = []
+    paragraph: List[str] = []
+    table: List[str] = []
+
+    def flush():
+        if paragraph:
+            blocks.append(("paragraph", None, "\n".join(paragraph)))
+            paragraph.clear()
+        if table:
+            blocks.append(("table", None, "\n".join(table)))
+            table.clear()
+
+    for raw_line in text.splitlines():
+        line = raw_line.strip()
+        if not line:
+            flush()
+            continue
+
+        if line.startswith("|"):
+            if paragraph:
+                flush()
+            table.append(line)
+            continue
+        if table:
+            flush()
+
+        match = _MARKDOWN_HEADING.match(line)
+        if match:
+            flush()
+            blocks.append(("heading", len(match.group(1)), match.group(2)))
+            continue
+
+        level = _pdf_heading_level(line)
+        if level:
+            flush()
+            blocks.append(("heading", level, line))
+            continue
+
+        paragraph.append(line)
+
+    flush()
+    return blocks
+
+
+def _split_oversized(kind: str, text: str, max_tokens: int) -> List[str]:
+    """Splits a single block that does not fit in a chunk, on rows/lines first, then sentences, then words."""
+    if estimate_tokens(text) <= max_tokens:
+        return [text]
+
+    pieces = text.split("\n")
+    if len(pieces) == 1:
+        pieces = _SENTENCE_END.split(text)
+    if len(pieces) == 1:
+        words = text.split()
+        half = len(words) // 2
+        if half == 0:
+            return [text]
+        pieces = [" ".join(words[:half]), " ".join(words[half:])]
+
+    # Table rows keep the header row on every piece so each chunk is readable on its own
+    header = pieces[0] if kind == "table" else None
+    separator = "\n" if "\n" in text else " "
+
+    parts: List[str] = []
+    current: List[str] = []
+    for piece in pieces:
+        candidate = separator.join(current + [piece])
+        if current and estimate_tokens(candidate) > max_tokens:
+            parts.append(separator.join(current))
+            current = [header, piece] if header and piece != header else [piece]
+        else:
+            current.append(piece)
+    if current:
+        parts.append(separator.join(current))
+
+    result = []
+    for part in parts:
+        result.extend(_split_oversized(kind, part, max_tokens) if estimate_tokens(part) > max_tokens and part != text else [part])
+    return result
+
+
+def _common_path(paths: List[List[str]]) -> List[str]:
+    common = paths[0]
+    for path in paths[1:]:
+        length = 0
+        while length < min(len(common), len(path)) and common[length] == path[length]:
+            length += 1
+        common = common[:length]
+    return common or paths[0]
+
+
+def chunk_text(text: str, max_tokens: int = CHUNK_MAX_TOKENS, min_tokens: int = CHUNK_MIN_TOKENS) -> List[dict]:
+    """
+    Packs structured blocks into chunks of at most max_tokens without overlap.
+    A heading closes the current chunk unless it is still smaller than min_tokens.
+    Each chunk is a dict with content, sectionpath and tokencount.
+    """
+    max_tokens = min(max_tokens, EMBED_MODEL_MAX_TOKENS)
+    chunks: List[dict] = []
+    headings: List[Tuple[int, str]] = []
+
+    current: List[str] = []
+    current_paths: List[List[str]] = []
+    current_kinds: List[str] = []
+
+    def flush():
+        if not current:
+            return
+        content = "\n".join(current)
+        path = _common_path(current_paths)
+        chunks.append({
+            "content": content,
+            "sectionpath": SECTION_SEPARATOR.join(path),
+            "tokencount": estimate_tokens(content),
+        })
+        current.clear()
+        current_paths.clear()
+        current_kinds.clear()
+
+    def add(kind: str, piece: str):
+        if current and estimate_tokens("\n".join(current + [piece])) > max_tokens:
+            # Never leave a heading dangling at the end of a chunk, move it to the next one
+            carried = []
+            while len(current) > 1 and current_kinds[-1] == "heading":
+                carried.insert(0, (current_kinds.pop(), current.pop(), current_paths.pop()))
+            flush()
+            for carried_kind, carried_piece, carried_path in carried:
+                current_kinds.append(carried_kind)
+                current.append(carried_piece)
+                current_paths.append(carried_path)
+        current_kinds.append(kind)
+        current.append(piece)
+        current_paths.append([title for _, title in headings])
+
+    for kind, level, block_text in parse_blocks(text):
+        if kind == "heading":
+            if estimate_tokens("\n".join(current)) >= min_tokens:
+                flush()
+            while headings and headings[-1][0] >= level:
+                headings.pop()
+            headings.append((level, block_text))
+            add(kind, block_text)
+            continue
+
+        for piece in _split_oversized(kind, block_text, max_tokens):
+            add(kind, piece)
+
+    flush()
+    return chunks
+
+
+def embedding_text(chunk: dict) -> str:
+    """Text sent to the embedding model, the section path gives continuation chunks their heading context."""
+    if chunk.get("sectionpath"):
+        return f"{chunk['sectionpath']}\n{chunk['content']}"
+    return chunk["content"]
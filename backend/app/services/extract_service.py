@@ -0,0 +1,204 @@
+import os
+import hashlib
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from app.core.config import settings
+
+# PDFs longer than this are split into page ranges so one large chapter does not hold up a whole worker
+PAGES_PER_TASK = 16
+SUPPORTED_EXTENSIONS = (".pdf", ".docx", ".doc")
+# Bump whenever the extracted text format changes so stale cache entries are not reused
+EXTRACT_VERSION = "2"
+
+
+def content_hash(file_path: str) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        for block in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _cache_dir() -> str:
+    cache_dir = settings.EXTRACT_CACHE_DIR or os.path.join(tempfile.gettempdir(), "medpass_extract_cache")
+    os.makedirs(cache_dir, exist_ok=True)
+    return cache_dir
+
+
+def _cache_path(digest: str) -> str:
+    return os.path.join(_cache_dir(), f"{digest}.v{EXTRACT_VERSION}.txt")
+
+
+def read_cached_text(digest: str) -> Optional[str]:
+    cache_path = _cache_path(digest)
+    if not os.path.exists(cache_path):
+        return None
+    with open(cache_path, "r", encoding="utf-8") as file:
+        return file.read()
+
+
+def write_cached_text(digest: str, text: str):
+    cache_path = _cache_path(digest)
+    # Write to a temp name first so a concurrent reader never sees a partial file
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        file.write(text)
+    os.replace(tmp_path, cache_path)
+
+
+def extract_pdf_pages(file_obj, start: int = 0, stop: Optional[int] = None) -> List[str]:
+    import pypdf
+
+    pdf_reader = pypdf.PdfReader(file_obj)
+    pages = pdf_reader.pages[start:stop]
+    return [(page.extract_text() or "") + "\n" for page in pages]
+
+
+def _docx_heading_level(paragraph) -> Optional[int]:
+    style_name = paragraph.style.name if paragraph.style is not None else ""
+    if style_name == "Title":
+        return 1
+    if style_name.startswith("Heading"):
+        level = style_name.replace("Heading", "").strip()
+        return int(level) if level.isdigit() else 1
+
+    # The chapter material uses bold Normal paragraphs as headings rather than heading styles
+    runs = [run for run in paragraph.runs if run.text.strip()]
+    text = paragraph.text.strip()
+    if runs and all(run.bold for run in runs) and len(text.split()) <= 12:
+        return 2
+    return None
+
+
+def extract_docx_paragraphs(file_obj) -> List[str]:
+    """
+    Returns the body as lines in document order. Headings are prefixed with markdown style
+    `#` markers and table rows are written as `| cell | cell |` so the chunker can see the structure.
+    """
+    import docx
+
+    doc = docx.Document(file_obj)
+    lines = []
+    for block in doc.iter_inner_content():
+        if isinstance(block, docx.table.Table):
+            for row in block.rows:
+                cells = []
+                for cell in row.cells:
+                    # Merged cells are repeated by python-docx, keep one copy
+                    value = " ".join(cell.text.split())
+                    if not cells or cells[-1] != value:
+                        cells.append(value)
+                lines.append("| " + " | ".join(cells) + " |\n")
+            lines.append("\n")
+            continue
+
+        level = _docx_heading_level(block)
+        if level:
+            lines.append("#" * level + " " + " ".join(block.text.split()) + "\n")
+        else:
+            lines.append(block.text + "\n")
+    return lines
+
+
+def _extension(filename: str) -> str:
+    return os.path.splitext(filename)[1].lower()
+
+
+def extract_file_obj(file_obj, filename: str) -> str:
+    ext = _extension(filename)
+    if ext == ".pdf":
+        return "".join(extract_pdf_pages(file_obj))
+    elif ext in (".docx", ".doc"):
+        return "".join(extract_docx_paragraphs(file_obj))
+    else:
+        raise ValueError(f"Unsupported file type: {ext}")
+
+
+def _extract_task(file_path: str, start: int, stop: Optional[int]) -> List[str]:
+    # Runs inside a worker process; paths are sent instead of bytes to keep the pickling cheap
+    if _extension(file_path) == ".pdf":
+        with open(file_path, "rb") as file:
+            return extract_pdf_pages(file, start, stop)
+    return extract_docx_paragraphs(file_path)
+
+
+def _plan_tasks(file_path: str, pages_per_task: int) -> List[Tuple[int, Optional[int]]]:
+    if _extension(file_path) != ".pdf":
+        return [(0, None)]
+    import pypdf
+
+    # Only the xref is parsed here, page content is left to the workers
+    page_count = len(pypdf.PdfReader(file_path).pages)
+    if page_count <= pages_per_task:
+        return [(0, None)]
+    return [(start, min(start + pages_per_task, page_count)) for start in range(0, page_count, pages_per_task)]
+
+
+def extract_texts(
+    file_paths: Sequence[str],
+    max_workers: Optional[int] = None,
+    pages_per_task: int = PAGES_PER_TASK,
+    use_cache: bool = True,
+) -> Dict[str, str]:
+    """
+    Extracts text for many files on a process pool. Large PDFs are split by page range and
+    stitched back in order. Results are cached on disk by file content hash.
+    Files that fail to extract are left out of the result.
+    """
+    results: Dict[str, str] = {}
+    digests: Dict[str, str] = {}
+    pending: List[str] = []
+
+    for file_path in file_paths:
+        if _extension(file_path) not in SUPPORTED_EXTENSIONS:
+            print(f"Skipping unsupported file: {file_path}")
+            continue
+        digest = content_hash(file_path)
+        digests[file_path] = digest
+        cached = read_cached_text(digest) if use_cache else None
+        if cached is not None:
+            results[file_path] = cached
+        else:
+            pending.append(file_path)
+
+    if not pending:
+        return results
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {}
+        for file_path in pending:
+            try:
+                tasks = _plan_tasks(file_path, pages_per_task)
+            except Exception as e:
+                print(f"Error reading {file_path}: {e}")
+                continue
+            futures[file_path] = [executor.submit(_extract_task, file_path, start, stop) for start, stop in tasks]
+
+        for file_path, file_futures in futures.items():
+            try:
+                parts = [part for future in file_futures for part in future.result()]
+            except Exception as e:
+                print(f"Error extracting text from {file_path}: {e}")
+                continue
+
+            text = "".join(parts)
+            results[file_path] = text
+            if use_cache:
+                write_cached_text(digests[file_path], text)
+
+    return results
+
+
+def extract_text_cached(file_path: str) -> str:
+    """Single-file extraction in the calling process, still served from and stored to the cache."""
+    digest = content_hash(file_path)
+    cached = read_cached_text(digest)
+    if cached is not None:
+        return cached
+
+    with open(file_path, "rb") as file:
+        text = extract_file_obj(file, file_path)
+    write_cached_text(digest, text)
+    return text
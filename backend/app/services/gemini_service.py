@@ -1,50 +1,54 @@
 import random
+import asyncio
 import datetime
-import re
 import json
-import google.generativeai as genai
-from google.ai.generativelanguage_v1beta import GenerativeServiceClient
 from typing import List, Optional, Dict, Any, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import func, select, desc
+from sqlalchemy import func, select, desc, exists, tuple_
 from app.core.config import settings
+from app.core.metrics import llm_timer
+from app.core.tracing import traced
+from app.services.token_service import estimate_tokens
+from app.services import answer_cache_service, prompt_service, question_parser
+from app.services.llm_providers import get_llm_provider
+from app.services.prompt_service import construct_system_prompt
 from app.core.database import get_db
+from app.core.pagination import DEFAULT_PAGE_SIZE, encode_cursor
 from app.models.chat_models import ChatConversation, ChatMessage, ChatContext, ChatMessageContext
+from app.models import Student
 from app.schemas.chat_schemas import ChatContextModel, ChatMessageWithContextModel, ChatConversationSummary, ChatConversationDetail
 from datetime import datetime
-import json
-# ——————— API-key rotation ———————
-API_KEYS = [k.strip() for k in settings.GEMINI_API_KEYS.split(",") if k.strip()]
-if not API_KEYS:
-    raise ValueError("No GEMINI_API_KEYS configured")
-
-def _select_api_key() -> str:
-    index = random.randint(0, 3)
-
-    return API_KEYS[index]
-
+import threading
 # ——————— Embeddings ———————
+# Calls go through the provider LLM_PROVIDER selects, Gemini keys are only read on the first real call
 EMBED_MODEL = "models/text-embedding-004"
 def embed_text(text: str) -> List[float]:
-    genai.configure(api_key=_select_api_key())
-    res = genai.embed_content(model=EMBED_MODEL, content=text)
-    return res.get("embedding") or res.get("embeddings")
+    with llm_timer("embed", EMBED_MODEL) as call:
+        embedding = get_llm_provider().embed(text, EMBED_MODEL)
+        # The embedding API reports no usage, count the estimate
+        call["input_tokens"] = estimate_tokens(text)
+    return embedding
 
 def embed_texts(texts: List[str]) -> List[List[float]]:
-    genai.configure(api_key=_select_api_key())
+    provider = get_llm_provider()
     embeddings = []
     
     for idx, text in enumerate(texts, start=1):  # start counting from 1
         print(f"Embedding {idx}/{len(texts)}")  # Show progress
         
-        res = genai.embed_content(model=EMBED_MODEL, content=text)
-        embedding = res.get("embedding") or res.get("embeddings")
+        with llm_timer("embed", EMBED_MODEL) as call:
+            embedding = provider.embed(text, EMBED_MODEL)
+            call["input_tokens"] = estimate_tokens(text)
         embeddings.append(embedding)
     
     return embeddings
 
 # ——————— Flash chat ———————
 
+# Process-wide cap on in-flight generate calls, shared by chat, summaries and question generation
+# so a fan-out job can't push the API keys past their rate limit
+_llm_slots = threading.BoundedSemaphore(settings.LLM_MAX_CONCURRENCY)
+
 
 def chat_model(
     messages: List[dict],
@@ -54,64 +58,135 @@ def chat_model(
     rag_query: Optional[str] = None,
     conversation_id: Optional[int] = None,
     context_limit: int = 5,
+    response_mime_type: Optional[str] = None,
+    operation: str = "chat",
 ):
-    genai.configure(api_key=_select_api_key())
-    
+    answer, _ = generate_chat_answer(
+        messages,
+        model=model,
+        use_chat_context=use_chat_context,
+        use_rag_doucments=use_rag_doucments,
+        rag_query=rag_query,
+        conversation_id=conversation_id,
+        context_limit=context_limit,
+        response_mime_type=response_mime_type,
+        operation=operation
+    )
+    return answer
+
+
+@traced()
+def generate_chat_answer(
+    messages: List[dict],
+    model: str = "gemini-2.5-flash-preview-04-17",
+    use_chat_context: bool = True,
+    use_rag_doucments: bool = True,
+    rag_query: Optional[str] = None,
+    conversation_id: Optional[int] = None,
+    context_limit: int = 5,
+    db: Optional[Session] = None,
+    use_answer_cache: bool = False,
+    response_mime_type: Optional[str] = None,
+    operation: str = "chat",
+    student_id: Optional[int] = None,
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    Same as chat_model but also returns metadata about how the answer was produced.
+    With student_id retrieval also searches that student's own notes next to the global curriculum.
+    With use_answer_cache the first turn of a conversation (one message, no conversation context) is
+    answered from the semantic cache when a near identical question retrieved the same documents.
+    Later turns always go to the model: a follow-up only makes sense with its history, and there is
+    no standalone rewrite of it to key the cache on.
+    response_mime_type="application/json" turns on the model's JSON mode.
+    operation labels the call's latency and token metrics (chat, summary, questions).
+    """
     chat_contexts = []
     rag_content = []
+    metadata: Dict[str, Any] = {"cached": False}
     
     if use_chat_context and conversation_id:
         chat_contexts = get_recent_chat_context(conversation_id, context_limit)
-    if use_rag_doucments and rag_query:
-        from app.services.rag_service import search_documents
-        rag_content = search_documents(rag_query, context_limit)
-        
-    system_prompt = construct_system_prompt(chat_contexts, rag_content)
-    #print("here is system context")
-    #print(system_prompt)
-    full_messages = []
     
-    if system_prompt.strip():
-        full_messages.append({
-            "role": "user", 
-            "parts": [{"text": system_prompt}]
-        })
+    # First turn only: history makes an answer specific to one conversation, those turns are never shared
+    first_turn = len(messages) == 1 and not chat_contexts
+    cacheable = use_answer_cache and settings.ANSWER_CACHE_ENABLED and db is not None and first_turn
+    if use_answer_cache and not cacheable:
+        answer_cache_service.record_bypass()
     
-    for msg in messages:
-        full_messages.append({
-            "role": msg["role"],
-            "parts": [{"text": msg["content"]}]
-        })
+    query_embedding = None
+    if cacheable:
+        query_embedding = embed_text(rag_query or messages[-1]["content"])
     
-    model_obj = genai.GenerativeModel(model)
-    chat_session = model_obj.start_chat(history=full_messages)
-    response = chat_session.send_message(content=messages[-1]["content"])
-
-    return response.candidates[0].content.parts[0].text
+    if use_rag_doucments and rag_query:
+        from app.services.rag_service import search_documents, SCOPE_GLOBAL, SCOPE_STUDENT
+        scopes = [SCOPE_GLOBAL, SCOPE_STUDENT] if student_id else [SCOPE_GLOBAL]
+        rag_content = search_documents(rag_query, context_limit, scopes=scopes, student_id=student_id, query_embedding=query_embedding) or []
+    
+    if cacheable:
+        fingerprint = answer_cache_service.retrieval_fingerprint(model, rag_content)
+        hit = answer_cache_service.lookup_answer(db, query_embedding, fingerprint)
+        if hit:
+            metadata.update({"cached": True, "cache_id": hit["cacheid"], "cache_similarity": round(hit["similarity"], 4)})
+            return hit["answer"], metadata
+    
+    # Context goes in the system instruction, packed into the token budget best first
+    prompt = prompt_service.build_system_instruction(chat_contexts, rag_content)
+    
+    contents = [
+        {"role": msg["role"], "parts": [{"text": msg["content"]}]}
+        for msg in messages
+    ]
+    
+    generation_config = {"response_mime_type": response_mime_type} if response_mime_type else None
+    with _llm_slots, llm_timer(operation, model) as call:
+        response = get_llm_provider().generate(
+            model,
+            contents,
+            system_instruction=prompt["system_instruction"] or None,
+            generation_config=generation_config
+        )
+        usage = prompt_service.usage_from_response(response)
+        if usage:
+            call["input_tokens"] = usage["prompt_tokens"]
+            call["output_tokens"] = usage["output_tokens"]
+    
+    estimated_prompt_tokens = prompt["estimated_tokens"] + sum(estimate_tokens(msg["content"]) for msg in messages)
+    prompt_service.record_prompt(estimated_prompt_tokens, usage)
+    
+    metadata["usage"] = usage
+    metadata["prompt"] = {
+        "estimated_tokens": estimated_prompt_tokens,
+        "contexts": prompt["contexts"],
+        "documents": prompt["documents"],
+        "dropped": prompt["dropped"],
+        "truncated": prompt["truncated"],
+    }
+    
+    answer = response.candidates[0].content.parts[0].text
+    
+    if cacheable:
+        metadata["cache_id"] = answer_cache_service.store_answer(
+            db, messages[-1]["content"], answer, query_embedding, fingerprint, rag_content, model
+        )
 
+    return answer, metadata
 
-def construct_system_prompt(chat_context: List[dict[str, str]], rag_documents: List[dict[str, str]]):
-    
-    prompt_parts = []
-    
-    if chat_context:
-        prompt_parts.append("Previous Chat Context:")
-        for context in chat_context:
-            prompt_parts.append(f"{context['title']}: {context['content']}")
-    
-    if rag_documents:
-        prompt_parts.append("Relevant Documents:")
-        for doc in rag_documents:
-            prompt_parts.append(f"{doc['title']}: {doc['content']}")
-            
-    final_prompt = "\n".join(prompt_parts)
-    
-    return final_prompt
 
 # Above are old functions keeping them for now
 
 # Parameters for Min Chat Length and Embedding 
+# Messages that have to leave the recent window before they are folded into the summary
 MIN_CHAT_LENGTH = 5
+# Latest messages always sent verbatim, older ones only reach the model through the summary
+RECENT_WINDOW_MESSAGES = 6
+# Hard cap on verbatim history if summarizing falls behind
+MAX_HISTORY_MESSAGES = RECENT_WINDOW_MESSAGES + 2 * MIN_CHAT_LENGTH
+SUMMARY_MAX_WORDS = 250
+SUMMARY_CONTEXT_KIND = "summary"
+
+# Conversations with a summary job in flight, so back to back turns don't summarize the same messages twice
+_summaries_running = set()
+_summaries_lock = threading.Lock()
 # Minimum Embedding Length is important, we don't want to embedded "ok" or "yes"
 MIN_EMBEDDING_LENGTH = 50
 
@@ -120,8 +195,7 @@ MIN_EMBEDDING_LENGTH = 50
 
 def calculate_token_usage(text: str):
     
-    # From research gemeni uses 1 token per 4 characters
-    return len(text) // 4
+    return estimate_tokens(text)
 
 def calculate_message_cost(tokens_input, tokens_output):
     
@@ -152,17 +226,12 @@ def generate_title(content):
 
 def get_chat_history(db, logininfoid, active_only: bool = True):
     
+    # messagecount is kept on the conversation, so this is a plain index scan with no join or GROUP BY
     query = (
         select(
-            ChatConversation,
-            func.count(ChatMessage.messageid).label("message_count"),
-        ).outerjoin(
-            ChatMessage,
-            ChatConversation.conversationid == ChatMessage.conversationid,
+            ChatConversation
         ).where(
             ChatConversation.userid == logininfoid
-        ).group_by(
-            ChatConversation.conversationid
         ).order_by(
             desc(ChatConversation.updatedat)
         )
@@ -171,18 +240,18 @@ def get_chat_history(db, logininfoid, active_only: bool = True):
     if active_only:
         query = query.where(ChatConversation.isactive == True)
         
-    results = db.execute(query).all()
+    results = db.execute(query).scalars().all()
     
     conversations = []
     
-    for conv, msg_count in results:
+    for conv in results:
         conversations.append(
             ChatConversationSummary(
                 conversationid=conv.conversationid,
                 title=conv.title,
                 createdat=conv.createdat,
                 updatedat=conv.updatedat,
-                message_count=msg_count,
+                message_count=conv.messagecount or 0,
                 total_tokens=conv.totaltokensinput + conv.totaltokensoutput,
                 total_cost=float(conv.totalcost)
             )
@@ -190,48 +259,79 @@ def get_chat_history(db, logininfoid, active_only: bool = True):
         
     return conversations
 
+def _context_model(context: ChatContext) -> ChatContextModel:
+    return ChatContextModel(
+        contextid=context.contextid,
+        title=context.title,
+        content=context.content,
+        importancescore=context.importancescore,
+        metadata=context.chatmetadata
+    )
+
 def get_message_contexts(db, message_id):
     
+    return get_contexts_for_messages(db, [message_id]).get(message_id, [])
+
+def get_contexts_for_messages(db, message_ids: List[int]) -> Dict[int, List[ChatContextModel]]:
+    """Contexts for a whole page of messages in one query, keyed by message id."""
+    if not message_ids:
+        return {}
+    
     query = (
         select(
-            ChatContext
+            ChatMessageContext.messageid, ChatContext
         ).join(
-            ChatMessageContext, ChatMessageContext.contextid == ChatContext.contextid
+            ChatContext, ChatMessageContext.contextid == ChatContext.contextid
         ).where(
-            ChatMessageContext.messageid == message_id
+            ChatMessageContext.messageid.in_(message_ids)
         )
     )
     
-    results = db.execute(query).scalars().all()
-    
-    return [
-        ChatContextModel(
-            contextid=context.contextid,
-            title=context.title,
-            content=context.content,
-            importancescore=context.importancescore,
-            metadata=context.chatmetadata
-        )
-        for context in results
-    ]
+    contexts: Dict[int, List[ChatContextModel]] = {}
+    for message_id, context in db.execute(query).all():
+        contexts.setdefault(message_id, []).append(_context_model(context))
+    return contexts
 
-def get_entire_chat(db, conversation_id, since_timestamp: Optional[datetime] = None):
+def conversation_exists(db, conversation_id) -> bool:
+    return db.query(exists().where(ChatConversation.conversationid == conversation_id)).scalar()
+
+def get_entire_chat(
+    db,
+    conversation_id,
+    since_timestamp: Optional[datetime] = None,
+    before: Optional[Tuple[datetime, int]] = None,
+    limit: int = DEFAULT_PAGE_SIZE
+):
+    """
+    One page of a conversation, oldest message first. By default the latest `limit` messages,
+    `before` (timestamp, messageid) pages back through older ones and `since_timestamp` fetches
+    what arrived after a point. Both are range scans on the (conversationid, timestamp, messageid) index.
+    """
 
     conversation = db.query(ChatConversation).filter(ChatConversation.conversationid == conversation_id).first()
     
     if not conversation:
         return None
     
-    query = (
-        db.query(ChatMessage)
-        .filter(ChatMessage.conversationid == conversation_id)
-        .order_by(ChatMessage.timestamp)
-    )
+    query = db.query(ChatMessage).filter(ChatMessage.conversationid == conversation_id)
     
+    next_cursor = None
     if since_timestamp:
-        query = query.filter(ChatMessage.timestamp > since_timestamp)
+        messages = query.filter(
+            ChatMessage.timestamp > since_timestamp
+        ).order_by(
+            ChatMessage.timestamp, ChatMessage.messageid
+        ).limit(limit).all()
+    else:
+        if before:
+            query = query.filter(tuple_(ChatMessage.timestamp, ChatMessage.messageid) < before)
+        rows = query.order_by(
+            desc(ChatMessage.timestamp), desc(ChatMessage.messageid)
+        ).limit(limit + 1).all()
         
-    messages = query.all()
+        messages = list(reversed(rows[:limit]))
+        if len(rows) > limit:
+            next_cursor = encode_cursor(messages[0].timestamp, messages[0].messageid)
     
     result = ChatConversationDetail(
         conversationid=conversation.conversationid,
@@ -242,14 +342,16 @@ def get_entire_chat(db, conversation_id, since_timestamp: Optional[datetime] = N
         totaltokensinput=conversation.totaltokensinput,
         totaltokensoutput=conversation.totaltokensoutput,
         totalcost=float(conversation.totalcost),
-        messages=[]
+        message_count=conversation.messagecount or 0,
+        messages=[],
+        next_cursor=next_cursor
     )
     
     # adding messages to the result
     
+    contexts = get_contexts_for_messages(db, [msg.messageid for msg in messages])
+    
     for msg in messages: 
-        context = get_message_contexts(db, msg.messageid)
-        
         message_model = ChatMessageWithContextModel(
             messageid=msg.messageid,
             sendertype=msg.sendertype,
@@ -259,7 +361,7 @@ def get_entire_chat(db, conversation_id, since_timestamp: Optional[datetime] = N
             tokensoutput=msg.tokensoutput,
             messagecost=float(msg.messagecost),
             metadata=msg.messagemetadata,
-            contexts=context
+            contexts=contexts.get(msg.messageid, [])
         )
         
         result.messages.append(message_model)
@@ -302,6 +404,7 @@ def create_conversation(
     '''
     return message, conversation
 
+@traced()
 def generate_model_response(
     db: Session,
     user_message_id: int,
@@ -317,13 +420,25 @@ def generate_model_response(
     
     conversation_id = user_message.conversationid
     
-    model_response = chat_model(
-        messages = [{"role": "user", "content": user_message.content}],
+    # Notes are searched for the student who owns the conversation, never anyone else's
+    student_id = db.query(Student.studentid).join(
+        ChatConversation, ChatConversation.userid == Student.logininfoid
+    ).filter(ChatConversation.conversationid == conversation_id).scalar()
+    
+    # Summary of older turns goes in as chat context, the recent turns verbatim; ends with this message
+    history = get_conversation_window(db, conversation_id) or [{"role": "user", "content": user_message.content}]
+    
+    model_response, response_metadata = generate_chat_answer(
+        messages = history,
         use_chat_context = True,
         use_rag_doucments = use_rag,
         rag_query = rag_query or user_message.content,
         conversation_id=conversation_id,
-        model=model
+        model=model,
+        db=db,
+        # Only a conversation's first turn is looked up or stored, see generate_chat_answer
+        use_answer_cache=True,
+        student_id=student_id
     )
     
     
@@ -332,26 +447,40 @@ def generate_model_response(
         conversation_id = conversation_id,
         content = model_response,
         sender_type = "flash",
-        metadata=None
+        metadata=response_metadata
     )
     
     return model_message
         
+@traced()
 def create_message(db, conversation_id, content, sender_type, metadata: Optional[Dict[str, Any]] = None) -> ChatMessage:
     
-    tokens = calculate_token_usage(content)
+    usage = (metadata or {}).get("usage")
+    
+    if usage:
+        # Model responses carry the API's own count for the whole prompt (instruction, context and
+        # the user's turn) plus the answer, so the bill lives on the response
+        tokens_input = usage["prompt_tokens"]
+        tokens_output = usage["output_tokens"]
+        cost = calculate_message_cost(tokens_input, tokens_output)
+    elif sender_type == "user":
+        # The user's text is billed as part of the prompt on the response, only the size is kept here
+        tokens_input = calculate_token_usage(content)
+        tokens_output = 0
+        cost = 0
+    else:
+        tokens_input = 0
+        tokens_output = calculate_token_usage(content)
+        # Answers served from the semantic cache never reached the model
+        cost = 0 if (metadata or {}).get("cached") else calculate_message_cost(0, tokens_output)
     
     new_message = ChatMessage(
         conversationid=conversation_id,
         sendertype=sender_type,
         content=content,
-        # Allows us to differentiate the cost between user and flash
-        tokensinput=tokens if sender_type == "user" else 0,
-        tokensoutput=tokens if sender_type == "flash" else 0,
-        messagecost=calculate_message_cost(
-            tokens if sender_type == "user" else 0,
-            tokens if sender_type == "flash" else 0
-        ),
+        tokensinput=tokens_input,
+        tokensoutput=tokens_output,
+        messagecost=cost,
         messagemetadata=metadata
     )
     
@@ -364,136 +493,19 @@ def create_message(db, conversation_id, content, sender_type, metadata: Optional
     conversation = db.query(ChatConversation).filter(ChatConversation.conversationid == conversation_id).first()
     
     if conversation:
-        if sender_type == "user":
-            conversation.totaltokensinput += tokens
-        else:
-            conversation.totaltokensoutput += tokens
+        # Totals only count what was billed, user turns are already inside the response's prompt count
+        if sender_type != "user":
+            conversation.totaltokensinput += tokens_input
+            conversation.totaltokensoutput += tokens_output
             
         conversation.totalcost += new_message.messagecost
+        conversation.messagecount = (conversation.messagecount or 0) + 1
         conversation.updatedat = datetime.utcnow()
         db.commit()
         
     return new_message
 
-async def generate_domain_questions(domain: str, subdomain: str, student_id: int, count: int = 10, additional_context: str = ""):
-    try:
-        prompt = f"""Generate exactly {count} multiple-choice medical questions for the domain "{domain}" and subdomain "{subdomain}".
-
-Each question must strictly follow these rules:
-1. Be directly relevant to the subdomain topic.
-2. Have exactly 4 possible answers (labeled A, B, C, D).
-3. Have only one correct answer among the 4 options.
-4. Include a brief explanation for why the correct answer is right.
-5. Vary in difficulty (easy, medium, hard).
-6. The entire response MUST be a single, COMPLETE and VALID JSON object.
-7. The JSON object MUST have a single key: "questions".
-8. The value associated with the "questions" key MUST be a JSON array containing EXACTLY {count} question objects.
-9. Each element in the "questions" array MUST be a JSON object representing a question.
-10. Each question object MUST have the following keys and value types:
-    - "id": string (e.g., "1", "2", etc.)
-    - "text": string (the question text)
-    - "options": array of JSON objects. Each object in this array MUST have exactly these three keys:
-        - "id": string (e.g., "A", "B", "C", "D")
-        - "text": string (the option text)
-        - "isCorrect": boolean (true if this is the correct answer, false otherwise)
-        NOTE: The keys within each option object MUST be separated by commas.
-    - "explanation": string (explanation for the correct answer)
-    - "difficulty": string ("easy", "medium", or "hard")
-    - "category": string (should be the subdomain name: "{subdomain}")
-
-Ensure all strings within the JSON are properly escaped (e.g., double quotes inside strings are backslash-escaped).
-
-{additional_context}
-
-STRICTLY return ONLY the JSON object. DO NOT include any other text, formatting, or conversational elements before or after the JSON. The JSON must be the entire response and must be correctly formatted. Example format:
-```json
-{{
-  "questions": [
-    {{
-      "id": "1",
-      "text": "Question text here?",
-      "options": [
-        {{"id": "A", "text": "Option A", "isCorrect": false}},
-        {{"id": "B", "text": "Option B", "isCorrect": true}},
-        {{"id": "C", "text": "Option C", "isCorrect": false}},
-        {{"id": "D", "text": "Option D", "isCorrect": false}}
-      ],
-      "explanation": "Explanation of correct answer",
-      "difficulty": "medium",
-      "category": "{subdomain}"
-    }}
-    // ... {count} total questions
-  ]
-}}
-```
-"""
-
-        messages = [
-            {
-                "role": "user",
-                "content": prompt
-            }
-        ]
-        
-        response_text = chat_model(messages)
-
-        print(f"Raw response from Gemini API: {response_text[:2000]}...") 
-
-        # look for a JSON block first, then try  parsing
-        json_match = re.search(r'```(?:json)?\s*({\s*"questions"[\s\S]*?})\s*```', response_text)
-        
-        if json_match:
-            json_string = json_match.group(1)
-            print("Found JSON code block, attempting to parse...")
-            try:
-                return json.loads(json_string)
-            except json.JSONDecodeError as e:
-                 print(f"JSON decode error from code block: {e}")
-                 pass
-        
-        print("No JSON code block found or parsing failed, attempting direct parse...")
-        try:
-            start_index = response_text.find('{')
-            end_index = response_text.rfind('}')
-            
-            if start_index != -1 and end_index != -1 and end_index > start_index:
-                cleaned_response_text = response_text[start_index:end_index + 1]
-                print(f"Attempting to parse cleaned text: {cleaned_response_text[:1000]}...")
-            else:
-                 print("Could not find valid JSON start/end markers in the response.")
-                 print(f"Full raw response (no JSON markers): {response_text}")
-                 raise ValueError("Could not find valid JSON structure in API response.")
-
-            data = json.loads(cleaned_response_text)
-            if isinstance(data, dict) and "questions" in data and isinstance(data["questions"], list):
-                 print("Direct JSON parse successful and structure seems valid.")
-                 return data
-            else:
-                 print("Direct JSON parse successful but structure is invalid.")
-                 raise ValueError("Invalid JSON structure received from API")
-        except json.JSONDecodeError as e:
-            print(f"Direct JSON decode error: {e}")
-            return {
-                "error": f"Failed to generate valid JSON questions. JSON Decode Error: {e}",
-                "questions": [],
-                "raw_response": response_text[:1000]
-            }
-        except ValueError as e:
-             print(f"Validation error after direct JSON parse: {e}")
-             return {
-                "error": f"Failed to generate valid questions. Validation Error: {e}",
-                "questions": [],
-                "raw_response": response_text[:1000]
-            }
-
-
-    except Exception as e:
-        print(f"Error generating questions: {str(e)}")
-        return {
-            "error": f"Error generating questions: {str(e)}",
-            "questions": []
-        }
-
+@traced()
 def embed_and_create_context_messages(db, message_id):
     from app.models.chat_models import ChatMessage
     from app.services.rag_service import generate_chat_message_embedding
@@ -507,54 +519,166 @@ def embed_and_create_context_messages(db, message_id):
         generate_chat_message_embedding(db, message_id)
 
 # Function to check to create big context summaries (i.e greater than 5 messages)
+def get_conversation_summary(db, conversation_id) -> Optional[ChatContext]:
+    return db.query(ChatContext).filter(
+        ChatContext.conversationid == conversation_id,
+        ChatContext.chatmetadata["kind"].astext == SUMMARY_CONTEXT_KIND
+    ).first()
+
+def _summarized_through(summary: Optional[ChatContext]) -> int:
+    if summary is None or not summary.chatmetadata:
+        return 0
+    return summary.chatmetadata.get("throughmessageid") or 0
+
+def get_unsummarized_messages(db, conversation_id, after_message_id: int = 0, limit: Optional[int] = None) -> List[ChatMessage]:
+    """Messages newer than the summary, oldest first. With a limit only the latest ones are returned."""
+    query = db.query(ChatMessage).filter(
+        ChatMessage.conversationid == conversation_id,
+        ChatMessage.messageid > after_message_id
+    )
+    if limit is None:
+        return query.order_by(ChatMessage.timestamp, ChatMessage.messageid).all()
+    
+    latest = query.order_by(desc(ChatMessage.timestamp), desc(ChatMessage.messageid)).limit(limit).all()
+    return list(reversed(latest))
+
 def check_create_context_summary(db, conversation_id):
-    count = db.query(ChatMessage).filter(ChatMessage.conversationid == conversation_id).count()
-    return count % MIN_CHAT_LENGTH == 0
+    # A summary is due once MIN_CHAT_LENGTH messages have fallen out of the recent window unsummarized
+    summary = get_conversation_summary(db, conversation_id)
+    count = db.query(func.count(ChatMessage.messageid)).filter(
+        ChatMessage.conversationid == conversation_id,
+        ChatMessage.messageid > _summarized_through(summary)
+    ).scalar()
+    return count - RECENT_WINDOW_MESSAGES >= MIN_CHAT_LENGTH
+
+def format_transcript(messages: List[ChatMessage]) -> str:
+    return "\n".join(
+        f"{'Student' if msg.sendertype == 'user' else 'Assistant'}: {msg.content}" for msg in messages
+    )
 
-def create_context_from_recent_message(db, conversation_id, user_id):
-    # Gets the last x (min chat length) messages to create a context
-    messages = db.query(ChatMessage).filter(ChatMessage.conversationid == conversation_id).order_by(ChatMessage.timestamp).limit(MIN_CHAT_LENGTH).all()
-    if not messages:
+@traced()
+def create_context_from_recent_message(db, conversation_id, user_id: Optional[int] = None):
+    """
+    Folds the messages that have left the recent window into the conversation's rolling summary.
+    There is one summary context per conversation, it is rewritten rather than appended to so its
+    size stays flat however long the conversation gets. Returns the summary, or None if nothing was due.
+    """
+    conversation = db.query(ChatConversation).filter(ChatConversation.conversationid == conversation_id).first()
+    if not conversation:
         return None
     
-    user_id = db.query(ChatMessage).filter(ChatMessage.conversationid == conversation_id).first().userid
+    summary = get_conversation_summary(db, conversation_id)
+    messages = get_unsummarized_messages(db, conversation_id, _summarized_through(summary))
     
-    content_summary = "\n".join(
-        [f"{msg.sendertype}: {msg.content}" for msg in messages]
-    )
-    title = generate_title((messages[0].content))    
-    context = ChatContext(
-        conversationid=conversation_id,
-        title=title,
-        content=content_summary,
-        createdat=datetime.utcnow(),
-        updatedat=datetime.utcnow(),
-        isactive=True,  
-        createdby=user_id,  
-    )
-    db.add(context)
-    db.commit()
-    db.refresh(context)
+    # The latest messages are still sent verbatim with every turn, only what is older gets folded in
+    messages = messages[:-RECENT_WINDOW_MESSAGES] if len(messages) > RECENT_WINDOW_MESSAGES else []
+    if len(messages) < MIN_CHAT_LENGTH:
+        return None
+    
+    prompt_parts = [
+        f"Summarize this tutoring conversation between a medical student and an assistant in at most {SUMMARY_MAX_WORDS} words.",
+        "Keep the topics covered, facts the student got wrong or asked to revisit, and anything the student said about themselves.",
+        "Return only the summary."
+    ]
+    if summary:
+        prompt_parts.append(f"Summary so far:\n{summary.content}")
+    prompt_parts.append(f"New messages:\n{format_transcript(messages)}")
+    
+    try:
+        content = chat_model(
+            [{"role": "user", "content": "\n\n".join(prompt_parts)}],
+            use_chat_context=False,
+            use_rag_doucments=False,
+            operation="summary"
+        ).strip()
+    except Exception as e:
+        # Nothing is marked as summarized, the same messages are picked up on the next turn
+        print(f"Error summarizing conversation {conversation_id}: {e}")
+        return None
+    
+    summary_metadata = {
+        "kind": SUMMARY_CONTEXT_KIND,
+        "throughmessageid": messages[-1].messageid,
+        "summarizedmessages": ((summary.chatmetadata or {}).get("summarizedmessages", 0) if summary else 0) + len(messages)
+    }
+    
+    if summary is None:
+        summary = ChatContext(
+            conversationid=conversation_id,
+            title=f"Summary: {conversation.title}"[:255],
+            createdat=datetime.utcnow(),
+            isactive=True,
+            # Ranks the summary ahead of everything else when the prompt is packed
+            importancescore=1.0,
+            createdby=user_id or conversation.userid,
+        )
+        db.add(summary)
+    
+    summary.content = content
+    summary.chatmetadata = summary_metadata
+    summary.updatedat = datetime.utcnow()
+    db.flush()
     
     for msg in messages:
-        link_context_to_message(db, msg.messageid, context.contextid)
+        db.add(ChatMessageContext(messageid=msg.messageid, contextid=summary.contextid, wasused=True))
+    db.commit()
+    db.refresh(summary)
     
-    from app.services.rag_service import generate_chat_context_embedding, generate_chat_message_embedding
-    generate_chat_context_embedding(db, context.contextid)
+    from app.services.rag_service import generate_chat_context_embedding
+    generate_chat_context_embedding(db, summary.contextid)
     
-    return context
+    return summary
+
+def summarize_conversation(conversation_id: int):
+    """Background job run after each model response, opens its own session."""
+    with _summaries_lock:
+        if conversation_id in _summaries_running:
+            return None
+        _summaries_running.add(conversation_id)
+    
+    db = next(get_db())
+    try:
+        if not check_create_context_summary(db, conversation_id):
+            return None
+        return create_context_from_recent_message(db, conversation_id)
+    except Exception as e:
+        print(f"Error updating summary for conversation {conversation_id}: {e}")
+        db.rollback()
+        return None
+    finally:
+        db.close()
+        with _summaries_lock:
+            _summaries_running.discard(conversation_id)
+
+def get_conversation_window(db, conversation_id) -> List[dict]:
+    """
+    The turns sent verbatim with a new question: everything after the rolling summary, capped
+    at the latest MAX_HISTORY_MESSAGES in case the summary job has fallen behind.
+    """
+    summary = get_conversation_summary(db, conversation_id)
+    messages = get_unsummarized_messages(db, conversation_id, _summarized_through(summary), limit=MAX_HISTORY_MESSAGES)
+    return [
+        {"role": "user" if msg.sendertype == "user" else "model", "content": msg.content}
+        for msg in messages
+    ]
         
 def link_context_to_message(db, message_id, context_id):
     context_link = ChatMessageContext(messageid=message_id, contextid=context_id, wasused=True)
     db.add(context_link) 
     db.commit() 
     
+@traced()
 def get_recent_chat_context(conversation_id, limit):
     db = next(get_db())
     
     try:
-        context = db.query(ChatContext).filter(ChatContext.conversationid == conversation_id).order_by(desc(ChatContext.updatedat)).limit(limit).all()
-        return [{"title": ctx.title, "content": ctx.content} for ctx in context]
+        # The rolling summary carries the top importance score so it always comes first
+        context = db.query(ChatContext).filter(
+            ChatContext.conversationid == conversation_id
+        ).order_by(
+            desc(ChatContext.importancescore).nulls_last(), desc(ChatContext.updatedat)
+        ).limit(limit).all()
+        return [{"title": ctx.title, "content": ctx.content, "importancescore": ctx.importancescore} for ctx in context]
     except Exception as e:
         print(f"Error retrieving recent chat context: {e}")
         return []
@@ -563,8 +687,19 @@ def get_recent_chat_context(conversation_id, limit):
 
 
 async def generate_domain_questions(domain: str, subdomain: str, student_id: int, count: int = 10, additional_context: str = ""):
-    try:
-        prompt = f"""Generate exactly {count} multiple-choice medical questions for the domain "{domain}" and subdomain "{subdomain}".
+    # The Gemini call blocks, run it on a worker thread so concurrent requests and job fan-out don't stall the event loop
+    return await asyncio.to_thread(generate_questions, domain, subdomain, count, additional_context)
+
+# A batch gets this many calls in total: the first for every question, the rest only for what was missing
+MAX_QUESTION_ATTEMPTS = 3
+
+def build_question_prompt(domain: str, subdomain: str, count: int, additional_context: str = "", exclude: Optional[List[str]] = None) -> str:
+    exclude_block = ""
+    if exclude:
+        # Follow-up calls must not repeat questions that were already accepted
+        exclude_block = "Do NOT repeat any of these existing questions:\n" + "\n".join(f"- {text}" for text in exclude) + "\n"
+    
+    prompt = f"""Generate exactly {count} multiple-choice medical questions for the domain "{domain}" and subdomain "{subdomain}".
 
 Each question must strictly follow these rules:
 1. Be directly relevant to the subdomain topic.
@@ -591,6 +726,7 @@ Each question must strictly follow these rules:
 Ensure all strings within the JSON are properly escaped (e.g., double quotes inside strings are backslash-escaped).
 
 {additional_context}
+{exclude_block}
 
 STRICTLY return ONLY the JSON object. DO NOT include any other text, formatting, or conversational elements before or after the JSON. The JSON must be the entire response and must be correctly formatted. Example format:
 ```json
@@ -614,69 +750,71 @@ STRICTLY return ONLY the JSON object. DO NOT include any other text, formatting,
 }}
 ```
 """
-
-        messages = [
-            {
-                "role": "user",
-                "content": prompt
-            }
-        ]
+    return prompt
+
+@traced()
+def generate_questions(domain: str, subdomain: str, count: int = 10, additional_context: str = ""):
+    """
+    Generates count questions in JSON mode and validates them one by one. Valid questions are kept
+    when others in the batch are broken, and follow-up calls ask only for the missing ones.
+    Returns {"questions": [...]} (possibly fewer than count), or an "error" when none were valid.
+    """
+    accepted: List[dict] = []
+    last_errors: List[str] = []
+    
+    for attempt in range(MAX_QUESTION_ATTEMPTS):
+        missing = count - len(accepted)
+        if missing <= 0:
+            break
         
-        response_text = chat_model(messages)
-
-        print(f"Raw response from Gemini API: {response_text[:2000]}...") 
-
-        # look for a JSON block first, then try  parsing
-        json_match = re.search(r'```(?:json)?\s*({\s*"questions"[\s\S]*?})\s*```', response_text)
-        
-        if json_match:
-            json_string = json_match.group(1)
-            print("Found JSON code block, attempting to parse...")
-            try:
-                return json.loads(json_string)
-            except json.JSONDecodeError as e:
-                 print(f"JSON decode error from code block: {e}")
-                 pass
+        if attempt:
+            question_parser.record("followup_calls")
+            question_parser.record("followup_questions", missing)
         
-        print("No JSON code block found or parsing failed, attempting direct parse...")
+        prompt = build_question_prompt(
+            domain, subdomain, missing, additional_context,
+            exclude=[question["text"] for question in accepted]
+        )
         try:
-            start_index = response_text.find('{')
-            end_index = response_text.rfind('}')
-            
-            if start_index != -1 and end_index != -1 and end_index > start_index:
-                cleaned_response_text = response_text[start_index:end_index + 1]
-                print(f"Attempting to parse cleaned text: {cleaned_response_text[:1000]}...")
-            else:
-                 print("Could not find valid JSON start/end markers in the response.")
-                 print(f"Full raw response (no JSON markers): {response_text}")
-                 raise ValueError("Could not find valid JSON structure in API response.")
-
-            data = json.loads(cleaned_response_text)
-            if isinstance(data, dict) and "questions" in data and isinstance(data["questions"], list):
-                 print("Direct JSON parse successful and structure seems valid.")
-                 return data
-            else:
-                 print("Direct JSON parse successful but structure is invalid.")
-                 raise ValueError("Invalid JSON structure received from API")
-        except json.JSONDecodeError as e:
-            print(f"Direct JSON decode error: {e}")
-            return {
-                "error": f"Failed to generate valid JSON questions. JSON Decode Error: {e}",
-                "questions": [],
-                "raw_response": response_text[:1000]
-            }
-        except ValueError as e:
-             print(f"Validation error after direct JSON parse: {e}")
-             return {
-                "error": f"Failed to generate valid questions. Validation Error: {e}",
-                "questions": [],
-                "raw_response": response_text[:1000]
-            }
-
-
-    except Exception as e:
-        print(f"Error generating questions: {str(e)}")
+            response_text = chat_model([{"role": "user", "content": prompt}], response_mime_type="application/json", operation="questions")
+        except Exception as e:
+            print(f"Error generating questions: {str(e)}")
+            last_errors = [str(e)]
+            continue
+        
+        parsed = question_parser.parse_questions(response_text)
+        seen = {question["text"].strip().lower() for question in accepted}
+        fresh = [question for question in parsed["questions"] if question["text"].strip().lower() not in seen][:missing]
+        accepted.extend(fresh)
+        last_errors = parsed["errors"]
+        
+        rejected = parsed["malformed"] + parsed["invalid"]
+        question_parser.record("batches")
+        question_parser.record("questions_accepted", len(fresh))
+        question_parser.record("questions_malformed", parsed["malformed"])
+        question_parser.record("questions_invalid", parsed["invalid"])
+        if not fresh:
+            question_parser.record("failed_batches")
+        elif rejected or len(fresh) < missing:
+            question_parser.record("salvaged_batches")
+            if len(accepted) < count:
+                # A whole-batch parse would have thrown these away and asked for all of them again
+                question_parser.record("full_regenerations_avoided")
+                question_parser.record("questions_not_regenerated", len(fresh))
+        else:
+            question_parser.record("clean_batches")
+        
+        if rejected:
+            print(f"Kept {len(fresh)} of {missing} questions for {subdomain}, rejected {rejected}: {parsed['errors'][:3]}")
+    
+    if not accepted:
         return {
-            "error": f"Error generating questions: {str(e)}",
+            "error": f"Failed to generate valid questions: {'; '.join(last_errors[:3]) or 'no questions in response'}",
             "questions": []
-        }
\ No newline at end of file
+        }
+    
+    for number, question in enumerate(accepted, start=1):
+        question["id"] = str(number)
+        question["category"] = subdomain
+    
+    return {"questions": accepted}
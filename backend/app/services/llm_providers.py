@@ -0,0 +1,163 @@
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+
+# Embedding and chat completion backends, picked by LLM_PROVIDER. "gemini" is the real API,
+# "local" answers deterministically in process so load tests and CI never touch the network.
+
+EMBEDDING_DIM = 768
+
+
+class ProviderError(RuntimeError):
+    """Failure injected by a local provider, stands in for a quota or transport error from the real API."""
+
+
+class FaultInjector:
+    """Sleeps LOCAL_PROVIDER_LATENCY_MS (+/- jitter) per call and fails LOCAL_PROVIDER_ERROR_RATE of them."""
+
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0, error_rate: float = 0.0, seed: Optional[int] = None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls) -> "FaultInjector":
+        return cls(settings.LOCAL_PROVIDER_LATENCY_MS, settings.LOCAL_PROVIDER_JITTER_MS, settings.LOCAL_PROVIDER_ERROR_RATE, settings.LOCAL_PROVIDER_SEED)
+
+    def __call__(self, operation: str):
+        with self._lock:
+            delay = max(0.0, self.latency_ms + self._rng.uniform(-self.jitter_ms, self.jitter_ms))
+            fail = self._rng.random() < self.error_rate
+        if delay:
+            time.sleep(delay / 1000)
+        if fail:
+            raise ProviderError(f"Injected {operation} failure")
+
+
+def deterministic_embedding(text: str, dim: int = EMBEDDING_DIM) -> List[float]:
+    """Unit vector seeded by the text's hash, equal texts always embed to the same vector."""
+    import numpy as np
+
+    seed = int.from_bytes(hashlib.sha256(text.encode()).digest()[:8], "little")
+    vector = np.random.default_rng(seed).standard_normal(dim)
+    return (vector / np.linalg.norm(vector)).tolist()
+
+
+class GeminiProvider:
+    """google.generativeai with the GEMINI_API_KEYS rotation. Keys are only read on the first call."""
+
+    name = "gemini"
+
+    def __init__(self):
+        self._keys: Optional[List[str]] = None
+
+    def _configure(self):
+        import google.generativeai as genai
+
+        if self._keys is None:
+            self._keys = [key.strip() for key in (settings.GEMINI_API_KEYS or "").split(",") if key.strip()]
+        if not self._keys:
+            raise ValueError("No GEMINI_API_KEYS configured")
+        genai.configure(api_key=random.choice(self._keys))
+        return genai
+
+    def embed(self, text: str, model: str) -> List[float]:
+        genai = self._configure()
+        res = genai.embed_content(model=model, content=text)
+        return res.get("embedding") or res.get("embeddings")
+
+    def generate(self, model: str, contents: List[dict], system_instruction: Optional[str] = None, generation_config: Optional[Dict[str, Any]] = None):
+        genai = self._configure()
+        model_obj = genai.GenerativeModel(
+            model,
+            system_instruction=system_instruction,
+            generation_config=generation_config
+        )
+        return model_obj.generate_content(contents)
+
+
+class LocalProvider:
+    """
+    Offline stand-in for Gemini. Embeddings are deterministic_embedding, chat answers are derived from
+    the last user turn, and JSON mode returns the number of valid practice questions the prompt asks for.
+    Responses carry usage_metadata like the real API so billing and metrics code paths still run.
+    """
+
+    name = "local"
+
+    def __init__(self, faults: Optional[FaultInjector] = None):
+        self.faults = faults or FaultInjector.from_settings()
+
+    def embed(self, text: str, model: str) -> List[float]:
+        self.faults("embed")
+        return deterministic_embedding(text)
+
+    def generate(self, model: str, contents: List[dict], system_instruction: Optional[str] = None, generation_config: Optional[Dict[str, Any]] = None):
+        self.faults("generate")
+        prompt = "\n".join(part["text"] for turn in contents for part in turn["parts"])
+
+        if (generation_config or {}).get("response_mime_type") == "application/json":
+            text = json.dumps({"questions": self._questions(prompt)})
+        else:
+            text = f"Local answer ({len(contents)} turns): {prompt[-200:]}"
+
+        prompt_tokens = (len(prompt) + len(system_instruction or "")) // 4
+        output_tokens = len(text) // 4
+        return SimpleNamespace(
+            candidates=[SimpleNamespace(content=SimpleNamespace(parts=[SimpleNamespace(text=text)]))],
+            text=text,
+            usage_metadata=SimpleNamespace(
+                prompt_token_count=prompt_tokens,
+                candidates_token_count=output_tokens,
+                total_token_count=prompt_tokens + output_tokens
+            )
+        )
+
+    def _questions(self, prompt: str) -> List[dict]:
+        requested = re.search(r"Generate exactly (\d+)", prompt)
+        count = int(requested.group(1)) if requested else 1
+        # Seeded by the prompt, so a follow-up prompt (which lists the questions to exclude) gets new ones
+        rng = random.Random(hashlib.sha256(prompt.encode()).hexdigest())
+        questions = []
+        for index in range(1, count + 1):
+            correct = rng.choice("ABCD")
+            questions.append({
+                "id": str(index),
+                "text": f"Local question {rng.getrandbits(48):x}: which option is correct?",
+                "options": [{"id": letter, "text": f"Option {letter}", "isCorrect": letter == correct} for letter in "ABCD"],
+                "explanation": f"Option {correct} is correct.",
+                "difficulty": rng.choice(["easy", "medium", "hard"]),
+            })
+        return questions
+
+
+PROVIDERS = {"gemini": GeminiProvider, "local": LocalProvider}
+
+_provider = None
+_provider_lock = threading.Lock()
+
+
+def get_llm_provider():
+    global _provider
+    if _provider is None:
+        with _provider_lock:
+            if _provider is None:
+                if settings.LLM_PROVIDER not in PROVIDERS:
+                    raise ValueError(f"Unknown LLM_PROVIDER {settings.LLM_PROVIDER!r}, expected one of {', '.join(PROVIDERS)}")
+                _provider = PROVIDERS[settings.LLM_PROVIDER]()
+    return _provider
+
+
+def set_llm_provider(provider):
+    """Replaces the process-wide provider, None goes back to the one LLM_PROVIDER selects."""
+    global _provider
+    _provider = provider
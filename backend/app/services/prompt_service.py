@@ -0,0 +1,133 @@
+import threading
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+from app.services.token_service import estimate_tokens, truncate_to_tokens
+
+# An item is only cut down to fit when at least this much budget is left, smaller scraps are dropped
+MIN_TRUNCATED_ITEM_TOKENS = 100
+# Sizes of the most recent prompts kept in memory for the distribution report
+PROMPT_SAMPLE_SIZE = 1000
+
+_prompt_samples = deque(maxlen=PROMPT_SAMPLE_SIZE)
+_samples_lock = threading.Lock()
+
+
+def _rank_candidates(chat_contexts: List[dict], rag_documents: List[dict]) -> List[dict]:
+    """
+    Orders context by how useful it is likely to be. RAG chunks carry a cosine similarity,
+    chat contexts carry an importance score when one was set and otherwise rank just behind
+    strong document matches, most recent first.
+    """
+    candidates = []
+    for rank, context in enumerate(chat_contexts):
+        score = context.get("importancescore")
+        score = float(score) if score is not None else 0.75 - rank * 0.01
+        candidates.append({"kind": "context", "score": score, "item": context})
+    for doc in rag_documents:
+        candidates.append({"kind": "document", "score": float(doc.get("similarity") or 0), "item": doc})
+    return sorted(candidates, key=lambda candidate: candidate["score"], reverse=True)
+
+
+def build_system_instruction(chat_contexts: List[dict], rag_documents: List[dict], budget_tokens: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Packs the highest ranked context into budget_tokens (PROMPT_CONTEXT_TOKEN_BUDGET by default)
+    and renders it as the system instruction. Returns the instruction, what was kept and the estimate.
+    """
+    if budget_tokens is None:
+        budget_tokens = settings.PROMPT_CONTEXT_TOKEN_BUDGET
+
+    remaining = budget_tokens
+    kept_contexts, kept_documents = [], []
+    dropped = 0
+    truncated = 0
+
+    for candidate in _rank_candidates(chat_contexts, rag_documents):
+        item = dict(candidate["item"])
+        cost = estimate_tokens(f"{item['title']}: {item['content']}")
+
+        if cost > remaining:
+            if remaining < MIN_TRUNCATED_ITEM_TOKENS:
+                dropped += 1
+                continue
+            item["content"] = truncate_to_tokens(item["content"], remaining - estimate_tokens(item["title"]) - 1)
+            cost = estimate_tokens(f"{item['title']}: {item['content']}")
+            truncated += 1
+
+        remaining -= cost
+        if candidate["kind"] == "context":
+            kept_contexts.append(item)
+        else:
+            kept_documents.append(item)
+
+    instruction = construct_system_prompt(kept_contexts, kept_documents)
+    return {
+        "system_instruction": instruction,
+        "estimated_tokens": estimate_tokens(instruction),
+        "contexts": len(kept_contexts),
+        "documents": len(kept_documents),
+        "dropped": dropped,
+        "truncated": truncated,
+    }
+
+
+def construct_system_prompt(chat_context: List[dict], rag_documents: List[dict]) -> str:
+
+    prompt_parts = []
+
+    if chat_context:
+        prompt_parts.append("Previous Chat Context:")
+        for context in chat_context:
+            prompt_parts.append(f"{context['title']}: {context['content']}")
+
+    if rag_documents:
+        prompt_parts.append("Relevant Documents:")
+        for doc in rag_documents:
+            prompt_parts.append(f"{doc['title']}: {doc['content']}")
+
+    return "\n".join(prompt_parts)
+
+
+def usage_from_response(response) -> Optional[Dict[str, int]]:
+    """Token counts reported by the API for a generate_content response, None if it reported none."""
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None:
+        return None
+    return {
+        "prompt_tokens": int(getattr(usage, "prompt_token_count", 0) or 0),
+        "output_tokens": int(getattr(usage, "candidates_token_count", 0) or 0),
+        "total_tokens": int(getattr(usage, "total_token_count", 0) or 0),
+    }
+
+
+def record_prompt(estimated_tokens: int, usage: Optional[Dict[str, int]]):
+    with _samples_lock:
+        _prompt_samples.append((estimated_tokens, usage["prompt_tokens"] if usage else None))
+
+
+def _percentile(values: List[int], percent: float) -> int:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(percent / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def prompt_stats() -> Dict[str, Any]:
+    """Distribution of recent prompt sizes, and how far the local estimate is from the API's count."""
+    with _samples_lock:
+        samples = list(_prompt_samples)
+
+    actual = [actual_tokens for _, actual_tokens in samples if actual_tokens is not None]
+    stats: Dict[str, Any] = {"samples": len(samples), "budget_tokens": settings.PROMPT_CONTEXT_TOKEN_BUDGET}
+    if actual:
+        stats["prompt_tokens"] = {
+            "mean": round(sum(actual) / len(actual), 1),
+            "p50": _percentile(actual, 50),
+            "p90": _percentile(actual, 90),
+            "p99": _percentile(actual, 99),
+            "max": max(actual),
+        }
+        paired = [(estimate, actual_tokens) for estimate, actual_tokens in samples if actual_tokens]
+        if paired:
+            stats["estimate_to_actual_ratio"] = round(sum(estimate for estimate, _ in paired) / sum(value for _, value in paired), 3)
+    return stats
@@ -0,0 +1,214 @@
+import asyncio
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from app.core.database import get_db
+from app.models.class_models import GeneratedQuestion, QuestionGenerationJob
+from app.services import gemini_service
+
+# Subdomain and job states
+PENDING = "pending"
+RUNNING = "running"
+COMPLETED = "completed"
+PARTIAL = "partial"
+FAILED = "failed"
+
+
+def build_rag_context(domain: str, subdomain: str, limit: int = 3) -> str:
+    from app.services.rag_service import search_documents
+
+    relevant_docs = search_documents(f"{domain} {subdomain}", limit=limit)
+    if not relevant_docs:
+        return ""
+
+    doc_context = "Use the following document excerpts as reference:\n\n"
+    for i, doc in enumerate(relevant_docs, 1):
+        doc_context += f"Document {i}: {doc['title']}\n{doc['content']}\n\n"
+    return doc_context
+
+
+def format_question(question: GeneratedQuestion) -> Dict[str, Any]:
+    return {
+        "id": question.id,
+        "text": question.question_text,
+        "difficulty": question.difficulty,
+        "category": question.subdomain,
+        "correctPct": (question.times_correct / question.times_practiced * 100) if question.times_practiced else 0,
+        "timesPracticed": question.times_practiced or 0
+    }
+
+
+def save_generated_questions(db, student_id: int, domain: str, subdomain: str, questions: List[dict]) -> List[GeneratedQuestion]:
+    """Adds the questions the student doesn't already have and returns every matching row. Does not commit."""
+    saved = []
+    for q in questions:
+        existing = db.query(GeneratedQuestion).filter(
+            GeneratedQuestion.student_id == student_id,
+            GeneratedQuestion.domain == domain,
+            GeneratedQuestion.subdomain == subdomain,
+            GeneratedQuestion.question_text == q.get("text")
+        ).first()
+
+        if existing:
+            saved.append(existing)
+            continue
+
+        options_data = []
+        correct_option = ""
+
+        for opt in q.get("options", []):
+            if opt.get("isCorrect"):
+                correct_option = opt.get("id", "")
+            options_data.append(opt)
+
+        new_question = GeneratedQuestion(
+            student_id=student_id,
+            domain=domain,
+            subdomain=subdomain,
+            question_text=q.get("text", ""),
+            options=options_data,
+            correct_option=correct_option,
+            explanation=q.get("explanation", ""),
+            difficulty=q.get("difficulty", "medium"),
+            times_practiced=0,
+            times_correct=0
+        )
+
+        db.add(new_question)
+        db.flush()
+        saved.append(new_question)
+
+    return saved
+
+
+def create_job(db, student_id: int, domain: str, subdomains: List[str], count: int) -> QuestionGenerationJob:
+    job = QuestionGenerationJob(
+        student_id=student_id,
+        domain=domain,
+        subdomains=subdomains,
+        count=count,
+        status=PENDING,
+        progress={subdomain: {"status": PENDING, "question_ids": [], "error": None} for subdomain in subdomains}
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def _update_progress(db, job_id: int, subdomain: str, **entry):
+    # Subdomains finish on different threads, the row lock keeps one from overwriting another's progress
+    job = db.query(QuestionGenerationJob).filter(QuestionGenerationJob.id == job_id).with_for_update().first()
+    if not job:
+        return
+    progress = dict(job.progress or {})
+    progress[subdomain] = {**progress.get(subdomain, {}), **entry}
+    job.progress = progress
+    if job.status == PENDING:
+        job.status = RUNNING
+    db.commit()
+
+
+def generate_for_subdomain(job_id: int, student_id: int, domain: str, subdomain: str, count: int, additional_context: str = "", rag: bool = True):
+    """Generates and saves one subdomain's questions. Runs on a worker thread with its own session."""
+    db = next(get_db())
+    try:
+        _update_progress(db, job_id, subdomain, status=RUNNING)
+
+        context = additional_context
+        if rag:
+            context = build_rag_context(domain, subdomain) + additional_context
+
+        generated = gemini_service.generate_questions(domain, subdomain, count, context)
+        if "error" in generated:
+            _update_progress(db, job_id, subdomain, status=FAILED, error=generated["error"])
+            return
+
+        saved = save_generated_questions(db, student_id, domain, subdomain, generated.get("questions", []))
+        db.flush()
+        _update_progress(db, job_id, subdomain, status=COMPLETED, question_ids=[question.id for question in saved])
+    except Exception as e:
+        db.rollback()
+        print(f"Error generating questions for job {job_id} ({subdomain}): {e}")
+        _update_progress(db, job_id, subdomain, status=FAILED, error=str(e))
+    finally:
+        db.close()
+
+
+async def run_job(job_id: int, additional_context: str = "", rag: bool = True):
+    """
+    Background task: every subdomain is generated concurrently and saved as soon as it finishes.
+    The shared LLM limiter in gemini_service bounds how many Gemini calls are actually in flight.
+    """
+    db = next(get_db())
+    try:
+        job = db.query(QuestionGenerationJob).filter(QuestionGenerationJob.id == job_id).first()
+        if not job:
+            return
+        student_id, domain, subdomains, count = job.student_id, job.domain, list(job.subdomains), job.count
+        job.status = RUNNING
+        db.commit()
+    finally:
+        db.close()
+
+    await asyncio.gather(*[
+        asyncio.to_thread(generate_for_subdomain, job_id, student_id, domain, subdomain, count, additional_context, rag)
+        for subdomain in subdomains
+    ])
+
+    db = next(get_db())
+    try:
+        job = db.query(QuestionGenerationJob).filter(QuestionGenerationJob.id == job_id).first()
+        states = [entry.get("status") for entry in (job.progress or {}).values()]
+        if all(state == COMPLETED for state in states):
+            job.status = COMPLETED
+        elif any(state == COMPLETED for state in states):
+            job.status = PARTIAL
+        else:
+            job.status = FAILED
+        job.finished_at = datetime.utcnow()
+        db.commit()
+    finally:
+        db.close()
+
+
+def job_response(db, job: QuestionGenerationJob, include_questions: bool = True) -> Dict[str, Any]:
+    """Job progress plus every question saved so far, grouped by subdomain."""
+    progress = job.progress or {}
+    question_ids = [question_id for entry in progress.values() for question_id in entry.get("question_ids") or []]
+
+    questions: Dict[int, GeneratedQuestion] = {}
+    if include_questions and question_ids:
+        questions = {
+            question.id: question
+            for question in db.query(GeneratedQuestion).filter(GeneratedQuestion.id.in_(question_ids)).all()
+        }
+
+    subdomains = []
+    for subdomain in job.subdomains:
+        entry = progress.get(subdomain, {})
+        item: Dict[str, Any] = {
+            "subdomain": subdomain,
+            "status": entry.get("status", PENDING),
+            "error": entry.get("error"),
+            "question_count": len(entry.get("question_ids") or []),
+        }
+        if include_questions:
+            item["questions"] = [
+                format_question(questions[question_id])
+                for question_id in entry.get("question_ids") or []
+                if question_id in questions
+            ]
+        subdomains.append(item)
+
+    done = sum(1 for item in subdomains if item["status"] in (COMPLETED, FAILED))
+    return {
+        "job_id": job.id,
+        "domain": job.domain,
+        "status": job.status,
+        "completed": done,
+        "total": len(subdomains),
+        "created_at": job.created_at,
+        "finished_at": job.finished_at,
+        "subdomains": subdomains
+    }
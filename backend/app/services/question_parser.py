@@ -0,0 +1,165 @@
+import json
+import threading
+from typing import Any, Dict, Iterator, List, Literal, Optional, Tuple
+
+from pydantic import BaseModel, Field, ValidationError, field_validator, model_validator
+
+_decoder = json.JSONDecoder()
+
+# Process-local counters, reset on restart
+_stats = {
+    "batches": 0,
+    "clean_batches": 0,
+    "salvaged_batches": 0,
+    "failed_batches": 0,
+    "questions_accepted": 0,
+    "questions_malformed": 0,
+    "questions_invalid": 0,
+    "followup_calls": 0,
+    "followup_questions": 0,
+    "full_regenerations_avoided": 0,
+    "questions_not_regenerated": 0,
+}
+_stats_lock = threading.Lock()
+
+
+def record(event: str, amount: int = 1):
+    with _stats_lock:
+        _stats[event] += amount
+
+
+def parser_stats() -> Dict[str, Any]:
+    with _stats_lock:
+        stats = dict(_stats)
+    seen = stats["questions_accepted"] + stats["questions_malformed"] + stats["questions_invalid"]
+    stats["acceptance_rate"] = round(stats["questions_accepted"] / seen, 4) if seen else 0.0
+    return stats
+
+
+class QuestionOptionSchema(BaseModel):
+    id: str
+    text: str = Field(..., min_length=1)
+    isCorrect: bool
+
+    @field_validator("id", mode="before")
+    @classmethod
+    def normalize_id(cls, value):
+        return str(value).strip().upper()
+
+
+class GeneratedQuestionSchema(BaseModel):
+    id: Optional[str] = None
+    text: str = Field(..., min_length=1)
+    options: List[QuestionOptionSchema]
+    explanation: str = ""
+    difficulty: Literal["easy", "medium", "hard"] = "medium"
+    category: Optional[str] = None
+
+    @field_validator("id", mode="before")
+    @classmethod
+    def stringify_id(cls, value):
+        return None if value is None else str(value)
+
+    @field_validator("difficulty", mode="before")
+    @classmethod
+    def normalize_difficulty(cls, value):
+        value = str(value or "medium").strip().lower()
+        return {"med": "medium", "moderate": "medium", "difficult": "hard"}.get(value, value)
+
+    @model_validator(mode="after")
+    def one_correct_of_four(self):
+        if len(self.options) != 4:
+            raise ValueError(f"expected 4 options, got {len(self.options)}")
+        if sum(option.isCorrect for option in self.options) != 1:
+            raise ValueError("expected exactly one correct option")
+        if len({option.id for option in self.options}) != 4:
+            raise ValueError("option ids must be unique")
+        return self
+
+
+def _skip_value(text: str, pos: int) -> int:
+    """End of the bracketed value starting at pos, tracking strings so braces inside them are ignored."""
+    depth = 0
+    in_string = False
+    escaped = False
+    for index in range(pos, len(text)):
+        char = text[index]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "{[":
+            depth += 1
+        elif char in "}]":
+            depth -= 1
+            if depth == 0:
+                return index + 1
+    return len(text)
+
+
+def _array_start(text: str) -> Optional[int]:
+    key = text.find('"questions"')
+    start = text.find("[", key if key != -1 else 0)
+    return None if start == -1 else start + 1
+
+
+def iter_question_items(text: str) -> Iterator[Tuple[Optional[dict], Optional[str]]]:
+    """
+    Walks the "questions" array one element at a time, yielding (item, None) for each element that
+    decodes and (None, error) for each that doesn't. A broken element is skipped rather than failing
+    the whole response, and a response cut off mid-array still yields everything before the cut.
+    """
+    pos = _array_start(text)
+    if pos is None:
+        return
+
+    length = len(text)
+    while pos < length:
+        while pos < length and text[pos] in " \t\r\n,":
+            pos += 1
+        if pos >= length or text[pos] == "]":
+            return
+        if text[pos] != "{":
+            # Stray text between elements, resync on the next object
+            next_object = text.find("{", pos)
+            if next_object == -1:
+                return
+            pos = next_object
+            continue
+
+        try:
+            item, pos = _decoder.raw_decode(text, pos)
+            yield item, None
+        except json.JSONDecodeError as e:
+            end = _skip_value(text, pos)
+            yield None, f"malformed JSON at char {e.pos}"
+            pos = end
+
+
+def parse_questions(text: str) -> Dict[str, Any]:
+    """
+    Validates the response question by question. Returns the valid questions as plain dicts plus
+    counts of elements that were malformed JSON or failed the schema, and the error messages.
+    """
+    questions: List[dict] = []
+    malformed = 0
+    invalid = 0
+    errors: List[str] = []
+
+    for item, error in iter_question_items(text or ""):
+        if error:
+            malformed += 1
+            errors.append(error)
+            continue
+        try:
+            questions.append(GeneratedQuestionSchema.model_validate(item).model_dump())
+        except ValidationError as e:
+            invalid += 1
+            errors.append(f"invalid question: {e.errors()[0]['msg']}")
+
+    return {"questions": questions, "malformed": malformed, "invalid": invalid, "errors": errors}
@@ -1,4 +1,4 @@
-from typing import List, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 
 from app.models import (
     Question,
@@ -12,16 +12,19 @@ from app.models import (
 )
 
 from ..core.database import get_db, get_question_with_details, get_chat_context, get_chat_message
+from ..core.tracing import traced
 from app.services.gemini_service import embed_texts, embed_text
 
 from sqlalchemy import text, func
 from sqlalchemy import select, desc
+from sqlalchemy.orm import aliased
 
-import pypdf
-import docx
 import os
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from app.services.s3_service import s3, BUCKET
+import hashlib
+from app.services.s3_service import get_storage, StorageKeyNotFound
+from app.services.extract_service import SUPPORTED_EXTENSIONS, extract_pdf_pages, extract_docx_paragraphs, extract_text_cached, extract_texts
+from app.services.chunk_service import chunk_text, embedding_text
+from app.services import answer_cache_service
 
 
 #Pre Processing Step Before Embedding Converts a question to a string takes in a dictionary found in get_question_with_details
@@ -159,31 +162,24 @@ def generate_chatmessage_embedding_SCRIPT(chatmessage_id, db):
 def extract_text_pdf(filepath: str) -> str:
     
     with open(filepath, "rb") as file:
-        pdf_reader = pypdf.PdfReader(file)
-        text = ""
-        for page in pdf_reader.pages:
-            text += page.extract_text() + "\n"
-    return text
+        return "".join(extract_pdf_pages(file))
 
 def extract_text_docx(filepath: str) -> str:
     
-    doc = docx.Document(filepath)
-    text = ""
-    for paragraph in doc.paragraphs:
-        text += paragraph.text + "\n"
-    return text
+    return "".join(extract_docx_paragraphs(filepath))
 
 def extract_text(filepath: str) -> str:
     
     _, ext = os.path.splitext(filepath)
-    if ext.lower() == ".pdf":
-        return extract_text_pdf(filepath)
-    elif ext in [".docx", ".doc"]:
-        return extract_text_docx(filepath)
-    else:
+    if ext.lower() not in SUPPORTED_EXTENSIONS:
         raise ValueError(f"Unsupported file type: {ext}")
+    # Served from the extracted text cache when the same file content was parsed before
+    return extract_text_cached(filepath)
     
+# Original fixed size splitter, ingest now uses chunk_document. Kept for the chunking benchmark
 def split_text(text: str) -> List[str]:
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+    
     # Split the text into chunks of 1000 characters with a chunk overlap of 200 characters
     text_splitter = RecursiveCharacterTextSplitter(
         chunk_size=1000,
@@ -196,18 +192,10 @@ def split_text(text: str) -> List[str]:
 # Nearly identical to the os extract but is support for S3 file objects
 def extract_text_pdf_from_s3(file_obj) -> str:
     
-    pdf_reader = pypdf.PdfReader(file_obj)
-    text = ""
-    for page in pdf_reader.pages:
-        text += page.extract_text() + "\n"
-    return text
+    return "".join(extract_pdf_pages(file_obj))
 
 def extract_text_docx_from_s3(file_obj) -> str:
-    doc = docx.Document(file_obj)
-    text = ""
-    for paragraph in doc.paragraphs:
-        text += paragraph.text + "\n"
-    return text
+    return "".join(extract_docx_paragraphs(file_obj))
 
 def extract_text_from_s3(file_obj, filename: str) :
 
@@ -225,10 +213,34 @@ def generate_document_embeddings(chunks):
     return embeddings
 
 
-def ingest_document(db, file_path):
+# Chunks are embedded and committed in batches so an interrupted ingest can resume from the last batch
+EMBED_BATCH_SIZE = 32
+
+# Retrieval scopes, stored on every DocumentChunk as ownerscope/ownerid.
+# Faculty is not a scope of its own, a faculty search is a filter on the chunk's copy of Document.facultyid
+SCOPE_GLOBAL = "global"
+SCOPE_STUDENT = "student"
+
+def document_scope(doc) -> Tuple[str, Optional[int]]:
+    # Student uploads are private notes; everything else ingested from files is shared curriculum
+    if doc.studentid:
+        return SCOPE_STUDENT, doc.studentid
+    return SCOPE_GLOBAL, None
+
+def chunk_hash(text_chunk: str) -> str:
+    return hashlib.sha256(text_chunk.encode("utf-8")).hexdigest()
+
+def chunk_document(text: str) -> List[dict]:
+    # Structure aware, token sized chunks; each dict has content, sectionpath and tokencount
+    return chunk_text(text)
+
+@traced()
+def ingest_document(db, file_path, start_chunk: int = 0, document_id: Optional[int] = None, on_progress: Optional[Callable[[int, int], None]] = None, text: Optional[str] = None, scope: str = SCOPE_GLOBAL, owner_id: Optional[int] = None):
     
     try:
-        text = extract_text(file_path)
+        # Callers that extracted up front on the process pool pass the text in directly
+        if text is None:
+            text = extract_text(file_path)
     except ValueError as e:
         print(f"Error extracting text: {e}")
         return
@@ -236,36 +248,64 @@ def ingest_document(db, file_path):
         print(f"Unexpected error: {e}")
         return
     
-    chunks = split_text(text)
-    
-    embeddings = generate_document_embeddings(chunks)
+    chunks = chunk_document(text)
     
     filename = os.path.basename(file_path)
     
     db = next(get_db())
     try:
-        doc = Document(
-            title=filename,
-            author="System",  
-            facultyid=1,  
-        )
-        db.add(doc)
-        db.flush()
-        
-        for i, (text_chunk, embedding) in enumerate(zip(chunks, embeddings)):
-            chunk = DocumentChunk(
-                documentid=doc.documentid,
-                chunkindex=i,
-                content=text_chunk,
-                embedding=embedding
+        if document_id is None:
+            doc = Document(
+                title=filename,
+                author="System",  
+                facultyid=1,  
             )
-            db.add(chunk)
+            db.add(doc)
+            db.flush()
+            document_id = doc.documentid
+            faculty_id = doc.facultyid
+        else:
+            faculty_id = db.query(Document.facultyid).filter(Document.documentid == document_id).scalar()
+            # Drop anything past the last recorded batch so resumed chunks are not duplicated
+            db.query(DocumentChunk).filter(
+                DocumentChunk.documentid == document_id,
+                DocumentChunk.chunkindex >= start_chunk
+            ).delete(synchronize_session=False)
+            answer_cache_service.invalidate_documents(db, [document_id])
+        db.commit()
+        
+        for batch_start in range(start_chunk, len(chunks), EMBED_BATCH_SIZE):
+            batch = chunks[batch_start:batch_start + EMBED_BATCH_SIZE]
+            embed_inputs = [embedding_text(text_chunk) for text_chunk in batch]
+            embeddings = generate_document_embeddings(embed_inputs)
+            
+            for i, (text_chunk, embed_input, embedding) in enumerate(zip(batch, embed_inputs, embeddings), start=batch_start):
+                chunk = DocumentChunk(
+                    documentid=document_id,
+                    chunkindex=i,
+                    content=text_chunk["content"],
+                    sectionpath=text_chunk["sectionpath"],
+                    tokencount=text_chunk["tokencount"],
+                    contenthash=chunk_hash(embed_input),
+                    ownerscope=scope,
+                    ownerid=owner_id,
+                    facultyid=faculty_id,
+                    embedding=embedding
+                )
+                db.add(chunk)
+            db.commit()
+            
+            if on_progress:
+                on_progress(document_id, batch_start + len(batch))
         
+        db.query(Document).filter(Document.documentid == document_id).update(
+            {"chunkcount": len(chunks)}, synchronize_session=False
+        )
         db.commit()
         
-        print(f"Document {filename} ingested successfully with ID: {doc.documentid}")
+        print(f"Document {filename} ingested successfully with ID: {document_id}")
         
-        return doc.documentid
+        return document_id
       
     except Exception as e:
         db.rollback()
@@ -275,19 +315,64 @@ def ingest_document(db, file_path):
     finally:
         db.close()
         
-def ingest_document_directory(directory_path: str):
+def reingest_document(file_path, document_id: int, text: Optional[str] = None) -> Optional[int]:
+    """
+    Re-ingests a changed file into the Document it was ingested as, diffing the chunks so unchanged
+    ones keep their embeddings and superseded ones are deleted. Returns None if the document is gone,
+    any other failure is raised so the caller never falls back to a second copy.
+    """
+    if text is None:
+        text = extract_text(file_path)
+    
+    chunks = chunk_document(text)
+    
+    db = next(get_db())
+    try:
+        doc = db.query(Document).filter(Document.documentid == document_id).first()
+        if not doc:
+            return None
+        
+        scope, owner_id = document_scope(doc)
+        stats = sync_document_chunks(db, document_id, chunks, scope, owner_id, doc.facultyid)
+        doc.version = (doc.version or 1) + 1
+        doc.chunkcount = stats["chunks"]
+        doc.ingeststats = stats
+        db.commit()
+        
+        print(
+            f"Document {os.path.basename(file_path)} re-ingested as version {doc.version} with ID: {document_id}, "
+            f"embedded {stats['embedded']}, reused {stats['reused']}, deleted {stats['deleted']} chunks"
+        )
+        return document_id
+    
+    except Exception:
+        db.rollback()
+        raise
+    
+    finally:
+        db.close()
+        
+def ingest_document_directory(directory_path: str, max_workers: Optional[int] = None):
     
     doc_ids = []
     try:
         db = next(get_db())
-        for filename in os.listdir(directory_path):
-            file_path = os.path.join(directory_path, filename)
-            
-            if os.path.isfile(file_path):
-                print(f"Processing file: {file_path}")
-                doc_id = ingest_document(db, file_path)
-                if doc_id:
-                    doc_ids.append(doc_id)
+        file_paths = [
+            os.path.join(directory_path, filename)
+            for filename in os.listdir(directory_path)
+            if os.path.isfile(os.path.join(directory_path, filename))
+        ]
+        
+        # Parsing is CPU bound, so every file is extracted on the process pool before embedding starts
+        texts = extract_texts(file_paths, max_workers=max_workers)
+        
+        for file_path in file_paths:
+            if file_path not in texts:
+                continue
+            print(f"Processing file: {file_path}")
+            doc_id = ingest_document(db, file_path, text=texts[file_path])
+            if doc_id:
+                doc_ids.append(doc_id)
                     
         return doc_ids
     except Exception as e:
@@ -296,93 +381,301 @@ def ingest_document_directory(directory_path: str):
     finally:
         db.close()
         
-def ingest_document_from_s3(db, bucket_name, key, logininfo_id):
-    try:
-        response = s3.get_object(Bucket=bucket_name, Key=key)
-        content = response['Body'].read()
-        
-        filename = key.split('/')[-1]
+def sync_document_chunks(db, document_id: int, chunks: List[dict], scope: str = SCOPE_GLOBAL, owner_id: Optional[int] = None, faculty_id: Optional[int] = None) -> Dict[str, int]:
+    """
+    Diffs the new chunk list against the stored chunks by content hash.
+    Unchanged chunks keep their embedding (only the index is updated), new chunks are embedded
+    and inserted and chunks that no longer appear are deleted. Does not commit.
+    """
+    existing = db.query(
+        DocumentChunk.documentchunkid,
+        DocumentChunk.chunkindex,
+        DocumentChunk.contenthash,
+        DocumentChunk.content,
+        DocumentChunk.sectionpath
+    ).filter(DocumentChunk.documentid == document_id).all()
+    
+    # Same text can appear more than once in a document, so keep a list of rows per hash
+    existing_by_hash: Dict[str, List] = {}
+    for row in existing:
+        # Chunks stored before hashes were recorded are hashed the same way new chunks are
+        digest = row.contenthash or chunk_hash(embedding_text({"content": row.content or "", "sectionpath": row.sectionpath}))
+        existing_by_hash.setdefault(digest, []).append(row)
+    
+    reused = []
+    new_chunks = []
+    for i, text_chunk in enumerate(chunks):
+        digest = chunk_hash(embedding_text(text_chunk))
+        matches = existing_by_hash.get(digest)
+        if matches:
+            row = matches.pop(0)
+            reused.append((row, i, digest))
+        else:
+            new_chunks.append((i, text_chunk, digest))
+    
+    removed_ids = [row.documentchunkid for rows in existing_by_hash.values() for row in rows]
+    if removed_ids:
+        db.query(DocumentChunk).filter(
+            DocumentChunk.documentchunkid.in_(removed_ids)
+        ).delete(synchronize_session=False)
+    
+    for row, i, digest in reused:
+        if row.chunkindex != i or row.contenthash != digest:
+            db.query(DocumentChunk).filter(
+                DocumentChunk.documentchunkid == row.documentchunkid
+            ).update({"chunkindex": i, "contenthash": digest}, synchronize_session=False)
+    
+    for batch_start in range(0, len(new_chunks), EMBED_BATCH_SIZE):
+        batch = new_chunks[batch_start:batch_start + EMBED_BATCH_SIZE]
+        embeddings = generate_document_embeddings([embedding_text(text_chunk) for _, text_chunk, _ in batch])
+        for (i, text_chunk, digest), embedding in zip(batch, embeddings):
+            db.add(DocumentChunk(
+                documentid=document_id,
+                chunkindex=i,
+                content=text_chunk["content"],
+                sectionpath=text_chunk["sectionpath"],
+                tokencount=text_chunk["tokencount"],
+                contenthash=digest,
+                ownerscope=scope,
+                ownerid=owner_id,
+                facultyid=faculty_id,
+                embedding=embedding
+            ))
+    
+    # Answers built on chunks that changed or went away are stale
+    if new_chunks or removed_ids:
+        answer_cache_service.invalidate_documents(db, [document_id])
+    
+    # Kept chunks follow the document if its owner or faculty changed
+    db.query(DocumentChunk).filter(
+        DocumentChunk.documentid == document_id,
+        (DocumentChunk.ownerscope != scope) | (DocumentChunk.ownerid.is_distinct_from(owner_id))
+        | (DocumentChunk.facultyid.is_distinct_from(faculty_id))
+    ).update({"ownerscope": scope, "ownerid": owner_id, "facultyid": faculty_id}, synchronize_session=False)
+    
+    # One embed call is made per chunk, so every reused chunk is a call saved
+    return {
+        "chunks": len(chunks),
+        "reused": len(reused),
+        "embedded": len(new_chunks),
+        "deleted": len(removed_ids),
+        "embed_calls_saved": len(reused),
+    }
+
+def register_document(db, key: str, logininfo_id: int, filesize: Optional[int] = None, content_type: Optional[str] = None):
+    """
+    Gets or creates the Document for an S3 key and marks it pending ingestion. Commits.
+    Returns None if the login has no student record.
+    """
+    student = db.query(Student).filter(Student.logininfoid == logininfo_id).first()
+    
+    if not student:
+        return None
+    
+    filename = key.split('/')[-1]
+    
+    doc = db.query(Document).filter(Document.s3_key == key).first()
+    if not doc:
+        doc = Document(
+            title=filename,
+            author=student.firstname + " " + student.lastname,
+            studentid=student.studentid,
+            s3_key=key,
+            version=1
+        )
+        db.add(doc)
+    
+    doc.title = filename
+    doc.status = "pending"
+    doc.statusmessage = None
+    doc.filesize = filesize
+    doc.contenttype = content_type
+    doc.lastmodified = func.now()
+    db.commit()
+    db.refresh(doc)
+    
+    return doc
+
+def ingest_document_file_obj(db, doc, file_obj, filehash: str) -> dict:
+    """
+    Extracts, chunks and embeds an already registered document from a local file object,
+    reusing stored embeddings for chunks that did not change. Commits and returns the diff stats.
+    """
+    filename = doc.s3_key.split('/')[-1] if doc.s3_key else doc.title
+    
+    if doc.contenthash == filehash:
+        chunk_count = db.query(func.count(DocumentChunk.documentchunkid)).filter(
+            DocumentChunk.documentid == doc.documentid
+        ).scalar()
+        stats = {"chunks": chunk_count, "reused": chunk_count, "embedded": 0, "deleted": 0, "embed_calls_saved": chunk_count}
+        print(f"Document {filename} unchanged (version {doc.version}), skipped re-embedding {chunk_count} chunks")
+    else:
+        text = extract_text_from_s3(file_obj, filename)
         
-        import io
+        chunks = chunk_document(text)
         
-        file_obj = io.BytesIO(content)
+        # The first ingest of a new key stays at version 1, any later content change bumps it
+        if doc.contenthash is not None:
+            doc.version = (doc.version or 1) + 1
+        doc.contenthash = filehash
         
-        text = extract_text_from_s3(file_obj, filename)
+        scope, owner_id = document_scope(doc)
+        stats = sync_document_chunks(db, doc.documentid, chunks, scope, owner_id, doc.facultyid)
         
-        chunks = split_text(text)
-        embeddings = generate_document_embeddings(chunks)
+        print(
+            f"Document {filename} ingested as version {doc.version} with ID: {doc.documentid}, "
+            f"embedded {stats['embedded']}, reused {stats['reused']}, deleted {stats['deleted']} chunks "
+            f"({stats['embed_calls_saved']} embed calls saved)"
+        )
+    
+    doc.status = "ready"
+    doc.statusmessage = None
+    doc.ingeststats = stats
+    doc.chunkcount = stats["chunks"]
+    db.commit()
+    
+    return {"documentid": doc.documentid, "version": doc.version, **stats}
+
+def ingest_uploaded_note(document_id: int, file_path: str, filehash: str):
+    """
+    Background job for /notes/upload/. Ingests from the temp copy the request already wrote,
+    so the file is never downloaded back from S3, and removes the temp file when done.
+    """
+    db = next(get_db())
+    try:
+        doc = db.query(Document).filter(Document.documentid == document_id).first()
+        if not doc:
+            print(f"Document {document_id} no longer exists, skipping ingest")
+            return None
         
-        student = db.query(Student).filter(Student.logininfoid == logininfo_id).first()
+        doc.status = "processing"
+        db.commit()
         
-        if not student:
+        try:
+            with open(file_path, "rb") as file_obj:
+                return ingest_document_file_obj(db, doc, file_obj, filehash)
+        except Exception as e:
+            db.rollback()
+            print(f"Error ingesting uploaded note {doc.s3_key}: {e}")
+            doc.status = "failed"
+            doc.statusmessage = str(e)[:1000]
+            db.commit()
             return None
+    finally:
+        db.close()
+        if os.path.exists(file_path):
+            os.remove(file_path)
+
+@traced()
+def sync_document_from_s3(db, bucket_name, key, logininfo_id) -> Optional[dict]:
+    """
+    Ingests an S3 object as a versioned document keyed by its S3 key.
+    Returns the document id, version and chunk diff stats, or None on failure.
+    """
+    try:
+        content, content_type = get_storage().get_object(key, bucket_name)
+        filehash = hashlib.sha256(content).hexdigest()
         
-        doc = Document(
-            title=filename,
-            author=student.firstname + " " + student.lastname,
-            studentid=student.studentid,
-            s3_key=key
-        )
-        
-        db.add(doc)
-        db.flush()
+        doc = register_document(db, key, logininfo_id, filesize=len(content), content_type=content_type)
         
-        for i, (text_chunk, embedding) in enumerate(zip(chunks, embeddings)):
-            chunk = DocumentChunk(
-                documentid=doc.documentid,
-                chunkindex=i,
-                content=text_chunk,
-                embedding=embedding
-            )
-            db.add(chunk)
-        db.commit()
+        if not doc:
+            return None
         
-        print(f"Document {filename} ingested successfully with ID: {doc.documentid}")
+        import io
         
-        return doc.documentid
+        return ingest_document_file_obj(db, doc, io.BytesIO(content), filehash)
         
-    except s3.exceptions.NoSuchKey:
+    except StorageKeyNotFound:
         print(f"File not found in S3: {key}")
         return None
         
     except Exception as e:
+        db.rollback()
         print(f"Unexpected error with S3 file: {key}, {e}")
         return None
+
+def ingest_document_from_s3(db, bucket_name, key, logininfo_id):
+    result = sync_document_from_s3(db, bucket_name, key, logininfo_id)
+    return result["documentid"] if result else None
+        
+def _scope_search_query(query_embedding, scope: str, owner_id: Optional[int], limit: int, faculty_id: Optional[int] = None):
+    chunk = DocumentChunk
+    if faculty_id:
+        # One faculty's chunks are collected first off ix_documentchunk_facultyid and ranked exactly. Filtering
+        # the global HNSW walk instead would lose every match outside its ef_search candidates
+        candidates = select(DocumentChunk).where(
+            DocumentChunk.facultyid == faculty_id,
+            DocumentChunk.ownerscope == scope
+        ).cte("faculty_chunks").prefix_with("MATERIALIZED", dialect="postgresql")
+        chunk = aliased(DocumentChunk, candidates)
+    
+    distance = chunk.embedding.cosine_distance(query_embedding)
+    
+    context = select(
+        chunk.documentchunkid,
+        chunk.content,
+        Document.title,
+        Document.author,
+        chunk.sectionpath,
         
-def search_documents(query: str, limit: int = 5, faculty_id: int = None, similiarity_threshold: float = 0.5):
+        # Calculating vector similarity (cosine sim)
+        (1 - distance).label("similarity"),
+        chunk.documentid
+    ).join(
+        Document, chunk.documentid == Document.documentid
+    ).where(
+        chunk.ownerscope == scope
+    )
     
-    query_embedding = embed_text(query)
+    if scope != SCOPE_GLOBAL:
+        context = context.where(chunk.ownerid == owner_id)
+    
+    # Ordering by the raw distance ascending (not by similarity desc) is what lets postgres walk the HNSW index
+    return context.order_by(distance).limit(limit)
+
+@traced()
+def search_documents(
+    query: str,
+    limit: int = 5,
+    faculty_id: int = None,
+    similiarity_threshold: float = 0.5,
+    scopes: Optional[List[str]] = None,
+    student_id: Optional[int] = None,
+    query_embedding: Optional[List[float]] = None
+):
+    """
+    Searches the given retrieval scopes and merges the results by similarity.
+    Each scope is its own query so it filters inside its index scan instead of post filtering a global top-k.
+    Defaults to global curriculum only; faculty_id narrows every scope to that faculty's documents.
+    Pass query_embedding when the caller already embedded the query to save an embed call.
+    """
+    if scopes is None:
+        scopes = [SCOPE_GLOBAL]
+    
+    owners = {SCOPE_GLOBAL: None, SCOPE_STUDENT: student_id}
+    # A scoped search without an owner would match nothing, skip it rather than error
+    scopes = [scope for scope in scopes if scope == SCOPE_GLOBAL or owners.get(scope)]
+    if not scopes:
+        return []
+    
+    if query_embedding is None:
+        query_embedding = embed_text(query)
     
     try:
         db = next(get_db())
 
         try:
             
-            context = (
-                select(
-                    DocumentChunk.documentchunkid,
-                    DocumentChunk.content,
-                    Document.title,
-                    Document.author,
-                    
-                    # Calculating vector similarity (cosine sim)
-                    (1 - DocumentChunk.embedding.cosine_distance(query_embedding)).label("similarity")
-                ).join(
-                    Document, DocumentChunk.documentid == Document.documentid
-                ).order_by(
-                    desc("similarity")
-                ).limit(limit)
-            )
-                
-            if faculty_id:
-                context = context.where(Document.facultyid == faculty_id)
+            results = []
+            for scope in scopes:
+                results.extend(db.execute(_scope_search_query(query_embedding, scope, owners[scope], limit, faculty_id)).fetchall())
             
             # Filtering by min similarity threshold 
-            context = context.where(
-                (1 - DocumentChunk.embedding.cosine_distance(query_embedding)) >= similiarity_threshold
-            )
-            
-            results = db.execute(context).fetchall()
+            results = sorted(
+                (result for result in results if result[5] >= similiarity_threshold),
+                key=lambda result: result[5],
+                reverse=True
+            )[:limit]
             
             formatted_results = [
                 {
@@ -390,7 +683,9 @@ def search_documents(query: str, limit: int = 5, faculty_id: int = None, similia
                     "content": result[1],
                     "title": result[2],
                     "author": result[3],
-                    "similarity": result[4]
+                    "sectionpath": result[4],
+                    "similarity": result[5],
+                    "documentid": result[6]
                 }
                 for result in results
             ]
@@ -445,6 +740,7 @@ def generate_chat_message_embedding(db, chatmessage_id):
     db.commit() 
     return embedding
 
+@traced()
 def search_chat_contexts(db, user_id, query: str, limit: int = 5, similiarity_threshold: float = .5 ):
     
     query_embedding = embed_text(query)
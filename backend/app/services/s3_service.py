@@ -1,26 +1,168 @@
 import os
 import uuid
-from app.core.config import settings
-import boto3
+import shutil
+import tempfile
+import threading
+import mimetypes
+from datetime import datetime, timezone
+from typing import Iterator, Optional, Tuple
 
+from app.core.config import settings
+from app.core.tracing import instrument_boto_client
 
-s3 = boto3.client(
-    "s3",
-    aws_access_key_id     = settings.AWS_S3_ACCESS,
-    aws_secret_access_key = settings.AWS_S3_DEV,
-    region_name           = "us-east-2",
-)
+# Object storage behind STORAGE_PROVIDER: "s3" is the medpassunr bucket, "local" keeps objects
+# under LOCAL_STORAGE_DIR so uploads and ingestion work offline.
 
 BUCKET = "medpassunr"
 
+# Built on first use, so importing this module never needs AWS credentials
+s3 = None
+_client_lock = threading.Lock()
+
+
+class StorageKeyNotFound(KeyError):
+    pass
+
+
+def get_s3_client():
+    global s3
+    if s3 is None:
+        with _client_lock:
+            if s3 is None:
+                import boto3
+                client = boto3.client(
+                    "s3",
+                    aws_access_key_id     = settings.AWS_S3_ACCESS,
+                    aws_secret_access_key = settings.AWS_S3_DEV,
+                    region_name           = "us-east-2",
+                )
+                instrument_boto_client(client)
+                s3 = client
+    return s3
+
+
+def transfer_config():
+    # Files over the threshold are sent as a multipart upload, parts go up on parallel threads
+    from boto3.s3.transfer import TransferConfig
+
+    return TransferConfig(
+        multipart_threshold=8 * 1024 * 1024,
+        multipart_chunksize=8 * 1024 * 1024,
+        max_concurrency=4,
+        use_threads=True,
+    )
+
+
+TRANSFER_CONFIG = None
+
+
+class S3Storage:
+    name = "s3"
+
+    def upload_stream(self, file_obj, key: str, content_type: str = None, bucket: str = BUCKET) -> str:
+        global TRANSFER_CONFIG
+        if TRANSFER_CONFIG is None:
+            TRANSFER_CONFIG = transfer_config()
+        extra_args = {"ContentType": content_type} if content_type else None
+        get_s3_client().upload_fileobj(file_obj, bucket, key, ExtraArgs=extra_args, Config=TRANSFER_CONFIG)
+        return f"s3://{bucket}/{key}"
+
+    def get_object(self, key: str, bucket: str = BUCKET) -> Tuple[bytes, Optional[str]]:
+        client = get_s3_client()
+        try:
+            response = client.get_object(Bucket=bucket, Key=key)
+        except client.exceptions.NoSuchKey:
+            raise StorageKeyNotFound(key)
+        return response["Body"].read(), response.get("ContentType")
+
+    def list_objects(self, prefix: str, bucket: str = BUCKET) -> Iterator[dict]:
+        # Paginated, so listings past the first 1000 keys are not cut off
+        paginator = get_s3_client().get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
+            for obj in page.get("Contents", []):
+                yield {"Key": obj["Key"], "Size": obj["Size"], "LastModified": obj["LastModified"]}
+
+
+class LocalStorage:
+    """Filesystem bucket: every object is a file at <root>/<bucket>/<key>."""
+
+    name = "local"
+
+    def __init__(self, root: Optional[str] = None, faults=None):
+        from app.services.llm_providers import FaultInjector
+
+        self.root = root or settings.LOCAL_STORAGE_DIR or os.path.join(tempfile.gettempdir(), "medpass_storage")
+        self.faults = faults or FaultInjector.from_settings()
+
+    def _path(self, bucket: str, key: str) -> str:
+        base = os.path.realpath(os.path.join(self.root, bucket))
+        path = os.path.realpath(os.path.join(base, key))
+        if not path.startswith(base + os.sep):
+            raise ValueError(f"Key {key!r} escapes the storage directory")
+        return path
+
+    def upload_stream(self, file_obj, key: str, content_type: str = None, bucket: str = BUCKET) -> str:
+        self.faults("upload")
+        path = self._path(bucket, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Written beside the target and renamed, so a reader never sees a partial object
+        with tempfile.NamedTemporaryFile(dir=os.path.dirname(path), delete=False) as target:
+            shutil.copyfileobj(file_obj, target)
+        os.replace(target.name, path)
+        return f"s3://{bucket}/{key}"
+
+    def get_object(self, key: str, bucket: str = BUCKET) -> Tuple[bytes, Optional[str]]:
+        self.faults("download")
+        path = self._path(bucket, key)
+        if not os.path.isfile(path):
+            raise StorageKeyNotFound(key)
+        with open(path, "rb") as file:
+            return file.read(), mimetypes.guess_type(key)[0]
+
+    def list_objects(self, prefix: str, bucket: str = BUCKET) -> Iterator[dict]:
+        base = os.path.join(self.root, bucket)
+        for directory, _, files in os.walk(base):
+            for filename in sorted(files):
+                path = os.path.join(directory, filename)
+                key = os.path.relpath(path, base).replace(os.sep, "/")
+                if key.startswith(prefix):
+                    stat = os.stat(path)
+                    yield {"Key": key, "Size": stat.st_size, "LastModified": datetime.fromtimestamp(stat.st_mtime, timezone.utc)}
+
+
+STORAGE_PROVIDERS = {"s3": S3Storage, "local": LocalStorage}
+
+_storage = None
+
+
+def get_storage():
+    global _storage
+    if _storage is None:
+        if settings.STORAGE_PROVIDER not in STORAGE_PROVIDERS:
+            raise ValueError(f"Unknown STORAGE_PROVIDER {settings.STORAGE_PROVIDER!r}, expected one of {', '.join(STORAGE_PROVIDERS)}")
+        _storage = STORAGE_PROVIDERS[settings.STORAGE_PROVIDER]()
+    return _storage
+
+
+def set_storage(storage):
+    """Replaces the process-wide storage, None goes back to the one STORAGE_PROVIDER selects."""
+    global _storage
+    _storage = storage
+
 
 def upload_fileobj(file_obj, key: str) -> str:
     """
     Uploads a file‐like object to S3 under `key`.
     Returns the public URL (or S3 URI) for storage in your DB.
     """
-    s3.upload_fileobj(file_obj, BUCKET, key)
-    return f"s3://{BUCKET}/{key}"
+    return get_storage().upload_stream(file_obj, key)
+
+
+def upload_stream(file_obj, key: str, content_type: str = None) -> str:
+    """
+    Streams a file-like object to S3 in parts without reading it into memory.
+    """
+    return get_storage().upload_stream(file_obj, key, content_type)
 
 
 def generate_s3_key(user_id: int, filename: str) -> str:
@@ -28,4 +170,4 @@ def generate_s3_key(user_id: int, filename: str) -> str:
     Generates a unique key, e.g. notes/{user_id}/{uuid4}.{ext}
     """
     ext = filename.split(".")[-1]
-    return f"notes/{user_id}/{uuid.uuid4()}.{ext}"
\ No newline at end of file
+    return f"notes/{user_id}/{uuid.uuid4()}.{ext}"
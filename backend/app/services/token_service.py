@@ -0,0 +1,17 @@
+import math
+
+# From research gemini uses roughly 1 token per 4 characters of english text
+CHARS_PER_TOKEN = 4
+
+# text-embedding-004 truncates anything past this many input tokens
+EMBED_MODEL_MAX_TOKENS = 2048
+
+
+def estimate_tokens(text: str) -> int:
+    if not text:
+        return 0
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    return text[:max_tokens * CHARS_PER_TOKEN]
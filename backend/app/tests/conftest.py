@@ -0,0 +1,23 @@
+import pytest
+from contextlib import contextmanager
+
+from app.core.query_profiler import profile_queries
+
+
+@pytest.fixture
+def query_budget():
+    """
+    Fails the test when the block runs more SQL statements than allowed on instrumented engines:
+
+        with query_budget(3):
+            client.get("/api/v1/question/historical-performance")
+    """
+    @contextmanager
+    def budget(max_queries: int):
+        with profile_queries() as profile:
+            yield profile
+        assert profile.count <= max_queries, (
+            f"{profile.count} queries, budget is {max_queries}. Repeated: {profile.repeated()}"
+        )
+
+    return budget
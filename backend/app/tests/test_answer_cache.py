@@ -0,0 +1,123 @@
+import pytest
+from sqlalchemy.orm import Session
+from unittest.mock import patch, MagicMock
+
+from app.services import gemini_service, answer_cache_service
+
+RAG_RESULTS = [
+    {"documentchunkid": 4, "documentid": 1, "title": "Heart", "content": "S1 is closure of the AV valves", "similarity": 0.8},
+    {"documentchunkid": 9, "documentid": 2, "title": "Lungs", "content": "Crackles suggest fluid", "similarity": 0.7},
+]
+
+@pytest.fixture
+def mock_db():
+    mock = MagicMock(spec=Session)
+    return mock
+
+@pytest.fixture
+def mock_retrieval():
+    with patch.object(gemini_service, "embed_text", return_value=[0.1] * 768) as embed, \
+         patch.object(gemini_service, "get_recent_chat_context", return_value=[]), \
+         patch("app.services.rag_service.search_documents", return_value=RAG_RESULTS) as search:
+        yield embed, search
+
+@pytest.fixture
+def mock_model():
+    response = MagicMock()
+    response.candidates[0].content.parts[0].text = "Fresh answer"
+    response.usage_metadata.prompt_token_count = 420
+    response.usage_metadata.candidates_token_count = 80
+    response.usage_metadata.total_token_count = 500
+    with patch("google.generativeai.GenerativeModel") as model, \
+         patch("google.generativeai.configure"):
+        model.return_value.generate_content.return_value = response
+        yield model
+
+
+class TestAnswerCache:
+
+    def test_fingerprint_ignores_result_order(self):
+        reordered = list(reversed(RAG_RESULTS))
+        assert answer_cache_service.retrieval_fingerprint("flash", RAG_RESULTS) == answer_cache_service.retrieval_fingerprint("flash", reordered)
+        assert answer_cache_service.retrieval_fingerprint("flash", RAG_RESULTS) != answer_cache_service.retrieval_fingerprint("pro", RAG_RESULTS)
+
+    def test_hit_skips_model(self, mock_db, mock_retrieval, mock_model):
+        hit = {"cacheid": 3, "answer": "Cached answer", "similarity": 0.97}
+        with patch.object(answer_cache_service, "lookup_answer", return_value=hit), \
+             patch.object(answer_cache_service, "store_answer") as store:
+            answer, metadata = gemini_service.generate_chat_answer(
+                [{"role": "user", "content": "best way to prepare for step 1"}],
+                rag_query="best way to prepare for step 1",
+                conversation_id=1,
+                db=mock_db,
+                use_answer_cache=True
+            )
+
+        assert answer == "Cached answer"
+        assert metadata == {"cached": True, "cache_id": 3, "cache_similarity": 0.97}
+        mock_model.assert_not_called()
+        store.assert_not_called()
+        # The query is embedded once and shared between retrieval and the cache lookup
+        embed, search = mock_retrieval
+        assert embed.call_count == 1
+        assert search.call_args.kwargs["query_embedding"] == [0.1] * 768
+
+    def test_miss_calls_model_and_stores(self, mock_db, mock_retrieval, mock_model):
+        with patch.object(answer_cache_service, "lookup_answer", return_value=None), \
+             patch.object(answer_cache_service, "store_answer", return_value=11) as store:
+            answer, metadata = gemini_service.generate_chat_answer(
+                [{"role": "user", "content": "best way to prepare for step 1"}],
+                rag_query="best way to prepare for step 1",
+                db=mock_db,
+                use_answer_cache=True
+            )
+
+        assert answer == "Fresh answer"
+        assert metadata["cached"] is False
+        assert metadata["cache_id"] == 11
+        assert store.call_args.args[5] == RAG_RESULTS
+
+    def test_student_notes_searched_with_curriculum(self, mock_db, mock_retrieval, mock_model):
+        with patch.object(answer_cache_service, "lookup_answer", return_value=None), \
+             patch.object(answer_cache_service, "store_answer", return_value=11):
+            gemini_service.generate_chat_answer(
+                [{"role": "user", "content": "what did my notes say about S1"}],
+                rag_query="what did my notes say about S1",
+                db=mock_db,
+                use_answer_cache=True,
+                student_id=12
+            )
+
+        _, search = mock_retrieval
+        assert search.call_args.kwargs["scopes"] == ["global", "student"]
+        assert search.call_args.kwargs["student_id"] == 12
+
+    def test_follow_up_turn_bypasses_cache(self, mock_db, mock_retrieval, mock_model):
+        history = [
+            {"role": "user", "content": "what is S1"},
+            {"role": "model", "content": "Closure of the AV valves"},
+            {"role": "user", "content": "and S2?"},
+        ]
+        with patch.object(answer_cache_service, "lookup_answer") as lookup, \
+             patch.object(answer_cache_service, "store_answer") as store:
+            answer, metadata = gemini_service.generate_chat_answer(history, rag_query="and S2?", db=mock_db, use_answer_cache=True)
+
+        assert answer == "Fresh answer"
+        lookup.assert_not_called()
+        store.assert_not_called()
+
+    def test_conversation_context_bypasses_cache(self, mock_db, mock_retrieval, mock_model):
+        with patch.object(gemini_service, "get_recent_chat_context", return_value=[{"title": "Earlier", "content": "We covered murmurs"}]), \
+             patch.object(answer_cache_service, "lookup_answer") as lookup:
+            answer, metadata = gemini_service.generate_chat_answer(
+                [{"role": "user", "content": "and the next topic?"}],
+                rag_query="and the next topic?",
+                conversation_id=1,
+                db=mock_db,
+                use_answer_cache=True
+            )
+
+        assert answer == "Fresh answer"
+        assert metadata["cached"] is False
+        assert "cache_id" not in metadata
+        lookup.assert_not_called()
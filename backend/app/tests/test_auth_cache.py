@@ -0,0 +1,121 @@
+import asyncio
+import pytest
+from datetime import timedelta
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+from unittest.mock import patch, MagicMock
+
+from app.core import auth_cache, security
+from app.core.auth_cache import AuthContext
+from app.core.config import settings
+
+STUDENT = AuthContext(logininfoid=11, username="amognus", email=None, bio=None, isactive=True, issuperuser=False, studentid=298)
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    auth_cache.clear()
+    yield
+    auth_cache.clear()
+
+
+def authenticate(token, db=None):
+    return asyncio.run(security.get_current_user(token=token, db=db or MagicMock(spec=Session)))
+
+
+class TestAuthCache:
+
+    def test_second_request_skips_the_database(self):
+        token = security.create_access_token({"sub": "amognus"}, timedelta(minutes=5))
+
+        with patch.object(security, "load_auth_context", side_effect=lambda db, username: auth_cache.put(STUDENT) or STUDENT) as load:
+            assert authenticate(token) == STUDENT
+            assert authenticate(token) == STUDENT
+
+        assert load.call_count == 1
+
+    def test_miss_takes_role_ids_from_claims(self):
+        token = security.create_access_token(STUDENT.claims(), timedelta(minutes=5))
+        db = MagicMock(spec=Session)
+        db.get.return_value = MagicMock(logininfoid=11, username="amognus", email=None, bio=None, isactive=True, issuperuser=False)
+
+        with patch.object(security, "load_auth_context") as load:
+            assert authenticate(token, db) == STUDENT
+
+        # Only the login row by primary key, no Student/Faculty join
+        load.assert_not_called()
+        db.query.assert_not_called()
+        assert db.get.call_args.args[1] == 11
+        assert auth_cache.get_cached("amognus") == STUDENT
+
+    def test_deactivated_login_seen_through_claims(self):
+        token = security.create_access_token(STUDENT.claims(), timedelta(minutes=5))
+        db = MagicMock(spec=Session)
+        db.get.return_value = MagicMock(logininfoid=11, username="amognus", email=None, bio=None, isactive=False, issuperuser=False)
+
+        assert authenticate(token, db).isactive is False
+
+    def test_token_without_role_loads_the_links(self):
+        # Minted before the login was linked to a student, the join picks the new link up
+        token = security.create_access_token({"sub": "amognus", "uid": 11, "role": None}, timedelta(minutes=5))
+        db = MagicMock(spec=Session)
+
+        with patch.object(security, "load_auth_context", return_value=STUDENT) as load:
+            assert authenticate(token, db) == STUDENT
+
+        load.assert_called_once()
+        db.get.assert_not_called()
+
+    def test_entries_expire(self):
+        auth_cache.put(STUDENT)
+
+        with patch.object(auth_cache.time, "monotonic", return_value=10 ** 9):
+            assert auth_cache.get_cached("amognus") is None
+
+    def test_invalidate_by_login_id(self):
+        auth_cache.put(STUDENT)
+        auth_cache.invalidate(logininfoid=11)
+
+        assert auth_cache.get_cached("amognus") is None
+
+    def test_least_recently_used_evicted(self):
+        with patch.object(settings, "AUTH_CACHE_MAX_ENTRIES", 2):
+            for index in range(3):
+                auth_cache.put(AuthContext(logininfoid=index, username=f"user{index}", email=None, bio=None, isactive=True, issuperuser=False))
+
+        assert auth_cache.get_cached("user0") is None
+        assert auth_cache.get_cached("user2") is not None
+
+    def test_disabled_with_zero_ttl(self):
+        with patch.object(settings, "AUTH_CACHE_TTL_SECONDS", 0):
+            auth_cache.put(STUDENT)
+            assert auth_cache.get_cached("amognus") is None
+
+    def test_token_for_another_login_id_rejected(self):
+        # Username reused by a different account after the token was issued
+        token = security.create_access_token({"sub": "amognus", "uid": 99}, timedelta(minutes=5))
+        auth_cache.put(STUDENT)
+
+        with pytest.raises(HTTPException) as error:
+            authenticate(token)
+        assert error.value.status_code == 401
+
+    def test_claims(self):
+        assert STUDENT.claims() == {"sub": "amognus", "uid": 11, "role": "student", "sid": 298}
+        assert STUDENT.role == "student"
+
+
+class TestCurrentStudentId:
+
+    def test_context_needs_no_query(self):
+        db = MagicMock(spec=Session)
+
+        assert security.current_student_id(db, STUDENT) == 298
+        db.query.assert_not_called()
+
+    def test_login_row_falls_back_to_query(self):
+        db = MagicMock(spec=Session)
+        db.query.return_value.filter.return_value.scalar.return_value = 298
+        user = MagicMock(logininfoid=11)
+
+        assert security.current_student_id(db, user) == 298
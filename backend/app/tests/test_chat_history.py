@@ -0,0 +1,115 @@
+import pytest
+from datetime import datetime, timedelta
+from decimal import Decimal
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+from unittest.mock import patch, MagicMock
+
+from app.main import app
+from app.core.database import get_db
+from app.core.pagination import decode_cursor, encode_cursor
+from app.models.chat_models import ChatContext, ChatConversation, ChatMessage
+from app.services import gemini_service
+from app.api.v1.endpoints import gemini
+
+START = datetime(2025, 4, 1, 9, 0)
+
+
+def make_conversation():
+    return ChatConversation(
+        conversationid=7, title="Cardiac cycle", createdat=START, updatedat=START, isactive=True,
+        totaltokensinput=100, totaltokensoutput=50, totalcost=Decimal("0.001"), messagecount=30
+    )
+
+
+def make_messages(ids):
+    return [
+        ChatMessage(
+            messageid=message_id, conversationid=7, sendertype="user", content=f"message {message_id}",
+            timestamp=START + timedelta(minutes=message_id), tokensinput=5, tokensoutput=0,
+            messagecost=Decimal("0"), messagemetadata=None
+        )
+        for message_id in ids
+    ]
+
+
+@pytest.fixture
+def mock_db():
+    db = MagicMock(spec=Session)
+    db.query.return_value.filter.return_value.first.return_value = make_conversation()
+    db.execute.return_value.all.return_value = []
+    return db
+
+@pytest.fixture
+def test_client(mock_db):
+    app.dependency_overrides[get_db] = lambda: mock_db
+
+    client = TestClient(app)
+
+    yield client
+
+    app.dependency_overrides = {}
+
+
+class TestChatHistoryPage:
+
+    def test_latest_page_is_chronological_with_cursor(self, mock_db):
+        # Rows come back newest first with one extra row that signals an older page exists
+        rows = list(reversed(make_messages(range(27, 31))))
+        mock_db.query.return_value.filter.return_value.order_by.return_value.limit.return_value.all.return_value = rows
+
+        chat = gemini_service.get_entire_chat(mock_db, 7, limit=3)
+
+        assert [msg.messageid for msg in chat.messages] == [28, 29, 30]
+        assert chat.message_count == 30
+        assert decode_cursor(chat.next_cursor) == [chat.messages[0].timestamp.isoformat(), 28]
+
+    def test_first_message_reached(self, mock_db):
+        rows = list(reversed(make_messages(range(1, 3))))
+        mock_db.query.return_value.filter.return_value.filter.return_value.order_by.return_value.limit.return_value.all.return_value = rows
+
+        chat = gemini_service.get_entire_chat(mock_db, 7, before=(START + timedelta(minutes=3), 3), limit=3)
+
+        assert [msg.messageid for msg in chat.messages] == [1, 2]
+        assert chat.next_cursor is None
+
+    def test_contexts_fetched_in_one_query(self, mock_db):
+        rows = list(reversed(make_messages(range(1, 4))))
+        mock_db.query.return_value.filter.return_value.order_by.return_value.limit.return_value.all.return_value = rows
+        summary = ChatContext(contextid=4, title="Summary", content="Murmurs", importancescore=1.0, chatmetadata={})
+        mock_db.execute.return_value.all.return_value = [(1, summary), (2, summary)]
+
+        chat = gemini_service.get_entire_chat(mock_db, 7, limit=5)
+
+        assert mock_db.execute.call_count == 1
+        assert [len(msg.contexts) for msg in chat.messages] == [1, 1, 0]
+
+
+class TestChatHistoryEndpoint:
+
+    def test_invalid_cursor(self, test_client):
+        response = test_client.get("/api/v1/gemini/chat/7/history?cursor=not-a-cursor")
+
+        assert response.status_code == 400
+
+    @pytest.mark.parametrize("values", [[], [1], ["x", 1], [START.isoformat(), None]])
+    def test_malformed_cursor_values(self, test_client, values):
+        response = test_client.get(f"/api/v1/gemini/chat/7/history?cursor={encode_cursor(*values)}")
+
+        assert response.status_code == 400
+
+    def test_cursor_passed_to_service(self, test_client):
+        cursor = encode_cursor(START, 12)
+        with patch.object(gemini, "get_entire_chat", return_value=None) as get_chat:
+            response = test_client.get(f"/api/v1/gemini/chat/7/history?cursor={cursor}&limit=10")
+
+        assert response.status_code == 404
+        assert get_chat.call_args.kwargs == {"before": (START, 12), "limit": 10}
+
+    def test_message_to_missing_conversation(self, test_client):
+        with patch.object(gemini, "conversation_exists", return_value=False), \
+             patch.object(gemini, "create_message") as create:
+            response = test_client.post("/api/v1/gemini/chat/99/messages", json={"content": "Hello"})
+
+        assert response.status_code == 404
+        create.assert_not_called()
@@ -0,0 +1,98 @@
+import pytest
+from unittest.mock import patch, MagicMock
+from sqlalchemy.orm import Session
+
+from app.models.chat_models import ChatContext, ChatConversation, ChatMessage, ChatMessageContext
+from app.services import gemini_service
+
+
+def make_messages(count, start_id=1):
+    return [
+        ChatMessage(
+            messageid=message_id,
+            conversationid=7,
+            sendertype="user" if message_id % 2 else "flash",
+            content=f"message {message_id}"
+        )
+        for message_id in range(start_id, start_id + count)
+    ]
+
+
+@pytest.fixture
+def mock_db():
+    db = MagicMock(spec=Session)
+    conversation = ChatConversation(conversationid=7, userid=3, title="Cardiac cycle")
+    db.query.return_value.filter.return_value.first.return_value = conversation
+    return db
+
+
+class TestRollingSummary:
+
+    def test_folds_messages_outside_recent_window(self, mock_db):
+        messages = make_messages(gemini_service.RECENT_WINDOW_MESSAGES + gemini_service.MIN_CHAT_LENGTH)
+
+        with patch.object(gemini_service, "get_conversation_summary", return_value=None), \
+             patch.object(gemini_service, "get_unsummarized_messages", return_value=messages), \
+             patch.object(gemini_service, "chat_model", return_value="Covered S1 and S2.") as chat, \
+             patch("app.services.rag_service.generate_chat_context_embedding"):
+            summary = gemini_service.create_context_from_recent_message(mock_db, 7)
+
+        assert summary.content == "Covered S1 and S2."
+        assert summary.createdby == 3
+        assert summary.chatmetadata == {
+            "kind": "summary",
+            "throughmessageid": gemini_service.MIN_CHAT_LENGTH,
+            "summarizedmessages": gemini_service.MIN_CHAT_LENGTH
+        }
+        prompt = chat.call_args.args[0][0]["content"]
+        assert "message 1" in prompt and f"message {gemini_service.MIN_CHAT_LENGTH + 1}" not in prompt
+
+        links = [call.args[0] for call in mock_db.add.call_args_list if isinstance(call.args[0], ChatMessageContext)]
+        assert len(links) == gemini_service.MIN_CHAT_LENGTH
+
+    def test_rewrites_existing_summary(self, mock_db):
+        summary = ChatContext(
+            contextid=4, conversationid=7, title="Summary", content="Earlier: murmurs.",
+            chatmetadata={"kind": "summary", "throughmessageid": 10, "summarizedmessages": 10}
+        )
+        messages = make_messages(gemini_service.RECENT_WINDOW_MESSAGES + gemini_service.MIN_CHAT_LENGTH, start_id=11)
+
+        with patch.object(gemini_service, "get_conversation_summary", return_value=summary), \
+             patch.object(gemini_service, "get_unsummarized_messages", return_value=messages) as unsummarized, \
+             patch.object(gemini_service, "chat_model", return_value="Murmurs, then S1 and S2.") as chat, \
+             patch("app.services.rag_service.generate_chat_context_embedding"):
+            result = gemini_service.create_context_from_recent_message(mock_db, 7)
+
+        assert result is summary
+        assert unsummarized.call_args.args[2] == 10
+        assert "Earlier: murmurs." in chat.call_args.args[0][0]["content"]
+        assert summary.content == "Murmurs, then S1 and S2."
+        assert summary.chatmetadata["throughmessageid"] == 10 + gemini_service.MIN_CHAT_LENGTH
+        assert summary.chatmetadata["summarizedmessages"] == 10 + gemini_service.MIN_CHAT_LENGTH
+
+    def test_nothing_due_inside_window(self, mock_db):
+        with patch.object(gemini_service, "get_conversation_summary", return_value=None), \
+             patch.object(gemini_service, "get_unsummarized_messages", return_value=make_messages(gemini_service.RECENT_WINDOW_MESSAGES + 1)), \
+             patch.object(gemini_service, "chat_model") as chat:
+            assert gemini_service.create_context_from_recent_message(mock_db, 7) is None
+
+        chat.assert_not_called()
+
+    def test_failed_summary_leaves_messages_unsummarized(self, mock_db):
+        messages = make_messages(gemini_service.RECENT_WINDOW_MESSAGES + gemini_service.MIN_CHAT_LENGTH)
+
+        with patch.object(gemini_service, "get_conversation_summary", return_value=None), \
+             patch.object(gemini_service, "get_unsummarized_messages", return_value=messages), \
+             patch.object(gemini_service, "chat_model", side_effect=RuntimeError("quota")):
+            assert gemini_service.create_context_from_recent_message(mock_db, 7) is None
+
+        mock_db.add.assert_not_called()
+        mock_db.commit.assert_not_called()
+
+    def test_window_maps_sender_roles(self, mock_db):
+        with patch.object(gemini_service, "get_conversation_summary", return_value=None), \
+             patch.object(gemini_service, "get_unsummarized_messages", return_value=make_messages(3)) as unsummarized:
+            window = gemini_service.get_conversation_window(mock_db, 7)
+
+        assert [turn["role"] for turn in window] == ["user", "model", "user"]
+        assert unsummarized.call_args.kwargs["limit"] == gemini_service.MAX_HISTORY_MESSAGES
@@ -0,0 +1,113 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, exc, text
+from sqlalchemy.orm import sessionmaker
+from unittest.mock import MagicMock
+
+from app.main import app
+from app.models import LoginInfo as User
+from app.core import db_pool
+from app.core.security import get_current_active_user
+
+
+@pytest.fixture
+def small_engine():
+    engine = create_engine("sqlite://", poolclass=db_pool.InstrumentedQueuePool, pool_size=1, max_overflow=0, pool_timeout=0.05)
+    db_pool.instrument_engine(engine)
+    yield engine
+    engine.dispose()
+
+@pytest.fixture
+def executed(small_engine):
+    # SQLite has no SET LOCAL, record the statement and run a no-op instead
+    statements = []
+
+    @event.listens_for(small_engine, "before_cursor_execute", retval=True)
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+        if statement.startswith("SET LOCAL"):
+            return "SELECT 1", parameters
+        return statement, parameters
+
+    return statements
+
+@pytest.fixture
+def superuser():
+    user = MagicMock(spec=User)
+    user.issuperuser = True
+    user.isactive = True
+    return user
+
+
+class TestPoolMetrics:
+
+    def test_checkout_wait_and_timeout_counted(self, small_engine):
+        before = db_pool.pool_metrics(small_engine)
+
+        held = small_engine.connect()
+        with pytest.raises(exc.TimeoutError):
+            small_engine.connect()
+        in_use = db_pool.pool_metrics(small_engine)
+        held.close()
+
+        assert in_use["checked_out"] == 1
+        assert in_use["checkout_timeouts"] - before["checkout_timeouts"] == 1
+        assert in_use["checkouts"] - before["checkouts"] == 2
+        assert in_use["checkout_wait_seconds_max"] >= 0.05
+        assert in_use["checkout_wait_histogram"]["le_inf"] == in_use["checkouts"]
+
+    def test_engine_options_from_settings(self):
+        options = db_pool.engine_options()
+
+        assert options["poolclass"] is db_pool.InstrumentedQueuePool
+        assert options["pool_pre_ping"] is True
+        assert options["connect_args"]["options"].startswith("-c statement_timeout=")
+
+
+class TestStatementTimeout:
+
+    def test_set_local_on_every_transaction(self, small_engine, executed):
+        factory = sessionmaker(bind=small_engine)
+        db_pool.instrument_sessions(factory)
+        db = factory()
+        db_pool.set_statement_timeout(db, 1500)
+
+        db.execute(text("SELECT 1"))
+        db.commit()
+        db.execute(text("SELECT 2"))
+        db.close()
+
+        assert executed.count("SET LOCAL statement_timeout = 1500") == 2
+
+    def test_no_timeout_by_default(self, small_engine, executed):
+        factory = sessionmaker(bind=small_engine)
+        db_pool.instrument_sessions(factory)
+        db = factory()
+
+        db.execute(text("SELECT 1"))
+        db.close()
+
+        assert not any(statement.startswith("SET LOCAL") for statement in executed)
+
+
+class TestMetricsEndpoint:
+
+    def test_superuser_sees_pool(self, superuser):
+        app.dependency_overrides[get_current_active_user] = lambda: superuser
+        try:
+            response = TestClient(app).get("/api/v1/metrics/db")
+        finally:
+            app.dependency_overrides = {}
+
+        assert response.status_code == 200
+        assert {"checked_out", "checkout_timeouts", "statement_timeouts", "checkout_wait_histogram"} <= set(response.json())
+
+    def test_forbidden_for_students(self, superuser):
+        superuser.issuperuser = False
+        app.dependency_overrides[get_current_active_user] = lambda: superuser
+        try:
+            response = TestClient(app).get("/api/v1/metrics/db")
+        finally:
+            app.dependency_overrides = {}
+
+        assert response.status_code == 403
@@ -0,0 +1,50 @@
+from fastapi.testclient import TestClient
+from unittest.mock import patch
+
+from app.main import app
+from app.core import health
+from app.core.config import settings
+
+client = TestClient(app)
+
+DB_OK = {"ok": True, "latency_ms": 1.0}
+DB_DOWN = {"ok": False, "error": "connection refused"}
+MODEL_OK = {"ok": True, "best_model": "Gradient Boosting"}
+MODEL_MISSING = {"ok": False, "best_model": None}
+
+
+class TestHealth:
+
+    def test_live(self):
+        response = client.get("/health/live")
+
+        assert response.status_code == 200
+        assert response.json() == {"status": "ok"}
+
+    def test_ready(self):
+        with patch.object(health, "check_database", return_value=DB_OK), \
+             patch.object(health, "check_model", return_value=MODEL_OK):
+            response = client.get("/health/ready")
+
+        assert response.status_code == 200
+        assert response.json()["checks"]["model"]["best_model"] == "Gradient Boosting"
+
+    def test_not_ready_without_database(self):
+        with patch.object(health, "check_database", return_value=DB_DOWN), \
+             patch.object(health, "check_model", return_value=MODEL_OK):
+            response = client.get("/health/ready")
+
+        assert response.status_code == 503
+        assert response.json()["status"] == "unavailable"
+
+    def test_model_requirement_is_configurable(self):
+        with patch.object(health, "check_database", return_value=DB_OK), \
+             patch.object(health, "check_model", return_value=MODEL_MISSING):
+            assert client.get("/health/ready").status_code == 503
+
+            with patch.object(settings, "READINESS_REQUIRES_MODEL", False):
+                assert client.get("/health/ready").status_code == 200
+
+    def test_database_check_reports_errors(self):
+        with patch.object(health.engine, "connect", side_effect=OSError("connection refused\ndetails")):
+            assert health.check_database() == {"ok": False, "error": "connection refused"}
@@ -0,0 +1,84 @@
+import pytest
+from unittest.mock import patch
+
+from app.scripts import ingest_orchestrator
+
+
+@pytest.fixture
+def checkpoints():
+    saved = []
+    with patch.object(ingest_orchestrator, "file_hash", return_value="new"), \
+         patch.object(ingest_orchestrator, "save_checkpoint", side_effect=lambda *args, **kwargs: saved.append((args, kwargs))):
+        yield saved
+
+
+def checkpoint(filehash, status="complete", documentid=7):
+    return {"filehash": filehash, "lastrow": 0, "chunkindex": 12, "documentid": documentid, "status": status}
+
+
+class TestDocumentCheckpoints:
+
+    def test_unchanged_file_is_skipped(self, checkpoints):
+        with patch.object(ingest_orchestrator, "get_checkpoint", return_value=checkpoint("new")), \
+             patch("app.services.rag_service.ingest_document") as ingest:
+            assert ingest_orchestrator.ingest_document_file("notes.pdf", text="x") == "skipped"
+
+        ingest.assert_not_called()
+
+    def test_changed_file_is_diffed_into_its_document(self, checkpoints):
+        with patch.object(ingest_orchestrator, "get_checkpoint", return_value=checkpoint("old")), \
+             patch("app.services.rag_service.reingest_document", return_value=7) as reingest, \
+             patch("app.services.rag_service.ingest_document") as ingest:
+            assert ingest_orchestrator.ingest_document_file("notes.pdf", text="x") == "complete"
+
+        reingest.assert_called_once_with("notes.pdf", 7, text="x")
+        ingest.assert_not_called()
+        assert checkpoints[-1] == (("notes.pdf", "", "new", "complete"), {"documentid": 7})
+
+    def test_failed_diff_keeps_the_old_hash(self, checkpoints):
+        with patch.object(ingest_orchestrator, "get_checkpoint", return_value=checkpoint("old")), \
+             patch("app.services.rag_service.reingest_document", side_effect=RuntimeError("embed quota")), \
+             patch("app.services.rag_service.ingest_document") as ingest:
+            assert ingest_orchestrator.ingest_document_file("notes.pdf", text="x") == "failed"
+
+        ingest.assert_not_called()
+        assert checkpoints[-1] == (("notes.pdf", "", "old", "failed"), {})
+
+    def test_deleted_document_is_ingested_again(self, checkpoints):
+        with patch.object(ingest_orchestrator, "get_checkpoint", return_value=checkpoint("old")), \
+             patch("app.services.rag_service.reingest_document", return_value=None), \
+             patch("app.services.rag_service.ingest_document", return_value=9) as ingest:
+            assert ingest_orchestrator.ingest_document_file("notes.pdf", text="x") == "complete"
+
+        assert ingest.call_args.kwargs["document_id"] is None
+        assert ingest.call_args.kwargs["start_chunk"] == 0
+
+    def test_interrupted_ingest_of_same_file_resumes(self, checkpoints):
+        with patch.object(ingest_orchestrator, "get_checkpoint", return_value=checkpoint("new", status="running")), \
+             patch("app.services.rag_service.reingest_document") as reingest, \
+             patch("app.services.rag_service.ingest_document", return_value=7) as ingest:
+            assert ingest_orchestrator.ingest_document_file("notes.pdf", text="x") == "complete"
+
+        reingest.assert_not_called()
+        assert (ingest.call_args.kwargs["document_id"], ingest.call_args.kwargs["start_chunk"]) == (7, 12)
+
+
+class TestRunStep:
+
+    def test_failed_ingest_function_fails_the_step(self, checkpoints, capsys):
+        with patch.object(ingest_orchestrator, "get_checkpoint", return_value=None):
+            status = ingest_orchestrator.run_step("ids.xlsx", "Full ID List/exam", "new", lambda: ingest_orchestrator._report_rows(None))
+
+        assert status == "failed"
+        assert checkpoints[-1][0] == ("ids.xlsx", "Full ID List/exam", "new", "failed")
+        # A real failure is not reported as an error raised while counting rows
+        assert "failed:" not in capsys.readouterr().out
+
+    def test_report_rows_sums_attempted(self):
+        from app.scripts.ingest_utils import IngestReport
+
+        reports = [IngestReport("a"), IngestReport("b")]
+        reports[0].attempted, reports[1].attempted = 3, 4
+
+        assert ingest_orchestrator._report_rows(reports) == 7
+        assert ingest_orchestrator._report_rows([reports[0], None]) is None
@@ -0,0 +1,116 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from unittest.mock import patch, MagicMock
+
+from app.main import app
+from app.core import metrics
+from app.core.config import settings
+from app.core.database import get_db
+from app.services import gemini_service
+
+
+@pytest.fixture
+def test_client():
+    client = TestClient(app)
+    yield client
+    app.dependency_overrides = {}
+
+
+class TestPrometheusFormat:
+
+    def test_histogram_is_cumulative(self):
+        histogram = metrics.Histogram("test_latency_seconds", "Test", ("route",), buckets=(0.1, 1.0))
+        histogram.observe(0.05, route="/a")
+        histogram.observe(0.5, route="/a")
+        histogram.observe(5, route="/a")
+
+        lines = histogram.render()
+
+        assert 'test_latency_seconds_bucket{route="/a",le="0.1"} 1' in lines
+        assert 'test_latency_seconds_bucket{route="/a",le="1.0"} 2' in lines
+        assert 'test_latency_seconds_bucket{route="/a",le="+Inf"} 3' in lines
+        assert 'test_latency_seconds_count{route="/a"} 3' in lines
+
+    def test_label_values_escaped(self):
+        counter = metrics.Counter("test_escaped_total", "Test", ("route",))
+        counter.inc(route='say "hi"')
+
+        assert 'test_escaped_total{route="say \\"hi\\""} 1' in counter.render()
+
+
+class TestMiddleware:
+
+    def test_requests_labelled_by_route_template(self, test_client):
+        mock_db = MagicMock()
+        mock_db.query.return_value.filter.return_value.first.return_value = None
+        app.dependency_overrides[get_db] = lambda: mock_db
+        route = "/api/v1/gemini/chat/{conversation_id}/history"
+        before = metrics.http_requests_total.value(method="GET", route=route, status=404)
+
+        test_client.get("/api/v1/gemini/chat/41/history")
+        test_client.get("/api/v1/gemini/chat/42/history")
+
+        assert metrics.http_requests_total.value(method="GET", route=route, status=404) - before == 2
+        assert metrics.http_request_duration_seconds.snapshot(method="GET", route=route)["count"] >= 2
+
+    def test_metrics_endpoint(self, test_client):
+        response = test_client.get("/metrics")
+
+        assert response.status_code == 200
+        assert "# TYPE http_request_duration_seconds histogram" in response.text
+        assert "db_pool_connections" in response.text
+
+    def test_metrics_token(self, test_client):
+        with patch.object(settings, "METRICS_TOKEN", "scrape-secret"):
+            assert test_client.get("/metrics").status_code == 401
+            assert test_client.get("/metrics", headers={"Authorization": "Bearer scrape-secret"}).status_code == 200
+
+
+class TestQueryHooks:
+
+    def test_queries_counted_per_request(self):
+        engine = create_engine("sqlite://")
+        metrics.instrument_queries(engine)
+        stats = {"queries": 0, "query_seconds": 0.0}
+        token = metrics._request_stats.set(stats)
+        try:
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+                conn.execute(text("SELECT 2"))
+        finally:
+            metrics._request_stats.reset(token)
+
+        assert stats["queries"] == 2
+        assert stats["query_seconds"] > 0
+
+
+class TestLlmTimer:
+
+    def test_tokens_and_outcome_recorded(self):
+        response = MagicMock()
+        response.candidates[0].content.parts[0].text = "Answer"
+        response.usage_metadata.prompt_token_count = 300
+        response.usage_metadata.candidates_token_count = 40
+        response.usage_metadata.total_token_count = 340
+        labels = {"operation": "chat", "model": "test-model"}
+        before = metrics.llm_tokens_total.value(direction="input", **labels)
+
+        with patch("google.generativeai.GenerativeModel") as model, \
+             patch("google.generativeai.configure"):
+            model.return_value.generate_content.return_value = response
+            gemini_service.chat_model([{"role": "user", "content": "Hi"}], model="test-model", use_chat_context=False, use_rag_doucments=False)
+
+        assert metrics.llm_tokens_total.value(direction="input", **labels) - before == 300
+        assert metrics.llm_requests_total.value(outcome="success", **labels) >= 1
+
+    def test_error_counted(self):
+        labels = {"operation": "chat", "model": "failing-model"}
+
+        with patch("google.generativeai.GenerativeModel") as model, \
+             patch("google.generativeai.configure"):
+            model.return_value.generate_content.side_effect = RuntimeError("quota")
+            with pytest.raises(RuntimeError):
+                gemini_service.chat_model([{"role": "user", "content": "Hi"}], model="failing-model", use_chat_context=False, use_rag_doucments=False)
+
+        assert metrics.llm_requests_total.value(outcome="error", **labels) == 1
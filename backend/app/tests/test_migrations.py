@@ -0,0 +1,254 @@
+import io
+import importlib
+import re
+import pytest
+
+from alembic import command
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from alembic.script import ScriptDirectory
+from sqlalchemy import Column, Integer, MetaData, Table, UniqueConstraint, create_engine, insert, select
+from sqlalchemy.pool import StaticPool
+
+from app.core.base import Base
+from app.core.migrations import BackfillProgress, alembic_config, backfill, backfill_rows, dedupe
+from app.scripts.benchmarks.explain import seq_scans
+import app.models  # noqa: F401
+
+# Columns the endpoints filter or join on per request, each needs an index that starts with them
+HOT_LOOKUPS = [
+    ("logininfo", ["username"]),
+    ("student", ["logininfoid"]),
+    ("faculty", ["logininfoid"]),
+    ("facultyaccess", ["facultyid", "rosteryear"]),
+    ("examresults", ["studentid", "examid"]),
+    ("examresults", ["examid"]),
+    ("studentquestionperformance", ["examresultsid"]),
+    ("studentgrade", ["studentid"]),
+    ("gradeclassification", ["classofferingid"]),
+    ("classdomain", ["classid"]),
+    ("classdomain", ["domaindid"]),
+    ("chatmessage", ["conversationid"]),
+    ("generated_questions", ["student_id", "domain"]),
+    ("calendar_events", ["student_id", "start_time"]),
+]
+
+
+def leading_columns(table):
+    """Column lists of every index, unique constraint and primary key on the table."""
+    candidates = [[column.name for column in index.columns] for index in table.indexes]
+    candidates += [[column.name for column in constraint.columns] for constraint in table.constraints if constraint.columns]
+    candidates += [[column.name] for column in table.columns if column.unique or column.index]
+    return candidates
+
+
+def test_hot_lookup_columns_lead_an_index():
+    missing = []
+    for table_name, columns in HOT_LOOKUPS:
+        table = Base.metadata.tables[table_name]
+        if not any(candidate[:len(columns)] == columns for candidate in leading_columns(table)):
+            missing.append(f"{table_name}({', '.join(columns)})")
+
+    assert missing == []
+
+
+def test_migrations_have_a_single_head_covering_the_model_indexes():
+    script = ScriptDirectory.from_config(alembic_config())
+    indexes_migration = importlib.import_module("migrations.versions.0011_hot_lookup_indexes")
+    model_indexes = {index.name for table in Base.metadata.tables.values() for index in table.indexes}
+
+    assert script.get_heads() == ["0012"]
+    assert {name for name, _, _ in indexes_migration.INDEXES} <= model_indexes
+
+
+def upgrade_sql():
+    config = alembic_config()
+    config.output_buffer = io.StringIO()
+    command.upgrade(config, "head", sql=True)
+    return config.output_buffer.getvalue()
+
+
+def test_upgrade_renders_offline():
+    sql = upgrade_sql()
+
+    assert "CREATE EXTENSION IF NOT EXISTS vector" in sql
+    # Concurrent builds run outside a transaction block
+    assert "COMMIT;\n\nCREATE INDEX CONCURRENTLY IF NOT EXISTS ix_student_logininfoid ON student (logininfoid);" in sql
+    # Columns added after the baseline are their own revisions, safe to rerun on a schema that has them
+    assert "ALTER TABLE documentchunk ADD COLUMN IF NOT EXISTS ownerscope VARCHAR(10) DEFAULT 'global' NOT NULL;" in sql
+    assert "ALTER TABLE document ADD CONSTRAINT document_s3_key_key UNIQUE USING INDEX document_s3_key_key;" in sql
+    assert "UPDATE alembic_version SET version_num='0012'" in sql
+
+
+def test_revisions_build_every_model_column_index_and_unique_key():
+    # A database stamped at the baseline only gets what the later revisions add, so each model change needs one
+    sql = upgrade_sql()
+    missing = []
+    for table in Base.metadata.sorted_tables:
+        created = re.search(rf'CREATE TABLE (?:IF NOT EXISTS )?{table.name} \((.*?)\n\);', sql, re.S)
+        body = created.group(1) if created else ""
+        for column in table.columns:
+            name = rf'"?{column.name}"?'
+            if not re.search(rf'\n    {name} ', body) and not re.search(rf'ALTER TABLE {table.name} ADD COLUMN IF NOT EXISTS {name} ', sql):
+                missing.append(f"{table.name}.{column.name}")
+        for index in table.indexes:
+            if not re.search(rf'INDEX (?:CONCURRENTLY )?(?:IF NOT EXISTS )?{index.name} ON {table.name} ', sql):
+                missing.append(index.name)
+        for constraint in table.constraints:
+            if isinstance(constraint, UniqueConstraint):
+                # Unnamed column level unique keys get Postgres' default name
+                name = constraint.name or f"{table.name}_{'_'.join(column.name for column in constraint.columns)}_key"
+                if f"CONSTRAINT {name} UNIQUE" not in sql and f"ADD CONSTRAINT {name} UNIQUE USING INDEX {name}" not in sql:
+                    missing.append(name)
+
+    assert missing == []
+
+
+def test_seq_scans_walks_nested_plans():
+    plan = {"Plan": {
+        "Node Type": "Hash Join",
+        "Plans": [
+            {"Node Type": "Seq Scan", "Relation Name": "examresults", "Actual Rows": 5, "Actual Loops": 1,
+             "Rows Removed by Filter": 49995, "Filter": "(studentid = 7)", "Shared Hit Blocks": 300},
+            {"Node Type": "Hash", "Plans": [
+                {"Node Type": "Seq Scan", "Relation Name": "exam", "Actual Rows": 12, "Actual Loops": 1},
+            ]},
+        ],
+    }}
+
+    scans = seq_scans(plan, min_rows=1000)
+
+    assert scans == [{
+        "relation": "examresults", "rows_read": 50000, "rows_removed": 49995, "loops": 1,
+        "filter": "(studentid = 7)", "shared_blocks": 300,
+    }]
+    assert [scan["relation"] for scan in seq_scans(plan)] == ["examresults", "exam"]
+
+
+@pytest.fixture
+def numbers():
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    table = Table("numbers", MetaData(), Column("id", Integer, primary_key=True), Column("value", Integer), Column("doubled", Integer))
+    table.create(engine)
+    with engine.begin() as connection:
+        connection.execute(insert(table), [{"id": i, "value": i, "doubled": 0 if i == 4 else None} for i in range(1, 11)])
+    return engine, table
+
+
+def doubled(engine, table):
+    with engine.connect() as connection:
+        return [row.doubled for row in connection.execute(select(table).order_by(table.c.id))]
+
+
+class TestBackfill:
+
+    def test_key_ranges_in_batches(self, numbers):
+        engine, table = numbers
+        pauses = []
+
+        summary = backfill("numbers", "id", "UPDATE numbers SET doubled = value * 2 WHERE id > :low AND id <= :high AND doubled IS NULL",
+                           bind=engine, batch_size=4, pause_seconds=0.5, sleep=pauses.append)
+
+        assert doubled(engine, table) == [2, 4, 6, 0, 10, 12, 14, 16, 18, 20]
+        assert (summary["done"], summary["total"], summary["updated"], summary["batches"]) == (10, 10, 9, 3)
+        assert pauses == [0.5, 0.5, 0.5]
+
+    def test_rate_cap_stretches_the_pause(self, numbers):
+        engine, _ = numbers
+        pauses = []
+
+        backfill("numbers", "id", "UPDATE numbers SET doubled = value WHERE id > :low AND id <= :high",
+                 bind=engine, batch_size=5, pause_seconds=0.0, max_rows_per_second=2, sleep=pauses.append)
+
+        # 5 rows at 2 rows/s is 2.5s per batch, minus the little the UPDATE took
+        assert len(pauses) == 2 and all(2.4 < pause <= 2.5 for pause in pauses)
+
+    def test_update_must_be_range_bound(self, numbers):
+        engine, _ = numbers
+
+        with pytest.raises(ValueError):
+            backfill("numbers", "id", "UPDATE numbers SET doubled = value", bind=engine)
+
+    def test_empty_table(self, numbers):
+        engine, _ = numbers
+        with engine.begin() as connection:
+            connection.exec_driver_sql("DELETE FROM numbers")
+
+        summary = backfill("numbers", "id", "UPDATE numbers SET doubled = 1 WHERE id > :low AND id <= :high", bind=engine)
+
+        assert (summary["done"], summary["batches"]) == (0, 0)
+
+    def test_rows_computed_in_python(self, numbers):
+        engine, table = numbers
+        batches = []
+
+        def compute(rows):
+            batches.append([row.id for row in rows])
+            return [{"id": row.id, "doubled": row.value * 2} for row in rows if row.id != 7]
+
+        summary = backfill_rows(table, ["value"], compute, where=table.c.doubled.is_(None), bind=engine,
+                                batch_size=4, pause_seconds=0.0, sleep=lambda seconds: None)
+
+        assert batches == [[1, 2, 3, 5], [6, 7, 8, 9], [10]]
+        assert doubled(engine, table) == [2, 4, 6, 0, 10, 12, None, 16, 18, 20]
+        assert (summary["total"], summary["done"], summary["updated"]) == (9, 9, 8)
+
+
+@pytest.fixture
+def duplicates():
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    with engine.begin() as connection:
+        connection.exec_driver_sql("CREATE TABLE domain (domainid INTEGER PRIMARY KEY, domainname TEXT)")
+        connection.exec_driver_sql("CREATE TABLE classdomain (classdomainid INTEGER PRIMARY KEY, domaindid INTEGER)")
+        connection.exec_driver_sql("INSERT INTO domain VALUES (1, 'Cardio'), (2, 'Renal'), (3, 'Cardio'), (4, NULL), (5, NULL), (6, 'Renal'), (7, 'Cardio')")
+        connection.exec_driver_sql("INSERT INTO classdomain VALUES (1, 3), (2, 6), (3, 7), (4, 2), (5, 4)")
+    return engine
+
+
+def run_in_revision(engine, operation):
+    with engine.connect() as connection:
+        # Transaction per revision, as env.py runs them
+        context = MigrationContext.configure(connection, opts={"transaction_per_migration": True})
+        with Operations.context(context), context.begin_transaction(_per_migration=True):
+            operation()
+
+
+def rows(engine, sql):
+    with engine.connect() as connection:
+        return [tuple(row) for row in connection.exec_driver_sql(sql)]
+
+
+class TestDedupe:
+
+    def test_keeps_first_row_and_repoints_references(self, duplicates):
+        run_in_revision(duplicates, lambda: dedupe(
+            "domain", "domainid", ["domainname"], repoint=[("classdomain", "domaindid")], batch_size=2, pause_seconds=0.0
+        ))
+
+        # Nulls never collide under a unique constraint, they stay
+        assert rows(duplicates, "SELECT * FROM domain ORDER BY domainid") == [(1, "Cardio"), (2, "Renal"), (4, None), (5, None)]
+        assert rows(duplicates, "SELECT * FROM classdomain ORDER BY classdomainid") == [(1, 1), (2, 2), (3, 1), (4, 2), (5, 4)]
+        # The scratch table of duplicate pairs is gone
+        assert rows(duplicates, "SELECT name FROM sqlite_master WHERE name LIKE 'dedupe_%'") == []
+
+    def test_keeps_last_row_and_cascades(self, duplicates):
+        run_in_revision(duplicates, lambda: dedupe(
+            "domain", "domainid", ["domainname"], cascade=[("classdomain", "domaindid")], keep="last", pause_seconds=0.0
+        ))
+
+        assert rows(duplicates, "SELECT domainid FROM domain ORDER BY domainid") == [(4,), (5,), (6,), (7,)]
+        assert rows(duplicates, "SELECT * FROM classdomain ORDER BY classdomainid") == [(2, 6), (3, 7), (5, 4)]
+
+
+def test_progress_reports_rate_and_eta(capsys):
+    now = [0.0]
+    progress = BackfillProgress("chunks", total=1000, report_seconds=5.0, clock=lambda: now[0])
+
+    now[0] = 2.0
+    progress.advance(100, 100)
+    assert capsys.readouterr().out == ""
+
+    now[0] = 5.0
+    progress.advance(150, 120)
+
+    assert capsys.readouterr().out == "chunks: 250/1000 (25%) updated 220 in 2 batches, 50.0/s, eta 15s\n"
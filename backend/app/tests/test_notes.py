@@ -0,0 +1,210 @@
+import os
+import pytest
+from datetime import datetime, timezone
+import boto3
+from boto3.s3.transfer import TransferConfig
+from fastapi.testclient import TestClient
+from moto import mock_aws
+from sqlalchemy.orm import Session
+from unittest.mock import patch, MagicMock
+
+from app.main import app
+from app.models import LoginInfo as User
+from app.core.database import get_db
+from app.core.security import get_current_user
+from app.services import s3_service
+from app.api.v1.endpoints import notes
+from app.core.pagination import encode_cursor, decode_cursor
+
+#Fixtures to set-up a local S3 (moto) and a logged in student
+@pytest.fixture
+def mock_s3():
+    with mock_aws():
+        client = boto3.client("s3", region_name="us-east-2")
+        client.create_bucket(
+            Bucket=s3_service.BUCKET,
+            CreateBucketConfiguration={"LocationConstraint": "us-east-2"}
+        )
+        with patch.object(s3_service, "s3", client):
+            yield client
+
+@pytest.fixture
+def mock_db():
+    mock = MagicMock(spec=Session)
+    return mock
+
+@pytest.fixture
+def mock_student():
+    user = MagicMock(spec=User)
+    user.username = "amognus"
+    user.logininfoid = 1
+    user.issuperuser = False
+    user.isactive = True
+    return user
+
+@pytest.fixture
+def test_client(mock_student, mock_db):
+    app.dependency_overrides[get_current_user] = lambda: mock_student
+    app.dependency_overrides[get_db] = lambda: mock_db
+
+    client = TestClient(app)
+
+    yield client
+
+    app.dependency_overrides = {}
+
+@pytest.fixture
+def mock_register():
+    doc = MagicMock()
+    doc.documentid = 7
+    doc.status = "pending"
+    with patch.object(notes, "register_document", return_value=doc) as register:
+        yield register
+
+@pytest.fixture
+def captured_jobs():
+    # Stand-in for the ingest job, records what it was given and keeps the temp file for assertions
+    jobs = []
+
+    def fake_ingest(document_id, file_path, filehash):
+        with open(file_path, "rb") as file:
+            jobs.append({"documentid": document_id, "content": file.read(), "filehash": filehash})
+        os.remove(file_path)
+
+    with patch.object(notes, "ingest_uploaded_note", side_effect=fake_ingest):
+        yield jobs
+
+
+class TestNotesUpload:
+
+    def test_upload_streams_to_s3_and_queues_ingest(self, test_client, mock_s3, mock_register, captured_jobs):
+        content = b"cardiac cycle notes\n" * 100
+
+        response = test_client.post(
+            "/api/v1/notes/upload/",
+            files={"file": ("heart.pdf", content, "application/pdf")}
+        )
+
+        assert response.status_code == 201
+        assert response.json() == {"key": "notes/amognus/heart.pdf", "documentid": 7, "status": "pending"}
+
+        stored = mock_s3.get_object(Bucket=s3_service.BUCKET, Key="notes/amognus/heart.pdf")
+        assert stored["Body"].read() == content
+        assert stored["ContentType"] == "application/pdf"
+
+        # The ingest job gets the bytes from the request, not from S3
+        assert len(captured_jobs) == 1
+        assert captured_jobs[0]["documentid"] == 7
+        assert captured_jobs[0]["content"] == content
+        assert mock_register.call_args.kwargs["filesize"] == len(content)
+
+    def test_large_upload_uses_multipart(self, test_client, mock_s3, mock_register, captured_jobs):
+        content = os.urandom(11 * 1024 * 1024)
+        config = TransferConfig(multipart_threshold=5 * 1024 * 1024, multipart_chunksize=5 * 1024 * 1024)
+
+        with patch.object(s3_service, "TRANSFER_CONFIG", config):
+            response = test_client.post(
+                "/api/v1/notes/upload/",
+                files={"file": ("big.docx", content, "application/octet-stream")}
+            )
+
+        assert response.status_code == 201
+        head = mock_s3.head_object(Bucket=s3_service.BUCKET, Key="notes/amognus/big.docx")
+        # Multipart objects get an ETag suffixed with the part count
+        assert head["ETag"].strip('"').endswith("-3")
+        assert head["ContentLength"] == len(content)
+        assert captured_jobs[0]["content"] == content
+
+    def test_upload_without_student(self, test_client, mock_s3, captured_jobs):
+        with patch.object(notes, "register_document", return_value=None):
+            response = test_client.post(
+                "/api/v1/notes/upload/",
+                files={"file": ("heart.pdf", b"notes", "application/pdf")}
+            )
+
+        assert response.status_code == 404
+        assert captured_jobs == []
+
+
+class TestNotesStatus:
+
+    def test_status(self, test_client, mock_db):
+        doc = MagicMock()
+        doc.documentid = 7
+        doc.s3_key = "notes/amognus/heart.pdf"
+        doc.status = "ready"
+        doc.statusmessage = None
+        doc.version = 2
+        doc.filesize = 2048
+        doc.ingeststats = {"chunks": 4, "reused": 3, "embedded": 1, "deleted": 0, "embed_calls_saved": 3}
+        doc.updated_at = None
+        mock_db.query.return_value.join.return_value.filter.return_value.first.return_value = doc
+
+        response = test_client.get("/api/v1/notes/status/7")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["status"] == "ready"
+        assert data["version"] == 2
+        assert data["size_kb"] == 2.0
+        assert data["ingest"]["embed_calls_saved"] == 3
+
+    def test_status_not_found(self, test_client, mock_db):
+        mock_db.query.return_value.join.return_value.filter.return_value.first.return_value = None
+
+        response = test_client.get("/api/v1/notes/status/99")
+
+        assert response.status_code == 404
+
+
+class TestNotesList:
+
+    def make_doc(self, documentid, day):
+        doc = MagicMock()
+        doc.documentid = documentid
+        doc.s3_key = f"notes/amognus/note{documentid}.pdf"
+        doc.title = f"note{documentid}.pdf"
+        doc.filesize = 4096
+        doc.lastmodified = datetime(2025, 4, day, tzinfo=timezone.utc)
+        doc.status = "ready"
+        doc.chunkcount = documentid
+        doc.version = 1
+        return doc
+
+    def test_first_page_returns_cursor(self, test_client, mock_db):
+        docs = [self.make_doc(3, 3), self.make_doc(2, 2), self.make_doc(1, 1)]
+        mock_db.query.return_value.filter.return_value.order_by.return_value.limit.return_value.all.return_value = docs
+
+        response = test_client.get("/api/v1/notes/list/?limit=2")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert [item["documentid"] for item in data["items"]] == [3, 2]
+        assert data["items"][0]["size_kb"] == 4.0
+        assert data["items"][0]["chunks"] == 3
+        assert decode_cursor(data["next_cursor"]) == [docs[1].lastmodified.isoformat(), 2]
+        # One extra row is fetched to know whether another page exists
+        mock_db.query.return_value.filter.return_value.order_by.return_value.limit.assert_called_with(3)
+
+    def test_last_page_has_no_cursor(self, test_client, mock_db):
+        docs = [self.make_doc(1, 1)]
+        mock_db.query.return_value.filter.return_value.filter.return_value.order_by.return_value.limit.return_value.all.return_value = docs
+        cursor = encode_cursor(datetime(2025, 4, 2, tzinfo=timezone.utc), 2)
+
+        response = test_client.get(f"/api/v1/notes/list/?limit=2&cursor={cursor}")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert [item["documentid"] for item in data["items"]] == [1]
+        assert data["next_cursor"] is None
+
+    def test_invalid_cursor(self, test_client, mock_db):
+        response = test_client.get("/api/v1/notes/list/?cursor=not-a-cursor")
+
+        assert response.status_code == 400
+
+    @pytest.mark.parametrize("values", [[], [1], ["x", 1], ["2025-04-02T00:00:00+00:00", "2"]])
+    def test_malformed_cursor_values(self, test_client, mock_db, values):
+        response = test_client.get(f"/api/v1/notes/list/?cursor={encode_cursor(*values)}")
+
+        assert response.status_code == 400
@@ -0,0 +1,67 @@
+import pytest
+from unittest.mock import patch, MagicMock
+
+from app.services import gemini_service, prompt_service
+
+DOCS = [
+    {"title": "Heart", "content": "S1 is closure of the mitral and tricuspid valves. " * 20, "similarity": 0.62},
+    {"title": "Murmurs", "content": "Systolic murmurs occur between S1 and S2. " * 20, "similarity": 0.91},
+    {"title": "Lungs", "content": "Crackles suggest fluid in the alveoli. " * 20, "similarity": 0.55},
+]
+
+@pytest.fixture
+def mock_model():
+    response = MagicMock()
+    response.candidates[0].content.parts[0].text = "Answer"
+    response.usage_metadata.prompt_token_count = 640
+    response.usage_metadata.candidates_token_count = 120
+    response.usage_metadata.total_token_count = 760
+    with patch("google.generativeai.GenerativeModel") as model, \
+         patch("google.generativeai.configure"), \
+         patch.object(gemini_service, "get_recent_chat_context", return_value=[]), \
+         patch("app.services.rag_service.search_documents", return_value=DOCS):
+        model.return_value.generate_content.return_value = response
+        yield model
+
+
+class TestPromptBuilder:
+
+    def test_packs_best_documents_first_within_budget(self):
+        prompt = prompt_service.build_system_instruction([], DOCS, budget_tokens=500)
+
+        assert prompt["estimated_tokens"] <= 500
+        # The strongest match is always included, the weakest is the one left out
+        assert prompt["system_instruction"].index("Murmurs:") < prompt["system_instruction"].index("Heart:")
+        assert "Lungs:" not in prompt["system_instruction"]
+        assert prompt["documents"] + prompt["dropped"] == 3
+
+    def test_empty_context(self):
+        prompt = prompt_service.build_system_instruction([], [], budget_tokens=500)
+
+        assert prompt["system_instruction"] == ""
+        assert prompt["estimated_tokens"] == 0
+
+    def test_sends_context_as_system_instruction_once(self, mock_model):
+        answer, metadata = gemini_service.generate_chat_answer(
+            [{"role": "user", "content": "What causes S1?"}],
+            rag_query="What causes S1?"
+        )
+
+        assert answer == "Answer"
+        assert "Relevant Documents:" in mock_model.call_args.kwargs["system_instruction"]
+        contents = mock_model.return_value.generate_content.call_args.args[0]
+        # The question is the only turn sent, and it is sent exactly once
+        assert contents == [{"role": "user", "parts": [{"text": "What causes S1?"}]}]
+        assert metadata["usage"] == {"prompt_tokens": 640, "output_tokens": 120, "total_tokens": 760}
+
+    def test_usage_is_billed_on_the_response(self):
+        db = MagicMock()
+        db.query.return_value.filter.return_value.first.return_value = None
+        metadata = {"usage": {"prompt_tokens": 640, "output_tokens": 120, "total_tokens": 760}}
+
+        with patch.object(gemini_service, "embed_and_create_context_messages"):
+            message = gemini_service.create_message(db, 1, "Answer", "flash", metadata)
+
+        assert message.tokensinput == 640
+        assert message.tokensoutput == 120
+        assert message.messagecost == gemini_service.calculate_message_cost(640, 120)
@@ -0,0 +1,109 @@
+import io
+import os
+import subprocess
+import sys
+import pytest
+from unittest.mock import patch
+
+from app.services import gemini_service, s3_service
+from app.services.llm_providers import FaultInjector, LocalProvider, ProviderError, set_llm_provider
+
+
+@pytest.fixture
+def local_provider():
+    provider = LocalProvider(FaultInjector())
+    set_llm_provider(provider)
+    yield provider
+    set_llm_provider(None)
+
+
+class TestLocalProvider:
+
+    def test_embeddings_are_deterministic_unit_vectors(self, local_provider):
+        first = gemini_service.embed_text("cardiac output")
+
+        assert first == gemini_service.embed_text("cardiac output")
+        assert first != gemini_service.embed_text("renal clearance")
+        assert len(first) == 768
+        assert abs(sum(value * value for value in first) - 1.0) < 1e-9
+
+    def test_chat_answer_through_gemini_service(self, local_provider):
+        answer = gemini_service.chat_model([{"role": "user", "content": "What is preload?"}], use_chat_context=False, use_rag_doucments=False)
+
+        assert "What is preload?" in answer
+
+    def test_generated_questions_pass_the_parser(self, local_provider):
+        result = gemini_service.generate_questions("Cardiovascular", "Physiology", count=3)
+
+        assert "error" not in result
+        assert len(result["questions"]) == 3
+        assert len({question["text"] for question in result["questions"]}) == 3
+
+    def test_error_rate_fails_calls(self):
+        provider = LocalProvider(FaultInjector(error_rate=1.0))
+
+        with pytest.raises(ProviderError):
+            provider.embed("anything", "models/text-embedding-004")
+
+    def test_seeded_faults_repeat(self):
+        def outcomes(seed):
+            faults = FaultInjector(error_rate=0.5, seed=seed)
+            results = []
+            for _ in range(20):
+                try:
+                    faults("embed")
+                    results.append(True)
+                except ProviderError:
+                    results.append(False)
+            return results
+
+        assert outcomes(7) == outcomes(7)
+        assert 0 < sum(outcomes(7)) < 20
+
+
+class TestLocalStorage:
+
+    def test_round_trip_and_listing(self, tmp_path):
+        storage = s3_service.LocalStorage(root=str(tmp_path), faults=FaultInjector())
+
+        uri = storage.upload_stream(io.BytesIO(b"%PDF-1.4 heart"), "notes/amognus/heart.pdf", "application/pdf")
+        content, content_type = storage.get_object("notes/amognus/heart.pdf")
+
+        assert uri == f"s3://{s3_service.BUCKET}/notes/amognus/heart.pdf"
+        assert content == b"%PDF-1.4 heart"
+        assert content_type == "application/pdf"
+        assert [obj["Key"] for obj in storage.list_objects("notes/")] == ["notes/amognus/heart.pdf"]
+        assert list(storage.list_objects("other/")) == []
+
+    def test_missing_key(self, tmp_path):
+        storage = s3_service.LocalStorage(root=str(tmp_path), faults=FaultInjector())
+
+        with pytest.raises(s3_service.StorageKeyNotFound):
+            storage.get_object("notes/missing.pdf")
+
+    def test_key_cannot_escape_root(self, tmp_path):
+        storage = s3_service.LocalStorage(root=str(tmp_path / "storage"), faults=FaultInjector())
+
+        with pytest.raises(ValueError):
+            storage.upload_stream(io.BytesIO(b"x"), "../../outside.txt")
+
+    def test_module_upload_uses_selected_storage(self, tmp_path):
+        storage = s3_service.LocalStorage(root=str(tmp_path), faults=FaultInjector())
+
+        with patch.object(s3_service, "_storage", storage):
+            s3_service.upload_stream(io.BytesIO(b"notes"), "notes/1/a.txt", "text/plain")
+
+        assert storage.get_object("notes/1/a.txt")[0] == b"notes"
+
+
+def test_services_import_without_credentials():
+    # Keys and the S3 client are only needed on first use, the local providers never ask for them
+    env = {"PATH": "", "POSTGRES_SERVER": "x", "POSTGRES_USER": "x", "POSTGRES_PASSWORD": "x", "POSTGRES_DB": "x",
+           "SECRET_KEY": "x", "NEXTAUTH_URL": "x", "NEXTAUTH_SECRET": "x", "NEXT_PUBLIC_API_BASE_URL": "x", "LLM_PROVIDER": "local", "STORAGE_PROVIDER": "local"}
+    script = "from app.services import gemini_service, s3_service, rag_service; print(len(gemini_service.embed_text('x')))"
+
+    result = subprocess.run([sys.executable, "-c", script], env=env, capture_output=True, text=True,
+                            cwd=os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().endswith("768")
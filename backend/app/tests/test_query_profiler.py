@@ -0,0 +1,131 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app.core.base import Base
+from app.core.database import get_historical_performance
+from app.core.query_profiler import QueryProfilerMiddleware, instrument_profiler, normalize_sql, profile_queries
+from app.models import Exam, ExamResults, Question, Student, StudentQuestionPerformance
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://")
+    instrument_profiler(engine)
+    Base.metadata.create_all(engine, tables=[
+        Student.__table__, Exam.__table__, ExamResults.__table__, Question.__table__, StudentQuestionPerformance.__table__
+    ])
+    yield engine
+    engine.dispose()
+
+@pytest.fixture
+def db(engine):
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+def seed_results(db, results: int, performances: int):
+    db.add(Student(studentid=1, firstname="Ada", lastname="Lovelace"))
+    db.add(Exam(examid=1, examname="Step 1"))
+    for question_id in range(1, performances + 1):
+        db.add(Question(questionid=question_id, examid=1, prompt=f"Question {question_id}", questionDifficulty="medium"))
+    for result_id in range(1, results + 1):
+        db.add(ExamResults(examresultsid=result_id, studentid=1, examid=1, score=200 + result_id, passorfail=True, timestamp=datetime(2025, 1, result_id)))
+        for question_id in range(1, performances + 1):
+            db.add(StudentQuestionPerformance(examresultid=result_id, questionid=question_id, result=question_id % 2 == 0, confidence=3))
+    db.commit()
+
+
+class TestNormalizeSql:
+
+    def test_literals_and_parameters_collapse(self):
+        first = normalize_sql("SELECT * FROM question WHERE questionid = 7 AND prompt = 'a'")
+        second = normalize_sql("SELECT  *\n FROM question WHERE questionid = %(questionid_1)s AND prompt = 'it''s'")
+        assert first == second == "SELECT * FROM question WHERE questionid = ? AND prompt = ?"
+
+    def test_in_lists_of_any_length_match(self):
+        assert normalize_sql("SELECT 1 WHERE id IN (1, 2, 3)") == normalize_sql("SELECT 1 WHERE id IN (?)")
+        assert normalize_sql("SELECT 1 WHERE id IN (__[POSTCOMPILE_id_1])") == "SELECT ? WHERE id IN (?)"
+
+
+class TestQueryProfile:
+
+    def test_repeated_statements_are_grouped(self, db):
+        with profile_queries() as profile:
+            for value in range(4):
+                db.execute(text(f"SELECT {value}"))
+            db.execute(text("SELECT 'x' AS other"))
+
+        assert profile.count == 5
+        repeated = profile.repeated(threshold=3)
+        assert len(repeated) == 1
+        assert repeated[0]["sql"] == "SELECT ?"
+        assert repeated[0]["count"] == 4
+        assert profile.summary()["distinct"] == 2
+
+    def test_statements_outside_a_profile_are_ignored(self, db):
+        db.execute(text("SELECT 1"))
+        with profile_queries() as profile:
+            pass
+        assert profile.count == 0
+
+
+class TestHistoricalPerformanceQueries:
+
+    def test_query_count_does_not_grow_with_rows(self, db, query_budget):
+        seed_results(db, results=5, performances=4)
+
+        with query_budget(2):
+            result = get_historical_performance(db, student_id=1)
+
+        assert len(result) == 5
+        assert result[0]["ExamResults"]["ExamResultsID"] == 5
+        assert result[0]["ExamResults"]["StudentName"] == "Ada Lovelace"
+        assert result[0]["ExamResults"]["ExamName"] == "Step 1"
+        performances = result[0]["Performances"]
+        assert [perf["QuestionID"] for perf in performances] == [1, 2, 3, 4]
+        assert performances[1]["QuestionPrompt"] == "Question 2"
+        assert performances[1]["Result"] is True
+
+    def test_missing_student_and_exam_are_unknown(self, db, query_budget):
+        db.add(ExamResults(examresultsid=1, studentid=99, examid=99, score=180))
+        db.commit()
+
+        with query_budget(2):
+            result = get_historical_performance(db)
+
+        assert result[0]["ExamResults"]["StudentName"] == "Unknown"
+        assert result[0]["ExamResults"]["ExamName"] == "Unknown"
+        assert result[0]["Performances"] == []
+
+    def test_budget_fixture_fails_when_exceeded(self, db, query_budget):
+        with pytest.raises(AssertionError, match="budget is 1"):
+            with query_budget(1):
+                db.execute(text("SELECT 1"))
+                db.execute(text("SELECT 2"))
+
+
+class TestProfilerMiddleware:
+
+    def test_headers_report_the_request_profile(self, engine, capsys):
+        app = FastAPI()
+        app.add_middleware(QueryProfilerMiddleware, repeat_threshold=3)
+
+        @app.get("/loop")
+        def loop():
+            with engine.connect() as conn:
+                for value in range(3):
+                    conn.execute(text(f"SELECT {value}"))
+            return {"ok": True}
+
+        response = TestClient(app).get("/loop")
+
+        assert response.headers["x-query-count"] == "3"
+        assert response.headers["x-query-repeated"] == "1"
+        assert float(response.headers["x-query-time-ms"]) >= 0
+        assert "3x" in capsys.readouterr().out
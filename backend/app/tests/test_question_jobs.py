@@ -0,0 +1,150 @@
+import time
+import asyncio
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+from unittest.mock import patch, MagicMock, AsyncMock
+
+from app.main import app
+from app.models import LoginInfo as User
+from app.core.database import get_db
+from app.core.security import get_current_active_user
+from app.models.class_models import GeneratedQuestion, QuestionGenerationJob
+from app.services import question_job_service
+from app.api.v1.endpoints import practice_questions
+
+SUBDOMAINS = ["Cardiac cycle", "Murmurs", "Heart failure", "Arrhythmias"]
+
+
+def make_job(progress=None):
+    return QuestionGenerationJob(
+        id=3, student_id=9, domain="Cardiology", subdomains=SUBDOMAINS, count=5,
+        status="pending", progress=progress or {}
+    )
+
+
+@pytest.fixture
+def mock_db():
+    return MagicMock(spec=Session)
+
+@pytest.fixture
+def job_db(mock_db):
+    with patch.object(question_job_service, "get_db", side_effect=lambda: iter([mock_db])):
+        yield mock_db
+
+@pytest.fixture
+def mock_student():
+    user = MagicMock(spec=User)
+    user.logininfoid = 1
+    user.issuperuser = False
+    user.isactive = True
+    return user
+
+@pytest.fixture
+def test_client(mock_student, mock_db):
+    app.dependency_overrides[get_current_active_user] = lambda: mock_student
+    app.dependency_overrides[get_db] = lambda: mock_db
+
+    client = TestClient(app)
+
+    yield client
+
+    app.dependency_overrides = {}
+
+
+class TestRunJob:
+
+    def test_subdomains_run_concurrently(self, job_db):
+        job = make_job()
+        job_db.query.return_value.filter.return_value.first.return_value = job
+
+        def slow_subdomain(job_id, student_id, domain, subdomain, count, additional_context, rag):
+            time.sleep(0.3)
+            job.progress = {**job.progress, subdomain: {"status": "completed", "question_ids": [1]}}
+
+        started = time.perf_counter()
+        with patch.object(question_job_service, "generate_for_subdomain", side_effect=slow_subdomain):
+            asyncio.run(question_job_service.run_job(3))
+        elapsed = time.perf_counter() - started
+
+        # Four subdomains in roughly the time of one
+        assert elapsed < 0.3 * 2
+        assert job.status == "completed"
+        assert job.finished_at is not None
+
+    def test_some_subdomains_failed(self, job_db):
+        job = make_job()
+        job_db.query.return_value.filter.return_value.first.return_value = job
+
+        def subdomain(job_id, student_id, domain, subdomain, count, additional_context, rag):
+            job.progress = {**job.progress, subdomain: {"status": "failed" if subdomain == "Murmurs" else "completed"}}
+
+        with patch.object(question_job_service, "generate_for_subdomain", side_effect=subdomain):
+            asyncio.run(question_job_service.run_job(3))
+
+        assert job.status == "partial"
+
+
+class TestGenerateForSubdomain:
+
+    def test_generation_error_marks_subdomain_failed(self, job_db):
+        with patch.object(question_job_service, "_update_progress") as progress, \
+             patch.object(question_job_service.gemini_service, "generate_questions", return_value={"error": "bad JSON", "questions": []}):
+            question_job_service.generate_for_subdomain(3, 9, "Cardiology", "Murmurs", 5, rag=False)
+
+        assert progress.call_args.kwargs == {"status": "failed", "error": "bad JSON"}
+        job_db.close.assert_called_once()
+
+    def test_saves_questions_and_records_ids(self, job_db):
+        saved = [GeneratedQuestion(id=41), GeneratedQuestion(id=42)]
+        with patch.object(question_job_service, "_update_progress") as progress, \
+             patch.object(question_job_service, "save_generated_questions", return_value=saved), \
+             patch.object(question_job_service, "build_rag_context", return_value="Document 1: ...\n") as rag, \
+             patch.object(question_job_service.gemini_service, "generate_questions", return_value={"questions": [{}, {}]}) as generate:
+            question_job_service.generate_for_subdomain(3, 9, "Cardiology", "Murmurs", 5)
+
+        rag.assert_called_once_with("Cardiology", "Murmurs")
+        assert generate.call_args.args[3].startswith("Document 1")
+        assert progress.call_args.kwargs == {"status": "completed", "question_ids": [41, 42]}
+
+
+class TestJobEndpoints:
+
+    def test_submit_queues_job(self, test_client, mock_db):
+        mock_db.query.return_value.filter.return_value.scalar.return_value = 9
+        with patch.object(practice_questions, "create_job", return_value=make_job()) as create, \
+             patch.object(practice_questions, "run_job", new_callable=AsyncMock) as run:
+            response = test_client.post("/api/v1/practice-questions/jobs", json={
+                "domain": "Cardiology",
+                "subdomains": ["Murmurs", "Murmurs ", "Heart failure"],
+                "count": 5
+            })
+
+        assert response.status_code == 202
+        assert create.call_args.args[1:] == (9, "Cardiology", ["Murmurs", "Heart failure"], 5)
+        run.assert_awaited_once_with(3, "", True)
+        assert response.json()["status"] == "pending"
+
+    def test_partial_results(self, test_client, mock_db):
+        job = make_job({
+            "Murmurs": {"status": "completed", "question_ids": [41]},
+            "Cardiac cycle": {"status": "running", "question_ids": []}
+        })
+        question = GeneratedQuestion(id=41, subdomain="Murmurs", question_text="S3 suggests?", difficulty="easy", times_practiced=0, times_correct=0)
+        mock_db.query.return_value.filter.return_value.first.return_value = job
+        mock_db.query.return_value.filter.return_value.all.return_value = [question]
+
+        response = test_client.get("/api/v1/practice-questions/jobs/3")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["completed"] == 1 and data["total"] == 4
+        murmurs = next(item for item in data["subdomains"] if item["subdomain"] == "Murmurs")
+        assert murmurs["questions"][0]["text"] == "S3 suggests?"
+
+    def test_unknown_job(self, test_client, mock_db):
+        mock_db.query.return_value.filter.return_value.first.return_value = None
+
+        response = test_client.get("/api/v1/practice-questions/jobs/99")
+
+        assert response.status_code == 404
@@ -0,0 +1,116 @@
+import json
+import pytest
+from unittest.mock import patch
+
+from app.services import gemini_service, question_parser
+
+
+def make_question(number, correct="B", text=None):
+    return {
+        "id": str(number),
+        "text": text or f"Question {number}?",
+        "options": [{"id": letter, "text": f"Option {letter}", "isCorrect": letter == correct} for letter in "ABCD"],
+        "explanation": "Because.",
+        "difficulty": "medium",
+        "category": "Murmurs"
+    }
+
+
+def batch(*items):
+    return '{"questions": [' + ", ".join(item if isinstance(item, str) else json.dumps(item) for item in items) + "]}"
+
+
+class TestParseQuestions:
+
+    def test_clean_batch(self):
+        parsed = question_parser.parse_questions(batch(make_question(1), make_question(2)))
+
+        assert [q["text"] for q in parsed["questions"]] == ["Question 1?", "Question 2?"]
+        assert parsed["malformed"] == 0 and parsed["invalid"] == 0
+
+    def test_malformed_item_is_skipped(self):
+        broken = '{"id": "2", "text": "Has a "quote" in it", "options": [{"id": "A"}]}'
+        parsed = question_parser.parse_questions(batch(make_question(1), broken, make_question(3)))
+
+        assert [q["id"] for q in parsed["questions"]] == ["1", "3"]
+        assert parsed["malformed"] == 1
+
+    def test_schema_violations_are_rejected(self):
+        two_correct = make_question(2)
+        two_correct["options"][0]["isCorrect"] = True
+        three_options = make_question(3)
+        three_options["options"].pop()
+
+        parsed = question_parser.parse_questions(batch(make_question(1), two_correct, three_options))
+
+        assert len(parsed["questions"]) == 1
+        assert parsed["invalid"] == 2
+
+    def test_truncated_response_keeps_complete_items(self):
+        text = batch(make_question(1), make_question(2))[:-40]
+
+        parsed = question_parser.parse_questions(text)
+
+        assert [q["id"] for q in parsed["questions"]] == ["1"]
+        assert parsed["malformed"] == 1
+
+    def test_code_fence_and_prose(self):
+        text = "Here you go:\n```json\n" + batch(make_question(1)) + "\n```"
+
+        assert len(question_parser.parse_questions(text)["questions"]) == 1
+
+    def test_difficulty_normalized(self):
+        question = make_question(1)
+        question["difficulty"] = "Med"
+
+        assert question_parser.parse_questions(batch(question))["questions"][0]["difficulty"] == "medium"
+
+    def test_no_questions(self):
+        assert question_parser.parse_questions("I can't help with that.")["questions"] == []
+
+
+class TestGenerateQuestions:
+
+    def test_follow_up_requests_only_missing(self):
+        first = batch(make_question(1), '{"id": "2", "text": broken}', make_question(3))
+        second = batch(make_question(1, text="Replacement?"))
+
+        with patch.object(gemini_service, "chat_model", side_effect=[first, second]) as chat:
+            result = gemini_service.generate_questions("Cardiology", "Murmurs", count=3)
+
+        assert [q["text"] for q in result["questions"]] == ["Question 1?", "Question 3?", "Replacement?"]
+        assert [q["id"] for q in result["questions"]] == ["1", "2", "3"]
+        follow_up = chat.call_args_list[1].args[0][0]["content"]
+        assert "Generate exactly 1 multiple-choice" in follow_up
+        assert "- Question 1?" in follow_up
+        assert chat.call_args_list[0].kwargs["response_mime_type"] == "application/json"
+
+    def test_duplicates_from_follow_up_not_accepted(self):
+        first = batch(make_question(1), '{"broken"')
+        second = batch(make_question(1))
+        third = batch(make_question(2))
+
+        with patch.object(gemini_service, "chat_model", side_effect=[first, second, third]):
+            result = gemini_service.generate_questions("Cardiology", "Murmurs", count=2)
+
+        assert [q["text"] for q in result["questions"]] == ["Question 1?", "Question 2?"]
+
+    def test_error_when_nothing_valid(self):
+        with patch.object(gemini_service, "chat_model", return_value="not json"):
+            result = gemini_service.generate_questions("Cardiology", "Murmurs", count=2)
+
+        assert result["questions"] == []
+        assert "error" in result
+
+    def test_salvage_recorded(self):
+        before = question_parser.parser_stats()
+        first = batch(make_question(1), '{"x": }')
+        second = batch(make_question(2))
+
+        with patch.object(gemini_service, "chat_model", side_effect=[first, second]):
+            gemini_service.generate_questions("Cardiology", "Murmurs", count=2)
+
+        after = question_parser.parser_stats()
+        assert after["salvaged_batches"] - before["salvaged_batches"] == 1
+        assert after["full_regenerations_avoided"] - before["full_regenerations_avoided"] == 1
+        assert after["followup_questions"] - before["followup_questions"] == 1
@@ -0,0 +1,155 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+from unittest.mock import patch, MagicMock
+
+from app.main import app
+from app.models import LoginInfo as User
+from app.core.database import get_db
+from app.core.security import get_current_active_user
+from app.core.auth_cache import AuthContext
+
+#Fixtures to set-up enviroment for testing
+@pytest.fixture
+def mock_db():
+    mock = MagicMock(spec=Session)
+    return mock
+
+@pytest.fixture
+def mock_student():
+    user = MagicMock(spec=User)
+    user.username = "amognus"
+    user.logininfoid = 1
+    user.issuperuser = False
+    user.isactive = True
+    return user
+
+@pytest.fixture
+def test_student(mock_student, mock_db):
+    app.dependency_overrides[get_current_active_user] = lambda: mock_student
+    app.dependency_overrides[get_db] = lambda: mock_db
+
+    client = TestClient(app)
+
+    yield client
+
+    app.dependency_overrides = {}
+
+@pytest.fixture
+def test_faculty(mock_db):
+    faculty = AuthContext(logininfoid=2, username="drheart", email=None, bio=None, isactive=True, issuperuser=False, facultyid=5)
+    app.dependency_overrides[get_current_active_user] = lambda: faculty
+    app.dependency_overrides[get_db] = lambda: mock_db
+
+    yield TestClient(app)
+
+    app.dependency_overrides = {}
+
+@pytest.fixture
+def mock_search():
+    with patch("app.api.v1.endpoints.rag.search_documents", return_value=[]) as search:
+        yield search
+
+
+class TestSearchScopes:
+
+    def test_default_scope_is_global(self, test_student, mock_db, mock_search):
+        mock_db.query.return_value.filter.return_value.scalar.return_value = 12
+
+        response = test_student.get("/api/v1/rag/search?query=murmur")
+
+        assert response.status_code == 200
+        assert mock_search.call_args.kwargs["scopes"] == ["global"]
+
+    def test_student_scope_uses_own_student_id(self, test_student, mock_db, mock_search):
+        mock_db.query.return_value.filter.return_value.scalar.return_value = 12
+
+        response = test_student.get("/api/v1/rag/search?query=murmur&scope=student")
+
+        assert response.status_code == 200
+        assert mock_search.call_args.kwargs["scopes"] == ["student"]
+        assert mock_search.call_args.kwargs["student_id"] == 12
+
+    def test_student_scope_without_student(self, test_student, mock_db, mock_search):
+        mock_db.query.return_value.filter.return_value.scalar.return_value = None
+
+        response = test_student.get("/api/v1/rag/search?query=murmur&scope=student")
+
+        assert response.status_code == 404
+        mock_search.assert_not_called()
+
+    def test_unknown_scope(self, test_student, mock_search):
+        response = test_student.get("/api/v1/rag/search?query=murmur&scope=everyone")
+
+        assert response.status_code == 400
+        mock_search.assert_not_called()
+
+    def test_faculty_scope_uses_own_faculty_id(self, test_faculty, mock_search):
+        response = test_faculty.get("/api/v1/rag/search?query=murmur&scope=faculty")
+
+        assert response.status_code == 200
+        assert mock_search.call_args.args[2] == 5
+        assert mock_search.call_args.kwargs["scopes"] == ["global"]
+
+    def test_other_faculty_id_is_forbidden(self, test_faculty, mock_search):
+        response = test_faculty.get("/api/v1/rag/search?query=murmur&faculty_id=6")
+
+        assert response.status_code == 403
+        mock_search.assert_not_called()
+
+    def test_student_cannot_filter_by_faculty(self, test_student, mock_db, mock_search):
+        mock_db.query.return_value.filter.return_value.scalar.return_value = None
+
+        response = test_student.get("/api/v1/rag/search?query=murmur&faculty_id=1")
+
+        assert response.status_code == 403
+        mock_search.assert_not_called()
+
+class TestSyncDocumentChunks:
+    
+    def test_legacy_chunk_with_section_is_reused(self, mock_db):
+        from types import SimpleNamespace
+        from app.services import rag_service
+        
+        # Stored before content hashes were recorded
+        legacy = SimpleNamespace(documentchunkid=7, chunkindex=0, contenthash=None, content="Cardiac output.", sectionpath="Heart")
+        mock_db.query.return_value.filter.return_value.all.return_value = [legacy]
+        chunk = {"content": "Cardiac output.", "sectionpath": "Heart", "tokencount": 4}
+        
+        with patch.object(rag_service, "generate_document_embeddings") as embed, \
+             patch.object(rag_service.answer_cache_service, "invalidate_documents"):
+            stats = rag_service.sync_document_chunks(mock_db, 1, [chunk])
+        
+        embed.assert_not_called()
+        mock_db.add.assert_not_called()
+        assert stats["embedded"] == 0
+
+class TestFacultySearch:
+    
+    def test_non_default_faculty_gets_its_documents(self, mock_db):
+        from sqlalchemy.dialects import postgresql
+        from app.services import rag_service
+        
+        row = (31, "Murmur grading", "Cardiology notes", "Dr Heart", None, 0.82, 9)
+        mock_db.execute.return_value.fetchall.return_value = [row]
+        
+        with patch.object(rag_service, "get_db", return_value=iter([mock_db])):
+            results = rag_service.search_documents("murmur", faculty_id=7, query_embedding=[0.1] * 768)
+        
+        assert [result["documentid"] for result in results] == [9]
+        # The faculty's chunks are selected first and ranked exactly, never filtered out of a global ANN top-k
+        sql = str(mock_db.execute.call_args.args[0].compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+        assert "AS MATERIALIZED" in sql
+        assert "documentchunk.facultyid = 7" in sql
+    
+    def test_new_chunks_carry_the_document_faculty(self, mock_db):
+        from app.services import rag_service
+        
+        mock_db.query.return_value.filter.return_value.all.return_value = []
+        chunk = {"content": "Cardiac output.", "sectionpath": "Heart", "tokencount": 4}
+        
+        with patch.object(rag_service, "generate_document_embeddings", return_value=[[0.1] * 768]), \
+             patch.object(rag_service.answer_cache_service, "invalidate_documents"):
+            rag_service.sync_document_chunks(mock_db, 9, [chunk], faculty_id=7)
+        
+        assert mock_db.add.call_args.args[0].facultyid == 7
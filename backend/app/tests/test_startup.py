@@ -0,0 +1,23 @@
+from app.scripts.benchmarks.startup import cold_import, parse_importtime
+
+
+def test_parse_importtime():
+    stderr = (
+        "import time: self [us] | cumulative | imported package\n"
+        "import time:       120 |        120 |   _io\n"
+        "import time:      2500 |       4000 | app.main\n"
+    )
+
+    rows = parse_importtime(stderr)
+
+    assert rows == [
+        {"module": "_io", "depth": 1, "self_ms": 0.12, "cumulative_ms": 0.12},
+        {"module": "app.main", "depth": 0, "self_ms": 2.5, "cumulative_ms": 4.0},
+    ]
+
+
+def test_app_imports_without_heavy_dependencies():
+    # pandas, sklearn, matplotlib, langchain, Gemini and boto3 load on first use, not at worker start
+    result = cold_import("app.main", importtime=False)
+
+    assert result["heavy_modules"] == [], f"imported eagerly: {result['heavy_modules']}"
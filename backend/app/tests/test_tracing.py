@@ -0,0 +1,130 @@
+import asyncio
+import json
+
+import boto3
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from moto import mock_aws
+from sqlalchemy import create_engine, text
+
+from app.core import tracing
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://")
+    tracing.instrument_tracing(engine)
+    yield engine
+    engine.dispose()
+
+@pytest.fixture
+def s3_client():
+    with mock_aws():
+        client = boto3.client("s3", region_name="us-east-2")
+        tracing.instrument_boto_client(client)
+        client.create_bucket(Bucket="traces", CreateBucketConfiguration={"LocationConstraint": "us-east-2"})
+        yield client
+
+@pytest.fixture
+def exported(monkeypatch):
+    """Spans finished during the test, through a private provider rather than the global one."""
+    pytest.importorskip("opentelemetry.sdk")
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+    from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    monkeypatch.setattr(tracing, "_tracer", provider.get_tracer("test"))
+    return exporter
+
+
+class TestTracingDisabled:
+
+    def test_configure_is_off_by_default(self, monkeypatch):
+        monkeypatch.setattr(tracing.settings, "TRACING_ENABLED", False)
+        assert tracing.configure_tracing() is False
+        assert tracing.tracing_enabled() is False
+
+    def test_helpers_pass_through(self, engine, s3_client):
+        @tracing.traced()
+        def add(a, b):
+            return a + b
+
+        @tracing.traced("custom")
+        async def fail():
+            raise ValueError("boom")
+
+        with tracing.span("outer", attribute="value") as current:
+            assert current is None
+            assert add(1, 2) == 3
+        with pytest.raises(ValueError):
+            asyncio.run(fail())
+
+        with engine.connect() as conn:
+            assert conn.execute(text("SELECT 1")).scalar() == 1
+        s3_client.put_object(Bucket="traces", Key="a.txt", Body=b"a")
+        assert s3_client.get_object(Bucket="traces", Key="a.txt")["Body"].read() == b"a"
+
+    def test_traced_keeps_function_metadata(self):
+        @tracing.traced()
+        def documented():
+            """Docstring."""
+
+        assert documented.__name__ == "documented"
+        assert documented.__doc__ == "Docstring."
+
+
+class TestTracingEnabled:
+
+    def test_service_and_db_spans_nest(self, engine, exported):
+        @tracing.traced()
+        def load():
+            with engine.connect() as conn:
+                return conn.execute(text("SELECT 1")).scalar()
+
+        assert load() == 1
+
+        spans = {span.name: span for span in exported.get_finished_spans()}
+        assert spans["db.query"].parent.span_id == spans["test_tracing.load"].context.span_id
+        assert spans["db.query"].attributes["db.statement"] == "SELECT 1"
+
+    def test_failed_statement_span_is_an_error(self, engine, exported):
+        with engine.connect() as conn:
+            with pytest.raises(Exception):
+                conn.execute(text("SELECT * FROM missing_table"))
+
+        (span,) = exported.get_finished_spans()
+        assert not span.status.is_ok
+
+    def test_s3_calls_are_spans(self, s3_client, exported):
+        s3_client.put_object(Bucket="traces", Key="notes/1.txt", Body=b"a")
+
+        spans = [span for span in exported.get_finished_spans() if span.name == "s3.PutObject"]
+        assert len(spans) == 1
+        assert spans[0].attributes["aws.s3.key"] == "notes/1.txt"
+
+    def test_request_span_named_by_route(self, exported):
+        app = FastAPI()
+        app.add_middleware(tracing.TracingMiddleware)
+
+        @app.get("/items/{item_id}")
+        def item(item_id: int):
+            return {"id": item_id}
+
+        TestClient(app).get("/items/7")
+
+        spans = {span.name: span for span in exported.get_finished_spans()}
+        assert spans["GET /items/{item_id}"].attributes["http.status_code"] == 200
+
+    def test_file_exporter_writes_json_lines(self, tmp_path, exported):
+        with tracing.span("offline"):
+            pass
+
+        path = tmp_path / "traces.jsonl"
+        tracing.JsonLinesSpanExporter(str(path)).export(exported.get_finished_spans())
+
+        lines = path.read_text().splitlines()
+        assert json.loads(lines[0])["name"] == "offline"
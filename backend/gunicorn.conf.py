@@ -0,0 +1,39 @@
+import os
+
+from app.core.config import settings
+
+# Production server: gunicorn -c gunicorn.conf.py app.main:app
+#
+# Rolling restart: `kill -HUP <master>` starts fresh workers and gives the old ones
+# WEB_GRACEFUL_TIMEOUT_SECONDS to finish their requests. With WEB_PRELOAD the master holds the old
+# code, so deploy new code with USR2 (spawns a new master) and then QUIT the old master.
+
+bind = settings.WEB_BIND
+workers = settings.WEB_WORKERS or os.cpu_count() or 1
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = settings.WEB_PRELOAD
+backlog = settings.WEB_BACKLOG
+keepalive = settings.WEB_KEEPALIVE_SECONDS
+timeout = settings.WEB_TIMEOUT_SECONDS
+graceful_timeout = settings.WEB_GRACEFUL_TIMEOUT_SECONDS
+max_requests = settings.WEB_MAX_REQUESTS
+max_requests_jitter = settings.WEB_MAX_REQUESTS_JITTER
+# Heartbeat files on tmpfs, a slow disk under /tmp would make healthy workers look hung
+worker_tmp_dir = "/dev/shm" if os.path.isdir("/dev/shm") else None
+accesslog = "-"
+
+
+def when_ready(server):
+    if not preload_app:
+        return
+    # Read once in the master, forked workers share the pages until they write to them
+    from app.api.v1.endpoints.risk import preload_assets
+
+    server.log.info("Risk model preloaded" if preload_assets() else "Risk model not available, workers will report not ready")
+
+
+def post_fork(server, worker):
+    # Connections opened in the master must not be shared across processes
+    from app.core.database import engine
+
+    engine.dispose(close=False)
@@ -0,0 +1,415 @@
+"""Baseline: the schema create_all_tables built before migrations were introduced
+
+Databases created with create_all_tables are stamped at this revision instead of running it,
+see app.core.migrations.upgrade_database. Every later schema change is a revision of its own.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import pgvector.sqlalchemy
+from sqlalchemy import Text
+from sqlalchemy.dialects import postgresql
+
+
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS vector")
+    op.create_table('class',
+    sa.Column('ClassID', sa.Integer(), nullable=False),
+    sa.Column('ClassName', sa.String(length=255), nullable=False),
+    sa.Column('ClassDescription', sa.String(length=255), nullable=True),
+    sa.Column('Block', sa.Integer(), nullable=True),
+    sa.PrimaryKeyConstraint('ClassID')
+    )
+    op.create_table('classroster',
+    sa.Column('rosteryear', sa.Integer(), nullable=False),
+    sa.Column('initialrosteramount', sa.Integer(), nullable=True),
+    sa.Column('currentenrollment', sa.Integer(), nullable=True),
+    sa.PrimaryKeyConstraint('rosteryear')
+    )
+    op.create_table('contentarea',
+    sa.Column('contentareaid', sa.Integer(), nullable=False),
+    sa.Column('contentname', sa.String(length=255), nullable=False),
+    sa.Column('description', sa.String(length=255), nullable=True),
+    sa.Column('discipline', sa.String(length=40), nullable=True),
+    sa.PrimaryKeyConstraint('contentareaid')
+    )
+    op.create_table('domain',
+    sa.Column('domainid', sa.Integer(), sa.Identity(always=False, start=1, increment=1), nullable=False),
+    sa.Column('domainname', sa.String(length=255), nullable=False),
+    sa.Column('weight', sa.Integer(), nullable=True),
+    sa.PrimaryKeyConstraint('domainid')
+    )
+    op.create_table('exam',
+    sa.Column('examid', sa.Integer(), sa.Identity(always=False, start=1, increment=1), nullable=False),
+    sa.Column('examname', sa.String(length=255), nullable=False),
+    sa.Column('examdescription', sa.String(length=255), nullable=True),
+    sa.Column('passscore', sa.Integer(), nullable=True),
+    sa.Column('examtype', sa.String(length=50), nullable=True),
+    sa.PrimaryKeyConstraint('examid')
+    )
+    op.create_index(op.f('ix_exam_examid'), 'exam', ['examid'], unique=False)
+    op.create_table('logininfo',
+    sa.Column('logininfoid', sa.Integer(), sa.Identity(always=False, start=1, increment=10), nullable=False),
+    sa.Column('username', sa.String(length=255), nullable=False),
+    sa.Column('password', sa.String(length=255), nullable=False),
+    sa.Column('isactive', sa.Boolean(), nullable=True),
+    sa.Column('issuperuser', sa.Boolean(), nullable=True),
+    sa.Column('createdat', sa.Date(), nullable=True),
+    sa.Column('updatedat', sa.Date(), nullable=True),
+    sa.Column('email', sa.String(length=255), nullable=True),
+    sa.Column('bio', sa.String(length=255), nullable=True),
+    sa.PrimaryKeyConstraint('logininfoid')
+    )
+    op.create_table('option',
+    sa.Column('optionid', sa.Integer(), nullable=False),
+    sa.Column('optiondescription', sa.String(length=255), nullable=False),
+    sa.PrimaryKeyConstraint('optionid')
+    )
+    op.create_table('chatconversation',
+    sa.Column('conversationid', sa.Integer(), sa.Identity(always=False, start=1, increment=1), nullable=False),
+    sa.Column('userid', sa.Integer(), nullable=True),
+    sa.Column('title', sa.String(length=255), nullable=True),
+    sa.Column('createdat', sa.DateTime(), nullable=True),
+    sa.Column('updatedat', sa.DateTime(), nullable=True),
+    sa.Column('isactive', sa.Boolean(), nullable=True),
+    sa.Column('totaltokensinput', sa.Integer(), nullable=True),
+    sa.Column('totaltokensoutput', sa.Integer(), nullable=True),
+    sa.Column('totalcost', sa.Numeric(precision=10, scale=6), nullable=True),
+    sa.ForeignKeyConstraint(['userid'], ['logininfo.logininfoid'], ),
+    sa.PrimaryKeyConstraint('conversationid')
+    )
+    op.create_table('classdomain',
+    sa.Column('classdomainid', sa.Integer(), sa.Identity(always=False, start=1, increment=1), nullable=False),
+    sa.Column('classid', sa.Integer(), nullable=True),
+    sa.Column('domaindid', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['classid'], ['class.ClassID'], ),
+    sa.ForeignKeyConstraint(['domaindid'], ['domain.domainid'], ),
+    sa.PrimaryKeyConstraint('classdomainid')
+    )
+    op.create_table('faculty',
+    sa.Column('facultyid', sa.Integer(), nullable=False),
+    sa.Column('logininfoid', sa.Integer(), nullable=True),
+    sa.Column('firstname', sa.String(length=255), nullable=True),
+    sa.Column('lastname', sa.String(length=255), nullable=True),
+    sa.Column('position', sa.String(length=255), nullable=True),
+    sa.ForeignKeyConstraint(['logininfoid'], ['logininfo.logininfoid'], ),
+    sa.PrimaryKeyConstraint('facultyid')
+    )
+    op.create_table('student',
+    sa.Column('studentid', sa.Integer(), nullable=False),
+    sa.Column('logininfoid', sa.Integer(), nullable=True),
+    sa.Column('lastname', sa.String(length=40), nullable=True),
+    sa.Column('firstname', sa.String(length=40), nullable=True),
+    sa.Column('cumgpa', sa.Float(), nullable=True),
+    sa.Column('bcpmgpa', sa.Float(), nullable=True),
+    sa.Column('mmicalc', sa.Float(), nullable=True),
+    sa.ForeignKeyConstraint(['logininfoid'], ['logininfo.logininfoid'], ),
+    sa.PrimaryKeyConstraint('studentid')
+    )
+    op.create_table('calendar_events',
+    sa.Column('event_id', sa.String(length=36), nullable=False),
+    sa.Column('student_id', sa.Integer(), nullable=False),
+    sa.Column('title', sa.String(length=255), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('start_time', sa.DateTime(), nullable=False),
+    sa.Column('end_time', sa.DateTime(), nullable=False),
+    sa.Column('all_day', sa.Boolean(), nullable=True),
+    sa.Column('event_type', sa.String(length=50), nullable=False),
+    sa.Column('recurrence', sa.JSON(), nullable=True),
+    sa.Column('location', sa.String(length=255), nullable=True),
+    sa.Column('color', sa.String(length=50), nullable=True),
+    sa.Column('priority', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['student_id'], ['student.studentid'], ),
+    sa.PrimaryKeyConstraint('event_id')
+    )
+    op.create_table('chatcontext',
+    sa.Column('contextid', sa.Integer(), sa.Identity(always=False, start=1, increment=1), nullable=False),
+    sa.Column('conversationid', sa.Integer(), nullable=True),
+    sa.Column('title', sa.String(length=255), nullable=False),
+    sa.Column('content', sa.Text(), nullable=False),
+    sa.Column('embedding', pgvector.sqlalchemy.vector.VECTOR(dim=768), nullable=True),
+    sa.Column('createdat', sa.DateTime(), nullable=True),
+    sa.Column('updatedat', sa.DateTime(), nullable=True),
+    sa.Column('isactive', sa.Boolean(), nullable=True),
+    sa.Column('importancescore', sa.Float(), nullable=True),
+    sa.Column('createdby', sa.Integer(), nullable=True),
+    sa.Column('metadata', postgresql.JSONB(astext_type=Text()), nullable=True),
+    sa.ForeignKeyConstraint(['conversationid'], ['chatconversation.conversationid'], ),
+    sa.ForeignKeyConstraint(['createdby'], ['logininfo.logininfoid'], ),
+    sa.PrimaryKeyConstraint('contextid')
+    )
+    op.create_table('chatmessage',
+    sa.Column('messageid', sa.Integer(), sa.Identity(always=False, start=1, increment=1), nullable=False),
+    sa.Column('conversationid', sa.Integer(), nullable=True),
+    sa.Column('sendertype', sa.String(length=20), nullable=False),
+    sa.Column('content', sa.Text(), nullable=False),
+    sa.Column('embedding', pgvector.sqlalchemy.vector.VECTOR(dim=768), nullable=True),
+    sa.Column('timestamp', sa.DateTime(), nullable=True),
+    sa.Column('tokensinput', sa.Integer(), nullable=True),
+    sa.Column('tokensoutput', sa.Integer(), nullable=True),
+    sa.Column('messagecost', sa.Numeric(precision=10, scale=6), nullable=True),
+    sa.Column('metadata', postgresql.JSONB(astext_type=Text()), nullable=True),
+    sa.ForeignKeyConstraint(['conversationid'], ['chatconversation.conversationid'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('messageid')
+    )
+    op.create_table('classoffering',
+    sa.Column('classofferingid', sa.Integer(), sa.Identity(always=False, start=1, increment=1), nullable=False),
+    sa.Column('facultyid', sa.Integer(), nullable=True),
+    sa.Column('classid', sa.Integer(), nullable=True),
+    sa.Column('datetaught', sa.Integer(), nullable=True),
+    sa.Column('semester', sa.String(length=40), nullable=True),
+    sa.ForeignKeyConstraint(['classid'], ['class.ClassID'], ),
+    sa.ForeignKeyConstraint(['facultyid'], ['faculty.facultyid'], ),
+    sa.PrimaryKeyConstraint('classofferingid')
+    )
+    op.create_table('clerkship',
+    sa.Column('clerkshipid', sa.Integer(), sa.Identity(always=False, start=1, increment=1), nullable=False),
+    sa.Column('studentid', sa.Integer(), nullable=True),
+    sa.Column('clerkshipname', sa.String(length=255), nullable=False),
+    sa.Column('clerkshipdescription', sa.String(length=255), nullable=True),
+    sa.Column('startdate', sa.Date(), nullable=True),
+    sa.Column('enddate', sa.Date(), nullable=True),
+    sa.Column('company', sa.String(length=255), nullable=True),
+    sa.ForeignKeyConstraint(['studentid'], ['student.studentid'], ),
+    sa.PrimaryKeyConstraint('clerkshipid')
+    )
+    op.create_table('document',
+    sa.Column('documentid', sa.Integer(), sa.Identity(always=False, start=1, increment=1), nullable=False),
+    sa.Column('title', sa.String(length=255), nullable=True),
+    sa.Column('author', sa.String(length=255), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('s3_key', sa.String(length=512), nullable=True),
+    sa.Column('facultyid', sa.Integer(), nullable=True),
+    sa.Column('studentid', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['facultyid'], ['faculty.facultyid'], ),
+    sa.ForeignKeyConstraint(['studentid'], ['student.studentid'], ),
+    sa.PrimaryKeyConstraint('documentid')
+    )
+    op.create_table('extracurriculars',
+    sa.Column('extracurricularid', sa.Integer(), sa.Identity(always=False, start=1, increment=1), nullable=False),
+    sa.Column('studentid', sa.Integer(), nullable=True),
+    sa.Column('activityname', sa.String(length=255), nullable=True),
+    sa.Column('activitydescription', sa.String(length=255), nullable=True),
+    sa.Column('weeklyhourcommitment', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['studentid'], ['student.studentid'], ),
+    sa.PrimaryKeyConstraint('extracurricularid')
+    )
+    op.create_table('facultyaccess',
+    sa.Column('facultyaccessid', sa.Integer(), sa.Identity(always=False, start=1, increment=1), nullable=False),
+    sa.Column('facultyid', sa.Integer(), nullable=True),
+    sa.Column('studentid', sa.Integer(), nullable=True),
+    sa.Column('rosteryear', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['facultyid'], ['faculty.facultyid'], ),
+    sa.ForeignKeyConstraint(['rosteryear'], ['classroster.rosteryear'], ),
+    sa.ForeignKeyConstraint(['studentid'], ['student.studentid'], ),
+    sa.PrimaryKeyConstraint('facultyaccessid')
+    )
+    op.create_table('generated_questions',
+    sa.Column('id', sa.Integer(), sa.Identity(always=False, start=1, increment=1), nullable=False),
+    sa.Column('student_id', sa.Integer(), nullable=False),
+    sa.Column('domain', sa.String(length=255), nullable=False),
+    sa.Column('subdomain', sa.String(length=255), nullable=False),
+    sa.Column('question_text', sa.Text(), nullable=False),
+    sa.Column('options', postgresql.JSONB(astext_type=Text()), nullable=False),
+    sa.Column('correct_option', sa.String(length=50), nullable=False),
+    sa.Column('explanation', sa.Text(), nullable=True),
+    sa.Column('difficulty', sa.String(length=50), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('times_practiced', sa.Integer(), nullable=True),
+    sa.Column('times_correct', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['student_id'], ['student.studentid'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('graduationstatus',
+    sa.Column('graduationstatusid', sa.Integer(), sa.Identity(always=False, start=1, increment=1), nullable=False),
+    sa.Column('studentid', sa.Integer(), nullable=True),
+    sa.Column('rosteryear', sa.Integer(), nullable=True),
+    sa.Column('graduationyear', sa.Integer(), nullable=True),
+    sa.Column('graduated', sa.Boolean(), nullable=True),
+    sa.Column('graduationlength', sa.Integer(), nullable=True),
+    sa.Column('status', sa.String(length=255), nullable=True),
+    sa.ForeignKeyConstraint(['rosteryear'], ['classroster.rosteryear'], ),
+    sa.ForeignKeyConstraint(['studentid'], ['student.studentid'], ),
+    sa.PrimaryKeyConstraint('graduationstatusid')
+    )
+    op.create_table('study_plans',
+    sa.Column('plan_id', sa.String(length=36), nullable=False),
+    sa.Column('student_id', sa.Integer(), nullable=False),
+    sa.Column('title', sa.String(length=255), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('start_date', sa.DateTime(), nullable=False),
+    sa.Column('end_date', sa.DateTime(), nullable=False),
+    sa.Column('exam_date', sa.DateTime(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['student_id'], ['student.studentid'], ),
+    sa.PrimaryKeyConstraint('plan_id')
+    )
+    op.create_table('chatmessagecontext',
+    sa.Column('messagecontextid', sa.Integer(), sa.Identity(always=False, start=1, increment=1), nullable=False),
+    sa.Column('messageid', sa.Integer(), nullable=True),
+    sa.Column('contextid', sa.Integer(), nullable=True),
+    sa.Column('relevancescore', sa.Float(), nullable=True),
+    sa.Column('wasused', sa.Boolean(), nullable=True),
+    sa.ForeignKeyConstraint(['contextid'], ['chatcontext.contextid'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['messageid'], ['chatmessage.messageid'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('messagecontextid')
+    )
+    op.create_table('documentchunk',
+    sa.Column('documentchunkid', sa.Integer(), sa.Identity(always=False, start=1, increment=1), nullable=False),
+    sa.Column('documentid', sa.Integer(), nullable=True),
+    sa.Column('chunkindex', sa.Integer(), nullable=True),
+    sa.Column('content', sa.Text(), nullable=True),
+    sa.Column('embedding', pgvector.sqlalchemy.vector.VECTOR(dim=768), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['documentid'], ['document.documentid'], ),
+    sa.PrimaryKeyConstraint('documentchunkid')
+    )
+    op.create_table('enrollmentrecord',
+    sa.Column('enrollmentrecordid', sa.Integer(), sa.Identity(always=False, start=1, increment=1), nullable=False),
+    sa.Column('studentid', sa.Integer(), nullable=True),
+    sa.Column('classofferingid', sa.Integer(), nullable=True),
+    sa.Column('gradepercentage', sa.Float(), nullable=True),
+    sa.Column('passfailstatus', sa.Boolean(), nullable=True),
+    sa.Column('attendancepercentage', sa.Float(), nullable=True),
+    sa.ForeignKeyConstraint(['classofferingid'], ['classoffering.classofferingid'], ),
+    sa.ForeignKeyConstraint(['studentid'], ['student.studentid'], ),
+    sa.PrimaryKeyConstraint('enrollmentrecordid')
+    )
+    op.create_table('examresults',
+    sa.Column('examresultsid', sa.Integer(), sa.Identity(always=False, start=1, increment=1), nullable=False),
+    sa.Column('studentid', sa.Integer(), nullable=True),
+    sa.Column('examid', sa.Integer(), nullable=True),
+    sa.Column('clerkshipid', sa.Integer(), nullable=True),
+    sa.Column('score', sa.Integer(), nullable=False),
+    sa.Column('passorfail', sa.Boolean(), nullable=True),
+    sa.Column('timestamp', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['clerkshipid'], ['clerkship.clerkshipid'], ),
+    sa.ForeignKeyConstraint(['examid'], ['exam.examid'], ),
+    sa.ForeignKeyConstraint(['studentid'], ['student.studentid'], ),
+    sa.PrimaryKeyConstraint('examresultsid')
+    )
+    op.create_table('gradeclassification',
+    sa.Column('gradeclassificationid', sa.Integer(), sa.Identity(always=False, start=1, increment=1), nullable=False),
+    sa.Column('classofferingid', sa.Integer(), nullable=True),
+    sa.Column('classificationname', sa.String(length=255), nullable=False),
+    sa.Column('unittype', sa.String(length=50), nullable=False),
+    sa.ForeignKeyConstraint(['classofferingid'], ['classoffering.classofferingid'], ),
+    sa.PrimaryKeyConstraint('gradeclassificationid')
+    )
+    op.create_table('study_plan_events',
+    sa.Column('id', sa.Integer(), sa.Identity(always=False, start=1, increment=1), nullable=False),
+    sa.Column('plan_id', sa.String(length=36), nullable=False),
+    sa.Column('event_id', sa.String(length=36), nullable=False),
+    sa.Column('topic_id', sa.String(length=36), nullable=True),
+    sa.Column('topic_name', sa.String(length=255), nullable=True),
+    sa.Column('difficulty', sa.Integer(), nullable=True),
+    sa.Column('importance', sa.Integer(), nullable=True),
+    sa.Column('completed', sa.Boolean(), nullable=True),
+    sa.ForeignKeyConstraint(['event_id'], ['calendar_events.event_id'], ),
+    sa.ForeignKeyConstraint(['plan_id'], ['study_plans.plan_id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('question',
+    sa.Column('questionid', sa.Integer(), sa.Identity(always=False, start=10, increment=1), nullable=False),
+    sa.Column('examid', sa.Integer(), nullable=True),
+    sa.Column('prompt', sa.String(length=255), nullable=False),
+    sa.Column('questiondifficulty', sa.String(length=40), nullable=True),
+    sa.Column('imageurl', sa.String(length=255), nullable=True),
+    sa.Column('imagedependent', sa.Boolean(), nullable=True),
+    sa.Column('imagedescription', sa.String(length=255), nullable=True),
+    sa.Column('gradeclassificationid', sa.Integer(), nullable=True),
+    sa.Column('embedding', pgvector.sqlalchemy.vector.VECTOR(dim=768), nullable=True),
+    sa.ForeignKeyConstraint(['examid'], ['exam.examid'], ),
+    sa.ForeignKeyConstraint(['gradeclassificationid'], ['gradeclassification.gradeclassificationid'], ),
+    sa.PrimaryKeyConstraint('questionid')
+    )
+    op.create_table('studentgrade',
+    sa.Column('studentgradeid', sa.Integer(), sa.Identity(always=False, start=1, increment=1), nullable=False),
+    sa.Column('studentid', sa.Integer(), nullable=True),
+    sa.Column('gradeclassificationid', sa.Integer(), nullable=True),
+    sa.Column('pointsearned', sa.Float(), nullable=True),
+    sa.Column('pointsavailable', sa.Float(), nullable=True),
+    sa.Column('daterecorded', sa.Date(), nullable=True),
+    sa.ForeignKeyConstraint(['gradeclassificationid'], ['gradeclassification.gradeclassificationid'], ),
+    sa.ForeignKeyConstraint(['studentid'], ['student.studentid'], ),
+    sa.PrimaryKeyConstraint('studentgradeid')
+    )
+    op.create_table('questionclassification',
+    sa.Column('questionclassid', sa.Integer(), sa.Identity(always=False, start=1, increment=1), nullable=False),
+    sa.Column('questionid', sa.Integer(), nullable=True),
+    sa.Column('contentareaid', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['contentareaid'], ['contentarea.contentareaid'], ),
+    sa.ForeignKeyConstraint(['questionid'], ['question.questionid'], ),
+    sa.PrimaryKeyConstraint('questionclassid')
+    )
+    op.create_table('questionoptions',
+    sa.Column('questionoptionid', sa.Integer(), sa.Identity(always=False, start=1, increment=1), nullable=False),
+    sa.Column('questionid', sa.Integer(), nullable=True),
+    sa.Column('optionid', sa.Integer(), nullable=True),
+    sa.Column('correctanswer', sa.Boolean(), nullable=True),
+    sa.Column('explanation', sa.String(length=255), nullable=True),
+    sa.ForeignKeyConstraint(['optionid'], ['option.optionid'], ),
+    sa.ForeignKeyConstraint(['questionid'], ['question.questionid'], ),
+    sa.PrimaryKeyConstraint('questionoptionid')
+    )
+    op.create_table('studentquestionperformance',
+    sa.Column('studentquestionperformanceid', sa.Integer(), sa.Identity(always=False, start=1, increment=1), nullable=False),
+    sa.Column('examresultsid', sa.Integer(), nullable=True),
+    sa.Column('questionid', sa.Integer(), nullable=True),
+    sa.Column('result', sa.Boolean(), nullable=False),
+    sa.Column('confidence', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['examresultsid'], ['examresults.examresultsid'], ),
+    sa.ForeignKeyConstraint(['questionid'], ['question.questionid'], ),
+    sa.PrimaryKeyConstraint('studentquestionperformanceid')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('studentquestionperformance')
+    op.drop_table('questionoptions')
+    op.drop_table('questionclassification')
+    op.drop_table('studentgrade')
+    op.drop_table('question')
+    op.drop_table('study_plan_events')
+    op.drop_table('gradeclassification')
+    op.drop_table('examresults')
+    op.drop_table('enrollmentrecord')
+    op.drop_table('documentchunk')
+    op.drop_table('chatmessagecontext')
+    op.drop_table('study_plans')
+    op.drop_table('graduationstatus')
+    op.drop_table('generated_questions')
+    op.drop_table('facultyaccess')
+    op.drop_table('extracurriculars')
+    op.drop_table('document')
+    op.drop_table('clerkship')
+    op.drop_table('classoffering')
+    op.drop_table('chatmessage')
+    op.drop_table('chatcontext')
+    op.drop_table('calendar_events')
+    op.drop_table('student')
+    op.drop_table('faculty')
+    op.drop_table('classdomain')
+    op.drop_table('chatconversation')
+    op.drop_table('option')
+    op.drop_table('logininfo')
+    op.drop_index(op.f('ix_exam_examid'), table_name='exam')
+    op.drop_table('exam')
+    op.drop_table('domain')
+    op.drop_table('contentarea')
+    op.drop_table('classroster')
+    op.drop_table('class')
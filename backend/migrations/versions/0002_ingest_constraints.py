@@ -0,0 +1,63 @@
+"""Ingest checkpoints and the unique keys the idempotent seed inserts conflict on
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.migrations import add_unique_constraint, dedupe, drop_unique_constraint
+
+
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (constraint, table, key, columns, foreign keys pointing at the table). The seed inserts use
+# ON CONFLICT DO NOTHING, so the first row wins: duplicates left by earlier reruns keep their lowest
+# id and references to the others move to it. Parents come first, repointing classdomain at the kept
+# domain can only create classdomain duplicates that its own dedupe then removes.
+CONSTRAINTS = [
+    ("logininfo_username_key", "logininfo", "logininfoid", ["username"],
+     [("student", "logininfoid"), ("faculty", "logininfoid"), ("chatconversation", "userid"), ("chatcontext", "createdby")]),
+    ("domain_domainname_key", "domain", "domainid", ["domainname"], [("classdomain", "domaindid")]),
+    ("exam_examname_key", "exam", "examid", ["examname"], [("question", "examid"), ("examresults", "examid")]),
+    ("uq_classoffering_class_year", "classoffering", "classofferingid", ["classid", "datetaught"],
+     [("enrollmentrecord", "classofferingid"), ("gradeclassification", "classofferingid")]),
+    ("graduationstatus_studentid_key", "graduationstatus", "graduationstatusid", ["studentid"], []),
+    ("uq_classdomain_class_domain", "classdomain", "classdomainid", ["classid", "domaindid"], []),
+    ("uq_studentgrade_student_classification", "studentgrade", "studentgradeid", ["studentid", "gradeclassificationid"], []),
+]
+
+
+def upgrade() -> None:
+    op.create_table('ingestcheckpoint',
+    sa.Column('checkpointid', sa.Integer(), sa.Identity(always=False, start=1, increment=1), nullable=False),
+    sa.Column('source', sa.String(length=512), nullable=False),
+    sa.Column('sheet', sa.String(length=255), nullable=False),
+    sa.Column('filehash', sa.String(length=64), nullable=False),
+    sa.Column('lastrow', sa.Integer(), nullable=True),
+    sa.Column('chunkindex', sa.Integer(), nullable=True),
+    sa.Column('documentid', sa.Integer(), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('updatedat', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['documentid'], ['document.documentid'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('checkpointid'),
+    sa.UniqueConstraint('source', 'sheet', name='uq_ingestcheckpoint_source_sheet'),
+    if_not_exists=True
+    )
+
+    for name, table, key, columns, references in CONSTRAINTS:
+        dedupe(table, key, columns, repoint=references)
+        add_unique_constraint(name, table, columns)
+
+
+def downgrade() -> None:
+    # Removed duplicates are not restored
+    for name, table, _, _, _ in reversed(CONSTRAINTS):
+        drop_unique_constraint(name, table)
+    op.drop_table("ingestcheckpoint", if_exists=True)
@@ -0,0 +1,44 @@
+"""Document versions and content hashes, one document per S3 key
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.migrations import (
+    add_column,
+    add_unique_constraint,
+    create_index_concurrently,
+    dedupe,
+    drop_index_concurrently,
+    drop_unique_constraint,
+)
+
+
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    add_column("document", sa.Column("version", sa.Integer(), server_default="1", nullable=False), if_not_exists=True)
+    add_column("document", sa.Column("contenthash", sa.String(length=64), nullable=True), if_not_exists=True)
+    add_column("documentchunk", sa.Column("contenthash", sa.String(length=64), nullable=True), if_not_exists=True)
+    create_index_concurrently("ix_documentchunk_contenthash", "documentchunk", ["contenthash"])
+
+    # Re-syncing a key used to add another document; the newest one is kept and the older ones go with their chunks
+    dedupe("document", "documentid", ["s3_key"], cascade=[("documentchunk", "documentid")], keep="last")
+    add_unique_constraint("document_s3_key_key", "document", ["s3_key"])
+
+
+def downgrade() -> None:
+    drop_unique_constraint("document_s3_key_key", "document")
+    drop_index_concurrently("ix_documentchunk_contenthash", "documentchunk")
+    op.drop_column("documentchunk", "contenthash")
+    op.drop_column("document", "contenthash")
+    op.drop_column("document", "version")
@@ -0,0 +1,29 @@
+"""Section path and token count on document chunks
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.migrations import add_column
+
+
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing chunks keep null until their document is re-ingested by the structure aware chunker
+    add_column("documentchunk", sa.Column("sectionpath", sa.String(length=1024), nullable=True), if_not_exists=True)
+    add_column("documentchunk", sa.Column("tokencount", sa.Integer(), nullable=True), if_not_exists=True)
+
+
+def downgrade() -> None:
+    op.drop_column("documentchunk", "tokencount")
+    op.drop_column("documentchunk", "sectionpath")
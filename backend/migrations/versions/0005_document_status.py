@@ -0,0 +1,39 @@
+"""Ingest status and file metadata on documents
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from app.core.migrations import add_column
+
+
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = [
+    # Documents already stored were ingested synchronously, so they are ready
+    sa.Column("status", sa.String(length=20), server_default="ready", nullable=False),
+    sa.Column("statusmessage", sa.Text(), nullable=True),
+    sa.Column("ingeststats", postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.Column("filesize", sa.Integer(), nullable=True),
+    sa.Column("contenttype", sa.String(length=255), nullable=True),
+    sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+]
+
+
+def upgrade() -> None:
+    for column in COLUMNS:
+        add_column("document", column, if_not_exists=True)
+
+
+def downgrade() -> None:
+    for column in reversed(COLUMNS):
+        op.drop_column("document", column.name)
@@ -0,0 +1,54 @@
+"""Last modified time and chunk count on documents for the keyset paged notes list
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.migrations import (
+    add_column,
+    create_index_concurrently,
+    drop_index_concurrently,
+    revision_backfill,
+    run_with_lock_timeout,
+)
+
+
+revision: str = "0006"
+down_revision: Union[str, None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Added without the default so the rows still to backfill are the null ones
+    add_column("document", sa.Column("lastmodified", sa.DateTime(timezone=True), nullable=True), if_not_exists=True)
+    add_column("document", sa.Column("chunkcount", sa.Integer(), server_default="0", nullable=False), if_not_exists=True)
+
+    revision_backfill(
+        "document", "documentid",
+        "UPDATE document SET lastmodified = created_at "
+        "WHERE documentid > :low AND documentid <= :high AND lastmodified IS NULL AND created_at IS NOT NULL",
+        label="document.lastmodified"
+    )
+    revision_backfill(
+        "document", "documentid",
+        "UPDATE document SET chunkcount = counts.chunks FROM ("
+        "SELECT documentid, count(*) AS chunks FROM documentchunk "
+        "WHERE documentid > :low AND documentid <= :high GROUP BY documentid"
+        ") counts WHERE document.documentid = counts.documentid AND document.chunkcount = 0",
+        label="document.chunkcount"
+    )
+    run_with_lock_timeout(lambda: op.alter_column("document", "lastmodified", server_default=sa.text("now()")))
+
+    create_index_concurrently("ix_document_student_lastmodified", "document", ["studentid", "lastmodified", "documentid"])
+
+
+def downgrade() -> None:
+    drop_index_concurrently("ix_document_student_lastmodified", "document")
+    op.drop_column("document", "chunkcount")
+    op.drop_column("document", "lastmodified")
@@ -0,0 +1,54 @@
+"""Retrieval scope on document chunks, with an ANN index over the global curriculum only
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.migrations import (
+    add_column,
+    create_index_concurrently,
+    drop_index_concurrently,
+    revision_backfill,
+)
+
+
+revision: str = "0007"
+down_revision: Union[str, None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    add_column("documentchunk", sa.Column("ownerscope", sa.String(length=10), server_default="global", nullable=False), if_not_exists=True)
+    add_column("documentchunk", sa.Column("ownerid", sa.Integer(), nullable=True), if_not_exists=True)
+
+    # Chunks of student uploads become private to that student, everything else stays global
+    revision_backfill(
+        "documentchunk", "documentchunkid",
+        "UPDATE documentchunk SET ownerscope = 'student', ownerid = document.studentid FROM document "
+        "WHERE documentchunk.documentid = document.documentid AND document.studentid IS NOT NULL "
+        "AND documentchunk.documentchunkid > :low AND documentchunk.documentchunkid <= :high "
+        "AND (documentchunk.ownerscope <> 'student' OR documentchunk.ownerid IS DISTINCT FROM document.studentid)",
+        label="documentchunk.ownerscope"
+    )
+
+    create_index_concurrently("ix_documentchunk_owner", "documentchunk", ["ownerscope", "ownerid"])
+    create_index_concurrently(
+        "ix_documentchunk_embedding_global", "documentchunk", ["embedding"],
+        postgresql_using="hnsw",
+        postgresql_with={"m": 16, "ef_construction": 64},
+        postgresql_ops={"embedding": "vector_cosine_ops"},
+        postgresql_where=sa.text("ownerscope = 'global'")
+    )
+
+
+def downgrade() -> None:
+    drop_index_concurrently("ix_documentchunk_embedding_global", "documentchunk")
+    drop_index_concurrently("ix_documentchunk_owner", "documentchunk")
+    op.drop_column("documentchunk", "ownerid")
+    op.drop_column("documentchunk", "ownerscope")
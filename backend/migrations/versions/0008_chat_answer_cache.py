@@ -0,0 +1,49 @@
+"""Semantic answer cache for the chat assistant
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import pgvector.sqlalchemy
+from sqlalchemy.dialects import postgresql
+
+from app.core.migrations import create_index_concurrently
+
+
+revision: str = "0008"
+down_revision: Union[str, None] = "0007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('chatanswercache',
+    sa.Column('cacheid', sa.Integer(), sa.Identity(always=False, start=1, increment=1), nullable=False),
+    sa.Column('question', sa.Text(), nullable=False),
+    sa.Column('answer', sa.Text(), nullable=False),
+    sa.Column('embedding', pgvector.sqlalchemy.vector.VECTOR(dim=768), nullable=False),
+    sa.Column('fingerprint', sa.String(length=64), nullable=False),
+    sa.Column('documentids', postgresql.ARRAY(sa.Integer()), nullable=False),
+    sa.Column('model', sa.String(length=100), nullable=True),
+    sa.Column('hitcount', sa.Integer(), nullable=True),
+    sa.Column('createdat', sa.DateTime(), nullable=True),
+    sa.Column('lasthitat', sa.DateTime(), nullable=True),
+    sa.Column('expiresat', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('cacheid'),
+    if_not_exists=True
+    )
+    create_index_concurrently(
+        "ix_chatanswercache_embedding", "chatanswercache", ["embedding"],
+        postgresql_using="hnsw",
+        postgresql_with={"m": 16, "ef_construction": 64},
+        postgresql_ops={"embedding": "vector_cosine_ops"}
+    )
+    create_index_concurrently("ix_chatanswercache_fingerprint", "chatanswercache", ["fingerprint", "expiresat"])
+
+
+def downgrade() -> None:
+    op.drop_table("chatanswercache", if_exists=True)
@@ -0,0 +1,43 @@
+"""Message count on conversations and the index behind keyset paged chat history
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-19
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.migrations import (
+    add_column,
+    create_index_concurrently,
+    drop_index_concurrently,
+    revision_backfill,
+)
+
+
+revision: str = "0009"
+down_revision: Union[str, None] = "0008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    add_column("chatconversation", sa.Column("messagecount", sa.Integer(), server_default="0", nullable=False), if_not_exists=True)
+
+    revision_backfill(
+        "chatconversation", "conversationid",
+        "UPDATE chatconversation SET messagecount = counts.messages FROM ("
+        "SELECT conversationid, count(*) AS messages FROM chatmessage "
+        "WHERE conversationid > :low AND conversationid <= :high GROUP BY conversationid"
+        ") counts WHERE chatconversation.conversationid = counts.conversationid AND chatconversation.messagecount = 0",
+        label="chatconversation.messagecount"
+    )
+
+    create_index_concurrently("ix_chatmessage_conversation_timestamp", "chatmessage", ["conversationid", "timestamp", "messageid"])
+
+
+def downgrade() -> None:
+    drop_index_concurrently("ix_chatmessage_conversation_timestamp", "chatmessage")
+    op.drop_column("chatconversation", "messagecount")
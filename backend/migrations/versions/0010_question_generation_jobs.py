@@ -0,0 +1,42 @@
+"""Background question generation jobs
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-19
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from app.core.migrations import create_index_concurrently
+
+
+revision: str = "0010"
+down_revision: Union[str, None] = "0009"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('question_generation_jobs',
+    sa.Column('id', sa.Integer(), sa.Identity(always=False, start=1, increment=1), nullable=False),
+    sa.Column('student_id', sa.Integer(), nullable=False),
+    sa.Column('domain', sa.String(length=255), nullable=False),
+    sa.Column('subdomains', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('progress', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['student_id'], ['student.studentid'], ),
+    sa.PrimaryKeyConstraint('id'),
+    if_not_exists=True
+    )
+    create_index_concurrently("ix_question_generation_jobs_student_id", "question_generation_jobs", ["student_id"])
+
+
+def downgrade() -> None:
+    op.drop_table("question_generation_jobs", if_exists=True)
@@ -0,0 +1,40 @@
+"""Indexes for the hot lookup columns found by app.scripts.benchmarks.explain
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-19
+"""
+from typing import Sequence, Union
+
+from app.core.migrations import create_index_concurrently, drop_index_concurrently
+
+
+revision: str = "0011"
+down_revision: Union[str, None] = "0010"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (name, table, columns). Built CONCURRENTLY so the tables stay writable, and IF NOT EXISTS since a
+# database created with create_all_tables after the models gained these indexes already has them.
+INDEXES = [
+    ("ix_student_logininfoid", "student", ["logininfoid"]),
+    ("ix_faculty_logininfoid", "faculty", ["logininfoid"]),
+    ("ix_facultyaccess_faculty_rosteryear", "facultyaccess", ["facultyid", "rosteryear"]),
+    ("ix_examresults_student_exam", "examresults", ["studentid", "examid"]),
+    ("ix_examresults_examid", "examresults", ["examid"]),
+    ("ix_studentquestionperformance_examresultsid", "studentquestionperformance", ["examresultsid"]),
+    ("ix_gradeclassification_classofferingid", "gradeclassification", ["classofferingid"]),
+    ("ix_classdomain_domainid", "classdomain", ["domaindid"]),
+    ("ix_generated_questions_student_domain", "generated_questions", ["student_id", "domain", "subdomain"]),
+    ("ix_calendar_events_student_start", "calendar_events", ["student_id", "start_time"]),
+]
+
+
+def upgrade() -> None:
+    for name, table, columns in INDEXES:
+        create_index_concurrently(name, table, columns)
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        drop_index_concurrently(name, table)
@@ -0,0 +1,43 @@
+"""Faculty of the parent document on document chunks, for exact faculty filtered searches
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-19
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.migrations import (
+    add_column,
+    create_index_concurrently,
+    drop_index_concurrently,
+    revision_backfill,
+)
+
+
+revision: str = "0012"
+down_revision: Union[str, None] = "0011"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    add_column("documentchunk", sa.Column("facultyid", sa.Integer(), nullable=True), if_not_exists=True)
+
+    revision_backfill(
+        "documentchunk", "documentchunkid",
+        "UPDATE documentchunk SET facultyid = document.facultyid FROM document "
+        "WHERE documentchunk.documentid = document.documentid "
+        "AND documentchunk.documentchunkid > :low AND documentchunk.documentchunkid <= :high "
+        "AND documentchunk.facultyid IS DISTINCT FROM document.facultyid",
+        label="documentchunk.facultyid"
+    )
+
+    create_index_concurrently("ix_documentchunk_facultyid", "documentchunk", ["facultyid"])
+
+
+def downgrade() -> None:
+    drop_index_concurrently("ix_documentchunk_facultyid", "documentchunk")
+    op.drop_column("documentchunk", "facultyid")
@@ -33,6 +33,7 @@ export default function ChatPage() {
   const [isLoading, setIsLoading] = useState(false);
   const [showHistory, setShowHistory] = useState(false);
   const [history, setHistory] = useState<ConversationSummary[]>([]);
+  const [olderCursor, setOlderCursor] = useState<string | null>(null);
   const messagesEndRef = useRef<HTMLDivElement>(null);
 
   const apiBase = `${process.env.NEXT_PUBLIC_API_URL}/api/v1/gemini/chat`;
@@ -64,6 +65,7 @@ export default function ChatPage() {
   const startNewChat = async () => {
     setConversationId(null);
     setMessages([]);
+    setOlderCursor(null);
     setChatTitle("New Conversation");
   };
 
@@ -78,10 +80,26 @@ export default function ChatPage() {
     if (res.ok) {
       const conversation = await res.json();
       setMessages(conversation.messages);
+      setOlderCursor(conversation.next_cursor);
       setChatTitle(conversation.title);
     }
   };
 
+  const loadOlderMessages = async () => {
+    if (!conversationId || !olderCursor) return;
+    const res = await fetch(`${apiBase}/${conversationId}/history?cursor=${encodeURIComponent(olderCursor)}`, {
+      method: "GET",
+      headers: {
+        "Authorization": `Bearer ${session?.accessToken}`,
+      },
+    });
+    if (res.ok) {
+      const conversation = await res.json();
+      setMessages(ms => [...conversation.messages, ...ms]);
+      setOlderCursor(conversation.next_cursor);
+    }
+  };
+
   const sendMessage = async (e: FormEvent) => {
     e.preventDefault();
     if (!draft.trim() || !session?.accessToken) return;
@@ -201,6 +219,11 @@ export default function ChatPage() {
                 <CardContent className="flex-1 p-0 flex flex-col">
                   <ScrollArea className="flex-1 px-6 py-4">
                     <div className="flex flex-col space-y-6 pb-4">
+                      {olderCursor && (
+                        <Button variant="outline" className="self-center" onClick={loadOlderMessages}>
+                          Load earlier messages
+                        </Button>
+                      )}
                       {messages.map((m, i) => (
                         <div key={i} className={`flex ${m.sender === "user" ? "justify-end" : "justify-start"}`}>
                           <div className={`max-w-3xl p-4 rounded-lg shadow-lg ${m.sender === "user" ? "bg-blue-600 text-white" : "bg-[#1e293b] border border-gray-700 text-white"}`}>
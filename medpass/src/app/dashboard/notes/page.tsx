@@ -14,9 +14,19 @@ interface UploadedFile {
 }
 
 interface S3File {
+  documentid: number;
   key: string;
-  size_kb: number;
+  size_kb: number | null;
   last_modified: string;
+  status: string;
+  chunks: number;
+}
+
+interface UploadStatus {
+  documentid: number;
+  key: string;
+  status: "pending" | "processing" | "ready" | "failed";
+  message: string | null;
 }
 
 export default function NotesPage() {
@@ -26,6 +36,8 @@ export default function NotesPage() {
   });
   const [files, setFiles] = useState<UploadedFile[]>([]);
   const [uploadedFiles, setUploadedFiles] = useState<S3File[]>([]);
+  const [uploadStatuses, setUploadStatuses] = useState<Record<string, UploadStatus>>({});
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
   const API_BASE = `${process.env.NEXT_PUBLIC_API_BASE_URL}/notes`;
 
   const handleFilesChange = (e: React.ChangeEvent<HTMLInputElement>) => {
@@ -50,14 +62,30 @@ export default function NotesPage() {
     setFiles((prev) => prev.filter((_, i) => i !== index));
   };
 
-  const fetchUploadedFiles = async () => {
+  const fetchUploadedFiles = async (cursor: string | null = null) => {
     if (!session?.accessToken) return;
-    const res = await fetch(`${API_BASE}/list/`, {
+    const query = cursor ? `?cursor=${encodeURIComponent(cursor)}` : "";
+    const res = await fetch(`${API_BASE}/list/${query}`, {
       headers: { Authorization: `Bearer ${session.accessToken}` },
     });
     if (res.ok) {
       const data = await res.json();
-      setUploadedFiles(data);
+      setUploadedFiles((prev) => (cursor ? [...prev, ...data.items] : data.items));
+      setNextCursor(data.next_cursor);
+    }
+  };
+
+  // Notes are processed in the background after upload, poll until they are searchable
+  const pollStatus = async (documentId: number) => {
+    if (!session?.accessToken) return;
+    const res = await fetch(`${API_BASE}/status/${documentId}`, {
+      headers: { Authorization: `Bearer ${session.accessToken}` },
+    });
+    if (!res.ok) return;
+    const data: UploadStatus = await res.json();
+    setUploadStatuses((prev) => ({ ...prev, [data.key]: data }));
+    if (data.status === "pending" || data.status === "processing") {
+      setTimeout(() => pollStatus(documentId), 2000);
     }
   };
 
@@ -71,8 +99,10 @@ export default function NotesPage() {
       body: formData,
     });
     if (res.ok) {
+      const data = await res.json();
       setFiles([]);
       fetchUploadedFiles();
+      pollStatus(data.documentid);
     }
   };
 
@@ -134,12 +164,21 @@ export default function NotesPage() {
                 {uploadedFiles.map((file, idx) => (
                   <div key={idx} className="text-gray-300 border-b border-gray-700 pb-2">
                     <p className="text-white font-medium">{file.key.split("/").pop()}</p>
-                    <p className="text-sm">Size: {file.size_kb} KB</p>
+                    <p className="text-sm">Size: {file.size_kb ?? "-"} KB</p>
+                    <p className="text-sm">
+                      Status: {uploadStatuses[file.key]?.status ?? file.status} ({file.chunks} chunks)
+                      {uploadStatuses[file.key]?.message && ` (${uploadStatuses[file.key].message})`}
+                    </p>
                     <p className="text-sm">
                       Uploaded: {new Date(file.last_modified).toLocaleString()}
                     </p>
                   </div>
                 ))}
+                {nextCursor && (
+                  <Button variant="outline" onClick={() => fetchUploadedFiles(nextCursor)}>
+                    Load more
+                  </Button>
+                )}
               </div>
             </div>
           </CardContent>